@@ -1,7 +1,70 @@
-from .instrumentation import *
+import importlib
 
-# Span filtering
-from monocle_apptrace.exporters import (
-    SpanFilter,
-    FilteredSpanExporter,
-)
\ No newline at end of file
+# The public API is imported on first use, so that the agent hook entry point
+# (`monocle-apptrace <agent>-hook`) starts without loading the instrumentation.
+_EXPORTS = {
+    "setup_monocle_telemetry": "monocle_apptrace.instrumentation.common.instrumentor",
+    "start_trace": "monocle_apptrace.instrumentation.common.instrumentor",
+    "stop_trace": "monocle_apptrace.instrumentation.common.instrumentor",
+    "http_route_handler": "monocle_apptrace.instrumentation.common.instrumentor",
+    "monocle_trace": "monocle_apptrace.instrumentation.common.instrumentor",
+    "amonocle_trace": "monocle_apptrace.instrumentation.common.instrumentor",
+    "monocle_trace_method": "monocle_apptrace.instrumentation.common.instrumentor",
+    "monocle_trace_http_route": "monocle_apptrace.instrumentation.common.instrumentor",
+    "is_valid_trace_id_uuid": "monocle_apptrace.instrumentation.common.instrumentor",
+    "start_scope": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "stop_scope": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "start_scopes": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "monocle_trace_scope": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "amonocle_trace_scope": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "monocle_trace_scope_method": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "MonocleSpanException": "monocle_apptrace.instrumentation.common.utils",
+    "monocle_trace_azure_function_route": "monocle_apptrace.instrumentation.metamodel.azfunc.wrapper",
+    # Span filtering
+    "SpanFilter": "monocle_apptrace.exporters",
+    "FilteredSpanExporter": "monocle_apptrace.exporters",
+}
+
+__all__ = list(_EXPORTS)
+
+# Modules that `from .instrumentation import *` used to make attributes of the package
+_LEGACY_MODULES = {
+    "common": "monocle_apptrace.instrumentation.common",
+    "metamodel": "monocle_apptrace.instrumentation.metamodel",
+    "agent_edit_context": "monocle_apptrace.instrumentation.common.agent_edit_context",
+    "constants": "monocle_apptrace.instrumentation.common.constants",
+    "custom_span_processor": "monocle_apptrace.instrumentation.common.custom_span_processor",
+    "genai_semantic_conventions": "monocle_apptrace.instrumentation.common.genai_semantic_conventions",
+    "instrumentor": "monocle_apptrace.instrumentation.common.instrumentor",
+    "method_wrappers": "monocle_apptrace.instrumentation.common.method_wrappers",
+    "scope_wrapper": "monocle_apptrace.instrumentation.common.scope_wrapper",
+    "span_handler": "monocle_apptrace.instrumentation.common.span_handler",
+    "stream_processor": "monocle_apptrace.instrumentation.common.stream_processor",
+    "trace_return": "monocle_apptrace.instrumentation.common.trace_return",
+    "utils": "monocle_apptrace.instrumentation.common.utils",
+    "wrapper": "monocle_apptrace.instrumentation.common.wrapper",
+    "wrapper_method": "monocle_apptrace.instrumentation.common.wrapper_method",
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY_MODULES:
+        value = importlib.import_module(_LEGACY_MODULES[name])
+        globals()[name] = value
+        return value
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        try:
+            # submodules, e.g. monocle_apptrace.instrumentation after a bare `import monocle_apptrace`
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_LEGACY_MODULES))
@@ -4,7 +4,7 @@ Subcommands:
   claude-setup    register Monocle hooks for Claude Code
   codex-setup     register Monocle hooks for Codex CLI
   copilot-setup   register Monocle hooks for GitHub Copilot (CLI + VS Code Chat)
-  validate        validate a trace file against the metamodel
+  validate        validate trace files against the metamodel
   reset           dev helper — clear local state (REMOVE BEFORE PR)
 
 Hook dispatch (`claude-hook`, `codex-hook`, `copilot-hook`) is invoked as a
@@ -382,35 +382,55 @@ def _enable_codex_hooks_flag(scope_root):
 
 
 def hook_dispatch(agent):
-    if agent == "claude":
-        from monocle_apptrace.instrumentation.metamodel.claude_cli.event_handler import main as run
-    elif agent == "codex":
-        from monocle_apptrace.instrumentation.metamodel.codex_cli.event_handler import main as run
-    elif agent == "copilot":
-        from monocle_apptrace.instrumentation.metamodel.github_copilot.event_handler import main as run
-    else:
+    from monocle_apptrace import hook_daemon
+
+    if agent not in hook_daemon.HOOK_HANDLER_MODULES:
         print("Unknown agent: {}".format(agent), file=sys.stderr)
         return 1
-    run()
+    # With MONOCLE_HOOK_DAEMON=true the event goes to the resident daemon; when
+    # none answers it is handled here as usual.
+    if hook_daemon.daemon_enabled():
+        exit_code = hook_daemon.dispatch(agent)
+        if exit_code is not None:
+            return exit_code
+    hook_daemon.run_handler(agent)
     return 0
 
 
 # =============================================================================
-# validate  (lint a trace file against the metamodel)
+# validate  (lint trace files against the metamodel)
 # =============================================================================
 
 
 def cmd_validate(args):
     try:
-        from monocle_apptrace.linter import MonocleValidator, ValidationReporter
-        validator = MonocleValidator()
-        results = validator.validate_trace_file(Path(args.trace_file))
+        from monocle_apptrace.linter import ValidationReporter, find_trace_files, validate_trace_files
+        entries = args.trace_file if isinstance(args.trace_file, (list, tuple)) else [args.trace_file]
+        paths = find_trace_files(entries)
+        if not paths:
+            print("ERROR: No trace files found in {}".format(", ".join(entries)), file=sys.stderr)
+            return 1
+        output_format = getattr(args, "format", "text")
         reporter = ValidationReporter()
-        print(reporter.format_results(results, args.fail_on_warning))
-        return reporter.get_exit_code(results, args.fail_on_warning)
-    except FileNotFoundError as e:
-        print("ERROR: {}".format(e), file=sys.stderr)
-        return 1
+        exit_code = 0
+        collected = []
+        # results are printed as each file completes, except for the JUnit report
+        for file_result in validate_trace_files(paths, getattr(args, "workers", None)):
+            if file_result.is_failed(args.fail_on_warning):
+                exit_code = 1
+            if output_format == "junit":
+                collected.append(file_result)
+            elif output_format == "json":
+                print(reporter.format_json(file_result, args.fail_on_warning), flush=True)
+            elif len(paths) > 1:
+                print(reporter.format_file_result(file_result, args.fail_on_warning), flush=True)
+            elif file_result.failure is not None:
+                print("ERROR: {}".format(file_result.failure), file=sys.stderr)
+            else:
+                print(reporter.format_results(file_result.result, args.fail_on_warning))
+        if output_format == "junit":
+            print(reporter.format_junit(collected, args.fail_on_warning))
+        return exit_code
     except Exception as e:
         print("ERROR: {}".format(e), file=sys.stderr)
         return 1
@@ -435,11 +455,15 @@ def cmd_token_summary(args):
     else:
         monocle_dir = None
 
+    use_index = not getattr(args, "no_index", False)
+    workers = getattr(args, "workers", None)
     if getattr(args, "by_session", False):
-        rows = summarize_by_session(time_window=args.time_window, monocle_dir=monocle_dir)
+        rows = summarize_by_session(time_window=args.time_window, monocle_dir=monocle_dir,
+                                    use_index=use_index, workers=workers)
         print(format_session_table(rows))
     else:
-        rows = summarize(time_window=args.time_window, monocle_dir=monocle_dir)
+        rows = summarize(time_window=args.time_window, monocle_dir=monocle_dir,
+                         use_index=use_index, workers=workers)
         print(format_table(rows))
     return 0
 
@@ -590,11 +614,16 @@ def _build_parser():
     sub.add_parser("reset", help="Clear Monocle state (dev helper; will be removed before PR)")
 
     v = sub.add_parser("validate", help="Validate Monocle traces against metamodel conformance")
-    v.add_argument("trace_file", help="Path to trace JSON file")
+    v.add_argument("trace_file", nargs="+", metavar="TRACE",
+                   help="Trace files, directories of trace files or glob patterns")
     v.add_argument("--level", choices=["basic", "selective", "strict"],
                    default="selective", help="Validation level (default: selective)")
     v.add_argument("--fail-on-warning", action="store_true",
                    help="Treat warnings as errors (exit code 1)")
+    v.add_argument("--format", choices=["text", "json", "junit"], default="text",
+                   help="Output format: text, one JSON object per file, or a JUnit XML report (default: text)")
+    v.add_argument("--workers", type=int, default=None, metavar="N",
+                   help="Processes used to validate the files (default: one per CPU)")
 
     ts = sub.add_parser(
         "token-summary",
@@ -622,6 +651,18 @@ def _build_parser():
         metavar="TRACE_DIR",
         help="Direct path to trace directory (overrides --dir)",
     )
+    ts.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Parse every trace file instead of using the cached per-file totals",
+    )
+    ts.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Processes used to parse uncached trace files (default: one per CPU)",
+    )
 
     sts = sub.add_parser(
         "session-token-summary",
@@ -649,6 +690,18 @@ def _build_parser():
         metavar="TRACE_DIR",
         help="Direct path to trace directory (overrides --dir)",
     )
+    sts.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Parse every trace file instead of using the cached per-file totals",
+    )
+    sts.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Processes used to parse uncached trace files (default: one per CPU)",
+    )
 
     return parser
 
@@ -0,0 +1,39 @@
+"""Monocle configuration values from the environment or the .env files.
+
+Kept free of the instrumentation and OpenTelemetry imports, so that the agent hook
+entry point can read its settings without loading them.
+"""
+
+import os
+from typing import Optional
+
+
+def get_monocle_env_value(key: str) -> Optional[str]:
+    """Look up a Monocle config value from the environment or .env files.
+    """
+    env_value = os.environ.get(key)
+    if env_value:
+        return env_value
+    candidates = (
+        os.path.join(os.getcwd(), ".env.monocle"),
+        os.path.join(os.path.expanduser("~"), ".monocle", ".env"),
+    )
+    for env_file_path in candidates:
+        try:
+            with open(env_file_path, "r", encoding="utf-8") as env_file:
+                for line in env_file:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    if line.startswith("export "):
+                        line = line[len("export "):].strip()
+                    if not line.startswith(f"{key}="):
+                        continue
+                    value = line.split("=", 1)[1].strip()
+                    if value.startswith(('"', "'")):
+                        value = value[1:-1].strip()
+                    if value:
+                        return value
+        except OSError:
+            continue
+    return None
@@ -1,5 +1,9 @@
 """Monocle span exporters and filtering utilities."""
 
+# The instrumentor imports the exporters and the exporters import instrumentation.common,
+# so the instrumentation is loaded first whichever module the application imports first.
+import monocle_apptrace.instrumentation  # noqa: F401
+
 from monocle_apptrace.exporters.span_filter import (
     SpanFilter,
     FilteredSpanExporter,
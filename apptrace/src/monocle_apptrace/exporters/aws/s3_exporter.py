@@ -14,10 +14,9 @@ from botocore.exceptions import (
 )
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
-from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x
+from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x, serialize_span_line
 from monocle_apptrace.exporters.exporter_processor import ExportTaskProcessor
 from typing import Sequence, Optional, Dict, List, Tuple
-import json
 logger = logging.getLogger(__name__)
 
 HANDLE_TIMEOUT_SECONDS = 60
@@ -148,6 +147,7 @@ class S3SpanExporter(SpanExporterBase):
                 self.__upload_to_s3_with_trace_id(span_data_batch=serialized_data, trace_id=trace_id)
             except Exception as e:
                 logger.error(f"Failed to upload trace {format_trace_id_without_0x(trace_id)}: {e}")
+                self.spool_spans(spans)
         
         del self.trace_spans[trace_id]
 
@@ -226,9 +226,9 @@ class S3SpanExporter(SpanExporterBase):
                 if self.skip_export(span):
                     continue
                 try:
-                    valid_json_list.append(span.to_json(indent=0).replace("\n", ""))
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON format in span data: {span.context.span_id}. Error: {e}")
+                    valid_json_list.append(serialize_span_line(span))
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Span data can't be encoded as JSON: {span.context.span_id}. Error: {e}")
                     continue
             ndjson_data = "\n".join(valid_json_list) + "\n"
             return ndjson_data
@@ -265,4 +265,5 @@ class S3SpanExporter(SpanExporterBase):
         
         if hasattr(self, 'task_processor') and self.task_processor is not None:
             self.task_processor.stop()
+        self.close_spool()
         logger.info("S3SpanExporter has been shut down.")
@@ -8,12 +8,11 @@ import warnings
 from typing import Sequence, Optional
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExportResult
-from monocle_apptrace.exporters.base_exporter import SpanExporterBase
+from monocle_apptrace.exporters.base_exporter import SpanExporterBase, serialize_span_line
 from monocle_apptrace.exporters.exporter_processor import ExportTaskProcessor
 from opendal import Operator
 from opendal.exceptions import PermissionDenied, ConfigInvalid, Unexpected
 
-import json
 
 logger = logging.getLogger(__name__)
 class OpenDALS3Exporter(SpanExporterBase):
@@ -96,9 +95,9 @@ class OpenDALS3Exporter(SpanExporterBase):
             valid_json_list = []
             for span in spans:
                 try:
-                    valid_json_list.append(span.to_json(indent=0).replace("\n", ""))
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON format in span data: {span.context.span_id}. Error: {e}")
+                    valid_json_list.append(serialize_span_line(span))
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Span data can't be encoded as JSON: {span.context.span_id}. Error: {e}")
                     continue
             return "\n".join(valid_json_list) + "\n"
         except Exception as e:
@@ -7,9 +7,8 @@ from azure.core.exceptions import ResourceNotFoundError, ClientAuthenticationErr
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
 from typing import Sequence, Optional, Dict, List, Tuple
-from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x
+from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x, serialize_span_line
 from monocle_apptrace.exporters.exporter_processor import ExportTaskProcessor
-import json
 from monocle_apptrace.instrumentation.common.constants import MONOCLE_SDK_VERSION
 logger = logging.getLogger(__name__)
 
@@ -182,9 +181,9 @@ class AzureBlobSpanExporter(SpanExporterBase):
             valid_json_list = []
             for span in spans:
                 try:
-                    valid_json_list.append(span.to_json(indent=0).replace("\n", ""))
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON format in span data: {span.context.span_id}. Error: {e}")
+                    valid_json_list.append(serialize_span_line(span))
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Span data can't be encoded as JSON: {span.context.span_id}. Error: {e}")
                     continue
 
             ndjson_data = "\n".join(valid_json_list) + "\n"
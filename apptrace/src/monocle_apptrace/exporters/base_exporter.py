@@ -1,14 +1,23 @@
 import time, os
+import calendar
+import datetime
 import json
 import asyncio
 import random
 import logging
+import threading
 from abc import ABC, abstractmethod
-from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry import trace as trace_api
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import Event, ReadableSpan
+from opentelemetry.sdk.util import ns_to_iso_str
 from opentelemetry.sdk.trace.export import SpanExportResult
+from opentelemetry.trace.status import Status, StatusCode
 from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
 from monocle_apptrace.instrumentation.common.constants import MONOCLE_SDK_VERSION
-from typing import Sequence
+from monocle_apptrace.instrumentation.common import json_codec, utils as _utils
+from monocle_apptrace.exporters.spool import SPOOL_DIR_ENV, SpanSpool, SpoolDrainer, process_spool_directory
+from typing import Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +40,79 @@ class SpanExporterBase(ABC):
     def shutdown(self) -> None:
         pass
 
+    spool: Optional[SpanSpool] = None
+    _spool_drainer: Optional[SpoolDrainer] = None
+
+    def enable_spool(self, directory: Optional[str] = None, drain_interval: Optional[float] = None,
+                     **spool_options) -> SpanSpool:
+        """Keep the spans the backend did not accept in a disk spool, replayed by a background thread.
+
+        Exporters hand undelivered spans to spool_spans or spool_records, and may override
+        replay_spooled when export() is not the way to send them again. Each process spools
+        into its own subdirectory of directory, so processes can share the directory.
+        """
+        if self.spool is None:
+            self._spool_local = threading.local()
+            self._spool_settings = (directory or os.environ[SPOOL_DIR_ENV], drain_interval, spool_options)
+            self._open_spool()
+        return self.spool
+
+    def _open_spool(self) -> None:
+        root, drain_interval, spool_options = self._spool_settings
+        self._spool_pid = os.getpid()
+        self.spool = SpanSpool(process_spool_directory(root), **spool_options)
+        self._spool_drainer = SpoolDrainer(self.spool, self.replay_spooled, drain_interval, root=root)
+        self._spool_drainer.start()
+
+    def _check_spool_fork(self) -> None:
+        # a forked process inherits the parent's spool directory but not its drainer thread
+        if self._spool_pid != os.getpid():
+            self._open_spool()
+
+    def close_spool(self) -> None:
+        if self.spool is not None:
+            self._spool_drainer.stop()
+            self.spool.close()
+
+    def spool_records(self, records: Sequence[bytes]) -> bool:
+        """Spool serialized spans, returns False when spooling is not enabled."""
+        if self.spool is None:
+            return False
+        self._check_spool_fork()
+        if getattr(self._spool_local, "replaying", False):
+            # the records are still in the spool, the drainer retries them later
+            self._spool_local.replay_failed = True
+            return True
+        self.spool.append(records)
+        return True
+
+    def spool_spans(self, spans: Sequence[ReadableSpan]) -> bool:
+        """Spool spans, returns False when spooling is not enabled."""
+        if self.spool is None:
+            return False
+        records = []
+        for span in spans:
+            if self.skip_export(span):
+                continue
+            try:
+                records.append(json_codec.dumps_bytes(serialize_span(span)))
+            except Exception as e:
+                logger.warning(f"Error serializing span {span.context.span_id} to the spool: {e}")
+        return self.spool_records(records)
+
+    def replay_spooled(self, records: Sequence[bytes]) -> bool:
+        """Export spooled spans again, returns True when the backend accepted them."""
+        spans = [deserialize_span(json_codec.loads(record)) for record in records]
+        self._spool_local.replaying = True
+        self._spool_local.replay_failed = False
+        try:
+            result = self.export(spans)
+        finally:
+            self._spool_local.replaying = False
+        return result == SpanExportResult.SUCCESS and not self._spool_local.replay_failed
+
     def skip_export(self, span:ReadableSpan) -> bool:
-        if self.export_monocle_only and (not span.attributes.get(MONOCLE_SDK_VERSION)):
+        if self.export_monocle_only and not _is_monocle_span(span):
             return True
         return False
 
@@ -65,6 +145,14 @@ class SpanExporterBase(ABC):
         return decorator
 
 
+def _is_monocle_span(span: ReadableSpan) -> bool:
+    # Only the span's own attributes count: with resource attributes enabled the SDK version is on the
+    # provider's Resource, which spans from other tracers on that provider share. span_source is set
+    # on every Monocle span alongside the version.
+    attributes = span.attributes or {}
+    return MONOCLE_SDK_VERSION in attributes or "span_source" in attributes
+
+
 class MonocleInMemorySpanExporter(InMemorySpanExporter, SpanExporterBase):
     """In-memory span exporter that keeps only Monocle-instrumented spans."""
 
@@ -87,15 +175,165 @@ def format_span_id_without_0x(span_id: int) -> str:
     """Format span_id as 16-character lowercase hex string without 0x prefix."""
     return f"{span_id:016x}"
 
+_resource_dicts_lock = threading.Lock()
+_resource_dicts: dict = {}
+MAX_CACHED_RESOURCES = 64
+
+def _is_0x_free() -> bool:
+    # setup_readablespan_patch makes to_json() drop the 0x prefix of every hex string
+    return ReadableSpan.to_json is _utils._patched_to_json
+
+def _json_key(key) -> str:
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    return str(key)
+
+def _json_value(value, strip_0x: bool):
+    """Copy an attribute value as json.loads(json.dumps(value)) would."""
+    if isinstance(value, str):
+        return value[2:] if strip_0x and value.startswith("0x") else value
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item, strip_0x) for item in value]
+    if isinstance(value, dict):
+        return {_json_key(key): _json_value(item, strip_0x) for key, item in value.items()}
+    return value
+
+def _json_attributes(attributes, strip_0x: bool) -> dict:
+    if attributes is None:
+        return None
+    return {_json_key(key): _json_value(value, strip_0x) for key, value in attributes.items()}
+
+def _json_context(context, strip_0x: bool) -> dict:
+    prefix = "" if strip_0x else "0x"
+    return {
+        "trace_id": f"{prefix}{context.trace_id:032x}",
+        "span_id": f"{prefix}{context.span_id:016x}",
+        "trace_state": _json_value(repr(context.trace_state), strip_0x),
+    }
+
+def _json_resource(resource, strip_0x: bool) -> dict:
+    # Spans share a handful of resources, convert each of them once.
+    cache_key = (id(resource), strip_0x)
+    cached = _resource_dicts.get(cache_key)
+    if cached is None or cached[0] is not resource:
+        resource_dict = json.loads(resource.to_json())
+        if strip_0x:
+            resource_dict = _json_value(resource_dict, strip_0x)
+        cached = (resource, resource_dict)
+        with _resource_dicts_lock:
+            if len(_resource_dicts) >= MAX_CACHED_RESOURCES:
+                _resource_dicts.clear()
+            _resource_dicts[cache_key] = cached
+    resource_dict = cached[1]
+    return {**resource_dict, "attributes": dict(resource_dict.get("attributes") or {})}
+
+def _span_to_dict(span: ReadableSpan) -> dict:
+    """Single pass equivalent of json.loads(span.to_json()), reading the span fields directly."""
+    strip_0x = _is_0x_free()
+    prefix = "" if strip_0x else "0x"
+    status = {"status_code": str(span._status.status_code.name)}
+    if span._status.description:
+        status["message"] = _json_value(span._status.description, strip_0x)
+    return {
+        "name": _json_value(span._name, strip_0x),
+        "context": _json_context(span._context, strip_0x) if span._context else None,
+        "kind": str(span.kind),
+        "parent_id": f"{prefix}{span.parent.span_id:016x}" if span.parent is not None else None,
+        "start_time": ns_to_iso_str(span._start_time) if span._start_time else None,
+        "end_time": ns_to_iso_str(span._end_time) if span._end_time else None,
+        "status": status,
+        "attributes": _json_attributes(span._attributes, strip_0x),
+        "events": [
+            {
+                "name": _json_value(event.name, strip_0x),
+                "timestamp": ns_to_iso_str(event.timestamp),
+                "attributes": _json_attributes(event.attributes, strip_0x),
+            }
+            for event in span._events
+        ],
+        "links": [
+            {
+                "context": _json_context(link.context, strip_0x),
+                "attributes": _json_attributes(link.attributes, strip_0x),
+            }
+            for link in span._links
+        ],
+        "resource": _json_resource(span.resource, strip_0x),
+    }
+
+def _has_sdk_to_json(span) -> bool:
+    return isinstance(span, ReadableSpan) and getattr(type(span), "to_json", None) is ReadableSpan.to_json
+
 def serialize_span(span) -> dict:
     """Serialize a ReadableSpan to a dict using OTLP JSON field names.
 
     OTel's to_json() uses 'description' for the status message; OTLP JSON
     (and the Monocle backend) expects 'message'.  This function normalizes
     the key so all exporters produce consistent output.
+    SDK spans are converted directly, other span objects (e.g. filtered spans)
+    go through their to_json().
     """
+    if _has_sdk_to_json(span):
+        try:
+            return _span_to_dict(span)
+        except Exception as e:
+            logger.debug(f"Falling back to to_json() to serialize span: {e}")
     obj = json.loads(span.to_json())
     status = obj.get("status", {})
     if "description" in status:
         status["message"] = status.pop("description")
     return obj
+
+def serialize_span_line(span) -> str:
+    """Serialize a span to one line of JSON, as written to NDJSON trace files."""
+    if _has_sdk_to_json(span):
+        return json_codec.dumps(serialize_span(span))
+    return span.to_json(indent=0).replace("\n", "")
+
+def _iso_to_ns(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    parsed = datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=datetime.timezone.utc)
+    return calendar.timegm(parsed.utctimetuple()) * 1_000_000_000 + parsed.microsecond * 1000
+
+def _span_context_of(context: dict) -> trace_api.SpanContext:
+    return trace_api.SpanContext(
+        trace_id=int(context["trace_id"], 16),
+        span_id=int(context["span_id"], 16),
+        is_remote=False,
+        trace_flags=trace_api.TraceFlags(trace_api.TraceFlags.SAMPLED),
+    )
+
+def deserialize_span(span_dict: dict) -> ReadableSpan:
+    """Rebuild a ReadableSpan from the dict produced by serialize_span, e.g. to export it again."""
+    parent_id = span_dict.get("parent_id")
+    context = _span_context_of(span_dict["context"])
+    parent = None
+    if parent_id:
+        parent = trace_api.SpanContext(trace_id=context.trace_id, span_id=int(parent_id, 16),
+                                       is_remote=False)
+    status = span_dict.get("status") or {}
+    status_code = StatusCode[status.get("status_code", "UNSET")]
+    status_message = (status.get("message") or status.get("description")) if status_code == StatusCode.ERROR else None
+    resource = span_dict.get("resource") or {}
+    return ReadableSpan(
+        name=span_dict.get("name"),
+        context=context,
+        parent=parent,
+        resource=Resource(resource.get("attributes") or {}, resource.get("schema_url") or None),
+        attributes=span_dict.get("attributes") or {},
+        events=[Event(event.get("name"), event.get("attributes") or {}, _iso_to_ns(event.get("timestamp")))
+                for event in span_dict.get("events") or []],
+        links=[trace_api.Link(_span_context_of(link["context"]), link.get("attributes") or {})
+               for link in span_dict.get("links") or []],
+        kind=trace_api.SpanKind[str(span_dict.get("kind") or "SpanKind.INTERNAL").split(".")[-1]],
+        status=Status(status_code, status_message),
+        start_time=_iso_to_ns(span_dict.get("start_time")),
+        end_time=_iso_to_ns(span_dict.get("end_time")),
+    )
@@ -126,12 +126,14 @@ class ClickHouseSpanExporter(SpanExporterBase):
             return SpanExportResult.SUCCESS
         except Exception as e:
             logger.error("Error exporting spans to ClickHouse: %s", e)
+            self.spool_spans(spans)
             return SpanExportResult.FAILURE
 
     def force_flush(self, timeout_millis: int = 30000) -> bool:
         return True
 
     def shutdown(self) -> None:
+        self.close_spool()
         try:
             self.client.close()
         except Exception:
@@ -0,0 +1,55 @@
+"""
+Exporter wrapper that evaluates deferred span events before export.
+
+With deferred events enabled (MONOCLE_DEFERRED_EVENTS=true), the data.input, data.output and
+metadata accessors are not run on the request thread. Wrapping an exporter runs them on the
+thread calling export, e.g. the BatchSpanProcessor worker, and records accessor errors on
+the exported span.
+"""
+
+import logging
+from typing import Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+
+from monocle_apptrace.instrumentation.common.deferred_events import resolve_deferred_events
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredEventsSpanExporter:
+    """
+    Wrapper exporter that resolves deferred span events before passing spans to the wrapped exporter.
+
+    Example:
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from monocle_apptrace.exporters.file_exporter import FileSpanExporter
+        from monocle_apptrace.exporters.deferred_events_exporter import DeferredEventsSpanExporter
+
+        processor = BatchSpanProcessor(DeferredEventsSpanExporter(FileSpanExporter()))
+    """
+
+    def __init__(self, base_exporter):
+        self.base_exporter = base_exporter
+
+    def export(self, spans: Sequence[ReadableSpan]):
+        for span in spans:
+            try:
+                resolve_deferred_events(span)
+            except Exception as e:
+                logger.debug(f"Error resolving deferred events: {e}")
+        return self.base_exporter.export(spans)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Delegate flush to base exporter."""
+        return self.base_exporter.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        """Delegate shutdown to base exporter."""
+        return self.base_exporter.shutdown()
+
+    def __getattr__(self, name):
+        # expose the wrapped exporter's attributes (e.g. in-memory exporter helpers)
+        if name == "base_exporter":
+            raise AttributeError(name)
+        return getattr(self.base_exporter, name)
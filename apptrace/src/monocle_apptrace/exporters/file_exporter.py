@@ -1,16 +1,21 @@
 #pylint: disable=consider-using-with
 
-import json
 from os import linesep, path
 from io import TextIOWrapper
 from datetime import datetime
+from threading import Lock, Timer
+import gzip
 import os
-from typing import Optional, Callable, Sequence, Dict, Tuple
+import shutil
+import time
+from typing import Optional, Callable, Sequence, Dict, List, Tuple
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
 from opentelemetry.sdk.resources import SERVICE_NAME
 from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x, serialize_span
 from monocle_apptrace.exporters.exporter_processor import ExportTaskProcessor
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.utils import get_env_int, parse_bool_setting
 
 DEFAULT_FILE_PREFIX:str = "monocle_trace_"
 DEFAULT_TIME_FORMAT:str = "%Y-%m-%d_%H.%M.%S"
@@ -18,6 +23,146 @@ HANDLE_TIMEOUT_SECONDS: int = 60  # 1 minute timeout
 DEFAULT_TRACE_FOLDER = ".monocle"
 # Sentinel so we can tell "caller passed nothing" apart from "caller passed default".
 _UNSET = object()
+# "json" writes each span indented, "compact" writes each span on a single line, both in one
+# file per trace. "ndjson" appends one line per span to rotating segment files shared by all traces.
+FILE_FORMAT_ENV = "MONOCLE_TRACE_FILE_FORMAT"
+FILE_FORMAT_INDENTED = "json"
+FILE_FORMAT_COMPACT = "compact"
+FILE_FORMAT_NDJSON = "ndjson"
+FILE_FORMATS = (FILE_FORMAT_INDENTED, FILE_FORMAT_COMPACT, FILE_FORMAT_NDJSON)
+SEGMENT_MAX_BYTES_ENV = "MONOCLE_TRACE_SEGMENT_MAX_BYTES"
+SEGMENT_MAX_SECONDS_ENV = "MONOCLE_TRACE_SEGMENT_MAX_SECONDS"
+SEGMENT_GZIP_ENV = "MONOCLE_TRACE_SEGMENT_GZIP"
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_MAX_SECONDS = 3600
+# kept out of the monocle_trace_*.json / *.ndjson globs of the trace readers
+SEGMENT_INDEX_SUFFIX = ".idx"
+
+def _indented_formatter(span: ReadableSpan) -> str:
+    return json_codec.dumps(serialize_span(span), indent=4) + linesep
+
+def _compact_formatter(span: ReadableSpan) -> str:
+    return json_codec.dumps(serialize_span(span)) + linesep
+
+def _ndjson_formatter(span: ReadableSpan) -> str:
+    return json_codec.dumps(serialize_span(span)) + "\n"
+
+
+class _SegmentWriter:
+    """Appends span lines to rotating segment files and indexes where each trace is.
+
+    A segment is closed once it reaches max_bytes or has been open for max_seconds, the latter from
+    a timer as well so that a segment left idle is closed without waiting for the next export. On
+    close its index, {"segment": file name, "traces": {trace_id: [[offset, length], ...]}}, is written next
+    to it and the segment is optionally gzipped; offsets are in the uncompressed segment.
+    """
+
+    def __init__(self, output_path: str, file_prefix: str, time_format: str, max_bytes: int,
+                 max_seconds: int, gzip_on_close: bool):
+        self.output_path = output_path
+        self.file_prefix = file_prefix
+        self.time_format = time_format
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.gzip_on_close = gzip_on_close
+        self.lock = Lock()
+        self.handle = None
+        self.file_path: Optional[str] = None
+        self.opened_at = 0.0
+        self.size = 0
+        self.sequence = 0
+        self.index: Dict[str, List[List[int]]] = {}
+        self.timer: Optional[Timer] = None
+
+    def _is_due(self) -> bool:
+        return self.size >= self.max_bytes or time.monotonic() - self.opened_at >= self.max_seconds
+
+    def _open(self, service_name: str) -> None:
+        self.sequence += 1
+        # the time stays last in the name, where the token summary reads it
+        self.file_path = path.join(self.output_path,
+                                   f"{self.file_prefix}{service_name}_segment-{os.getpid()}-{self.sequence}_"
+                                   f"{datetime.now().strftime(self.time_format)}.ndjson")
+        self.handle = open(self.file_path, "wb")
+        self.opened_at = time.monotonic()
+        self.size = 0
+        self.index = {}
+        self.timer = Timer(self.max_seconds, self._close_expired, args=(self.sequence,))
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _close_expired(self, sequence: int) -> None:
+        with self.lock:
+            # the segment the timer was started for may have been rotated by size since
+            if self.handle is not None and self.sequence == sequence:
+                self._close()
+
+    def write(self, service_name: str, trace_id: int, lines: List[str]) -> Optional[str]:
+        """Append the lines of a trace, return the path of the segment closed to make room, if any."""
+        data = "".join(lines).encode("utf-8")
+        with self.lock:
+            closed = None
+            if self.handle is not None and self._is_due():
+                closed = self._close()
+            if self.handle is None:
+                self._open(service_name)
+            self.handle.write(data)
+            ranges = self.index.setdefault(format_trace_id_without_0x(trace_id), [])
+            if ranges and ranges[-1][0] + ranges[-1][1] == self.size:
+                ranges[-1][1] += len(data)
+            else:
+                ranges.append([self.size, len(data)])
+            self.size += len(data)
+            return closed
+
+    def flush(self) -> Optional[str]:
+        """Flush the segment, or close it when it is due for rotation."""
+        with self.lock:
+            if self.handle is None:
+                return None
+            if self._is_due():
+                return self._close()
+            self.handle.flush()
+            return None
+
+    def close(self) -> Optional[str]:
+        with self.lock:
+            return self._close()
+
+    def _close(self) -> Optional[str]:
+        if self.handle is None:
+            return None
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        file_path, segment_path = self.file_path, self.file_path
+        try:
+            self.handle.close()
+            if self.gzip_on_close:
+                # compress to a temporary name so that a failure leaves only the uncompressed segment
+                temp_path = file_path + ".gz.tmp"
+                try:
+                    with open(file_path, "rb") as source, gzip.open(temp_path, "wb") as target:
+                        shutil.copyfileobj(source, target)
+                    os.replace(temp_path, file_path + ".gz")
+                except Exception:
+                    if path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+                segment_path = file_path + ".gz"
+                os.remove(file_path)
+        except Exception as e:
+            print(f"Error closing segment {file_path}: {e}")
+        finally:
+            self.handle = None
+        try:
+            with open(file_path + SEGMENT_INDEX_SUFFIX, "w", encoding="UTF-8") as index_file:
+                index_file.write(json_codec.dumps({"segment": path.basename(segment_path), "traces": self.index}))
+        except Exception as e:
+            print(f"Error writing index of segment {file_path}: {e}")
+        self.index = {}
+        return segment_path
+
 
 class FileSpanExporter(SpanExporterBase):
     def __init__(
@@ -26,15 +171,26 @@ class FileSpanExporter(SpanExporterBase):
         out_path:str = path.join(".", DEFAULT_TRACE_FOLDER),
         file_prefix = _UNSET,
         time_format = DEFAULT_TIME_FORMAT,
-        formatter: Callable[
-            [ReadableSpan], str
-        ] = lambda span: json.dumps(serialize_span(span), indent=4)
-        + linesep,
-        task_processor: Optional[ExportTaskProcessor] = None
+        formatter: Optional[Callable[[ReadableSpan], str]] = None,
+        task_processor: Optional[ExportTaskProcessor] = None,
+        file_format: Optional[str] = None,
+        segment_max_bytes: Optional[int] = None,
+        segment_max_seconds: Optional[int] = None,
+        segment_gzip: Optional[bool] = None
     ):
         super().__init__()
         # Dictionary to store file handles: {trace_id: (file_handle, file_path, last_activity, first_span)}
         self.file_handles: Dict[int, Tuple[TextIOWrapper, str, datetime, bool]] = {}
+        self.file_format = (file_format or os.getenv(FILE_FORMAT_ENV, FILE_FORMAT_INDENTED)).strip().lower()
+        if self.file_format not in FILE_FORMATS:
+            raise ValueError(f"{FILE_FORMAT_ENV} must be one of {', '.join(FILE_FORMATS)}")
+        if formatter is None:
+            if self.file_format == FILE_FORMAT_NDJSON:
+                formatter = _ndjson_formatter
+            elif self.file_format == FILE_FORMAT_COMPACT:
+                formatter = _compact_formatter
+            else:
+                formatter = _indented_formatter
         self.formatter = formatter
         self.service_name = service_name
         self.output_path = os.getenv("MONOCLE_TRACE_OUTPUT_PATH", out_path)
@@ -53,6 +209,15 @@ class FileSpanExporter(SpanExporterBase):
         self.last_file_processed:str = None
         self.last_trace_id = None
         self._root_span_seen: set = set()  # traces where root arrived but child hasn't yet
+        self._segment_writer: Optional[_SegmentWriter] = None
+        if self.file_format == FILE_FORMAT_NDJSON:
+            if segment_gzip is None:
+                segment_gzip = parse_bool_setting(SEGMENT_GZIP_ENV, os.getenv(SEGMENT_GZIP_ENV, "false"))
+            self._segment_writer = _SegmentWriter(
+                self.output_path, self.file_prefix, self.time_format,
+                segment_max_bytes or get_env_int(SEGMENT_MAX_BYTES_ENV, DEFAULT_SEGMENT_MAX_BYTES),
+                segment_max_seconds or get_env_int(SEGMENT_MAX_SECONDS_ENV, DEFAULT_SEGMENT_MAX_SECONDS),
+                segment_gzip)
 
     @staticmethod
     def _is_root_span(span: ReadableSpan) -> bool:
@@ -147,7 +312,43 @@ class FileSpanExporter(SpanExporterBase):
             handle, file_path, _, first_span = self.file_handles[trace_id]
             self.file_handles[trace_id] = (handle, file_path, datetime.now(), first_span)
 
+    def _process_segment_spans(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Append the spans to the current segment, grouped by trace so each trace gets one range."""
+        lines_by_trace: Dict[int, List[str]] = {}
+        service_name = self.service_name
+        for span in spans:
+            if self.skip_export(span):
+                continue
+            try:
+                line = self.formatter(span)
+            except Exception as e:
+                print(f"Error formatting span {span.context.span_id}: {e}")
+                continue
+            lines_by_trace.setdefault(span.context.trace_id, []).append(line)
+            if service_name is None:
+                service_name = span.resource.attributes.get(SERVICE_NAME, "unknown")
+
+        for trace_id, lines in lines_by_trace.items():
+            try:
+                closed = self._segment_writer.write(service_name, trace_id, lines)
+            except Exception as e:
+                print(f"Error writing spans of trace {format_trace_id_without_0x(trace_id)}: {e}")
+                continue
+            if closed is not None:
+                self.last_file_processed = closed
+            self.last_trace_id = trace_id
+
+        try:
+            closed = self._segment_writer.flush()
+            if closed is not None:
+                self.last_file_processed = closed
+        except Exception as e:
+            print(f"Error flushing segment: {e}")
+        return SpanExportResult.SUCCESS
+
     def _process_spans(self, spans: Sequence[ReadableSpan], is_root_span: bool = False) -> SpanExportResult:
+        if self._segment_writer is not None:
+            return self._process_segment_spans(spans)
         # Group spans by trace_id for efficient processing
         spans_by_trace = {}
         root_span_traces = set()
@@ -232,6 +433,10 @@ class FileSpanExporter(SpanExporterBase):
 
     def force_flush(self, timeout_millis: int = 30000) -> bool:
         """Flush all open file handles."""
+        if self._segment_writer is not None:
+            closed = self._segment_writer.flush()
+            if closed is not None:
+                self.last_file_processed = closed
         for trace_id, (handle, file_path, _, _) in self.file_handles.items():
             try:
                 if handle is not None:
@@ -245,6 +450,11 @@ class FileSpanExporter(SpanExporterBase):
         if hasattr(self, 'task_processor') and self.task_processor is not None:
             self.task_processor.stop()
         
+        if self._segment_writer is not None:
+            closed = self._segment_writer.close()
+            if closed is not None:
+                self.last_file_processed = closed
+
         # Close all remaining file handles
         trace_ids_to_close = list(self.file_handles.keys())
         for trace_id in trace_ids_to_close:
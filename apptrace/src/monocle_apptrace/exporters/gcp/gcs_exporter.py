@@ -7,9 +7,8 @@ from google.cloud.exceptions import NotFound, Forbidden, GoogleCloudError, Confl
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
 from typing import Sequence, Optional, Dict, List, Tuple
-from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x
+from monocle_apptrace.exporters.base_exporter import SpanExporterBase, format_trace_id_without_0x, serialize_span_line
 from monocle_apptrace.exporters.exporter_processor import ExportTaskProcessor
-import json
 from monocle_apptrace.instrumentation.common.constants import MONOCLE_SDK_VERSION
 
 logger = logging.getLogger(__name__)
@@ -277,11 +276,11 @@ class GCSSpanExporter(SpanExporterBase):
             valid_json_list = []
             for span in spans:
                 try:
-                    span_json = span.to_json(indent=0).replace("\n", "")  # make oneline json
+                    span_json = serialize_span_line(span)  # make oneline json
                     valid_json_list.append(span_json)
-                except json.JSONDecodeError as e:
+                except (TypeError, ValueError) as e:
                     logger.warning(
-                        f"Invalid JSON format in span data: {span.context.span_id}. Error: {e}"
+                        f"Span data can't be encoded as JSON: {span.context.span_id}. Error: {e}"
                     )
                     continue
                 except Exception as e:
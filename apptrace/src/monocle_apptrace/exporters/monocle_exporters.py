@@ -3,9 +3,11 @@ import os
 import logging, warnings
 from importlib import import_module
 from opentelemetry.sdk.trace.export import SpanExporter, ConsoleSpanExporter
+from monocle_apptrace.exporters.base_exporter import SpanExporterBase
 from monocle_apptrace.exporters.exporter_processor import LambdaExportTaskProcessor, is_aws_lambda_environment
 from monocle_apptrace.exporters.file_exporter import FileSpanExporter
 from monocle_apptrace.exporters.okahu.okahu_exporter import _get_monocle_exporter
+from monocle_apptrace.exporters.spool import SPOOL_DIR_ENV
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,7 @@ def get_monocle_exporter(exporters_list:str=None) -> List[SpanExporter]:
     
     # Create task processor for AWS Lambda environment
     task_processor = LambdaExportTaskProcessor() if is_aws_lambda_environment() else None
+    spool_dir = os.environ.get(SPOOL_DIR_ENV)
 
     for exporter_name in exporter_names:
         exporter_name = exporter_name.strip()
@@ -56,9 +59,16 @@ def get_monocle_exporter(exporters_list:str=None) -> List[SpanExporter]:
             exporter_class = getattr(exporter_module, exporter_class_path["class"])
             # Pass task_processor to all exporters when in AWS Lambda environment
             if task_processor is not None and exporter_module.__name__.startswith("monocle_apptrace"):
-                exporters.append(exporter_class(task_processor=task_processor))
+                exporter = exporter_class(task_processor=task_processor)
             else:
-                exporters.append(exporter_class())
+                exporter = exporter_class()
+            # MONOCLE_SPOOL_DIR keeps the spans each exporter could not deliver in its own spool
+            if spool_dir and isinstance(exporter, SpanExporterBase):
+                try:
+                    exporter.enable_spool(os.path.join(spool_dir, exporter_name))
+                except Exception as ex:
+                    warnings.warn(f"Unable to enable the spool of Monocle span exporter '{exporter_name}', error: {ex}.")
+            exporters.append(exporter)
         except Exception as ex:
             warnings.warn(
                 f"Unable to initialize Monocle span exporter '{exporter_name}', error: {ex}. Using ConsoleSpanExporter as a fallback.")
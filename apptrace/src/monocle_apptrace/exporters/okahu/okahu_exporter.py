@@ -1,17 +1,35 @@
-import json
+import gzip
 import logging
-from typing import Callable, Optional, Sequence
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Sequence, Tuple
 import requests
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult, ConsoleSpanExporter
-from requests.exceptions import ReadTimeout
+from requests.adapters import HTTPAdapter
 from monocle_apptrace.exporters.base_exporter import SpanExporterBase, serialize_span
 from monocle_apptrace.exporters.exporter_processor import ExportTaskProcessor
-from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.utils import get_env_int, get_monocle_env_value
 
 REQUESTS_SUCCESS_STATUS_CODES = (200, 202, 204)
+# Responses worth retrying, anything else outside the success codes drops the batch
+REQUESTS_RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
 OKAHU_PROD_INGEST_ENDPOINT = "https://ingest.okahu.co/api/v1/trace/ingest"
 
+# Spans waiting to be sent; spans exported while the queue is full are dropped
+DEFAULT_MAX_QUEUE_SIZE = 4096
+# Queued spans are coalesced into requests of up to this many spans / uncompressed bytes
+DEFAULT_MAX_BATCH_SPANS = 512
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+# Concurrent requests, the connection pool is sized to match
+DEFAULT_EXPORT_WORKERS = 2
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +41,32 @@ def _get_monocle_exporter() -> Optional[str]:
     return get_monocle_env_value("MONOCLE_EXPORTER")
 
 
+def _get_int_setting(value: Optional[int], key: str, default: int) -> int:
+    if value is not None:
+        return value
+    return get_env_int(key, default, lookup=get_monocle_env_value)
+
+
+def _get_compressor(compression: Optional[str]) -> Tuple[str, Optional[Callable[[bytes], bytes]]]:
+    compression = (compression or get_monocle_env_value("MONOCLE_OKAHU_COMPRESSION") or COMPRESSION_NONE).strip().lower()
+    if compression == COMPRESSION_ZSTD:
+        try:
+            import zstandard
+            return COMPRESSION_ZSTD, zstandard.ZstdCompressor().compress
+        except ImportError:
+            logger.warning("zstandard is not installed, compressing Okahu requests with gzip")
+            compression = COMPRESSION_GZIP
+    if compression == COMPRESSION_GZIP:
+        return COMPRESSION_GZIP, lambda body: gzip.compress(body, compresslevel=6)
+    if compression != COMPRESSION_NONE:
+        raise ValueError("MONOCLE_OKAHU_COMPRESSION must be one of none, gzip, or zstd")
+    return COMPRESSION_NONE, None
+
+
+class _RetryableResponse(Exception):
+    pass
+
+
 class OkahuSpanExporter(SpanExporterBase):
     def __init__(
             self,
@@ -30,9 +74,22 @@ class OkahuSpanExporter(SpanExporterBase):
             timeout: Optional[int] = None,
             session: Optional[requests.Session] = None,
             task_processor: ExportTaskProcessor = None,
-            evaluate: Optional[bool] = False
+            evaluate: Optional[bool] = False,
+            compression: Optional[str] = None,
+            max_queue_size: Optional[int] = None,
+            max_batch_spans: Optional[int] = None,
+            max_batch_bytes: Optional[int] = None,
+            export_workers: Optional[int] = None
     ):
-        """Okahu exporter."""
+        """Okahu exporter.
+
+        Exported spans are queued and sent by background threads, which coalesce the queued spans
+        into requests of up to max_batch_spans spans and max_batch_bytes bytes, optionally
+        compressed, retrying connection errors, timeouts, throttling and server errors with
+        backoff. The number of spans dropped because the queue was full or the request kept
+        failing is kept in dropped_spans and failed_spans, unless a spool is enabled (see
+        SpanExporterBase.enable_spool) to keep them on disk until the backend recovers.
+        """
         super().__init__()
         okahu_endpoint: str = get_monocle_env_value("OKAHU_INGESTION_ENDPOINT") or OKAHU_PROD_INGEST_ENDPOINT
         if evaluate:
@@ -43,11 +100,32 @@ class OkahuSpanExporter(SpanExporterBase):
         if not api_key:
             raise ValueError("OKAHU_API_KEY not set.")
         self.timeout = timeout or 15
-        self.session = session or requests.Session()
+        self.compression, self._compress = _get_compressor(compression)
+        self.max_queue_size = _get_int_setting(max_queue_size, "MONOCLE_OKAHU_MAX_QUEUE_SIZE", DEFAULT_MAX_QUEUE_SIZE)
+        self.max_batch_spans = _get_int_setting(max_batch_spans, "MONOCLE_OKAHU_MAX_BATCH_SPANS", DEFAULT_MAX_BATCH_SPANS)
+        self.max_batch_bytes = _get_int_setting(max_batch_bytes, "MONOCLE_OKAHU_MAX_BATCH_BYTES", DEFAULT_MAX_BATCH_BYTES)
+        self.export_workers = _get_int_setting(export_workers, "MONOCLE_OKAHU_EXPORT_WORKERS", DEFAULT_EXPORT_WORKERS)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.export_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
         self.session.headers.update(
             {"Content-Type": "application/json", "x-api-key": api_key}
         )
 
+        # serialized spans waiting to be sent, guarded by _queue_condition
+        self._queue: deque = deque()
+        self._queue_condition = threading.Condition()
+        self._in_flight = 0
+        self._workers: List[threading.Thread] = []
+        # the worker threads belong to this process, a forked child starts its own
+        self._pid = os.getpid()
+        self.exported_spans = 0
+        self.dropped_spans = 0
+        self.failed_spans = 0
+
         self.task_processor = task_processor or None
         if task_processor is not None:
             task_processor.start()
@@ -57,71 +135,207 @@ class OkahuSpanExporter(SpanExporterBase):
         # not allowed and should return a Failure result
         if not hasattr(self, 'session'):
             return self.exporter.export(spans)
-        
+
         if self._closed:
             logger.warning("Exporter already shutdown, ignoring batch")
             return SpanExportResult.FAILURE
-        
-        span_list = {
-            "batch": []
-        }
 
-        # append the batch object with all the spans object
+        serialized_spans = []
         for span in spans:
             if self.skip_export(span):
                 continue
-            span_list["batch"].append(serialize_span(span))
+            try:
+                serialized_spans.append(json_codec.dumps_bytes(serialize_span(span)))
+            except Exception as e:
+                logger.warning("Error serializing span %s: %s", span.context.span_id, e)
 
         # if there are no spans to export after filtering, then return
-        if len(span_list["batch"]) == 0:
-            return
-        
-        # Calculate is_root_span by checking if any span has no parent
-        is_root_span = any(OkahuSpanExporter._is_root_span(span) for span in spans)
-
-        def send_spans_to_okahu(span_list_local=None, is_root=False):
-            try:
-                result = self.session.post(
-                    url=self.endpoint,
-                    data=json.dumps(span_list_local),
-                    timeout=self.timeout,
-                )
-                if result.status_code not in REQUESTS_SUCCESS_STATUS_CODES:
-                    logger.error(
-                        "Traces cannot be uploaded; status code: %s, message %s",
-                        result.status_code,
-                        result.text,
-                    )
-                    return SpanExportResult.FAILURE
-                logger.debug("spans successfully exported to okahu. Is root span: %s", is_root)
-                return SpanExportResult.SUCCESS
-            except ReadTimeout as e:
-                logger.warning("Trace export timed out: %s", str(e))
-                return SpanExportResult.FAILURE
+        if len(serialized_spans) == 0:
+            return SpanExportResult.SUCCESS
 
         # if async task function is present, then push the request to asnc task
         if self.task_processor is not None and callable(self.task_processor.queue_task):
+            is_root_span = any(OkahuSpanExporter._is_root_span(span) for span in spans)
             self.task_processor.queue_task(
-                send_spans_to_okahu,
-                kwargs={'span_list_local': span_list, 'is_root': is_root_span},
+                self._send_spans,
+                kwargs={'serialized_spans': serialized_spans},
                 is_root_span=is_root_span
             )
             return SpanExportResult.SUCCESS
-        return send_spans_to_okahu(span_list, is_root_span)
+
+        self._start_workers()
+        with self._queue_condition:
+            accepted = max(0, min(len(serialized_spans), self.max_queue_size - len(self._queue)))
+            self._queue.extend(serialized_spans[:accepted])
+            self._queue_condition.notify()
+            if accepted < len(serialized_spans) and self.spool is None:
+                self.dropped_spans += len(serialized_spans) - accepted
+        if accepted < len(serialized_spans):
+            if self.spool_records(serialized_spans[accepted:]):
+                return SpanExportResult.SUCCESS
+            logger.warning("Okahu export queue is full, dropped %d spans (%d dropped so far)",
+                           len(serialized_spans) - accepted, self.dropped_spans)
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def _check_fork(self) -> None:
+        """Start over in a process forked from the one that started the workers.
+
+        The child has none of the parent's threads, and the queue lock may have been held by one of
+        them at the fork. The spans queued in the parent are left to the parent, and the pooled
+        connections, whose sockets the parent still uses, are closed.
+        """
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._queue = deque()
+        self._queue_condition = threading.Condition()
+        self._in_flight = 0
+        self._workers = []
+        try:
+            self.session.close()
+        except Exception as e:
+            logger.debug("Error closing the inherited Okahu session: %s", e)
+
+    def _start_workers(self) -> None:
+        self._check_fork()
+        if len(self._workers) == self.export_workers:
+            return
+        with self._queue_condition:
+            while len(self._workers) < self.export_workers:
+                worker = threading.Thread(target=self._worker, name="OkahuSpanExporter", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker(self) -> None:
+        while True:
+            with self._queue_condition:
+                while not self._queue and not self._closed:
+                    self._queue_condition.wait()
+                if not self._queue:
+                    return
+                batch = self._take_batch(self._queue)
+                self._in_flight += 1
+            try:
+                self._send_spans(batch)
+            finally:
+                with self._queue_condition:
+                    self._in_flight -= 1
+                    self._queue_condition.notify_all()
+
+    def _take_batch(self, pending: deque) -> List[bytes]:
+        """Pop the pending spans fitting in one request, at least one span."""
+        batch = [pending.popleft()]
+        batch_bytes = len(batch[0])
+        while pending and len(batch) < self.max_batch_spans \
+                and batch_bytes + len(pending[0]) + 1 <= self.max_batch_bytes:
+            batch_bytes += len(pending[0]) + 1
+            batch.append(pending.popleft())
+        return batch
+
+    def _send_spans(self, serialized_spans: List[bytes], spool_failures: bool = True) -> SpanExportResult:
+        """Send serialized spans, in as many requests as the batch limits require.
+
+        Batches the backend could not be reached for are spooled when spool_failures is set and a
+        spool is enabled, otherwise sending stops at the first of them and FAILURE is returned.
+        Batches the backend rejected are dropped.
+        """
+        result = SpanExportResult.SUCCESS
+        pending = deque(serialized_spans)
+        while pending:
+            batch = self._take_batch(pending)
+            body = b'{"batch":[' + b",".join(batch) + b"]}"
+            unreachable = False
+            try:
+                sent = self._post_batch(body)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+                sent, unreachable = False, True
+            if unreachable:
+                if spool_failures and self.spool_records(batch):
+                    continue
+                if not spool_failures:
+                    return SpanExportResult.FAILURE
+            with self._queue_condition:
+                if sent:
+                    self.exported_spans += len(batch)
+                else:
+                    self.failed_spans += len(batch)
+            if not sent and spool_failures:
+                result = SpanExportResult.FAILURE
+        return result
+
+    def replay_spooled(self, records: Sequence[bytes]) -> bool:
+        # rejected spans are dropped, only an unreachable backend leaves them in the spool
+        return self._send_spans(list(records), spool_failures=False) == SpanExportResult.SUCCESS
+
+    @SpanExporterBase.retry_with_backoff(
+        exceptions=(requests.exceptions.ConnectionError, requests.exceptions.Timeout, _RetryableResponse)
+    )
+    def _post_batch(self, body: bytes) -> bool:
+        headers = None
+        if self._compress is not None:
+            body = self._compress(body)
+            headers = {"Content-Encoding": self.compression}
+        result = self.session.post(
+            url=self.endpoint,
+            data=body,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        if result.status_code in REQUESTS_RETRY_STATUS_CODES:
+            raise _RetryableResponse(f"status code {result.status_code}")
+        if result.status_code not in REQUESTS_SUCCESS_STATUS_CODES:
+            logger.error(
+                "Traces cannot be uploaded; status code: %s, message %s",
+                result.status_code,
+                result.text,
+            )
+            return False
+        logger.debug("spans successfully exported to okahu")
+        return True
 
     @staticmethod
     def _is_root_span(span: ReadableSpan) -> bool:
         """Return True if the span has no parent (i.e. it is a root span)."""
         return (not span.parent) or (span.attributes.get("span.type") == "workflow")
 
-    def shutdown(self) -> None:
+    def shutdown(self, timeout_millis: int = 30000) -> None:
+        """Send the queued spans and stop the workers, giving up after timeout_millis.
+
+        Spans still queued at the deadline are spooled when a spool is enabled and dropped otherwise;
+        a request still being retried is abandoned to its daemon thread.
+        """
         if self._closed:
             logger.warning("Exporter already shutdown, ignoring call")
             return
+        self._check_fork()
+        deadline = time.monotonic() + timeout_millis / 1000
+        self.force_flush(timeout_millis)
+        with self._queue_condition:
+            self._closed = True
+            self._queue_condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+        with self._queue_condition:
+            remaining = list(self._queue)
+            self._queue.clear()
+        if remaining and not self.spool_records(remaining):
+            with self._queue_condition:
+                self.dropped_spans += len(remaining)
+            logger.warning("Okahu exporter shut down with %d unsent spans", len(remaining))
+        self.close_spool()
         if hasattr(self, 'session'):
             self.session.close()
-        self._closed = True
 
     def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Wait until the queued spans are sent, or the timeout expires."""
+        self._check_fork()
+        deadline = time.monotonic() + timeout_millis / 1000
+        with self._queue_condition:
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._workers:
+                    return False
+                self._queue_condition.wait(remaining)
         return True
-    
\ No newline at end of file
@@ -127,12 +127,14 @@ class PostgresSpanExporter(SpanExporterBase):
             return SpanExportResult.SUCCESS
         except Exception as e:
             logger.error("Error exporting spans to Postgres: %s", e)
+            self.spool_spans(spans)
             return SpanExportResult.FAILURE
 
     def force_flush(self, timeout_millis: int = 30000) -> bool:
         return True
 
     def shutdown(self) -> None:
+        self.close_spool()
         try:
             self.connection.close()
         except Exception:
@@ -0,0 +1,360 @@
+"""Disk-backed spool keeping the spans an exporter could not deliver until its backend recovers.
+
+The spool is a directory of append-only segment files. Each record is a serialized span prefixed by
+its length and CRC32, so a record torn by a crash is detected and skipped. Records are read back
+oldest first from a cursor persisted next to the segments, segments are deleted once read through,
+and the oldest segments are evicted when the spool grows past its size cap. Delivery is at least
+once: records read but not acknowledged before a crash are replayed again.
+
+A spool directory has a single owner, held with an flock for the spool's lifetime. Exporters of
+several processes sharing one spool root each spool into their own ``pid-<pid>`` subdirectory.
+
+A ``SpoolDrainer`` thread periodically hands the spooled records back to the exporter, and adopts
+the subdirectories left behind by processes that exited.
+"""
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+
+try:
+    import fcntl  # POSIX only
+except ImportError:
+    fcntl = None
+
+from monocle_apptrace.instrumentation.common.utils import get_env_int
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR_ENV = "MONOCLE_SPOOL_DIR"
+SPOOL_MAX_BYTES_ENV = "MONOCLE_SPOOL_MAX_BYTES"
+SPOOL_SEGMENT_BYTES_ENV = "MONOCLE_SPOOL_SEGMENT_BYTES"
+SPOOL_FSYNC_ENV = "MONOCLE_SPOOL_FSYNC"
+SPOOL_DRAIN_INTERVAL_ENV = "MONOCLE_SPOOL_DRAIN_INTERVAL_SECONDS"
+DEFAULT_SPOOL_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_SPOOL_SEGMENT_BYTES = 16 * 1024 * 1024
+DEFAULT_SPOOL_DRAIN_INTERVAL_SECONDS = 30
+DEFAULT_SPOOL_DRAIN_BATCH = 512
+# fsync after every append, when a segment is sealed, or leave it to the OS
+FSYNC_ALWAYS = "always"
+FSYNC_SEGMENT = "segment"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_SEGMENT, FSYNC_NEVER)
+
+_HEADER = struct.Struct(">II")
+_SEGMENT_SUFFIX = ".spool"
+_CURSOR_FILE = "cursor"
+_LOCK_FILE = "lock"
+_PROCESS_DIR_PREFIX = "pid-"
+
+
+class SpoolLockedError(OSError):
+    """The spool directory is owned by another SpanSpool, in this or another process."""
+
+
+def process_spool_directory(root: str) -> str:
+    """Spool directory of the current process under a spool root shared by several processes."""
+    return os.path.join(root, f"{_PROCESS_DIR_PREFIX}{os.getpid()}")
+
+
+def process_spool_directories(root: str) -> List[str]:
+    """The per-process spool directories under a spool root."""
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return []
+    return [os.path.join(root, name) for name in names
+            if name.startswith(_PROCESS_DIR_PREFIX) and os.path.isdir(os.path.join(root, name))]
+
+
+class SpanSpool:
+    """Size-capped write-ahead spool of serialized span records."""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None, segment_bytes: Optional[int] = None,
+                 fsync: Optional[str] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes or get_env_int(SPOOL_MAX_BYTES_ENV, DEFAULT_SPOOL_MAX_BYTES)
+        self.segment_bytes = min(segment_bytes or get_env_int(SPOOL_SEGMENT_BYTES_ENV, DEFAULT_SPOOL_SEGMENT_BYTES),
+                                 self.max_bytes)
+        self.fsync = (fsync or os.environ.get(SPOOL_FSYNC_ENV, FSYNC_SEGMENT)).strip().lower()
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"{SPOOL_FSYNC_ENV} must be one of {', '.join(FSYNC_POLICIES)}")
+        os.makedirs(directory, exist_ok=True)
+        self._owner_lock = self._acquire_owner_lock()
+        self._lock = threading.Lock()
+        # segment sequence -> [size in bytes, record count], oldest first
+        self._segments: "OrderedDict[int, list]" = OrderedDict()
+        self._active = None
+        self._active_seq = None
+        self._read_seq, self._read_offset = self._load_cursor()
+        self._pending_ack = None
+        self.evicted_records = 0
+        self.dropped_records = 0
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(_SEGMENT_SUFFIX) and name[:-len(_SEGMENT_SUFFIX)].isdigit():
+                seq = int(name[:-len(_SEGMENT_SUFFIX)])
+                self._segments[seq] = [os.path.getsize(self._segment_path(seq)), self._count_records(seq)]
+        for seq in [seq for seq in self._segments if seq < self._read_seq]:
+            self._delete_segment(seq)
+
+    def _acquire_owner_lock(self):
+        if fcntl is None:
+            return None
+        fh = open(os.path.join(self.directory, _LOCK_FILE), "a")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            raise SpoolLockedError(f"Spool {self.directory} is in use")
+        return fh
+
+    def _release_owner_lock(self) -> None:
+        if self._owner_lock is not None:
+            self._owner_lock.close()
+            self._owner_lock = None
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:020d}{_SEGMENT_SUFFIX}")
+
+    def _load_cursor(self):
+        try:
+            with open(os.path.join(self.directory, _CURSOR_FILE), encoding="utf-8") as f:
+                seq, offset = f.read().split()
+                return int(seq), int(offset)
+        except (OSError, ValueError):
+            return 0, 0
+
+    def _save_cursor(self) -> None:
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(f"{self._read_seq} {self._read_offset}")
+            if self.fsync == FSYNC_ALWAYS:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _count_records(self, seq: int) -> int:
+        return sum(1 for _ in self._iter_records(seq, 0))
+
+    def _iter_records(self, seq: int, offset: int):
+        """Yield (record, offset after the record) from a segment, stopping at a torn or corrupt record."""
+        try:
+            with open(self._segment_path(seq), "rb") as f:
+                f.seek(offset)
+                while True:
+                    header = f.read(_HEADER.size)
+                    if not header:
+                        return
+                    if len(header) < _HEADER.size:
+                        break
+                    length, crc = _HEADER.unpack(header)
+                    record = f.read(length)
+                    if len(record) < length or zlib.crc32(record) != crc:
+                        break
+                    offset += _HEADER.size + length
+                    yield record, offset
+        except OSError as e:
+            logger.warning("Unable to read spool segment %s: %s", self._segment_path(seq), e)
+            return
+        logger.warning("Skipping corrupt or truncated record in spool segment %s", self._segment_path(seq))
+
+    def _seal_active(self) -> None:
+        if self._active is None:
+            return
+        self._active.flush()
+        if self.fsync != FSYNC_NEVER:
+            os.fsync(self._active.fileno())
+        self._active.close()
+        self._active = None
+
+    def _delete_segment(self, seq: int) -> None:
+        if seq == self._active_seq:
+            self._seal_active()
+            self._active_seq = None
+        self._segments.pop(seq, None)
+        try:
+            os.remove(self._segment_path(seq))
+        except OSError:
+            pass
+
+    def append(self, records: Iterable[bytes]) -> int:
+        """Append records, evicting the oldest segments when over the size cap.
+
+        Returns the number of records written, records larger than the cap are dropped.
+        """
+        written = 0
+        with self._lock:
+            for record in records:
+                size = _HEADER.size + len(record)
+                if size > self.max_bytes:
+                    self.dropped_records += 1
+                    continue
+                if self._active is not None and self._segments[self._active_seq][0] + size > self.segment_bytes:
+                    self._seal_active()
+                while self._segments and sum(s[0] for s in self._segments.values()) + size > self.max_bytes:
+                    oldest = next(iter(self._segments))
+                    self.evicted_records += self._segments[oldest][1]
+                    if oldest == self._read_seq:
+                        self._read_offset = 0
+                        self._pending_ack = None
+                    self._delete_segment(oldest)
+                if self._active is None:
+                    self._active_seq = max(self._segments, default=self._read_seq) + 1
+                    self._active = open(self._segment_path(self._active_seq), "ab")
+                    self._segments[self._active_seq] = [0, 0]
+                self._active.write(_HEADER.pack(len(record), zlib.crc32(record)) + record)
+                self._segments[self._active_seq][0] += size
+                self._segments[self._active_seq][1] += 1
+                written += 1
+            if self._active is not None:
+                self._active.flush()
+                if self.fsync == FSYNC_ALWAYS:
+                    os.fsync(self._active.fileno())
+        if self.evicted_records or self.dropped_records:
+            logger.debug("Spool %s evicted %d and dropped %d records so far",
+                         self.directory, self.evicted_records, self.dropped_records)
+        return written
+
+    def read(self, max_records: int = DEFAULT_SPOOL_DRAIN_BATCH) -> List[bytes]:
+        """Return up to max_records of the oldest records, ack() removes them from the spool."""
+        records = []
+        with self._lock:
+            position = None
+            for seq in list(self._segments):
+                if seq < self._read_seq:
+                    continue
+                offset = self._read_offset if seq == self._read_seq else 0
+                end_offset = offset
+                for record, end_offset in self._iter_records(seq, offset):
+                    records.append(record)
+                    if len(records) == max_records:
+                        break
+                position = (seq, end_offset)
+                if len(records) == max_records:
+                    break
+                if seq != self._active_seq:
+                    # read through, or stopped at a torn record
+                    position = (seq + 1, 0)
+            self._pending_ack = position
+        return records
+
+    def ack(self) -> None:
+        """Remove the records returned by the last read()."""
+        with self._lock:
+            if self._pending_ack is None:
+                return
+            self._read_seq, self._read_offset = self._pending_ack
+            self._pending_ack = None
+            for seq in [seq for seq in self._segments if seq < self._read_seq]:
+                self._delete_segment(seq)
+            self._save_cursor()
+
+    def pending_bytes(self) -> int:
+        with self._lock:
+            return sum(size for size, _ in self._segments.values())
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            for seq, (size, count) in self._segments.items():
+                if seq > self._read_seq and count:
+                    return False
+                if seq == self._read_seq and size > self._read_offset:
+                    return False
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._seal_active()
+            self._active_seq = None
+            self._release_owner_lock()
+
+    def remove(self) -> None:
+        """Close the spool and delete its directory with any records left in it."""
+        with self._lock:
+            for seq in list(self._segments):
+                self._delete_segment(seq)
+            # unlinked while still locked, so no other spool takes over the directory meanwhile
+            for name in (_CURSOR_FILE, _LOCK_FILE):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            try:
+                os.rmdir(self.directory)
+            except OSError as e:
+                logger.debug("Unable to remove spool directory %s: %s", self.directory, e)
+            self._release_owner_lock()
+
+
+class SpoolDrainer(threading.Thread):
+    """Replays spooled records through replay(records) -> bool, waiting interval seconds after a failure.
+
+    With a root, the drainer also replays and removes the spools other processes left under it.
+    """
+
+    def __init__(self, spool: SpanSpool, replay: Callable[[List[bytes]], bool], interval: Optional[float] = None,
+                 batch_size: int = DEFAULT_SPOOL_DRAIN_BATCH, root: Optional[str] = None):
+        super().__init__(name="MonocleSpoolDrainer", daemon=True)
+        self.spool = spool
+        self.root = root
+        self.replay = replay
+        self.interval = interval or get_env_int(SPOOL_DRAIN_INTERVAL_ENV, DEFAULT_SPOOL_DRAIN_INTERVAL_SECONDS)
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self.replayed_records = 0
+
+    def drain(self) -> bool:
+        """Replay spooled records until the spools are empty or a replay fails."""
+        return self._drain_spool(self.spool) and self.drain_orphans()
+
+    def drain_orphans(self) -> bool:
+        """Replay and remove the spools under the root whose process exited."""
+        if self.root is None or fcntl is None:
+            # without flock a live process's spool cannot be told from an orphaned one
+            return True
+        for directory in process_spool_directories(self.root):
+            if os.path.abspath(directory) == os.path.abspath(self.spool.directory):
+                continue
+            try:
+                orphan = SpanSpool(directory, max_bytes=self.spool.max_bytes,
+                                   segment_bytes=self.spool.segment_bytes, fsync=self.spool.fsync)
+            except SpoolLockedError:
+                # its process is still running, or another drainer adopted it
+                continue
+            except OSError as e:
+                logger.debug("Unable to open spool %s: %s", directory, e)
+                continue
+            try:
+                if not self._drain_spool(orphan):
+                    return False
+                orphan.remove()
+            finally:
+                orphan.close()
+        return True
+
+    def _drain_spool(self, spool: SpanSpool) -> bool:
+        while not self._stop_event.is_set():
+            records = spool.read(self.batch_size)
+            if not records:
+                return True
+            try:
+                replayed = self.replay(records)
+            except Exception as e:
+                logger.debug(f"Error replaying spooled spans: {e}")
+                replayed = False
+            if not replayed:
+                return False
+            spool.ack()
+            self.replayed_records += len(records)
+        return False
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.drain()
+
+    def stop(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,146 @@
+"""
+Exporter wrapper that keeps or drops whole traces once they have completed.
+
+Spans are buffered per trace until the local root span of the trace is exported, then the
+``TailSamplingPolicy`` keeps the trace when it has an error, a high token count or a slow
+inference, and samples the other traces. Buffering is bounded: when too many traces or spans
+are pending, or a trace waited longer than the decision wait, the oldest pending traces are
+decided with the spans seen so far. Spans arriving after their trace was decided follow that
+decision.
+
+Enabled for the default exporters by MONOCLE_TAIL_SAMPLING=true.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Optional, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExportResult
+
+from monocle_apptrace.instrumentation.common.sampling import TailSamplingPolicy
+from monocle_apptrace.instrumentation.common.utils import get_env_int
+
+logger = logging.getLogger(__name__)
+
+TAIL_SAMPLING_MAX_TRACES_ENV = "MONOCLE_TAIL_SAMPLING_MAX_TRACES"
+TAIL_SAMPLING_MAX_SPANS_ENV = "MONOCLE_TAIL_SAMPLING_MAX_SPANS"
+TAIL_SAMPLING_DECISION_WAIT_ENV = "MONOCLE_TAIL_SAMPLING_DECISION_WAIT_SECONDS"
+DEFAULT_TAIL_SAMPLING_MAX_TRACES = 1000
+DEFAULT_TAIL_SAMPLING_MAX_SPANS = 20000
+DEFAULT_TAIL_SAMPLING_DECISION_WAIT_SECONDS = 60
+# decisions are remembered for late spans, for this many traces per pending trace allowed
+DECIDED_TRACES_FACTOR = 10
+
+
+
+def _is_local_root(span: ReadableSpan) -> bool:
+    return span.parent is None or span.parent.is_remote
+
+
+class TailSamplingSpanExporter:
+    """
+    Wrapper exporter that exports only the traces kept by a TailSamplingPolicy.
+
+    Example:
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from monocle_apptrace.exporters.file_exporter import FileSpanExporter
+        from monocle_apptrace.exporters.tail_sampling_exporter import TailSamplingSpanExporter
+
+        processor = BatchSpanProcessor(TailSamplingSpanExporter(FileSpanExporter()))
+    """
+
+    def __init__(self, base_exporter, policy: Optional[TailSamplingPolicy] = None, max_traces: Optional[int] = None,
+                 max_spans: Optional[int] = None, decision_wait_seconds: Optional[float] = None):
+        self.base_exporter = base_exporter
+        self.policy = policy or TailSamplingPolicy()
+        self.max_traces = max_traces or get_env_int(TAIL_SAMPLING_MAX_TRACES_ENV, DEFAULT_TAIL_SAMPLING_MAX_TRACES)
+        self.max_spans = max_spans or get_env_int(TAIL_SAMPLING_MAX_SPANS_ENV, DEFAULT_TAIL_SAMPLING_MAX_SPANS)
+        self.decision_wait_seconds = decision_wait_seconds or get_env_int(
+            TAIL_SAMPLING_DECISION_WAIT_ENV, DEFAULT_TAIL_SAMPLING_DECISION_WAIT_SECONDS)
+        self._lock = Lock()
+        # trace_id -> (time first seen, spans), oldest first
+        self._pending: "OrderedDict[int, tuple]" = OrderedDict()
+        self._pending_spans = 0
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self.kept_traces = 0
+        self.dropped_traces = 0
+
+    def _decide(self, trace_id: int, spans: List[ReadableSpan], kept: List[ReadableSpan]) -> None:
+        try:
+            keep = self.policy.keep(trace_id, spans)
+        except Exception as e:
+            logger.debug(f"Error evaluating tail sampling policy, keeping trace: {e}")
+            keep = True
+        if keep:
+            self.kept_traces += 1
+            kept.extend(spans)
+        else:
+            self.dropped_traces += 1
+        self._decided[trace_id] = keep
+        while len(self._decided) > self.max_traces * DECIDED_TRACES_FACTOR:
+            self._decided.popitem(last=False)
+
+    def _release(self, trace_id: int, kept: List[ReadableSpan]) -> None:
+        _, spans = self._pending.pop(trace_id)
+        self._pending_spans -= len(spans)
+        self._decide(trace_id, spans, kept)
+
+    def export(self, spans: Sequence[ReadableSpan]):
+        kept: List[ReadableSpan] = []
+        with self._lock:
+            completed = []
+            for span in spans:
+                trace_id = span.context.trace_id
+                decision = self._decided.get(trace_id)
+                if decision is not None:
+                    if decision:
+                        kept.append(span)
+                    continue
+                entry = self._pending.get(trace_id)
+                if entry is None:
+                    entry = self._pending[trace_id] = (time.monotonic(), [])
+                entry[1].append(span)
+                self._pending_spans += 1
+                if _is_local_root(span):
+                    completed.append(trace_id)
+            for trace_id in completed:
+                if trace_id in self._pending:
+                    self._release(trace_id, kept)
+            deadline = time.monotonic() - self.decision_wait_seconds
+            while self._pending:
+                trace_id, (first_seen, _) = next(iter(self._pending.items()))
+                if (first_seen > deadline and len(self._pending) <= self.max_traces
+                        and self._pending_spans <= self.max_spans):
+                    break
+                self._release(trace_id, kept)
+        if not kept:
+            return SpanExportResult.SUCCESS
+        return self.base_exporter.export(kept)
+
+    def _release_all(self) -> None:
+        kept: List[ReadableSpan] = []
+        with self._lock:
+            while self._pending:
+                self._release(next(iter(self._pending)), kept)
+        if kept:
+            self.base_exporter.export(kept)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Decide the pending traces with the spans seen so far and flush the base exporter."""
+        self._release_all()
+        return self.base_exporter.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        """Decide the pending traces and shut down the base exporter."""
+        self._release_all()
+        logger.debug(f"Tail sampling kept {self.kept_traces} and dropped {self.dropped_traces} traces")
+        return self.base_exporter.shutdown()
+
+    def __getattr__(self, name):
+        # expose the wrapped exporter's attributes (e.g. in-memory exporter helpers)
+        if name == "base_exporter":
+            raise AttributeError(name)
+        return getattr(self.base_exporter, name)
@@ -1,27 +1,81 @@
+import logging
 import threading
+import time
+from collections import OrderedDict
 
 from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
-from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
 
 from monocle_apptrace.exporters.base_exporter import MonocleInMemorySpanExporter
-from monocle_apptrace.instrumentation.common.constants import TRACE_RETURN_SCOPE_NAME
+from monocle_apptrace.instrumentation.common.constants import (
+    MONOCLE_TRACE_RETURN_MAX_SPANS_ENV,
+    MONOCLE_TRACE_RETURN_TTL_ENV,
+    TRACE_RETURN_SCOPE_NAME,
+)
+from monocle_apptrace.instrumentation.common.utils import get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
 
 _SCOPE_ATTR = f"scope.{TRACE_RETURN_SCOPE_NAME}"
+DEFAULT_TRACE_RETURN_TTL_SECONDS = 300
+DEFAULT_TRACE_RETURN_MAX_SPANS = 10000
 
 
 class TraceReturnSpanExporter(MonocleInMemorySpanExporter):
-    """In-memory exporter that stores ONLY spans tagged with the trace-return scope."""
+    """In-memory exporter that stores ONLY spans tagged with the trace-return scope.
+
+    Spans are buffered per trace_id until the response of their request pops them. Traces whose
+    response never pops them are evicted once older than the TTL, and the oldest traces are evicted
+    when the buffer holds more than max_spans spans.
+    """
 
-    def __init__(self):
+    def __init__(self, ttl_seconds: float = None, max_spans: int = None):
         super().__init__()
         self._tr_lock = threading.Lock()
+        self.ttl_seconds = ttl_seconds or get_env_float(MONOCLE_TRACE_RETURN_TTL_ENV, DEFAULT_TRACE_RETURN_TTL_SECONDS)
+        self.max_spans = max_spans or get_env_int(MONOCLE_TRACE_RETURN_MAX_SPANS_ENV, DEFAULT_TRACE_RETURN_MAX_SPANS)
+        # trace_id -> [last update time, spans], least recently updated trace first
+        self._traces: "OrderedDict[int, list]" = OrderedDict()
+        self._span_count = 0
+        self.evicted_spans = 0
 
     def export(self, spans):
         tagged = [s for s in spans if s.attributes and s.attributes.get(_SCOPE_ATTR) is not None]
         if not tagged:
             return SpanExportResult.SUCCESS
+        now = time.monotonic()
+        with self._tr_lock:
+            for span in tagged:
+                trace_id = span.get_span_context().trace_id
+                entry = self._traces.get(trace_id)
+                if entry is None:
+                    self._traces[trace_id] = [now, [span]]
+                else:
+                    entry[0] = now
+                    entry[1].append(span)
+                    self._traces.move_to_end(trace_id)
+            self._span_count += len(tagged)
+            self._evict_locked(now)
+        return SpanExportResult.SUCCESS
+
+    def _evict_locked(self, now: float) -> None:
+        expiry = now - self.ttl_seconds
+        while self._traces:
+            trace_id, (updated, spans) = next(iter(self._traces.items()))
+            if updated > expiry and self._span_count <= self.max_spans:
+                break
+            del self._traces[trace_id]
+            self._span_count -= len(spans)
+            self.evicted_spans += len(spans)
+            logger.debug("Evicted %d trace-return spans of trace %032x", len(spans), trace_id)
+
+    def get_finished_spans(self):
+        with self._tr_lock:
+            return tuple(span for _, spans in self._traces.values() for span in spans)
+
+    def clear(self) -> None:
         with self._tr_lock:
-            return InMemorySpanExporter.export(self, tagged)
+            self._traces.clear()
+            self._span_count = 0
 
     def shutdown(self) -> None:
         # This is a process-global singleton registered on the tracer provider via a
@@ -38,13 +92,11 @@ class TraceReturnSpanExporter(MonocleInMemorySpanExporter):
     def pop_spans_for_trace(self, trace_id: int) -> list:
         """Return and evict all buffered spans whose trace_id matches."""
         with self._tr_lock:
-            all_spans = list(self.get_finished_spans())
-            matched = [s for s in all_spans if s.get_span_context().trace_id == trace_id]
-            remaining = [s for s in all_spans if s.get_span_context().trace_id != trace_id]
-            self.clear()
-            if remaining:
-                InMemorySpanExporter.export(self, remaining)
-        return matched
+            entry = self._traces.pop(trace_id, None)
+            if entry is None:
+                return []
+            self._span_count -= len(entry[1])
+        return entry[1]
 
 
 _trace_return_exporter = None
@@ -0,0 +1,336 @@
+"""Resident daemon for the agent CLI hooks.
+
+Claude Code, Codex and GitHub Copilot run ``monocle-apptrace <agent>-hook`` in a new
+process for every hook event. With MONOCLE_HOOK_DAEMON=true the hook process hands the
+event over a Unix socket to a long-lived daemon instead. The daemon keeps the event
+handlers imported and the telemetry set up between events, so a Stop does not pay for
+``setup_monocle_telemetry`` and the exporters, and the spans of successive turns are
+exported in batches by the BatchSpanProcessor. The hook side only imports this module
+and ``monocle_apptrace.env_config``.
+
+One daemon runs per user and project directory, since the telemetry configuration
+(workflow name, ``.env.monocle``) belongs to the project. Each connection is served in
+its own thread; the events of one session are handled one at a time in the order they
+arrive, those of different sessions concurrently. The daemon exits after
+MONOCLE_HOOK_DAEMON_IDLE_TIMEOUT seconds without events.
+
+An event is handed over in two steps: the daemon acknowledges the event, then the hook
+confirms it before the daemon handles it. When no daemon acknowledges within
+ACCEPT_TIMEOUT, the hook starts one in the background and handles its event in process,
+exactly as without the daemon; an event the hook did not confirm is dropped by the
+daemon, so no event is handled twice.
+"""
+
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl  # POSIX only
+except ImportError:
+    fcntl = None
+
+from monocle_apptrace.env_config import get_monocle_env_value
+
+logger = logging.getLogger(__name__)
+
+HOOK_DAEMON_ENV = "MONOCLE_HOOK_DAEMON"
+HOOK_DAEMON_IDLE_TIMEOUT_ENV = "MONOCLE_HOOK_DAEMON_IDLE_TIMEOUT"
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+# Waiting longer than this to connect means the daemon is stuck; the hook handles the event itself
+CONNECT_TIMEOUT = 0.5
+# Same for the acknowledgement of the event, sent before the daemon waits for the session
+ACCEPT_TIMEOUT = 1.0
+# Upper bound on one event once the daemon took it, Stop replays included
+REQUEST_TIMEOUT = 120.0
+
+_ACCEPTED = b"accepted\n"
+_CONFIRMED = b"confirmed\n"
+
+HOOK_HANDLER_MODULES = {
+    "claude": "monocle_apptrace.instrumentation.metamodel.claude_cli.event_handler",
+    "codex": "monocle_apptrace.instrumentation.metamodel.codex_cli.event_handler",
+    "copilot": "monocle_apptrace.instrumentation.metamodel.github_copilot.event_handler",
+}
+
+
+def run_handler(agent: str) -> None:
+    """Run the agent's hook event handler on the event on stdin."""
+    importlib.import_module(HOOK_HANDLER_MODULES[agent]).main()
+
+
+def daemon_enabled() -> bool:
+    if fcntl is None or not hasattr(socket, "AF_UNIX"):
+        return False
+    return (get_monocle_env_value(HOOK_DAEMON_ENV) or "").lower() in ("1", "true", "yes")
+
+
+def _daemon_dir() -> Path:
+    return Path.home() / ".monocle" / "hookd"
+
+
+def _daemon_paths(cwd: str) -> tuple:
+    """Socket and lock file of the daemon serving the project directory cwd."""
+    key = hashlib.sha1("{}\0{}".format(os.path.realpath(cwd), sys.executable).encode("utf-8")).hexdigest()[:16]
+    base = _daemon_dir() / key
+    return base.with_suffix(".sock"), base.with_suffix(".lock")
+
+
+def _send_event(agent: str, raw: str) -> Optional[dict]:
+    """Send the event to the daemon and wait for its reply.
+
+    Returns None when no daemon took the event, so the caller handles it. Once the
+    daemon acknowledged the event and the hook confirmed it, the daemon owns it: a
+    reply that does not come in time is reported as a failed hook, not handled again.
+    """
+    sock_path, _ = _daemon_paths(os.getcwd())
+    if not sock_path.exists():
+        return None
+    try:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(CONNECT_TIMEOUT)
+        conn.connect(str(sock_path))
+    except OSError as e:
+        logger.debug(f"Hook daemon not reachable: {e}")
+        return None
+    with conn:
+        try:
+            conn.settimeout(ACCEPT_TIMEOUT)
+            conn.sendall(json.dumps({"agent": agent, "event": raw}).encode("utf-8") + b"\n")
+            if _read_line(conn) != _ACCEPTED:
+                logger.debug("Hook daemon did not accept the event")
+                return None
+            conn.sendall(_CONFIRMED)
+            conn.shutdown(socket.SHUT_WR)
+        except OSError as e:
+            # socket.timeout included: the daemon is busy or stuck, the event is not confirmed
+            logger.debug(f"Could not hand the event to the hook daemon: {e}")
+            return None
+        try:
+            conn.settimeout(REQUEST_TIMEOUT)
+            reply = _read_all(conn)
+        except socket.timeout:
+            logger.debug("Timed out waiting for the hook daemon")
+            return {"exit_code": 1}
+        except OSError as e:
+            logger.debug(f"Hook daemon dropped the event: {e}")
+            return {"exit_code": 1}
+        try:
+            return json.loads(reply)
+        except ValueError:
+            logger.debug("Bad reply from the hook daemon")
+            return {"exit_code": 1}
+
+
+def _read_line(conn) -> bytes:
+    """Read one message; each side waits for the other's line before sending more."""
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        chunks.append(chunk)
+        if not chunk or chunk.endswith(b"\n"):
+            return b"".join(chunks)
+
+
+def _read_all(conn) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _start_daemon() -> None:
+    try:
+        _daemon_dir().mkdir(parents=True, exist_ok=True, mode=0o700)
+        subprocess.Popen(
+            [sys.executable, "-m", "monocle_apptrace.hook_daemon"],
+            cwd=os.getcwd(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            close_fds=True,
+        )
+    except OSError as e:
+        logger.debug(f"Could not start the hook daemon: {e}")
+
+
+def dispatch(agent: str) -> Optional[int]:
+    """Hand the hook event on stdin to the daemon.
+
+    Returns the hook's exit code after writing its output, or None when no daemon
+    took the event. In that case a daemon is started for the next events and stdin
+    is rewound so the caller can run the handler in process.
+    """
+    raw = sys.stdin.read()
+    reply = _send_event(agent, raw)
+    if reply is None:
+        _start_daemon()
+        sys.stdin = io.StringIO(raw)
+        return None
+    sys.stdout.write(reply.get("stdout", ""))
+    return reply.get("exit_code", 0)
+
+
+class _ThreadStdio:
+    """Stand-in for sys.stdin or sys.stdout routing each handler thread to its own stream."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def _stream(self):
+        return getattr(self._local, "stream", None) or self._default
+
+    def __getattr__(self, name):
+        return getattr(self._stream(), name)
+
+    def __iter__(self):
+        return iter(self._stream())
+
+
+_stdio_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _thread_stdio(stdin, stdout):
+    """Give the current thread its own sys.stdin and sys.stdout, the handlers use them."""
+    with _stdio_lock:
+        if not isinstance(sys.stdin, _ThreadStdio):
+            sys.stdin = _ThreadStdio(sys.stdin)
+        if not isinstance(sys.stdout, _ThreadStdio):
+            sys.stdout = _ThreadStdio(sys.stdout)
+        proxies = (sys.stdin, sys.stdout)
+    proxies[0]._local.stream, proxies[1]._local.stream = stdin, stdout
+    try:
+        yield
+    finally:
+        proxies[0]._local.stream = proxies[1]._local.stream = None
+
+
+_session_locks_lock = threading.Lock()
+_session_locks: dict = {}
+
+
+def _session_lock(raw_event: str) -> threading.Lock:
+    """Lock serializing the events of the session of the raw event."""
+    try:
+        event = json.loads(raw_event)
+    except ValueError:
+        event = None
+    session_id = ""
+    if isinstance(event, dict):
+        session_id = event.get("session_id") or event.get("sessionId") or ""
+    with _session_locks_lock:
+        return _session_locks.setdefault(str(session_id), threading.Lock())
+
+
+def _handle_request(request: dict) -> dict:
+    agent = request.get("agent")
+    if agent not in HOOK_HANDLER_MODULES:
+        return {"exit_code": 1}
+    out = io.StringIO()
+    exit_code = 0
+    raw_event = request.get("event", "")
+    with _session_lock(raw_event), _thread_stdio(io.StringIO(raw_event), out):
+        try:
+            run_handler(agent)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            logger.debug(f"Hook handler for {agent} failed: {e}")
+            exit_code = 1
+    return {"stdout": out.getvalue(), "exit_code": exit_code}
+
+
+def _serve_connection(conn) -> None:
+    with conn:
+        conn.settimeout(ACCEPT_TIMEOUT)
+        try:
+            request = json.loads(_read_line(conn))
+            conn.sendall(_ACCEPTED)
+            if _read_line(conn) != _CONFIRMED:
+                # the hook gave up waiting and handles the event itself
+                return
+        except (OSError, ValueError) as e:
+            logger.debug(f"Bad hook daemon request: {e}")
+            return
+        reply = _handle_request(request if isinstance(request, dict) else {})
+        try:
+            conn.settimeout(REQUEST_TIMEOUT)
+            conn.sendall(json.dumps(reply).encode("utf-8"))
+        except OSError as e:
+            logger.debug(f"Could not reply to the hook: {e}")
+
+
+def serve(idle_timeout: Optional[float] = None) -> None:
+    """Serve the hook events of the current directory until idle_timeout seconds pass without one.
+
+    Returns at once when a daemon already serves the directory.
+    """
+    if idle_timeout is None:
+        try:
+            idle_timeout = float(get_monocle_env_value(HOOK_DAEMON_IDLE_TIMEOUT_ENV) or DEFAULT_IDLE_TIMEOUT)
+        except ValueError:
+            idle_timeout = DEFAULT_IDLE_TIMEOUT
+    _daemon_dir().mkdir(parents=True, exist_ok=True, mode=0o700)
+    sock_path, lock_path = _daemon_paths(os.getcwd())
+    lock_fh = lock_path.open("a")
+    try:
+        fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_fh.close()
+        return
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    workers = []
+    try:
+        with contextlib.suppress(FileNotFoundError):
+            sock_path.unlink()
+        server.bind(str(sock_path))
+        os.chmod(sock_path, 0o600)
+        server.listen(16)
+        server.settimeout(idle_timeout)
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                workers = [worker for worker in workers if worker.is_alive()]
+                if workers:
+                    # still handling events, not idle
+                    continue
+                break
+            worker = threading.Thread(target=_serve_connection, args=(conn,), daemon=True)
+            worker.start()
+            workers.append(worker)
+    finally:
+        # unlinked first so that no hook connects while the server closes
+        with contextlib.suppress(OSError):
+            sock_path.unlink()
+        server.close()
+        for worker in workers:
+            worker.join(REQUEST_TIMEOUT)
+        lock_fh.close()
+
+
+def main() -> None:
+    import signal
+    # exit through sys.exit so that atexit flushes the pending spans
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    serve()
+
+
+if __name__ == "__main__":
+    main()
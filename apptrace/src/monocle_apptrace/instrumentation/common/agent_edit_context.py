@@ -1,4 +1,5 @@
 """Git context capture for agentic CLI metamodels."""
+import contextlib
 import difflib
 import hashlib
 import json
@@ -6,9 +7,17 @@ import logging
 import os
 import re
 import subprocess
+import time
+import zlib
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl  # POSIX only
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +25,17 @@ _TIMEOUT = 2.0
 _MAX_UNTRACKED_BYTES = 1_000_000
 _MAX_SNAPSHOT_FILE_BYTES = 1_000_000
 _MAX_SNAPSHOT_FILES = 5000
+_TRUNCATED_MARKER = "__snapshot_truncated__"
+# Files changed this recently may change again within the same mtime tick, so their
+# hash is not cached (the "racy git" problem).
+_RACY_MTIME_NS = 2_000_000_000
+# Below this many files to read, hashing in a thread pool costs more than it saves
+_PARALLEL_HASH_MIN_FILES = 32
+SNAPSHOT_HASH_WORKERS_ENV = "MONOCLE_SNAPSHOT_HASH_WORKERS"
+# Unreferenced blobs are pruned at session cleanup and at most this often at turn start
+_PRUNE_INTERVAL_SECONDS = 60 * 60
+# Baselines and stat caches not written for this long belong to sessions that never cleaned up
+_STALE_CACHE_SECONDS = 7 * 24 * 60 * 60
 _SKIP_DIRS = {
     "venv",
     "node_modules",
@@ -40,10 +60,6 @@ def _is_state_path(path):
     return path.startswith(".monocle/") or "/.monocle/" in path
 
 
-def _is_hidden_path(path: Union[str, Path]) -> bool:
-    return any(part.startswith(".") for part in Path(path).parts)
-
-
 def _repo_name(url):
     if not url:
         return ""
@@ -207,49 +223,176 @@ def _line_delta(before: str, after: str) -> Tuple[int, int]:
     return added, removed
 
 
-def _workspace_snapshot(root: Optional[Path]):
+def _iter_workspace_files(root: Path) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Yield (relative path, path, stat) of the non-hidden regular files under root."""
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, prefix = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in _SKIP_DIRS:
+                                subdirs.append((entry.path, prefix + entry.name + "/"))
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        rel = prefix + entry.name
+                        if _is_state_path(rel):
+                            continue
+                        yield rel, entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+
+def _stat_key(stat: os.stat_result) -> List[int]:
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def _stat_cache_file(cache_dir: Path, root: Path) -> Path:
+    key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"stat_{key}.json"
+
+
+def _load_stat_cache(cache_dir: Path, root: Path) -> Dict[str, list]:
+    try:
+        data = json.loads(_stat_cache_file(cache_dir, root).read_text())
+    except (OSError, ValueError):
+        return {}
+    return data.get("files", {}) if isinstance(data, dict) and data.get("root") == str(root) else {}
+
+
+def _save_stat_cache(cache_dir: Path, root: Path, entries: Dict[str, list]) -> None:
+    f = _stat_cache_file(cache_dir, root)
+    tmp = f.with_name(f"{f.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps({"root": str(root), "files": entries}))
+        os.replace(tmp, f)
+    except OSError as e:
+        logger.debug("snapshot stat cache write failed: %s", e)
+        tmp.unlink(missing_ok=True)
+
+
+def _blob_path(cache_dir: Path, digest: str) -> Path:
+    return cache_dir / "blobs" / digest[:2] / digest
+
+
+def _write_blob(cache_dir: Path, digest: str, data: bytes) -> None:
+    path = _blob_path(cache_dir, digest)
+    if path.exists():
+        return
+    tmp = path.with_name(f"{digest}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(zlib.compress(data, 1))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug("snapshot blob write failed: %s", e)
+        tmp.unlink(missing_ok=True)
+
+
+def _read_blob_text(cache_dir: Path, digest: str) -> Optional[str]:
+    try:
+        data = zlib.decompress(_blob_path(cache_dir, digest).read_bytes())
+    except (OSError, zlib.error):
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("utf-8", errors="ignore")
+
+
+def _hash_file(path: str, cache_dir: Optional[Path]) -> Optional[Tuple[str, str]]:
+    """Hash a file and store its content in the blob store when it is text. Returns (hash, kind)."""
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    if _is_binary(data):
+        return digest, "binary"
+    if cache_dir is not None:
+        _write_blob(cache_dir, digest, data)
+    return digest, "text"
+
+
+def _hash_workers() -> int:
+    from monocle_apptrace.instrumentation.common.utils import get_env_int, get_monocle_env_value
+    return get_env_int(SNAPSHOT_HASH_WORKERS_ENV, min(8, os.cpu_count() or 1), lookup=get_monocle_env_value)
+
+
+def _workspace_snapshot(root: Optional[Path], cache_dir: Optional[Path] = None):
+    """Map the relative path of each workspace file to its size, content hash and kind.
+
+    With a cache_dir, files whose size, mtime and inode are unchanged since the
+    previous snapshot of root are not read again, and the content of text files
+    is kept in a content-addressed blob store there so that line deltas can be
+    computed later without inlining file text in the turn baseline.
+    """
     if not root:
         return {}
+    cache = _load_stat_cache(cache_dir, root) if cache_dir is not None else {}
     files = {}
+    stats = {}
+    to_hash = []
     scanned = 0
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS and not d.startswith(".")]
-        base = Path(dirpath)
-        for name in filenames:
-            if name.startswith("."):
-                continue
-            path = base / name
-            try:
-                if path.is_symlink() or not path.is_file():
-                    continue
-                rel = path.relative_to(root).as_posix()
-                if _is_state_path(rel) or _is_hidden_path(rel):
-                    continue
-                stat = path.stat()
-                if stat.st_size > _MAX_SNAPSHOT_FILE_BYTES:
-                    files[rel] = {"size": stat.st_size, "hash": "", "text": None}
-                    continue
-                data = path.read_bytes()
-            except OSError:
-                continue
-            scanned += 1
-            if scanned > _MAX_SNAPSHOT_FILES:
-                files["__snapshot_truncated__"] = {"size": 0, "hash": "", "text": None}
-                return files
-            digest = hashlib.sha256(data).hexdigest()
-            if _is_binary(data):
-                files[rel] = {"size": stat.st_size, "hash": digest, "text": None}
-                continue
-            try:
-                text = data.decode("utf-8")
-            except UnicodeDecodeError:
-                text = data.decode("utf-8", errors="ignore")
-            files[rel] = {"size": stat.st_size, "hash": digest, "text": text}
+    for rel, path, stat in _iter_workspace_files(root):
+        if stat.st_size > _MAX_SNAPSHOT_FILE_BYTES:
+            files[rel] = {"size": stat.st_size, "hash": "", "kind": "large"}
+            continue
+        scanned += 1
+        if scanned > _MAX_SNAPSHOT_FILES:
+            files[_TRUNCATED_MARKER] = {"size": 0, "hash": "", "kind": "large"}
+            break
+        key = _stat_key(stat)
+        stats[rel] = key
+        cached = cache.get(rel)
+        if cached and cached[:3] == key:
+            files[rel] = {"size": stat.st_size, "hash": cached[3], "kind": cached[4]}
+        else:
+            to_hash.append((rel, path))
+
+    workers = _hash_workers() if len(to_hash) >= _PARALLEL_HASH_MIN_FILES else 1
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            hashed = list(pool.map(lambda item: _hash_file(item[1], cache_dir), to_hash))
+    else:
+        hashed = [_hash_file(path, cache_dir) for _, path in to_hash]
+    for (rel, _), result in zip(to_hash, hashed):
+        if result is None:
+            stats.pop(rel, None)
+            continue
+        files[rel] = {"size": stats[rel][0], "hash": result[0], "kind": result[1]}
+
+    if cache_dir is not None:
+        racy_after = time.time_ns() - _RACY_MTIME_NS
+        _save_stat_cache(cache_dir, root, {
+            rel: key + [files[rel]["hash"], files[rel]["kind"]]
+            for rel, key in stats.items() if key[1] < racy_after
+        })
     return files
 
 
-def _workspace_changes(baseline_files, current_files):
-    paths = sorted((set(baseline_files) | set(current_files)) - {"__snapshot_truncated__"})
+def _entry_text(entry, read_blob: Optional[Callable[[str], Optional[str]]]):
+    if not entry:
+        return ""
+    if "text" in entry:  # baselines written by earlier versions inline the text
+        return entry["text"]
+    if entry.get("kind") != "text" or read_blob is None:
+        return None
+    return read_blob(entry["hash"])
+
+
+def _workspace_changes(baseline_files, current_files, read_blob: Optional[Callable[[str], Optional[str]]] = None):
+    paths = sorted((set(baseline_files) | set(current_files)) - {_TRUNCATED_MARKER})
     changed, added, removed = [], 0, 0
     for path in paths:
         before = baseline_files.get(path)
@@ -259,8 +402,8 @@ def _workspace_changes(baseline_files, current_files):
         if before and after and before.get("hash") == after.get("hash"):
             continue
         changed.append(path)
-        before_text = before.get("text") if before else ""
-        after_text = after.get("text") if after else ""
+        before_text = _entry_text(before, read_blob)
+        after_text = _entry_text(after, read_blob)
         if before_text is None or after_text is None:
             continue
         if before is None:
@@ -274,6 +417,63 @@ def _workspace_changes(baseline_files, current_files):
     return {"files": changed, "added": added, "removed": removed}
 
 
+def _prune_blobs(cache_dir: Path, keep: set) -> None:
+    blobs = cache_dir / "blobs"
+    if not blobs.exists():
+        return
+    for shard in blobs.iterdir():
+        try:
+            for blob in shard.iterdir():
+                if blob.name not in keep:
+                    blob.unlink(missing_ok=True)
+        except OSError as e:
+            logger.debug("snapshot blob pruning failed: %s", e)
+
+
+def _prune_stat_caches(cache_dir: Path, keep: set, stale_before: float) -> None:
+    """Drop the stat caches of stale workspaces and the text entries whose blob is pruned,
+    so that a cache hit never refers to a missing blob."""
+    for f in cache_dir.glob("stat_*.json"):
+        try:
+            if f.stat().st_mtime < stale_before:
+                f.unlink(missing_ok=True)
+                continue
+            data = json.loads(f.read_text())
+            entries = data.get("files", {})
+            kept = {rel: entry for rel, entry in entries.items() if entry[4] != "text" or entry[3] in keep}
+        except (OSError, ValueError, AttributeError, IndexError, TypeError) as e:
+            logger.debug("snapshot stat cache pruning failed for %s: %s", f, e)
+            f.unlink(missing_ok=True)
+            continue
+        if len(kept) != len(entries):
+            _save_stat_cache(cache_dir, Path(data["root"]), kept)
+
+
+@contextlib.contextmanager
+def _cache_lock(cache_dir: Path, exclusive: bool = False):
+    """Lock the blob store: shared while a snapshot writes and reads blobs, exclusive to prune.
+
+    The exclusive lock is not waited for. Yields whether the lock is held; without
+    flock (Windows) only the shared lock is reported held, so blobs are not pruned.
+    """
+    if fcntl is None:
+        yield not exclusive
+        return
+    try:
+        fh = (cache_dir / "lock").open("a")
+    except OSError as e:
+        logger.debug("snapshot cache lock unavailable: %s", e)
+        yield not exclusive
+        return
+    with fh:
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB if exclusive else fcntl.LOCK_SH)
+        except OSError:
+            yield False
+            return
+        yield True
+
+
 def apply_to_span(span, kwargs):
     """Set scope.* attributes directly on the turn span only.
     Call from pre_task_processing on the handle_turn wrap site."""
@@ -289,6 +489,14 @@ class GitContext:
     def _baseline_file(self, session_id):
         return self._sessions_dir() / f"{self._prefix}_{session_id}.turn_baseline.json"
 
+    def _cache_dir(self):
+        cache_dir = self._sessions_dir() / ".workspace_cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cache_dir
+
+    def _snapshot_files(self, root):
+        return _workspace_snapshot(root, self._cache_dir())
+
     def capture_turn_baseline(self, session_id, cwd: Optional[Union[str, Path]] = None):
         snap = _snapshot(cwd)
         workspace_root = _resolve_workspace_root(cwd)
@@ -298,16 +506,20 @@ class GitContext:
         f = self._baseline_file(session_id)
         try:
             f.parent.mkdir(parents=True, exist_ok=True)
-            f.write_text(json.dumps({
-                "head_sha": snap.get("head_sha", "") if snap else "",
-                "branch": snap.get("branch", "") if snap else "",
-                "repo_root": snap.get("repo_root", "") if snap else "",
-                "workspace_root": str(root) if root else "",
-                "files": _workspace_snapshot(root),
-                "untracked": _untracked_meta(Path(snap["repo_root"])) if snap and snap.get("repo_root") else {},
-            }))
+            # the baseline refers to the blobs of the snapshot, written before a prune can run
+            with _cache_lock(self._cache_dir()):
+                f.write_text(json.dumps({
+                    "head_sha": snap.get("head_sha", "") if snap else "",
+                    "branch": snap.get("branch", "") if snap else "",
+                    "repo_root": snap.get("repo_root", "") if snap else "",
+                    "workspace_root": str(root) if root else "",
+                    "files": self._snapshot_files(root),
+                    "untracked": _untracked_meta(Path(snap["repo_root"])) if snap and snap.get("repo_root") else {},
+                }))
         except Exception as e:
             logger.debug("turn baseline capture failed: %s", e)
+            return
+        self._prune_blobs(force=False)
 
     def _load_baseline(self, session_id):
         f = self._baseline_file(session_id)
@@ -364,7 +576,7 @@ class GitContext:
                 baseline = {
                     "head_sha": current.get("head_sha", "") if current else "",
                     "branch": current.get("branch", "") if current else "",
-                    "files": _workspace_snapshot(repo_root),
+                    "files": self._snapshot_files(repo_root),
                     "untracked": {},
                 }
 
@@ -378,7 +590,13 @@ class GitContext:
 
             base_sha = baseline.get("head_sha", "")
             if baseline.get("files"):
-                diff = _workspace_changes(baseline.get("files", {}), _workspace_snapshot(repo_root))
+                cache_dir = self._cache_dir()
+                with _cache_lock(cache_dir):
+                    diff = _workspace_changes(
+                        baseline.get("files", {}),
+                        _workspace_snapshot(repo_root, cache_dir),
+                        lambda digest: _read_blob_text(cache_dir, digest),
+                    )
             else:
                 diff = {"files": [], "added": 0, "removed": 0}
                 if base_sha:
@@ -398,3 +616,44 @@ class GitContext:
 
     def cleanup(self, session_id):
         self._baseline_file(session_id).unlink(missing_ok=True)
+        self._prune_blobs()
+
+    def _prune_blobs(self, force=True):
+        """Drop the blobs no live turn baseline refers to.
+
+        Blobs live as long as a baseline refers to them: the stat cache entries of
+        pruned text blobs are dropped with them, and baselines and stat caches left
+        by sessions that never cleaned up are removed once stale. Unless forced, this
+        runs at most every _PRUNE_INTERVAL_SECONDS. Skipped while another process
+        snapshots the workspace.
+        """
+        cache_dir = self._sessions_dir() / ".workspace_cache"
+        if not cache_dir.exists():
+            return
+        marker = cache_dir / "pruned"
+        now = time.time()
+        if not force:
+            try:
+                if now - marker.stat().st_mtime < _PRUNE_INTERVAL_SECONDS:
+                    return
+            except OSError:
+                pass
+        with _cache_lock(cache_dir, exclusive=True) as locked:
+            if not locked:
+                return
+            stale_before = now - _STALE_CACHE_SECONDS
+            keep = set()
+            for f in self._sessions_dir().glob("*.turn_baseline.json"):
+                try:
+                    if f.stat().st_mtime < stale_before:
+                        f.unlink(missing_ok=True)
+                        continue
+                    keep.update(entry.get("hash", "") for entry in json.loads(f.read_text()).get("files", {}).values())
+                except (OSError, ValueError, AttributeError) as e:
+                    # a baseline that cannot be read may still refer to any blob
+                    logger.debug("snapshot blob pruning skipped: %s", e)
+                    return
+            _prune_stat_caches(cache_dir, keep, stale_before)
+            _prune_blobs(cache_dir, keep)
+            with contextlib.suppress(OSError):
+                marker.touch()
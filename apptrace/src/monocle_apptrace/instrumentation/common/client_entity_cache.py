@@ -0,0 +1,113 @@
+"""Per client instance cache of the entity attributes resolved by the inference accessors.
+
+A long-lived LLM client serves many calls, and the accessors of its inference spans
+resolve the same endpoint from it on every call by probing attributes and parsing its
+base URL. A helper decorated with ``cached_per_client`` computes its value once per
+client instance and returns it until one of the attributes it watches changes. Watched
+attributes should be the plain attributes the value is derived from rather than
+properties computing it. Entries are keyed by the identity of the instance and dropped
+when the instance is garbage collected; instances that do not support weak references
+are not cached.
+"""
+
+import logging
+import threading
+import weakref
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# id(instance) -> (weak reference to the instance, {helper: (fingerprint, value)})
+_entries: Dict[int, Tuple[weakref.ref, dict]] = {}
+_lock = threading.Lock()
+
+
+def _drop_entry(key: int, ref: weakref.ref) -> None:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] is ref:
+            del _entries[key]
+
+
+def _client_values(instance) -> Optional[dict]:
+    key = id(instance)
+    entry = _entries.get(key)
+    if entry is not None and entry[0]() is instance:
+        return entry[1]
+    try:
+        ref = weakref.ref(instance, lambda r, key=key: _drop_entry(key, r))
+    except TypeError:
+        return None
+    values = {}
+    with _lock:
+        _entries[key] = (ref, values)
+    return values
+
+
+def _resolve(instance, path: Tuple[str, ...]):
+    value = instance
+    for name in path:
+        value = getattr(value, name, _MISSING)
+        if value is _MISSING:
+            break
+    return value
+
+
+def _resolve_guarded(instance, path: Tuple[str, ...]):
+    try:
+        return _resolve(instance, path)
+    except Exception:
+        return _MISSING
+
+
+def cached_per_client(*watched: str) -> Callable:
+    """Cache the value of a single argument helper per client instance.
+
+    watched are the attribute paths of the instance the value is derived from, such as
+    ``"_client._base_url"``; the cached value is recomputed when any of them is set to a
+    different, unequal value. Exceptions raised by the helper are not cached.
+
+    A cache hit costs a dict lookup and a getattr per watched attribute, a few hundred
+    nanoseconds: only decorate helpers that cost more than that, as measured by
+    tests/benchmarks/bench_client_entity_cache.py.
+    """
+    paths = tuple(tuple(path.split(".")) for path in watched)
+
+    def fingerprint(instance) -> tuple:
+        try:
+            return tuple([_resolve(instance, path) for path in paths])
+        except Exception:
+            # a property raising something other than AttributeError
+            return tuple([_resolve_guarded(instance, path) for path in paths])
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(instance):
+            values = _client_values(instance)
+            if values is None:
+                return func(instance)
+            current = fingerprint(instance)
+            cached = values.get(func)
+            if cached is not None:
+                try:
+                    # tuple equality compares by identity first, then ==, so a new but
+                    # equal string or URL read from a property is still a hit
+                    if cached[0] == current:
+                        return cached[1]
+                except Exception:
+                    pass
+            value = func(instance)
+            values[func] = (current, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def clear_client_entity_cache() -> None:
+    with _lock:
+        _entries.clear()
@@ -103,6 +103,7 @@ SCOPE_METHOD_FILE = "monocle_scopes.json"
 CUSTOM_INSTRUMENTATION_FILE_NAME = "custom_instrumentation.yaml"
 CUSTOM_INSTRUMENTATION_FILE_PATH_ENV = "MONOCLE_CUSTOM_INSTRUMENTATION_FILE_PATH"
 WORKFLOW_NAME_ENV = "MONOCLE_WORKFLOW_NAME"
+LAZY_INSTRUMENTATION_ENV = "MONOCLE_LAZY_INSTRUMENTATION"
 SCOPE_CONFIG_PATH = "MONOCLE_SCOPE_CONFIG_PATH"
 TRACE_PROPOGATION_URLS = "MONOCLE_TRACE_PROPAGATATION_URLS"
 WORKFLOW_TYPE_KEY = "monocle.workflow_type"
@@ -111,6 +112,15 @@ WORKFLOW_TYPE_GENERIC = "workflow.generic"
 MONOCLE_SDK_VERSION = "monocle_apptrace.version"
 MONOCLE_SDK_LANGUAGE = "monocle_apptrace.language"
 MONOCLE_DETECTED_SPAN_ERROR = "monocle_apptrace.detected_span_error"
+MONOCLE_PAYLOAD_DROPPED_BYTES = "monocle_apptrace.payload_dropped_bytes"
+# Streaming inference timing, set on the span when the stream completes
+STREAM_CHUNK_COUNT = "stream.chunk_count"
+STREAM_TIME_TO_FIRST_TOKEN_MS = "stream.time_to_first_token_ms"
+STREAM_INTER_CHUNK_P50_MS = "stream.inter_chunk_p50_ms"
+STREAM_INTER_CHUNK_P90_MS = "stream.inter_chunk_p90_ms"
+STREAM_INTER_CHUNK_P99_MS = "stream.inter_chunk_p99_ms"
+STREAM_INTER_CHUNK_MAX_MS = "stream.inter_chunk_max_ms"
+STREAM_TOKENS_PER_SECOND = "stream.tokens_per_second"
 HTTP_SUCCESS_CODES = ("200", "201", "202", "204", "205", "206")
 CHILD_ERROR_CODE = "child.error.code"
 HEALTH_RESET_COUNTER = 100
@@ -283,6 +293,10 @@ TRACE_RETURN_REQUEST_HEADER = "x-monocle-retrieve-traces"
 TRACE_RETURN_RESPONSE_HEADER = "x-monocle-traces"
 TRACE_RETURN_SCOPE_NAME = "monocle_trace_return"
 TRACE_RETURN_VERSION = "v1"
+# Bounds of the spans buffered until their response is sent
+MONOCLE_TRACE_RETURN_TTL_ENV = "MONOCLE_TRACE_RETURN_TTL_SECONDS"
+MONOCLE_TRACE_RETURN_MAX_SPANS_ENV = "MONOCLE_TRACE_RETURN_MAX_SPANS"
+MONOCLE_TRACE_RETURN_MAX_BYTES_ENV = "MONOCLE_TRACE_RETURN_MAX_BYTES"
 
 # Trace-retrieval authorization
 MONOCLE_TRACE_RETRIEVAL_CALLBACK_ENV = "MONOCLE_TRACE_RETRIEVAL_CALLBACK"
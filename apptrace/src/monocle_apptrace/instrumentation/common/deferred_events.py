@@ -0,0 +1,180 @@
+"""Optionally defer the evaluation of span event accessors until the span is exported.
+
+The ``data.input``, ``data.output`` and ``metadata`` accessors extract messages and serialize
+inputs and outputs, which is the bulk of the instrumentation cost on the request thread.
+When deferred events are enabled, hydration only snapshots the accessor arguments and adds
+the event with lazily evaluated attributes. The accessors run on the first read of the
+attributes, normally on the exporter worker thread right before the span is exported.
+"""
+
+import logging
+import os
+from threading import Lock
+from typing import Any, Optional
+
+from opentelemetry.attributes import BoundedAttributes, _clean_attribute_value
+from opentelemetry.sdk.trace import Event, Span
+from opentelemetry.trace.status import Status, StatusCode
+
+from monocle_apptrace.instrumentation.common.constants import MONOCLE_DETECTED_SPAN_ERROR
+from monocle_apptrace.instrumentation.common.message_delta import apply_message_delta, record_message_digests
+from monocle_apptrace.instrumentation.common.payload_budget import apply_payload_budget
+from monocle_apptrace.instrumentation.common.utils import MonocleSpanException, parse_bool_setting
+
+logger = logging.getLogger(__name__)
+
+DEFERRED_EVENTS_ENV = "MONOCLE_DEFERRED_EVENTS"
+DEFERRED_EVENT_NAMES = ("data.input", "data.output", "metadata")
+# Nesting depth of list/dict/tuple containers copied when snapshotting accessor arguments,
+# enough for chat messages (messages -> message -> content parts -> part).
+MAX_SNAPSHOT_DEPTH = 6
+_deferred_events_enabled = False
+
+
+def configure_deferred_events(setting: Any = None) -> bool:
+    """Resolve true/false configuration and return the enabled state."""
+    global _deferred_events_enabled
+
+    value = setting
+    if value is None:
+        value = os.environ.get(DEFERRED_EVENTS_ENV, "false")
+
+    enabled = parse_bool_setting(DEFERRED_EVENTS_ENV, value)
+
+    _deferred_events_enabled = enabled
+    return enabled
+
+
+def is_deferred_events_enabled() -> bool:
+    return _deferred_events_enabled
+
+
+def snapshot_value(value, depth: int = MAX_SNAPSHOT_DEPTH):
+    """Copy the list/dict/tuple containers of a value so that later mutations by the application
+    (e.g. appending to a conversation history) don't leak into deferred events. Other objects are
+    kept by reference."""
+    if depth <= 0:
+        return value
+    value_type = type(value)
+    if value_type is list:
+        return [snapshot_value(item, depth - 1) for item in value]
+    if value_type is dict:
+        return {key: snapshot_value(item, depth - 1) for key, item in value.items()}
+    if value_type is tuple:
+        return tuple(snapshot_value(item, depth - 1) for item in value)
+    return value
+
+
+def snapshot_arguments(arguments: dict) -> dict:
+    snapshot = dict(arguments)
+    for key in ("args", "kwargs", "result"):
+        snapshot[key] = snapshot_value(arguments.get(key))
+    return snapshot
+
+
+def _set_span_error(span, message: str) -> None:
+    if span.end_time is None:
+        span.set_status(StatusCode.ERROR, message)
+        span.set_attribute(MONOCLE_DETECTED_SPAN_ERROR, True)
+    else:
+        # The span was already handed to the span processors, update the ended span in place.
+        span._status = Status(StatusCode.ERROR, message)
+        span._attributes._dict[MONOCLE_DETECTED_SPAN_ERROR] = True
+
+
+class DeferredEventAttributes(BoundedAttributes):
+    """Event attributes evaluated by the event accessors on first read.
+
+    The accessors run once, under a lock, whichever thread reads the attributes first.
+    """
+
+    def __init__(self, event_name: str, accessors: tuple, arguments: dict, maxlen: Optional[int] = None,
+                 max_value_len: Optional[int] = None):
+        self._event_name = event_name
+        self._resolve_lock = Lock()
+        self._pending = (accessors, arguments)
+        super().__init__(maxlen=maxlen, max_value_len=max_value_len, immutable=True)
+
+    @property
+    def _dict(self):
+        if self._pending is not None:
+            self.resolve()
+        return self._resolved
+
+    @_dict.setter
+    def _dict(self, value):
+        self._resolved = value
+
+    def __repr__(self) -> str:
+        self.resolve()
+        return super().__repr__()
+
+    def __deepcopy__(self, memo):
+        # the base class reads _dict holding _lock, which resolving takes as well
+        self.resolve()
+        return super().__deepcopy__(memo)
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._pending is None
+
+    def resolve(self, span=None) -> None:
+        """Run the event accessors. Errors reported by the accessors are recorded on ``span``,
+        by default the span the event was added to."""
+        with self._resolve_lock:
+            if self._pending is None:
+                return
+            accessors, arguments = self._pending
+            event_attributes = {}
+            error_message = None
+            for attribute_key, accessor in accessors:
+                try:
+                    try:
+                        result = accessor(arguments)
+                    except MonocleSpanException as e:
+                        error_message = e.message
+                        result = e.get_err_code()
+                    if result and isinstance(result, dict):
+                        result = dict((key, value) for key, value in result.items() if value is not None)
+                    if result and isinstance(result, (int, str, list, dict)):
+                        if attribute_key is not None:
+                            event_attributes[attribute_key] = result
+                        else:
+                            event_attributes.update(result)
+                except Exception as e:
+                    logger.debug(f"Error evaluating deferred accessor for attribute '{attribute_key}': {e}")
+            input_delta = apply_message_delta(arguments.get("span"), self._event_name, event_attributes)
+            apply_payload_budget(arguments.get("span"), self._event_name, event_attributes)
+            record_message_digests(arguments.get("span"), input_delta, event_attributes)
+            with self._lock:
+                for key, value in event_attributes.items():
+                    if self.maxlen is not None and len(self._resolved) >= self.maxlen:
+                        self.dropped += 1
+                        continue
+                    try:
+                        self._resolved[key] = _clean_attribute_value(value, self.max_value_len)
+                    except Exception as e:
+                        logger.debug(f"Error cleaning deferred event attribute '{key}': {e}")
+            if error_message is not None:
+                try:
+                    _set_span_error(span if span is not None else arguments.get("span"), error_message)
+                except Exception as e:
+                    logger.debug(f"Error recording deferred accessor error on span: {e}")
+            # drop the references to the application objects once the accessors ran
+            self._pending = None
+
+
+def add_deferred_event(span: Span, name: str, accessors: tuple, arguments: dict,
+                       timestamp: Optional[int] = None) -> None:
+    attributes = DeferredEventAttributes(name, accessors, arguments,
+                                         maxlen=span._limits.max_event_attributes,
+                                         max_value_len=span._limits.max_attribute_length)
+    span._add_event(Event(name=name, attributes=attributes, timestamp=timestamp))
+
+
+def resolve_deferred_events(span) -> None:
+    """Evaluate the deferred events of a finished span, recording accessor errors on it."""
+    for event in getattr(span, "_events", None) or ():
+        attributes = event.attributes
+        if isinstance(attributes, DeferredEventAttributes) and not attributes.is_resolved:
+            attributes.resolve(span)
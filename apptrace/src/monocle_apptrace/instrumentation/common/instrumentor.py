@@ -14,20 +14,34 @@ from opentelemetry.sdk.trace import Span, TracerProvider, SynchronousMultiSpanPr
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanProcessor
 from opentelemetry.sdk.trace.export import SpanExporter
 from opentelemetry.trace import get_tracer
-from wrapt import wrap_function_wrapper
+from wrapt import register_post_import_hook, wrap_function_wrapper
 from monocle_apptrace.exporters.monocle_exporters import (
     get_monocle_exporter,
     get_monocle_exporter_names,
 )
+from monocle_apptrace.exporters.deferred_events_exporter import DeferredEventsSpanExporter
+from monocle_apptrace.exporters.tail_sampling_exporter import TailSamplingSpanExporter
 from monocle_apptrace.instrumentation.common.genai_semantic_conventions import (
     configure_otel_genai_semconv,
 )
+from monocle_apptrace.instrumentation.common.deferred_events import configure_deferred_events
+from monocle_apptrace.instrumentation.common.json_codec import configure_json_backend
+from monocle_apptrace.instrumentation.common.message_delta import configure_message_delta
+from monocle_apptrace.instrumentation.common.payload_budget import configure_payload_budget
+from monocle_apptrace.instrumentation.common.resource_attributes import (
+    configure_resource_attributes,
+    is_resource_attributes_enabled,
+    monocle_resource_attributes,
+    resource_has_monocle_attributes,
+)
+from monocle_apptrace.instrumentation.common.sampling import configure_head_sampling, configure_tail_sampling
 from monocle_apptrace.instrumentation.common.span_handler import SpanHandler, NonFrameworkSpanHandler
 from monocle_apptrace.instrumentation.common.wrapper_method import (
-    DEFAULT_METHODS_LIST,
     WrapperMethod,
     MONOCLE_SPAN_HANDLERS
 )
+from monocle_apptrace.instrumentation.common.metamodel_registry import SpanHandlerRegistry, default_methods
+from monocle_apptrace.instrumentation.common.method_plan import compile_method_plan, remove_method_plan
 from monocle_apptrace.instrumentation.common.wrapper import scope_wrapper, ascope_wrapper, monocle_wrapper, amonocle_wrapper, task_wrapper, atask_wrapper
 from monocle_apptrace.instrumentation.common.utils import (
     load_scopes,
@@ -35,10 +49,11 @@ from monocle_apptrace.instrumentation.common.utils import (
     set_workflow_name,
     build_setup_signature,
     check_duplicate_setup,
+    parse_bool_setting,
 )
 from monocle_apptrace.instrumentation.common.constants import ( 
     MONOCLE_INSTRUMENTOR, MONOCLE_WORKFLOW_NAME_KEY, CUSTOM_INSTRUMENTATION_FILE_NAME,
-    CUSTOM_INSTRUMENTATION_FILE_PATH_ENV, WORKFLOW_NAME_ENV
+    CUSTOM_INSTRUMENTATION_FILE_PATH_ENV, WORKFLOW_NAME_ENV, LAZY_INSTRUMENTATION_ENV
 )
 from monocle_apptrace.instrumentation.common.custom_span_processor import build_custom_span_processor
 from functools import wraps
@@ -106,21 +121,24 @@ class MonocleInstrumentor(BaseInstrumentor):
     instrumented_method_list: list[object] = []
     handlers:Dict[str,SpanHandler] = None # dict of handlers
     union_with_default_methods: bool = False
+    lazy_instrumentation: bool = False
 
     def __init__(
             self,
             handlers,
             user_wrapper_methods: list[Union[dict,WrapperMethod]] = None,
             exporters: list[SpanExporter] = None,
-            union_with_default_methods: bool = True
+            union_with_default_methods: bool = True,
+            lazy_instrumentation: bool = False
             ) -> None:
         self.user_wrapper_methods = user_wrapper_methods or []
+        self.lazy_instrumentation = lazy_instrumentation
+        # package -> method configs waiting for the package to be imported
+        self._pending_imports: Dict[str, list] = {}
         self.handlers = handlers
         self.exporters = exporters
         if self.handlers is not None:
-            for key, val in MONOCLE_SPAN_HANDLERS.items():
-                if key not in self.handlers:
-                    self.handlers[key] = val
+            self.handlers = SpanHandlerRegistry(self.handlers, fallback=MONOCLE_SPAN_HANDLERS)
         else:
             self.handlers = MONOCLE_SPAN_HANDLERS
         self.union_with_default_methods = union_with_default_methods
@@ -158,7 +176,8 @@ class MonocleInstrumentor(BaseInstrumentor):
 
         final_method_list = []
         if self.union_with_default_methods is True:
-            final_method_list= final_method_list + DEFAULT_METHODS_LIST
+            # only the metamodels of installed packages are imported
+            final_method_list= final_method_list + default_methods()
 
         for method in self.user_wrapper_methods:
             if isinstance(method, dict):
@@ -176,42 +195,73 @@ class MonocleInstrumentor(BaseInstrumentor):
                 method['wrapper_method'] = scope_wrapper
             final_method_list.append(method)
         
-        for method_config in final_method_list:
-            target_package = method_config.get("package", None)
-            target_object = method_config.get("object", None)
-            target_method = method_config.get("method", None)
-            wrapped_by = method_config.get("wrapper_method", None)
-            #get the requisite handler or default one
-            handler_key = method_config.get("span_handler",'default')
-            try:
-                handler =  self.handlers.get(handler_key)
-                if not handler:
-                    logger.warning("incorrect or empty handler falling back to default handler")
-                    handler = self.handlers.get('default')
-                handler.set_instrumentor(self.get_instrumentor(tracer))
-                wrap_function_wrapper(
-                    target_package,
-                    f"{target_object}.{target_method}" if target_object else target_method,
-                    wrapped_by(tracer, handler, method_config),
-                )
-                self.instrumented_method_list.append(method_config)
-            except ModuleNotFoundError as e:
-                logger.debug(f"ignoring module {e.name}")
-
-            except Exception as ex:
-                if target_package == "agent_framework._tools":
-                    logger.debug("ignoring wrap exception for package: agent_framework._tools")
-                    continue
-                # For openai-agents SDK, method availability varies by version; log as debug
-                if target_package == "agents.run" and target_method in ("run_single_turn", "_run_single_turn"):
-                    logger.debug(f"method {target_method} not found in {target_package} (SDK version compatibility)")
-                    continue
-                logger.error(f"""_instrument wrap exception: {str(ex)}
-                            for package: {target_package},
-                            object:{target_object},
-                            method:{target_method}""")
+        if self.lazy_instrumentation:
+            self._wrap_on_import(tracer, final_method_list)
+        else:
+            for method_config in final_method_list:
+                self._wrap_method(tracer, method_config)
+
+    def _wrap_on_import(self, tracer, method_list):
+        """Wrap the methods of each package once the application imports it.
+
+        wrapt runs the post import hook at once for packages already imported. The
+        hooks of an earlier instrumentation find their pending dict emptied by
+        _uninstrument and do nothing.
+        """
+        pending: Dict[str, list] = {}
+        for method_config in method_list:
+            pending.setdefault(method_config.get("package", None), []).append(method_config)
+        self._pending_imports = pending
+
+        def wrap_package(package):
+            def hook(module):
+                for method_config in pending.pop(package, ()):
+                    self._wrap_method(tracer, method_config)
+            return hook
+
+        for package in list(pending):
+            register_post_import_hook(wrap_package(package), package)
+
+    def _wrap_method(self, tracer, method_config):
+        target_package = method_config.get("package", None)
+        target_object = method_config.get("object", None)
+        target_method = method_config.get("method", None)
+        wrapped_by = method_config.get("wrapper_method", None)
+        #get the requisite handler or default one
+        handler_key = method_config.get("span_handler",'default')
+        try:
+            handler =  self.handlers.get(handler_key)
+            if not handler:
+                logger.warning("incorrect or empty handler falling back to default handler")
+                handler = self.handlers.get('default')
+            handler.set_instrumentor(self.get_instrumentor(tracer))
+            compile_method_plan(method_config)
+            wrap_function_wrapper(
+                target_package,
+                f"{target_object}.{target_method}" if target_object else target_method,
+                wrapped_by(tracer, handler, method_config),
+            )
+            self.instrumented_method_list.append(method_config)
+        except ModuleNotFoundError as e:
+            remove_method_plan(method_config)
+            logger.debug(f"ignoring module {e.name}")
+
+        except Exception as ex:
+            remove_method_plan(method_config)
+            if target_package == "agent_framework._tools":
+                logger.debug("ignoring wrap exception for package: agent_framework._tools")
+                return
+            # For openai-agents SDK, method availability varies by version; log as debug
+            if target_package == "agents.run" and target_method in ("run_single_turn", "_run_single_turn"):
+                logger.debug(f"method {target_method} not found in {target_package} (SDK version compatibility)")
+                return
+            logger.error(f"""_instrument wrap exception: {str(ex)}
+                        for package: {target_package},
+                        object:{target_object},
+                        method:{target_method}""")
 
     def _uninstrument(self, **kwargs):
+        self._pending_imports.clear()
         for wrapped_method in self.instrumented_method_list:
             try:
                 wrap_package = wrapped_method.get("package")
@@ -221,6 +271,7 @@ class MonocleInstrumentor(BaseInstrumentor):
                     f"{wrap_package}.{wrap_object}" if wrap_object else wrap_package,
                     wrap_method,
                 )
+                remove_method_plan(wrapped_method)
             except Exception as ex:
                 logger.error(f"""_instrument unwrap exception: {str(ex)}
                              for package: {wrap_package},
@@ -231,6 +282,10 @@ class MonocleInstrumentor(BaseInstrumentor):
         set_monocle_instrumentor(None)
         set_monocle_setup_signature(None)
         configure_otel_genai_semconv(False)
+        configure_deferred_events(False)
+        configure_message_delta(False)
+        configure_payload_budget(False)
+        configure_resource_attributes(False)
 
 def set_tracer_provider(tracer_provider: TracerProvider):
     global monocle_tracer_provider
@@ -264,6 +319,15 @@ def _append_trace_return_processor(span_processors):
         span_processors = list(span_processors) + [proc]
     return span_processors
 
+def _wrap_exporter(exporter: SpanExporter, defer_events: bool, tail_sampling: bool) -> SpanExporter:
+    """Wrap a default exporter to resolve deferred events and apply tail sampling."""
+    if defer_events:
+        exporter = DeferredEventsSpanExporter(exporter)
+    if tail_sampling:
+        # outermost, so dropped traces only have their metadata events resolved, for the token count
+        exporter = TailSamplingSpanExporter(exporter)
+    return exporter
+
 def set_monocle_setup_signature(signature: Optional[dict]):
     global monocle_setup_signature
     monocle_setup_signature = signature
@@ -279,10 +343,17 @@ def setup_monocle_telemetry(
         wrapper_methods: List[Union[dict,WrapperMethod]] = None,
         union_with_default_methods: bool = True,
         monocle_exporters_list:str = None,
-        otel_genai_semconv: Optional[Union[str, bool]] = None) -> MonocleInstrumentor:
+        otel_genai_semconv: Optional[Union[str, bool]] = None,
+        deferred_events: Optional[bool] = None,
+        lazy_instrumentation: Optional[bool] = None,
+        resource_attributes: Optional[bool] = None) -> MonocleInstrumentor:
     """
     Set up Monocle telemetry for the application.
 
+    Head sampling (MONOCLE_HEAD_SAMPLING_RATIO, MONOCLE_HEAD_SAMPLING_RULES) is applied through the sampler
+    of the TracerProvider created here. When the application already set a global SDK TracerProvider, that
+    provider and its own sampler are used instead: the head sampling settings are ignored with a warning.
+
     Parameters
     ----------
     workflow_name : str
@@ -307,6 +378,19 @@ def setup_monocle_telemetry(
         ``otlp-genai-semconv`` exporter is configured. The existing ``otlp`` exporter leaves them disabled by
         default. ``True`` and ``False`` explicitly enable or disable them. The MONOCLE_OTEL_GENAI_SEMCONV
         environment variable provides the same auto/true/false control.
+    deferred_events : bool, optional
+        If True, the data.input, data.output and metadata event accessors run when the span is exported
+        instead of on the request thread. Their arguments are snapshotted when the span is hydrated.
+        The default Monocle exporters resolve the events on the BatchSpanProcessor worker; with custom
+        span_processors they are resolved on first read. Defaults to the MONOCLE_DEFERRED_EVENTS environment variable.
+    lazy_instrumentation : bool, optional
+        If True, the methods of a package are wrapped when the application first imports it, from an import hook,
+        instead of importing every instrumented package during setup. Packages already imported are wrapped at once.
+        Defaults to the MONOCLE_LAZY_INSTRUMENTATION environment variable.
+    resource_attributes : bool, optional
+        If True, the Monocle SDK version and language are set once on the Resource instead of on every span,
+        and the app hosting entity of root spans is resolved once here. Defaults to the
+        MONOCLE_RESOURCE_ATTRIBUTES environment variable.
     """
     # workflow_name is determined in the following order of precedence:
     # 1. Argument passed to this function
@@ -327,6 +411,9 @@ def setup_monocle_telemetry(
         union_with_default_methods=union_with_default_methods,
         monocle_exporters_list=monocle_exporters_list,
         otel_genai_semconv=otel_genai_semconv,
+        deferred_events=deferred_events,
+        lazy_instrumentation=lazy_instrumentation,
+        resource_attributes=resource_attributes,
     )
 
     if check_duplicate_setup(
@@ -337,18 +424,35 @@ def setup_monocle_telemetry(
     ):
         return get_monocle_instrumentor()
 
-    resource = Resource(attributes={
+    resource_attrs = {
         SERVICE_NAME: workflow_name
-    })
+    }
+    if configure_resource_attributes(resource_attributes):
+        resource_attrs.update(monocle_resource_attributes())
+    resource = Resource(attributes=resource_attrs)
     if span_processors and monocle_exporters_list:
         raise ValueError("span_processors and monocle_exporters_list can't be used together")
     exporter_names = tuple(get_monocle_exporter_names(monocle_exporters_list))
     configure_otel_genai_semconv(otel_genai_semconv, exporter_names)
+    configure_json_backend()
     exporters:List[SpanExporter] = get_monocle_exporter(monocle_exporters_list)
-    span_processors = span_processors or [BatchSpanProcessor(exporter) for exporter in exporters]
+    defer_events = configure_deferred_events(deferred_events)
+    if lazy_instrumentation is None:
+        lazy_instrumentation = os.environ.get(LAZY_INSTRUMENTATION_ENV, "false")
+    lazy_instrumentation = parse_bool_setting(LAZY_INSTRUMENTATION_ENV, lazy_instrumentation)
+    configure_message_delta()
+    configure_payload_budget()
+    tail_sampling = configure_tail_sampling()
+    span_processors = span_processors or [
+        BatchSpanProcessor(_wrap_exporter(exporter, defer_events, tail_sampling))
+        for exporter in exporters
+    ]
     span_processors = _append_trace_return_processor(span_processors)
     set_monocle_span_processor(MonocleSynchronousMultiSpanProcessor())
-    set_tracer_provider(TracerProvider(resource=resource, active_span_processor=get_monocle_span_processor()))
+    sampler = configure_head_sampling()
+    provider_options = {"sampler": sampler} if sampler is not None else {}
+    set_tracer_provider(TracerProvider(resource=resource, active_span_processor=get_monocle_span_processor(),
+                                       **provider_options))
     set_workflow_name(workflow_name)
     
     # Monkey-patch ReadableSpan.to_json to remove 0x prefix from trace_id/span_id
@@ -374,8 +478,18 @@ def setup_monocle_telemetry(
         # Track the active processor so reset_span_processors() operates on the right one.
         if isinstance(active_processor, SynchronousMultiSpanProcessor):
             set_monocle_span_processor(active_processor)
+        if is_resource_attributes_enabled() and not resource_has_monocle_attributes(
+                getattr(tracer_provider_default, "resource", None)):
+            # The spans get the Resource of the existing provider, not the one built above
+            logger.info("The active tracer provider's Resource lacks the Monocle attributes, keeping them on the spans")
+            configure_resource_attributes(False)
+        if sampler is not None:
+            # The spans are sampled by the existing provider's sampler, not the one built above
+            logger.warning("A tracer provider was already set, its sampler is used and the Monocle head sampling "
+                           "settings are ignored")
     instrumentor = MonocleInstrumentor(user_wrapper_methods=wrapper_methods or [], exporters=exporters,
-                                       handlers=span_handlers, union_with_default_methods = union_with_default_methods)
+                                       handlers=span_handlers, union_with_default_methods = union_with_default_methods,
+                                       lazy_instrumentation=lazy_instrumentation)
     # instrumentor.app_name = workflow_name
     if not instrumentor.is_instrumented_by_opentelemetry:
         instrumentor.instrument(tracer_provider=get_tracer_provider())
@@ -0,0 +1,130 @@
+"""JSON encoding and decoding of spans, with optional orjson or msgspec acceleration.
+
+The backend is picked from ``MONOCLE_JSON_BACKEND`` (auto, orjson, msgspec or json). ``auto``
+uses orjson, then msgspec, when installed and the standard library otherwise. The fast backends
+only handle compact output; indented output, values they cannot encode and documents they refuse
+to decode (e.g. NaN literals) go through the standard library. NaN and infinite floats are
+encoded as ``null`` by every backend, as orjson and msgspec do, instead of the standard library's
+non-standard ``NaN``/``Infinity`` literals. Values no backend can encode raise TypeError or
+ValueError.
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKEND_ENV = "MONOCLE_JSON_BACKEND"
+JSON_BACKENDS = ("orjson", "msgspec", "json")
+_backend_name = "json"
+_fast_dumps: Optional[Callable[[Any], bytes]] = None
+_fast_loads: Optional[Callable[[Any], Any]] = None
+
+
+def _load_backend(name: str):
+    if name == "orjson":
+        import orjson
+        return (lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)), orjson.loads
+    if name == "msgspec":
+        import msgspec
+        encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+        return encoder.encode, decoder.decode
+    return None, None
+
+
+def configure_json_backend(setting: Any = None) -> str:
+    """Resolve the JSON backend setting and return the name of the backend in use."""
+    global _backend_name, _fast_dumps, _fast_loads
+
+    value = setting
+    if value is None:
+        value = os.environ.get(JSON_BACKEND_ENV, "auto")
+    normalized = str(value).strip().lower() or "auto"
+    if normalized == "auto":
+        candidates = JSON_BACKENDS
+    elif normalized in JSON_BACKENDS:
+        candidates = (normalized,) + tuple(name for name in JSON_BACKENDS if name != normalized)
+    else:
+        raise ValueError(f"{JSON_BACKEND_ENV} must be one of auto, orjson, msgspec, or json")
+
+    for name in candidates:
+        try:
+            _fast_dumps, _fast_loads = _load_backend(name)
+        except ImportError:
+            if name == normalized:
+                logger.warning(f"JSON backend {name} is not installed, falling back")
+            continue
+        _backend_name = name
+        break
+    return _backend_name
+
+
+def get_json_backend() -> str:
+    return _backend_name
+
+
+def _replace_non_finite(obj: Any) -> Any:
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _replace_non_finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_replace_non_finite(value) for value in obj]
+    return obj
+
+
+def _std_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    try:
+        return json.dumps(obj, indent=indent, allow_nan=False)
+    except ValueError as e:
+        if "float" not in str(e):
+            raise
+    return json.dumps(_replace_non_finite(obj), indent=indent)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode obj as compact UTF-8 JSON."""
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(obj)
+        except Exception as e:
+            logger.debug(f"{_backend_name} could not encode value, using json: {e}")
+    return _std_dumps(obj).encode("utf-8")
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """Encode obj as JSON text, compact unless an indent is given."""
+    if indent is not None:
+        return _std_dumps(obj, indent=indent)
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(obj).decode("utf-8")
+        except Exception as e:
+            logger.debug(f"{_backend_name} could not encode value, using json: {e}")
+    return _std_dumps(obj)
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from str or bytes, raising json.JSONDecodeError on invalid documents."""
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(data)
+        except Exception:
+            pass
+    return json.loads(data)
+
+
+def load(fp) -> Any:
+    """Decode JSON from a file object opened in text or binary mode."""
+    return loads(fp.read())
+
+
+try:
+    configure_json_backend()
+except ValueError as e:
+    # a bad setting must not break importing the package, setup_monocle_telemetry raises it
+    logger.warning(f"{e}, using auto")
+    configure_json_backend("auto")
@@ -0,0 +1,93 @@
+"""Incremental reading of append-only JSON lines files.
+
+The agent hook replays (Claude Code, Codex, GitHub Copilot) read their session logs and
+transcripts from a cursor saved in their ``.state.json`` sidecar, so that each hook firing
+parses only the lines appended since the previous one instead of the whole session. A cursor
+is a dict, ``{"offset": bytes consumed, "head": hash of the first head_size bytes, "head_size"}``.
+When the file got shorter than the offset or its first bytes changed, it was truncated or
+replaced and is read again from the start.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the start of the file hashed to detect that it was replaced
+HEAD_BYTES = 256
+
+
+def _head_hash(fh, size: int) -> str:
+    fh.seek(0)
+    return hashlib.sha1(fh.read(size)).hexdigest()
+
+
+def read_new_records(path, cursor: Optional[dict] = None) -> Tuple[List[Tuple[int, int, Any]], dict, bool]:
+    """Read the complete lines appended to a JSON lines file since the cursor.
+
+    Returns ``(records, cursor, restarted)``: the decoded records with the byte offsets where
+    their line starts and ends, the cursor to save for the next call and whether the file was
+    read from the start because it was truncated or replaced. A trailing line without its
+    newline is still being written and is left for the next call; lines that are not valid
+    JSON are skipped.
+    """
+    cursor = cursor or {}
+    offset = cursor.get("offset", 0)
+    head, head_size = cursor.get("head"), cursor.get("head_size", 0)
+    restarted = False
+    try:
+        with Path(path).open("rb") as fh:
+            size = fh.seek(0, 2)
+            if offset and (size < max(offset, head_size) or _head_hash(fh, head_size) != head):
+                logger.debug(f"{path} was truncated or replaced, reading it from the start")
+                offset, head, head_size, restarted = 0, None, 0, True
+            fh.seek(offset)
+            data = fh.read(size - offset)
+            end = data.rfind(b"\n") + 1
+            new_offset = offset + end
+            if head_size < HEAD_BYTES and new_offset > head_size:
+                head_size = min(HEAD_BYTES, new_offset)
+                head = _head_hash(fh, head_size)
+    except OSError as e:
+        logger.debug(f"Error reading {path}: {e}")
+        return [], dict(cursor), False
+
+    records = []
+    position = 0
+    for line in data[:end].split(b"\n")[:-1]:
+        start = offset + position
+        position += len(line) + 1
+        if not line.strip():
+            continue
+        try:
+            records.append((start, offset + position, json.loads(line.decode("utf-8", errors="replace"))))
+        except ValueError:
+            continue
+    return records, {"offset": new_offset, "head": head, "head_size": head_size}, restarted
+
+
+def cursor_at(cursor: dict, offset: int) -> dict:
+    """The cursor moved back to an offset of the same file, to read again from there."""
+    return dict(cursor, offset=offset)
+
+
+def cursor_after_lines(path, count: int) -> dict:
+    """A cursor after the first count lines of a file, to convert line counts saved by earlier versions."""
+    if count <= 0:
+        return {}
+    try:
+        with Path(path).open("rb") as fh:
+            offset = 0
+            for _ in range(count):
+                line = fh.readline()
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+            head_size = min(HEAD_BYTES, offset)
+            return {"offset": offset, "head": _head_hash(fh, head_size), "head_size": head_size}
+    except OSError as e:
+        logger.debug(f"Error reading {path}: {e}")
+        return {}
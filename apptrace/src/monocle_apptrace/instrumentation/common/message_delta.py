@@ -0,0 +1,199 @@
+"""Optionally capture only the new messages of multi-turn inference inputs.
+
+Agent loops send the whole conversation history on every inference call, so recording the full
+``data.input`` of each inference span stores the history over and over. When message delta capture
+is enabled, the messages of each inference input are content-hashed, and an input that starts
+with the messages of an earlier inference span of the same trace records only the new messages
+along with a reference to that span:
+
+    input                   the messages after the shared prefix
+    input.prefix_span_id    span id (hex) of the inference span holding the prefix
+    input.prefix_count      number of messages taken from that span's full input
+
+Only messages stored unchanged are offered as a prefix: messages truncated by the payload budget
+can't be rebuilt from the exported span. ``expand_message_deltas`` rebuilds the full inputs from
+exported spans.
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from monocle_apptrace.instrumentation.common.utils import parse_bool_setting
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_DELTA_ENV = "MONOCLE_MESSAGE_DELTA"
+INPUT_EVENT_NAME = "data.input"
+INPUT_ATTRIBUTE = "input"
+PREFIX_SPAN_ID_ATTRIBUTE = "input.prefix_span_id"
+PREFIX_COUNT_ATTRIBUTE = "input.prefix_count"
+# Traces tracked at once and inference inputs remembered per trace to match prefixes against.
+MAX_TRACKED_TRACES = 1024
+MAX_INPUTS_PER_TRACE = 8
+_message_delta_enabled = False
+_recent_inputs_lock = Lock()
+_recent_inputs: "OrderedDict[int, List[tuple]]" = OrderedDict()
+
+
+def configure_message_delta(setting: Any = None) -> bool:
+    """Resolve true/false configuration and return the enabled state."""
+    global _message_delta_enabled
+
+    value = setting
+    if value is None:
+        value = os.environ.get(MESSAGE_DELTA_ENV, "false")
+
+    enabled = parse_bool_setting(MESSAGE_DELTA_ENV, value)
+
+    _message_delta_enabled = enabled
+    if not enabled:
+        with _recent_inputs_lock:
+            _recent_inputs.clear()
+    return enabled
+
+
+def is_message_delta_enabled() -> bool:
+    return _message_delta_enabled
+
+
+def _message_digest(message: str) -> bytes:
+    return hashlib.blake2b(message.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _common_prefix_length(first: tuple, second: tuple) -> int:
+    count = 0
+    for first_digest, second_digest in zip(first, second):
+        if first_digest != second_digest:
+            break
+        count += 1
+    return count
+
+
+def apply_message_delta(span, event_name: str, event_attributes: dict) -> Optional[tuple]:
+    """Replace the messages of an inference span's input event attributes by the messages following
+    the longest prefix shared with an earlier inference input of the same trace.
+
+    Returns what ``record_message_digests`` needs to offer the input as a prefix to later inputs,
+    once the attributes are final (e.g. after the payload budget), or None for other events.
+    """
+    if not _message_delta_enabled or event_name != INPUT_EVENT_NAME:
+        return None
+    try:
+        messages = event_attributes.get(INPUT_ATTRIBUTE)
+        if not isinstance(messages, list) or len(messages) == 0 \
+                or not all(isinstance(message, str) for message in messages):
+            return None
+        span_type = span.attributes.get("span.type") if span.attributes else None
+        if not isinstance(span_type, str) or not span_type.startswith("inference"):
+            return None
+        span_context = span.get_span_context()
+        digests = tuple(_message_digest(message) for message in messages)
+        prefix_span_id, prefix_count = None, 0
+        with _recent_inputs_lock:
+            recent_inputs = _recent_inputs.get(span_context.trace_id)
+            if recent_inputs is None:
+                recent_inputs = []
+                _recent_inputs[span_context.trace_id] = recent_inputs
+                if len(_recent_inputs) > MAX_TRACKED_TRACES:
+                    _recent_inputs.popitem(last=False)
+            else:
+                _recent_inputs.move_to_end(span_context.trace_id)
+            # the input event of a span is hydrated again on exceptions: it must not match itself
+            recent_inputs[:] = [recent for recent in recent_inputs if recent[0] != span_context.span_id]
+            for recent_span_id, recent_digests in recent_inputs:
+                count = _common_prefix_length(digests, recent_digests)
+                if count > prefix_count:
+                    prefix_span_id, prefix_count = recent_span_id, count
+        if prefix_count > 0:
+            messages = messages[prefix_count:]
+            event_attributes[INPUT_ATTRIBUTE] = messages
+            event_attributes[PREFIX_SPAN_ID_ATTRIBUTE] = format(prefix_span_id, "016x")
+            event_attributes[PREFIX_COUNT_ATTRIBUTE] = prefix_count
+        return messages, digests
+    except Exception as e:
+        logger.debug(f"Error computing message delta: {e}")
+        return None
+
+
+def record_message_digests(span, delta: Optional[tuple], event_attributes: dict) -> None:
+    """Offer the input returned by ``apply_message_delta`` as a prefix to the later inputs of the trace.
+
+    Only the messages stored unchanged count: when the payload budget truncated the input, the
+    messages from the first truncated one on can't be rebuilt from the exported span.
+    """
+    if delta is None:
+        return
+    try:
+        messages, digests = delta
+        stored = event_attributes.get(INPUT_ATTRIBUTE)
+        if stored is not messages:
+            intact = 0
+            for message, stored_message in zip(messages, stored or ()):
+                if message != stored_message:
+                    break
+                intact += 1
+            digests = digests[:event_attributes.get(PREFIX_COUNT_ATTRIBUTE, 0) + intact]
+        if not digests:
+            return
+        span_context = span.get_span_context()
+        with _recent_inputs_lock:
+            recent_inputs = _recent_inputs.get(span_context.trace_id)
+            if recent_inputs is None:
+                return
+            recent_inputs.append((span_context.span_id, digests))
+            if len(recent_inputs) > MAX_INPUTS_PER_TRACE:
+                del recent_inputs[0]
+    except Exception as e:
+        logger.debug(f"Error recording message digests: {e}")
+
+
+def _span_id_of(span_data: dict) -> Optional[str]:
+    span_id = (span_data.get("context") or {}).get("span_id") or span_data.get("span_id")
+    return str(span_id).replace("0x", "") if span_id else None
+
+
+def _input_attributes_of(span_data: dict) -> Optional[dict]:
+    for event in span_data.get("events") or []:
+        if event.get("name") == INPUT_EVENT_NAME and isinstance(event.get("attributes"), dict):
+            return event["attributes"]
+    return None
+
+
+def expand_message_deltas(spans: List[dict]) -> List[dict]:
+    """Rebuild, in place, the full input of the spans recorded with message delta capture.
+
+    ``spans`` are span dicts in the exported JSON format. Inputs whose prefix span is not among
+    ``spans`` are left as recorded.
+    """
+    inputs_by_span_id: Dict[str, dict] = {}
+    for span_data in spans:
+        span_id = _span_id_of(span_data) if isinstance(span_data, dict) else None
+        if span_id is None:
+            continue
+        attributes = _input_attributes_of(span_data)
+        if attributes is not None:
+            inputs_by_span_id[span_id] = attributes
+
+    for span_id, attributes in inputs_by_span_id.items():
+        # walk the prefix chain down to a complete input, then expand the chain back up
+        chain, visited = [], set()
+        current = attributes
+        while current is not None and PREFIX_SPAN_ID_ATTRIBUTE in current and id(current) not in visited:
+            chain.append(current)
+            visited.add(id(current))
+            current = inputs_by_span_id.get(str(current[PREFIX_SPAN_ID_ATTRIBUTE]).replace("0x", ""))
+        if current is None or id(current) in visited:
+            if chain:
+                logger.debug(f"Prefix of the input of span {span_id} not found, leaving it as recorded")
+            continue
+        for delta in reversed(chain):
+            prefix = list(current.get(INPUT_ATTRIBUTE) or [])
+            delta[INPUT_ATTRIBUTE] = prefix[:delta.get(PREFIX_COUNT_ATTRIBUTE, 0)] + list(delta.get(INPUT_ATTRIBUTE) or [])
+            del delta[PREFIX_SPAN_ID_ATTRIBUTE]
+            delta.pop(PREFIX_COUNT_ATTRIBUTE, None)
+            current = delta
+    return spans
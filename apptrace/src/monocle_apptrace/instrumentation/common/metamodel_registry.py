@@ -0,0 +1,180 @@
+"""Declarative registry of the built-in metamodels.
+
+Each metamodel names the module and list holding its wrapper method configs and the
+packages it instruments; its modules are imported only when one of those packages is
+installed, so ``import monocle_apptrace`` and ``setup_monocle_telemetry`` do not pay
+for the framework integrations an application does not use. Span handlers are
+likewise imported and created on their first lookup by name.
+"""
+
+import importlib
+import importlib.util
+import logging
+import sys
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_METAMODEL_PACKAGE = "monocle_apptrace.instrumentation.metamodel"
+
+
+class Metamodel(NamedTuple):
+    # module, relative to the metamodel package, and name of the method config list
+    methods: Tuple[str, str]
+    # packages the methods wrap; the metamodel is used when any of them is installed. Name the
+    # package itself, not a namespace such as google or azure that unrelated packages also provide
+    requires: Tuple[str, ...] = ()
+    # modules of which at least one must already be imported, for metamodels that wrap
+    # Monocle's own modules that only some entry points load
+    requires_imported: Tuple[str, ...] = ()
+
+
+# In the order of precedence of the original DEFAULT_METHODS_LIST
+METAMODELS: Tuple[Metamodel, ...] = (
+    Metamodel(("langchain.methods", "LANGCHAIN_METHODS"), ("langchain", "langchain_core")),
+    Metamodel(("llamaindex.methods", "LLAMAINDEX_METHODS"), ("llama_index",)),
+    Metamodel(("haystack.methods", "HAYSTACK_METHODS"), ("haystack", "haystack_integrations")),
+    Metamodel(("botocore.methods", "BOTOCORE_METHODS"), ("botocore",)),
+    Metamodel(("flask.methods", "FLASK_METHODS"), ("flask", "werkzeug")),
+    Metamodel(("requests.methods", "REQUESTS_METHODS"), ("requests",)),
+    Metamodel(("langgraph.methods", "LANGGRAPH_METHODS"), ("langgraph", "langchain_core")),
+    Metamodel(("crew_ai.methods", "CREW_AI_METHODS"), ("crewai",)),
+    Metamodel(("msagent.methods", "MSAGENT_METHODS"), ("agent_framework",)),
+    Metamodel(("agents.methods", "AGENTS_METHODS"), ("agents",)),
+    Metamodel(("openai.methods", "OPENAI_METHODS"), ("openai", "agents")),
+    Metamodel(("teamsai.methods", "TEAMAI_METHODS"), ("teams",)),
+    Metamodel(("anthropic.methods", "ANTHROPIC_METHODS"), ("anthropic",)),
+    Metamodel(("aiohttp.methods", "AIOHTTP_METHODS"), ("aiohttp",)),
+    Metamodel(("azureaiinference.methods", "AZURE_AI_INFERENCE_METHODS"), ("azure.ai.inference",)),
+    # the Azure Functions and Lambda decorators are Monocle's own, always instrumented
+    Metamodel(("azfunc.methods", "AZFUNC_HTTP_METHODS")),
+    Metamodel(("gemini.methods", "GEMINI_METHODS"), ("google.genai",)),
+    Metamodel(("fastapi.methods", "FASTAPI_METHODS"), ("fastapi", "starlette")),
+    Metamodel(("fastmcp.methods", "FASTMCP_METHODS"), ("fastmcp",)),
+    Metamodel(("lambdafunc.methods", "LAMBDA_HTTP_METHODS")),
+    Metamodel(("mcp.methods", "MCP_METHODS"), ("mcp", "langchain_mcp_adapters")),
+    Metamodel(("a2a.methods", "A2A_CLIENT_METHODS"), ("a2a",)),
+    Metamodel(("litellm.methods", "LITELLM_METHODS"), ("litellm",)),
+    Metamodel(("adk.methods", "ADK_METHODS"), ("google.adk",)),
+    Metamodel(("mistral.methods", "MISTRAL_METHODS"), ("mistralai",)),
+    Metamodel(("hugging_face.methods", "HUGGING_FACE_METHODS"), ("huggingface_hub",)),
+    Metamodel(("strands.methods", "STRAND_METHODS"), ("strands",)),
+    Metamodel(("agentcore.methods", "AGENTCORE_METHODS"), ("bedrock_agentcore",)),
+    # the agent CLI hooks import their replay handlers before setting up telemetry
+    Metamodel(("claude_cli.methods", "CLAUDE_CLI_PROXY_METHODS"),
+              requires_imported=(f"{_METAMODEL_PACKAGE}.claude_cli.replay_handlers",)),
+    Metamodel(("codex_cli.methods", "CODEX_CLI_PROXY_METHODS"),
+              requires_imported=(f"{_METAMODEL_PACKAGE}.codex_cli.replay_handlers",)),
+    Metamodel(("github_copilot.methods", "GITHUB_COPILOT_PROXY_METHODS"),
+              requires_imported=(f"{_METAMODEL_PACKAGE}.github_copilot.replay_handlers",)),
+)
+
+# Handler name -> (module relative to the metamodel package, class name)
+SPAN_HANDLERS: Dict[str, Tuple[str, str]] = {
+    "aiohttp_handler": ("aiohttp._helper", "aiohttpSpanHandler"),
+    "botocore_handler": ("botocore.handlers.botocore_span_handler", "BotoCoreSpanHandler"),
+    "flask_handler": ("flask._helper", "FlaskSpanHandler"),
+    "flask_response_handler": ("flask._helper", "FlaskResponseSpanHandler"),
+    "request_handler": ("requests._helper", "RequestSpanHandler"),
+    "openai_handler": ("openai.openai_processor", "OpenAISpanHandler"),
+    "openai_agents_handler": ("openai.openai_processor", "OpenAIAgentsSpanHandler"),
+    "azure_func_handler": ("azfunc._helper", "azureSpanHandler"),
+    "mcp_agent_handler": ("mcp.mcp_processor", "MCPAgentHandler"),
+    "fastapi_handler": ("fastapi._helper", "FastAPISpanHandler"),
+    "fastapi_response_handler": ("fastapi._helper", "FastAPIResponseSpanHandler"),
+    "langgraph_agent_handler": ("langgraph.langgraph_processor", "LanggraphAgentHandler"),
+    "langgraph_tool_handler": ("langgraph.langgraph_processor", "LanggraphToolHandler"),
+    "crew_ai_agent_handler": ("crew_ai.crew_ai_processor", "CrewAIAgentHandler"),
+    "crew_ai_task_handler": ("crew_ai.crew_ai_processor", "CrewAITaskHandler"),
+    "crew_ai_tool_handler": ("crew_ai.crew_ai_processor", "CrewAIToolHandler"),
+    "msagent_request_handler": ("msagent.msagent_processor", "MSAgentRequestHandler"),
+    "msagent_agent_handler": ("msagent.msagent_processor", "MSAgentAgentHandler"),
+    "msagent_inference_handler": ("msagent.msagent_processor", "MSAgentInferenceHandler"),
+    "msagent_inference_stream_handler": ("msagent.msagent_processor", "MSAgentInferenceStreamHandler"),
+    "msagent_tool_handler": ("msagent.msagent_processor", "MSAgentToolHandler"),
+    "agents_agent_handler": ("agents.agents_processor", "AgentsSpanHandler"),
+    "llamaindex_tool_handler": ("llamaindex.llamaindex_processor", "LlamaIndexToolHandler"),
+    "llamaindex_agent_handler": ("llamaindex.llamaindex_processor", "LlamaIndexAgentHandler"),
+    "llamaindex_workflow_handler": ("llamaindex.llamaindex_processor", "LlamaIndexWorkflowHandler"),
+    "llamaindex_single_agent_tool_handler": ("llamaindex.llamaindex_processor", "LlamaIndexSingleAgenttToolHandlerWrapper"),
+    "lambda_func_handler": ("lambdafunc._helper", "lambdaSpanHandler"),
+    "agentcore_handler": ("agentcore.agentcore_handler", "AgentCoreSpanHandler"),
+    "adk_handler": ("adk.adk_handler", "AdkSpanHandler"),
+    "strands_handler": ("strands.strands_processor", "StrandsSpanHandler"),
+    "claude_handler": ("claude_cli.claude_span_handler", "ClaudeSpanHandler"),
+    "codex_handler": ("codex_cli.codex_span_handler", "CodexSpanHandler"),
+    "github_copilot_handler": ("github_copilot.github_copilot_span_handler", "GitHubCopilotSpanHandler"),
+    "litellm_sync_handler": ("litellm.litellm_span_handler", "LiteLLMSyncSpanHandler"),
+}
+
+
+def _import_metamodel_attr(module: str, name: str):
+    return getattr(importlib.import_module(f"{_METAMODEL_PACKAGE}.{module}"), name)
+
+
+def _is_installed(package: str) -> bool:
+    if package in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(package) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def is_available(metamodel: Metamodel) -> bool:
+    """Whether the packages instrumented by the metamodel are present, without importing them."""
+    if metamodel.requires_imported and not any(m in sys.modules for m in metamodel.requires_imported):
+        return False
+    return not metamodel.requires or any(_is_installed(p) for p in metamodel.requires)
+
+
+def load_methods(metamodel: Metamodel) -> List[dict]:
+    return list(_import_metamodel_attr(*metamodel.methods))
+
+
+def default_methods(available_only: bool = True) -> List[dict]:
+    """Method configs of the built-in metamodels, of those whose packages are present by default."""
+    methods = []
+    for metamodel in METAMODELS:
+        if available_only and not is_available(metamodel):
+            continue
+        try:
+            methods.extend(load_methods(metamodel))
+        except ImportError as e:
+            logger.debug(f"ignoring metamodel {metamodel.methods[0]}: {e}")
+    return methods
+
+
+class SpanHandlerRegistry(dict):
+    """Span handlers by name, importing and creating the built-in ones on first lookup.
+
+    Names not set in the registry are looked up in the fallback registry when there is
+    one, so that all instrumentors share the built-in handler instances.
+    """
+
+    def __init__(self, handlers: Optional[dict] = None, fallback: Optional["SpanHandlerRegistry"] = None):
+        super().__init__(handlers or {})
+        self._fallback = fallback
+
+    def _create(self, name: str):
+        if self._fallback is not None:
+            return self._fallback[name]
+        if name not in SPAN_HANDLERS:
+            raise KeyError(name)
+        handler_cls: Callable = _import_metamodel_attr(*SPAN_HANDLERS[name])
+        return handler_cls()
+
+    def __missing__(self, name):
+        handler = self._create(name)
+        self[name] = handler
+        return handler
+
+    def __contains__(self, name) -> bool:
+        return (dict.__contains__(self, name) or name in SPAN_HANDLERS
+                or (self._fallback is not None and name in self._fallback))
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
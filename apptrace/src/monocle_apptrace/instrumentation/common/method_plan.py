@@ -0,0 +1,153 @@
+import logging
+import threading
+from typing import Optional
+
+from monocle_apptrace.instrumentation.common.constants import AGENTIC_SPANS
+from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on plans compiled for to_wrap copies (handlers swapping output processors in
+# pre_tracing, botocore client methods, ...). Those come from a small set of static configs,
+# the bound only guards against a caller building processor dicts on every call.
+MAX_DERIVED_PLANS = 1024
+METHOD_PLAN_KEY = "_monocle_method_plan"
+
+class MethodPlan:
+    """ Immutable per-method facts derived from a ``to_wrap`` config.
+        The wrappers read the span name, auto close accessor, builtin scope and processor chain
+        from here instead of re-deriving them from the dict on every wrapped call.
+    """
+    __slots__ = ("to_wrap", "package", "span_name", "workflow_type", "is_framework_workflow",
+                 "output_processor", "output_processor_list", "has_more_processors",
+                 "is_auto_close", "response_processor", "builtin_scope_name", "_next_plans")
+
+    def __init__(self, to_wrap: dict):
+        set_attr = object.__setattr__
+        set_attr(self, "to_wrap", to_wrap)
+        set_attr(self, "package", to_wrap.get("package"))
+        set_attr(self, "span_name", _compute_span_name(to_wrap))
+        workflow_type = SpanHandler.get_workflow_type(to_wrap)
+        set_attr(self, "workflow_type", workflow_type)
+        set_attr(self, "is_framework_workflow", SpanHandler.is_framework_workflow(workflow_type))
+        output_processor = to_wrap.get("output_processor")
+        output_processor_list = to_wrap.get("output_processor_list")
+        set_attr(self, "output_processor", output_processor)
+        set_attr(self, "output_processor_list", output_processor_list)
+        set_attr(self, "has_more_processors", len(output_processor_list or []) > 0)
+        first_processor = output_processor
+        if not first_processor and output_processor_list:
+            first_processor = output_processor_list[0]
+        is_auto_close = first_processor.get("is_auto_close") if isinstance(first_processor, dict) else None
+        set_attr(self, "is_auto_close", is_auto_close)
+        response_processor = output_processor.get("response_processor") if isinstance(output_processor, dict) else None
+        set_attr(self, "response_processor", response_processor)
+        set_attr(self, "builtin_scope_name", _compute_builtin_scope_name(output_processor, output_processor_list))
+        set_attr(self, "_next_plans", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def matches(self, to_wrap: dict) -> bool:
+        """ True while to_wrap still runs the processors this plan was compiled for."""
+        return (self.output_processor is to_wrap.get("output_processor")
+                and self.output_processor_list is to_wrap.get("output_processor_list"))
+
+    def get_auto_close_span(self, kwargs) -> bool:
+        if self.is_auto_close is None:
+            return True
+        try:
+            return self.is_auto_close(kwargs)
+        except Exception as e:
+            logger.warning("Warning: Error occurred in get_auto_close_span: %s", str(e))
+            return True
+
+    def next_plan(self, index: Optional[int]) -> "MethodPlan":
+        """ Plan for running output_processor_list[index] followed by the processors after it.
+            index None means every processor in the list was skipped."""
+        plan = self._next_plans.get(index)
+        if plan is None:
+            next_to_wrap = dict(self.to_wrap)
+            next_to_wrap.pop(METHOD_PLAN_KEY, None)
+            if index is None:
+                next_to_wrap["output_processor"] = None
+                next_to_wrap["output_processor_list"] = []
+            else:
+                next_to_wrap["output_processor"] = self.output_processor_list[index]
+                next_to_wrap["output_processor_list"] = self.output_processor_list[index + 1:]
+            plan = MethodPlan(next_to_wrap)
+            self._next_plans[index] = plan
+        return plan
+
+    def bind(self, to_wrap: dict) -> dict:
+        """ Copy of to_wrap that runs this plan's processors. The processor list object is shared
+            with the plan so later lookups resolve without recompiling."""
+        bound = to_wrap.copy()
+        bound["output_processor"] = self.output_processor
+        bound["output_processor_list"] = self.output_processor_list
+        bound[METHOD_PLAN_KEY] = self
+        return bound
+
+def _compute_span_name(to_wrap: dict) -> str:
+    if to_wrap.get("span_name"):
+        return to_wrap.get("span_name")
+    return to_wrap.get("package", "") + "." + to_wrap.get("object", "") + "." + to_wrap.get("method", "")
+
+def _compute_builtin_scope_name(output_processor, output_processor_list) -> Optional[str]:
+    if output_processor_list:
+        for processor in output_processor_list:
+            if processor.get("type", None) in AGENTIC_SPANS:
+                output_processor = processor
+                break
+    # An entity can opt out of the builtin scope when its handler sets the value itself.
+    if isinstance(output_processor, dict) and output_processor.get("skip_builtin_scope", False):
+        return None
+    span_type = output_processor.get("type", None) if output_processor and isinstance(output_processor, dict) else None
+    if span_type and span_type in AGENTIC_SPANS:
+        return span_type
+    return None
+
+_plans_lock = threading.Lock()
+_compiled_plans: dict[int, MethodPlan] = {}
+_derived_plans: dict[tuple, MethodPlan] = {}
+
+def compile_method_plan(to_wrap: dict) -> MethodPlan:
+    """ Compile and register the plan for an instrumented method config. Called once per
+        method by the instrumentor; later lookups for the same dict are a single dict hit."""
+    plan = MethodPlan(to_wrap)
+    with _plans_lock:
+        _compiled_plans[id(to_wrap)] = plan
+    return plan
+
+def _derived_plan_key(to_wrap: dict) -> tuple:
+    output_processor_list = to_wrap.get("output_processor_list")
+    return (to_wrap.get("package"), to_wrap.get("object"), to_wrap.get("method"), to_wrap.get("span_name"),
+            id(to_wrap.get("output_processor")),
+            tuple(id(processor) for processor in output_processor_list) if output_processor_list else None)
+
+def get_method_plan(to_wrap: dict) -> MethodPlan:
+    """ Return the plan for to_wrap. Configs registered with compile_method_plan and copies bound by a plan
+        resolve by identity, copies made by span handlers resolve by their method and processor identities."""
+    plan = to_wrap.get(METHOD_PLAN_KEY)
+    if plan is None:
+        plan = _compiled_plans.get(id(to_wrap))
+        if plan is not None and plan.to_wrap is not to_wrap:
+            plan = None
+    if plan is not None and plan.matches(to_wrap):
+        return plan
+    key = _derived_plan_key(to_wrap)
+    plan = _derived_plans.get(key)
+    if plan is None:
+        # The plan keeps references to the processors in its key, so the ids stay valid while cached.
+        plan = MethodPlan(to_wrap)
+        with _plans_lock:
+            if len(_derived_plans) >= MAX_DERIVED_PLANS:
+                _derived_plans.clear()
+            _derived_plans[key] = plan
+    return plan
+
+def remove_method_plan(to_wrap: dict) -> None:
+    with _plans_lock:
+        plan = _compiled_plans.get(id(to_wrap))
+        if plan is not None and plan.to_wrap is to_wrap:
+            del _compiled_plans[id(to_wrap)]
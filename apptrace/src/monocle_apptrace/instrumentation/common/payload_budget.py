@@ -0,0 +1,195 @@
+"""Optionally cap the size of the inputs and outputs captured on span events.
+
+When the payload budget is enabled, the ``data.input`` and ``data.output`` event attributes are
+truncated before they are added to the span so that no attribute, event, span or trace goes over
+its budget in UTF-8 bytes. A truncated string ends with a marker giving the number of bytes
+dropped, and with ``MONOCLE_PAYLOAD_HASH_DROPPED`` a hash of the dropped bytes so that two
+payloads can still be told apart. List values (e.g. chat messages) keep their leading items and
+end with a marker item for the items dropped. Other values are measured by their JSON encoding and
+replaced by the truncated encoding when they do not fit. The bytes dropped are counted on the span in
+the ``monocle_apptrace.payload_dropped_bytes`` attribute (on the event itself for deferred events
+resolved after the span ended) and process wide in ``get_payload_budget_stats``.
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Tuple
+
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.constants import (
+    DEFAULT_MAX_ATTRIBUTE_LENGTH,
+    MONOCLE_PAYLOAD_DROPPED_BYTES,
+)
+from monocle_apptrace.instrumentation.common.utils import get_env_int, parse_bool_setting
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_BUDGET_ENV = "MONOCLE_PAYLOAD_BUDGET"
+PAYLOAD_MAX_ATTRIBUTE_BYTES_ENV = "MONOCLE_PAYLOAD_MAX_ATTRIBUTE_BYTES"
+PAYLOAD_MAX_EVENT_BYTES_ENV = "MONOCLE_PAYLOAD_MAX_EVENT_BYTES"
+PAYLOAD_MAX_SPAN_BYTES_ENV = "MONOCLE_PAYLOAD_MAX_SPAN_BYTES"
+PAYLOAD_MAX_TRACE_BYTES_ENV = "MONOCLE_PAYLOAD_MAX_TRACE_BYTES"
+PAYLOAD_HASH_DROPPED_ENV = "MONOCLE_PAYLOAD_HASH_DROPPED"
+DEFAULT_MAX_EVENT_BYTES = 128 * 1024
+DEFAULT_MAX_SPAN_BYTES = 256 * 1024
+DEFAULT_MAX_TRACE_BYTES = 4 * 1024 * 1024
+BUDGETED_EVENT_NAMES = ("data.input", "data.output")
+# Spans and traces whose usage is tracked at once.
+MAX_TRACKED_SPANS = 4096
+MAX_TRACKED_TRACES = 1024
+
+_payload_budget_enabled = False
+_limits: Dict[str, int] = {}
+_hash_dropped = False
+_usage_lock = Lock()
+_span_usage: "OrderedDict[int, int]" = OrderedDict()
+_trace_usage: "OrderedDict[int, int]" = OrderedDict()
+_stats = {"truncated_values": 0, "dropped_bytes": 0}
+
+
+def configure_payload_budget(setting: Any = None) -> bool:
+    """Resolve true/false configuration, read the budgets and return the enabled state."""
+    global _payload_budget_enabled, _limits, _hash_dropped
+
+    value = setting
+    if value is None:
+        value = os.environ.get(PAYLOAD_BUDGET_ENV, "false")
+    enabled = parse_bool_setting(PAYLOAD_BUDGET_ENV, value)
+
+    _limits = {
+        "attribute": get_env_int(PAYLOAD_MAX_ATTRIBUTE_BYTES_ENV, DEFAULT_MAX_ATTRIBUTE_LENGTH),
+        "event": get_env_int(PAYLOAD_MAX_EVENT_BYTES_ENV, DEFAULT_MAX_EVENT_BYTES),
+        "span": get_env_int(PAYLOAD_MAX_SPAN_BYTES_ENV, DEFAULT_MAX_SPAN_BYTES),
+        "trace": get_env_int(PAYLOAD_MAX_TRACE_BYTES_ENV, DEFAULT_MAX_TRACE_BYTES),
+    }
+    _hash_dropped = parse_bool_setting(PAYLOAD_HASH_DROPPED_ENV, os.environ.get(PAYLOAD_HASH_DROPPED_ENV, "false"))
+    _payload_budget_enabled = enabled
+    with _usage_lock:
+        _span_usage.clear()
+        _trace_usage.clear()
+    return enabled
+
+
+def is_payload_budget_enabled() -> bool:
+    return _payload_budget_enabled
+
+
+def get_payload_budget_stats() -> Dict[str, int]:
+    """Values truncated and bytes dropped since the process started."""
+    with _usage_lock:
+        return dict(_stats)
+
+
+def _marker(dropped: bytes) -> str:
+    if _hash_dropped:
+        return f"...[truncated {len(dropped)} bytes sha256:{hashlib.sha256(dropped).hexdigest()[:16]}]"
+    return f"...[truncated {len(dropped)} bytes]"
+
+
+def _truncate_str(value: str, budget: int) -> Tuple[str, int, int]:
+    """Return (value within budget, bytes used, bytes dropped)."""
+    if len(value) * 4 <= budget:
+        # fits whatever the encoding, skip encoding it
+        return value, len(value.encode("utf-8", "surrogatepass")), 0
+    encoded = value.encode("utf-8", "surrogatepass")
+    if len(encoded) <= budget:
+        return value, len(encoded), 0
+    marker_len = len(_marker(encoded[budget:]).encode("utf-8"))
+    # cut at a character boundary
+    kept = encoded[:max(budget - marker_len, 0)].decode("utf-8", "ignore")
+    dropped = encoded[len(kept.encode("utf-8", "surrogatepass")):]
+    text = kept + _marker(dropped)
+    return text, len(text.encode("utf-8", "surrogatepass")), len(dropped)
+
+
+def _truncate_value(value: Any, budget: int) -> Tuple[Any, int, int]:
+    if isinstance(value, str):
+        return _truncate_str(value, budget)
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        items, used, dropped = [], 0, 0
+        for index, item in enumerate(value):
+            if used >= budget:
+                rest = sum(len(rest_item.encode("utf-8", "surrogatepass")) for rest_item in value[index:])
+                dropped += rest
+                items.append(f"...[truncated {len(value) - index} items, {rest} bytes]")
+                break
+            item, item_used, item_dropped = _truncate_str(item, budget - used)
+            items.append(item)
+            used += item_used
+            dropped += item_dropped
+        return items, used, dropped
+    if value is None or isinstance(value, (bool, int, float)):
+        return value, len(str(value)), 0
+    try:
+        text = json_codec.dumps(value)
+    except (TypeError, ValueError):
+        text = str(value)
+    truncated, used, dropped = _truncate_str(text, budget)
+    return (truncated if dropped else value), used, dropped
+
+
+def _remaining(usage: "OrderedDict[int, int]", key: int, limit: int, max_tracked: int) -> int:
+    used = usage.get(key)
+    if used is None:
+        usage[key] = 0
+        if len(usage) > max_tracked:
+            usage.popitem(last=False)
+        return limit
+    usage.move_to_end(key)
+    return max(limit - used, 0)
+
+
+def _add_dropped_bytes(span, event_attributes: dict, dropped: int) -> None:
+    if span.is_recording():
+        total = (span.attributes or {}).get(MONOCLE_PAYLOAD_DROPPED_BYTES, 0) + dropped
+        span.set_attribute(MONOCLE_PAYLOAD_DROPPED_BYTES, total)
+    else:
+        # deferred events are resolved after the span ended, count on the event instead
+        event_attributes[MONOCLE_PAYLOAD_DROPPED_BYTES] = dropped
+
+
+def apply_payload_budget(span, event_name: str, event_attributes: dict, rehydrated: bool = False) -> None:
+    """Truncate the attributes of an input or output event to the remaining payload budget.
+
+    ``rehydrated`` events replace the attributes of an event that was already budgeted (e.g. the
+    input evaluated again when the call raised), they are held to the event budget only and are
+    not charged to the span and trace again.
+    """
+    if not _payload_budget_enabled or event_name not in BUDGETED_EVENT_NAMES or not event_attributes:
+        return
+    try:
+        span_context = span.get_span_context()
+        if rehydrated:
+            budget = _limits["event"]
+        else:
+            with _usage_lock:
+                budget = min(
+                    _limits["event"],
+                    _remaining(_span_usage, span_context.span_id, _limits["span"], MAX_TRACKED_SPANS),
+                    _remaining(_trace_usage, span_context.trace_id, _limits["trace"], MAX_TRACKED_TRACES),
+                )
+        used, dropped = 0, 0
+        truncated_values = 0
+        for key, value in event_attributes.items():
+            value, value_used, value_dropped = _truncate_value(value, min(_limits["attribute"], budget - used))
+            if value_dropped:
+                event_attributes[key] = value
+                truncated_values += 1
+            used += value_used
+            dropped += value_dropped
+        if rehydrated:
+            return
+        with _usage_lock:
+            if span_context.span_id in _span_usage:
+                _span_usage[span_context.span_id] += used
+            if span_context.trace_id in _trace_usage:
+                _trace_usage[span_context.trace_id] += used
+            _stats["truncated_values"] += truncated_values
+            _stats["dropped_bytes"] += dropped
+        if dropped:
+            _add_dropped_bytes(span, event_attributes, dropped)
+    except Exception as e:
+        logger.debug(f"Error applying payload budget: {e}")
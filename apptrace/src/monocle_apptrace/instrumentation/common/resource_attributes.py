@@ -0,0 +1,94 @@
+"""Process constant span attributes kept on the OTel Resource.
+
+Every Monocle span carries the SDK version and language, and every root span the app
+hosting entity found by scanning the environment. With MONOCLE_RESOURCE_ATTRIBUTES=true
+(or ``setup_monocle_telemetry(resource_attributes=True)``) the version and language are
+set once on the tracer provider's Resource instead of on each span, and the app hosting
+entity is resolved once at setup. When the spans go to a tracer provider the application
+set up beforehand, whose Resource lacks them, they stay on the spans. Readers use ``get_span_attribute`` to find an
+attribute in either place.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from monocle_apptrace.instrumentation.common.constants import (
+    MONOCLE_SDK_LANGUAGE,
+    MONOCLE_SDK_VERSION,
+    service_name_map,
+    service_type_map,
+)
+from monocle_apptrace.instrumentation.common.utils import get_monocle_version, parse_bool_setting
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_ATTRIBUTES_ENV = "MONOCLE_RESOURCE_ATTRIBUTES"
+_resource_attributes_enabled = False
+_app_hosting_entity: Optional[Tuple[str, str]] = None
+
+
+def configure_resource_attributes(setting: Any = None) -> bool:
+    """Resolve true/false configuration and return the enabled state."""
+    global _resource_attributes_enabled, _app_hosting_entity
+
+    value = setting
+    if value is None:
+        value = os.environ.get(RESOURCE_ATTRIBUTES_ENV, "false")
+
+    enabled = parse_bool_setting(RESOURCE_ATTRIBUTES_ENV, value)
+
+    _resource_attributes_enabled = enabled
+    _app_hosting_entity = _find_app_hosting_entity() if enabled else None
+    return enabled
+
+
+def is_resource_attributes_enabled() -> bool:
+    return _resource_attributes_enabled
+
+
+# Span attributes that may be found on the Resource instead
+RESOURCE_ATTRIBUTE_NAMES = (MONOCLE_SDK_VERSION, MONOCLE_SDK_LANGUAGE)
+
+
+def monocle_resource_attributes() -> Dict[str, str]:
+    """Attributes added to the Resource in place of the per-span ones."""
+    return {
+        MONOCLE_SDK_VERSION: get_monocle_version(),
+        MONOCLE_SDK_LANGUAGE: "python",
+    }
+
+
+def resource_has_monocle_attributes(resource) -> bool:
+    """Whether a Resource carries the attributes kept off the spans, e.g. the Resource of a
+    tracer provider the application set up before Monocle."""
+    attributes = getattr(resource, "attributes", None) or {}
+    return all(attributes.get(name) == value for name, value in monocle_resource_attributes().items())
+
+
+def _find_app_hosting_entity() -> Tuple[str, str]:
+    # Search env to indentify the infra service type, if found check env for service name if possible
+    for type_env, type_name in service_type_map.items():
+        if type_env in os.environ:
+            entity_name_env = service_name_map.get(type_name, "unknown")
+            return f"app_hosting.{type_name}", os.environ.get(entity_name_env, "generic")
+    return "app_hosting.generic", "generic"
+
+
+def app_hosting_entity() -> Tuple[str, str]:
+    """Type and name of the app hosting entity, resolved once at setup when enabled."""
+    if _app_hosting_entity is not None:
+        return _app_hosting_entity
+    return _find_app_hosting_entity()
+
+
+def get_span_attribute(span, name: str, default=None):
+    """Attribute of a span, looked up on its Resource for the attributes that can be kept there."""
+    attributes = getattr(span, "attributes", None) or {}
+    if name in attributes:
+        return attributes[name]
+    if name not in RESOURCE_ATTRIBUTE_NAMES:
+        return default
+    resource = getattr(span, "resource", None)
+    resource_attributes = getattr(resource, "attributes", None) or {}
+    return resource_attributes.get(name, default)
@@ -0,0 +1,193 @@
+"""Head and tail sampling of Monocle traces.
+
+Head sampling decides when a trace starts whether it is exported, by workflow name or scope.
+Spans of a trace that is not sampled are still recorded, so instrumentation behaves the same,
+but the span processors skip them. Rules are read from ``MONOCLE_HEAD_SAMPLING_RULES``, a comma
+separated list of ``workflow=<name>:<ratio>``, ``scope=<name>:<ratio>`` or
+``scope=<name>=<value>:<ratio>`` entries, the first match wins and other traces are sampled at
+``MONOCLE_HEAD_SAMPLING_RATIO``. The head sampler is set on the tracer provider created by
+``setup_monocle_telemetry``; it is not applied when the application already set a global SDK
+tracer provider, which keeps its own sampler.
+
+Tail sampling decides once the trace has completed, see
+``monocle_apptrace.exporters.tail_sampling_exporter``. A trace is always kept when one of its
+spans has an error, when its inference spans used at least ``MONOCLE_TAIL_SAMPLING_MIN_TOKENS``
+tokens or when an inference span took at least ``MONOCLE_TAIL_SAMPLING_SLOW_INFERENCE_MS``;
+other traces are kept at ``MONOCLE_TAIL_SAMPLING_RATIO``.
+"""
+
+import logging
+import os
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from opentelemetry import baggage
+from opentelemetry.context import Context, get_value
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult, TraceIdRatioBased
+from opentelemetry.trace import get_current_span
+from opentelemetry.trace.status import StatusCode
+
+from monocle_apptrace.instrumentation.common.constants import (
+    MONOCLE_DETECTED_SPAN_ERROR,
+    MONOCLE_SCOPE_NAME_PREFIX,
+    MONOCLE_WORKFLOW_NAME_KEY,
+)
+from monocle_apptrace.instrumentation.common.utils import get_env_int, get_workflow_name, parse_bool_setting
+
+logger = logging.getLogger(__name__)
+
+HEAD_SAMPLING_RATIO_ENV = "MONOCLE_HEAD_SAMPLING_RATIO"
+HEAD_SAMPLING_RULES_ENV = "MONOCLE_HEAD_SAMPLING_RULES"
+TAIL_SAMPLING_ENV = "MONOCLE_TAIL_SAMPLING"
+TAIL_SAMPLING_RATIO_ENV = "MONOCLE_TAIL_SAMPLING_RATIO"
+TAIL_SAMPLING_MIN_TOKENS_ENV = "MONOCLE_TAIL_SAMPLING_MIN_TOKENS"
+TAIL_SAMPLING_SLOW_INFERENCE_MS_ENV = "MONOCLE_TAIL_SAMPLING_SLOW_INFERENCE_MS"
+DEFAULT_TAIL_SAMPLING_MIN_TOKENS = 10000
+DEFAULT_TAIL_SAMPLING_SLOW_INFERENCE_MS = 10000
+
+
+def _parse_ratio(name: str, value: Any) -> float:
+    try:
+        ratio = float(value)
+    except (TypeError, ValueError):
+        ratio = -1.0
+    if not 0.0 <= ratio <= 1.0:
+        raise ValueError(f"{name} must be a number between 0 and 1")
+    return ratio
+
+
+def _env_ratio(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return _parse_ratio(name, value)
+
+
+
+def parse_head_sampling_rules(rules: Optional[str]) -> List[Tuple[str, str, Optional[str], float]]:
+    """Parse head sampling rules into (kind, name, scope value, ratio) tuples."""
+    parsed = []
+    for entry in (rules or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        selector, sep, ratio = entry.rpartition(":")
+        kind, _, target = selector.partition("=")
+        kind = kind.strip().lower()
+        if not sep or not target or kind not in ("workflow", "scope"):
+            raise ValueError(f"Invalid {HEAD_SAMPLING_RULES_ENV} entry: {entry}")
+        value = None
+        if kind == "scope" and "=" in target:
+            target, value = target.split("=", 1)
+        parsed.append((kind, target.strip(), value, _parse_ratio(HEAD_SAMPLING_RULES_ENV, ratio)))
+    return parsed
+
+
+class MonocleHeadSampler(Sampler):
+    """Samples new traces by workflow name and scope rules, child spans follow their parent."""
+
+    def __init__(self, ratio: float = 1.0, rules: Sequence[Tuple[str, str, Optional[str], float]] = ()):
+        self.ratio = ratio
+        self.rules = list(rules)
+
+    def _root_ratio(self, parent_context: Optional[Context]) -> float:
+        if not self.rules:
+            return self.ratio
+        workflow_name = get_value(MONOCLE_WORKFLOW_NAME_KEY, parent_context) or get_workflow_name()
+        scopes = baggage.get_all(parent_context)
+        for kind, name, value, ratio in self.rules:
+            if kind == "workflow":
+                if workflow_name == name:
+                    return ratio
+            else:
+                scope_value = scopes.get(f"{MONOCLE_SCOPE_NAME_PREFIX}{name}")
+                if scope_value is not None and (value is None or str(scope_value) == value):
+                    return ratio
+        return self.ratio
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None,
+                      trace_state=None) -> SamplingResult:
+        parent_span_context = get_current_span(parent_context).get_span_context()
+        if parent_span_context is not None and parent_span_context.is_valid:
+            sampled = parent_span_context.trace_flags.sampled
+            parent_trace_state = parent_span_context.trace_state
+        else:
+            ratio = self._root_ratio(parent_context)
+            sampled = (trace_id & TraceIdRatioBased.TRACE_ID_LIMIT) < TraceIdRatioBased.get_bound_for_rate(ratio)
+            parent_trace_state = None
+        # Spans are still recorded so the instrumentation runs as usual, the processors skip
+        # the ones that are not sampled.
+        decision = Decision.RECORD_AND_SAMPLE if sampled else Decision.RECORD_ONLY
+        return SamplingResult(decision, attributes, parent_trace_state)
+
+    def get_description(self) -> str:
+        return f"MonocleHeadSampler{{{self.ratio}, {len(self.rules)} rules}}"
+
+
+def configure_head_sampling(ratio: Any = None, rules: Any = None) -> Optional[MonocleHeadSampler]:
+    """Return the head sampler for the ratio and rules settings, None when every trace is sampled."""
+    ratio = _env_ratio(HEAD_SAMPLING_RATIO_ENV, 1.0) if ratio is None else _parse_ratio(HEAD_SAMPLING_RATIO_ENV, ratio)
+    if rules is None:
+        rules = os.environ.get(HEAD_SAMPLING_RULES_ENV)
+    parsed_rules = parse_head_sampling_rules(rules) if isinstance(rules, str) or rules is None else list(rules)
+    if ratio >= 1.0 and not parsed_rules:
+        return None
+    return MonocleHeadSampler(ratio, parsed_rules)
+
+
+def configure_tail_sampling(setting: Any = None) -> bool:
+    """Resolve true/false configuration and return the enabled state."""
+    value = setting
+    if value is None:
+        value = os.environ.get(TAIL_SAMPLING_ENV, "false")
+    return parse_bool_setting(TAIL_SAMPLING_ENV, value)
+
+
+def _is_inference(span: ReadableSpan) -> bool:
+    span_type = (span.attributes or {}).get("span.type")
+    return isinstance(span_type, str) and span_type.startswith("inference")
+
+
+def _span_tokens(span: ReadableSpan) -> int:
+    for event in span.events or ():
+        if event.name != "metadata":
+            continue
+        attributes = event.attributes or {}
+        total = attributes.get("total_tokens")
+        if not isinstance(total, (int, float)):
+            total = sum(attributes.get(key) or 0 for key in ("prompt_tokens", "completion_tokens")
+                        if isinstance(attributes.get(key), (int, float)))
+        return int(total)
+    return 0
+
+
+class TailSamplingPolicy:
+    """Decides whether a completed trace is kept."""
+
+    def __init__(self, ratio: Optional[float] = None, min_tokens: Optional[int] = None,
+                 slow_inference_ms: Optional[int] = None):
+        self.ratio = _env_ratio(TAIL_SAMPLING_RATIO_ENV, 0.0) if ratio is None else _parse_ratio(TAIL_SAMPLING_RATIO_ENV, ratio)
+        self.min_tokens = get_env_int(TAIL_SAMPLING_MIN_TOKENS_ENV, DEFAULT_TAIL_SAMPLING_MIN_TOKENS, minimum=0) \
+            if min_tokens is None else min_tokens
+        self.slow_inference_ms = get_env_int(TAIL_SAMPLING_SLOW_INFERENCE_MS_ENV, DEFAULT_TAIL_SAMPLING_SLOW_INFERENCE_MS, minimum=0) \
+            if slow_inference_ms is None else slow_inference_ms
+        self._ratio_bound = TraceIdRatioBased.get_bound_for_rate(self.ratio)
+
+    def keep(self, trace_id: int, spans: Iterable[ReadableSpan]) -> bool:
+        inference_spans = []
+        for span in spans:
+            # cheap checks first, the token count may evaluate deferred metadata events
+            if span.status.status_code == StatusCode.ERROR or (span.attributes or {}).get(MONOCLE_DETECTED_SPAN_ERROR):
+                return True
+            if _is_inference(span):
+                if self.slow_inference_ms and span.end_time and span.start_time and \
+                        span.end_time - span.start_time >= self.slow_inference_ms * 1_000_000:
+                    return True
+                inference_spans.append(span)
+        if self.min_tokens and inference_spans:
+            tokens = 0
+            for span in inference_spans:
+                tokens += _span_tokens(span)
+                if tokens >= self.min_tokens:
+                    return True
+        return (trace_id & TraceIdRatioBased.TRACE_ID_LIMIT) < self._ratio_bound
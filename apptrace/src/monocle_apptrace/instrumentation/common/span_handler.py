@@ -1,11 +1,12 @@
 import logging
 import os
 from contextlib import contextmanager
+from functools import lru_cache
 from threading import Lock
 from typing import Union
 from urllib.parse import urlparse
 from opentelemetry.context import get_value, set_value, attach, detach
-from opentelemetry.sdk.trace import Span
+from opentelemetry.sdk.trace import ReadableSpan, Span
 from opentelemetry.sdk.resources import SERVICE_NAME
 from opentelemetry.trace.status import Status, StatusCode
 from monocle_apptrace.instrumentation.common.constants import (
@@ -13,12 +14,16 @@ from monocle_apptrace.instrumentation.common.constants import (
     HTTP_HEALTH_CHECK_ROUTES,
     HTTP_HEALTH_CHECK_ROUTES_ENV,
     QUERY,
-    service_name_map,
-    service_type_map,
     MONOCLE_SDK_VERSION, MONOCLE_SDK_LANGUAGE, MONOCLE_DETECTED_SPAN_ERROR,
     HTTP_SUCCESS_CODES, HEALTH_RESET_COUNTER
 )
 
+from monocle_apptrace.instrumentation.common.deferred_events import (
+    DEFERRED_EVENT_NAMES, add_deferred_event, is_deferred_events_enabled, snapshot_arguments
+)
+from monocle_apptrace.instrumentation.common.message_delta import apply_message_delta, record_message_digests
+from monocle_apptrace.instrumentation.common.payload_budget import apply_payload_budget
+from monocle_apptrace.instrumentation.common.resource_attributes import app_hosting_entity, is_resource_attributes_enabled
 from monocle_apptrace.instrumentation.common.utils import CyclicCounter, set_attribute, get_scopes, MonocleSpanException, get_monocle_version, replace_placeholders, propogate_inference_info_to_parent_span, get_workflow_name
 from monocle_apptrace.instrumentation.common.constants import \
     (WORKFLOW_TYPE_KEY, WORKFLOW_TYPE_GENERIC, CHILD_ERROR_CODE, MONOCLE_SKIP_EXECUTIONS, SKIPPED_EXECUTION, MONOCLE_WORKFLOW_NAME_KEY)
@@ -53,6 +58,126 @@ FRAMEWORK_WORKFLOW_LIST = [
     "workflow.teams_ai",
     "workflow.litellm",
 ]
+@lru_cache(maxsize=None)
+def _resolve_workflow_type(package_name: str) -> str:
+    if package_name is not None:
+        for (package, framework_workflow_type) in WORKFLOW_TYPE_MAP.items():
+            if package_name.startswith(package):
+                return framework_workflow_type
+    return WORKFLOW_TYPE_GENERIC
+
+# Events evaluated only once the wrapped call returned, and only before it runs.
+POST_EXEC_ONLY_EVENTS = ("data.output", "metadata")
+PRE_EXEC_ONLY_EVENTS = ("data.input",)
+MAX_OUTPUT_PROCESSOR_INDEXES = 1024
+_SPAN_EVENTS_BY_NAME = "_monocle_events_by_name"
+
+class OutputProcessorIndex:
+    """ Accessors of an output processor partitioned by execution phase, built once per output processor
+        so that span hydration only evaluates the work of the current phase.
+
+        pre_exec_entities / post_exec_entities hold one entry per entity: the (accessor, attribute names) pairs
+        to evaluate in that phase and the attribute names set in the other phase. Attribute names are
+        resolved upfront for every entity index the entity can land on.
+        events / pre_exec_events / post_exec_events hold (event name, skip key, [(attribute, accessor)]).
+        eager_events holds the names of the events marked ``"deferrable": False``, whose accessors
+        have side effects on the request thread and always run during hydration.
+    """
+    __slots__ = ("output_processor", "pre_exec_entities", "post_exec_entities",
+                 "events", "pre_exec_events", "post_exec_events", "eager_events")
+
+    def __init__(self, output_processor: dict):
+        self.output_processor = output_processor
+        self.pre_exec_entities = []
+        self.post_exec_entities = []
+        for position, processors in enumerate(output_processor.get("attributes", None) or []):
+            pre_exec, post_exec = [], []
+            for processor in processors:
+                attribute = processor.get('attribute')
+                accessor = processor.get('accessor')
+                if not (attribute and accessor):
+                    logger.debug(f"{' and '.join([key for key in ['attribute', 'accessor'] if not processor.get(key)])} not found or incorrect in entity JSON")
+                    continue
+                # the entity index starts at 0 (or 2 for root spans) and grows by at most one per earlier entity
+                attribute_names = tuple(f"entity.{span_index + 1}.{attribute}" for span_index in range(position + 3))
+                if processor.get('phase', '') == 'post_execution':
+                    post_exec.append((accessor, attribute_names))
+                else:
+                    pre_exec.append((accessor, attribute_names))
+            self.pre_exec_entities.append((tuple(pre_exec), tuple(names for _, names in post_exec)))
+            self.post_exec_entities.append((tuple(post_exec), tuple(names for _, names in pre_exec)))
+
+        self.events = []
+        eager_events = set()
+        for event in output_processor.get("events", None) or []:
+            event_name = event.get("name")
+            if event_name is None:
+                logger.debug("name not found or incorrect in event JSON")
+                continue
+            if event.get("deferrable", True) is False:
+                eager_events.add(event_name)
+            accessors = tuple((attribute.get("attribute"), attribute.get("accessor"))
+                              for attribute in event.get("attributes", []) if attribute.get("accessor"))
+            self.events.append((event_name, 'events.' + event_name, accessors))
+        self.pre_exec_events = [event for event in self.events if event[0] not in POST_EXEC_ONLY_EVENTS]
+        self.post_exec_events = [event for event in self.events if event[0] not in PRE_EXEC_ONLY_EVENTS]
+        self.eager_events = frozenset(eager_events)
+
+_output_processor_indexes_lock = Lock()
+_output_processor_indexes: dict[int, OutputProcessorIndex] = {}
+
+def get_output_processor_index(output_processor: dict) -> OutputProcessorIndex:
+    """ Return the phase partitioned index of an output processor, building it on first use."""
+    processor_index = _output_processor_indexes.get(id(output_processor))
+    if processor_index is not None and processor_index.output_processor is output_processor:
+        return processor_index
+    # The index keeps a reference to the output processor, so its id stays valid while cached.
+    processor_index = OutputProcessorIndex(output_processor)
+    with _output_processor_indexes_lock:
+        if len(_output_processor_indexes) >= MAX_OUTPUT_PROCESSOR_INDEXES:
+            _output_processor_indexes.clear()
+        _output_processor_indexes[id(output_processor)] = processor_index
+    return processor_index
+
+def _get_span_event_list(span: Span):
+    # ReadableSpan.events copies the event list into a tuple on every access
+    return span._events if isinstance(span, ReadableSpan) else span.events
+
+def get_span_events_by_name(span: Span) -> dict:
+    """ Map of event name to the span's events with that name, kept on the span and rebuilt
+        only when its events changed outside of monocle's hydration."""
+    events = _get_span_event_list(span)
+    cached = getattr(span, _SPAN_EVENTS_BY_NAME, None)
+    if isinstance(cached, tuple) and cached[0] == len(events) and (not events or cached[1] is events[-1]):
+        return cached[2]
+    events_by_name = {}
+    for event in events:
+        events_by_name.setdefault(event.name, []).append(event)
+    _set_span_events_by_name(span, events, events_by_name)
+    return events_by_name
+
+def record_span_event(span: Span, event_name: str) -> None:
+    """ Add the event just added to the span to its name map."""
+    cached = getattr(span, _SPAN_EVENTS_BY_NAME, None)
+    if not isinstance(cached, tuple):
+        return
+    events = _get_span_event_list(span)
+    if len(events) != cached[0] + 1:
+        # ended span or bounded event list dropped an event, rebuild on the next lookup
+        _set_span_events_by_name(span, None, None)
+        return
+    cached[2].setdefault(event_name, []).append(events[-1])
+    _set_span_events_by_name(span, events, cached[2])
+
+def _set_span_events_by_name(span: Span, events, events_by_name) -> None:
+    try:
+        if events_by_name is None:
+            setattr(span, _SPAN_EVENTS_BY_NAME, None)
+        else:
+            setattr(span, _SPAN_EVENTS_BY_NAME, (len(events), events[-1] if events else None, events_by_name))
+    except AttributeError:
+        pass
+
 class SpanHandler:
 
     def __init__(self,instrumentor=None):
@@ -108,8 +233,9 @@ class SpanHandler:
     @staticmethod
     def set_default_monocle_attributes(span: Span, source_path = "" ):
         """ Set default monocle attributes for all spans """
-        span.set_attribute(MONOCLE_SDK_VERSION, get_monocle_version())
-        span.set_attribute(MONOCLE_SDK_LANGUAGE, "python")
+        if not is_resource_attributes_enabled():
+            span.set_attribute(MONOCLE_SDK_VERSION, get_monocle_version())
+            span.set_attribute(MONOCLE_SDK_LANGUAGE, "python")
         span.set_attribute("span_source", source_path)
         for scope_key, scope_value in get_scopes().items():
             span.set_attribute(f"scope.{scope_key}", SpanHandler._coerce_scope_value(scope_value))
@@ -152,6 +278,10 @@ class SpanHandler:
         try:
             detected_error_in_attribute = self.hydrate_attributes(to_wrap, wrapped, instance, args, kwargs, result, span, parent_span, is_post_exec)
             detected_error_in_event = self.hydrate_events(to_wrap, wrapped, instance, args, kwargs, result, span, parent_span, ex, is_post_exec)
+            if is_post_exec:
+                stream_stats = getattr(result, "stream_stats", None)
+                if isinstance(stream_stats, dict):
+                    span.set_attributes(stream_stats)
             if detected_error_in_attribute or detected_error_in_event:
                 span.set_attribute(MONOCLE_DETECTED_SPAN_ERROR, True)
         finally:
@@ -172,32 +302,29 @@ class SpanHandler:
             skip_processors:list[str] = self.skip_processor(to_wrap, wrapped, instance, span, args, kwargs) or []
             if 'attributes' in output_processor and 'attributes' not in skip_processors:
                 arguments = {"instance":instance, "args":args, "kwargs":kwargs, "result":result, "parent_span":parent_span, "span":span}
-
-                for processors in output_processor["attributes"]:
+                processor_index = get_output_processor_index(output_processor)
+                entities = processor_index.post_exec_entities if is_post_exec else processor_index.pre_exec_entities
+                for phase_accessors, other_phase_names in entities:
                     entity_has_attributes = False
-                    for processor in processors:
-                        attribute = processor.get('attribute')
-                        accessor = processor.get('accessor')
-
-                        if attribute and accessor:
-                            attribute_name = f"entity.{span_index + 1}.{attribute}"
-                            try:
-                                if (not is_post_exec and processor.get('phase', '') != 'post_execution') or (is_post_exec and processor.get('phase', '') == 'post_execution'):
-                                    processor_result = accessor(arguments)
-                                    if processor_result and isinstance(processor_result, (str, list)):
-                                        span.set_attribute(attribute_name, processor_result)
-                                        entity_has_attributes = True
-                                else:
-                                    # During post_execution, we need to find the next available entity index
-                                    if span.attributes.get(attribute_name) is not None:
-                                        entity_has_attributes = True
-                            except MonocleSpanException as e:
-                                span.set_status(StatusCode.ERROR, e.message)
-                                detected_error = True
-                            except Exception as e:
-                                logger.debug(f"Error processing accessor: {e}")
-                        else:
-                            logger.debug(f"{' and '.join([key for key in ['attribute', 'accessor'] if not processor.get(key)])} not found or incorrect in entity JSON")
+                    for accessor, attribute_names in phase_accessors:
+                        try:
+                            processor_result = accessor(arguments)
+                            if processor_result and isinstance(processor_result, (str, list)):
+                                span.set_attribute(attribute_names[span_index], processor_result)
+                                entity_has_attributes = True
+                        except MonocleSpanException as e:
+                            span.set_status(StatusCode.ERROR, e.message)
+                            detected_error = True
+                        except Exception as e:
+                            logger.debug(f"Error processing accessor: {e}")
+                    if not entity_has_attributes and other_phase_names:
+                        # Attributes of the other phase were set by the earlier hydration of this span,
+                        # they still count towards the entity index.
+                        span_attributes = span.attributes
+                        for attribute_names in other_phase_names:
+                            if span_attributes.get(attribute_names[span_index]) is not None:
+                                entity_has_attributes = True
+                                break
 
                     # Only increment span_index if this entity actually has attributes set
                     if entity_has_attributes:
@@ -217,11 +344,7 @@ class SpanHandler:
         detected_error:bool = False
         if 'output_processor' in to_wrap and to_wrap["output_processor"] is not None:
             output_processor=to_wrap['output_processor']
-            if is_post_exec:
-                skip_events:list[str] = ['events.data.input']
-            else:
-                skip_events:list[str] = ['events.data.output', 'events.metadata']
-            skip_processors:list[str] = list(set(self.skip_processor(to_wrap, wrapped, instance, span, args, kwargs) or []).union(set(skip_events)))
+            skip_processors:list[str] = self.skip_processor(to_wrap, wrapped, instance, span, args, kwargs) or []
             arguments = {"instance": instance, "args": args, "kwargs": kwargs, "result": ret_result, "exception":ex, "parent_span":parent_span, "span": span}
             subtype = output_processor.get('subtype')
             if subtype:
@@ -242,51 +365,59 @@ class SpanHandler:
             # Process events if they are defined in the output_processor.
             # In case of inference.modelapi skip the event processing unless the span has an exception
             if 'events' in output_processor and ('events' not in skip_processors or ex is not None):
-                events = output_processor['events']
-                for event in events:
-                    event_name = event.get("name")
-                    if 'events.'+event_name in skip_processors and ex is None:
+                processor_index = get_output_processor_index(output_processor)
+                if ex is not None:
+                    events = processor_index.events
+                else:
+                    events = processor_index.post_exec_events if is_post_exec else processor_index.pre_exec_events
+                timestamps = getattr(ret_result, "timestamps", {})
+                defer_events = ex is None and is_deferred_events_enabled() and isinstance(span, Span)
+                deferred_arguments = None
+                for event_name, skip_key, event_accessors in events:
+                    if ex is None and skip_key in skip_processors:
+                        continue
+                    existing_events = get_span_events_by_name(span).get(event_name)
+                    if (defer_events and not existing_events and event_name in DEFERRED_EVENT_NAMES
+                            and event_name not in processor_index.eager_events):
+                        # the accessors run when the event is read, normally by the exporter
+                        if deferred_arguments is None:
+                            deferred_arguments = snapshot_arguments(arguments)
+                        matching_timestamp = timestamps.get(event_name, None)
+                        add_deferred_event(span, event_name, event_accessors, deferred_arguments,
+                                           matching_timestamp if isinstance(matching_timestamp, int) else None)
+                        record_span_event(span, event_name)
                         continue
                     event_attributes = {}
-                    attributes = event.get("attributes", [])
-                    for attribute in attributes:
-                        attribute_key = attribute.get("attribute")
-                        accessor = attribute.get("accessor")
-                        if accessor:
+                    for attribute_key, accessor in event_accessors:
+                        try:
                             try:
-                                try:
-                                    result = accessor(arguments)
-                                except MonocleSpanException as e:
-                                    span.set_status(StatusCode.ERROR, e.message)
-                                    detected_error = True
-                                    result = e.get_err_code()
-                                if result and isinstance(result, dict):
-                                    result = dict((key, value) for key, value in result.items() if value is not None)
-                                if result and isinstance(result, (int, str, list, dict)):
-                                    if attribute_key is not None:
-                                        event_attributes[attribute_key] = result
-                                    else:
-                                        event_attributes.update(result)
-                                if not is_post_exec and event_name == "data.input" and attribute_key == "input" and result:
-                                    # append memory to input if available
-                                    # update the result with new input
-                                    pass
-                                elif not detected_error and is_post_exec and event_name == "data.output" and attribute_key == "response" and result:
-                                    # capture memory
-                                    pass
-                            except Exception as e:
-                                logger.debug(f"Error evaluating accessor for attribute '{attribute_key}': {e}")
-                    matching_timestamp = getattr(ret_result, "timestamps", {}).get(event_name, None)
-                    alreadyExist = False
-                    for existing_event in span.events:
-                        if event_name == existing_event.name:
+                                result = accessor(arguments)
+                            except MonocleSpanException as e:
+                                span.set_status(StatusCode.ERROR, e.message)
+                                detected_error = True
+                                result = e.get_err_code()
+                            if result and isinstance(result, dict):
+                                result = dict((key, value) for key, value in result.items() if value is not None)
+                            if result and isinstance(result, (int, str, list, dict)):
+                                if attribute_key is not None:
+                                    event_attributes[attribute_key] = result
+                                else:
+                                    event_attributes.update(result)
+                        except Exception as e:
+                            logger.debug(f"Error evaluating accessor for attribute '{attribute_key}': {e}")
+                    input_delta = apply_message_delta(span, event_name, event_attributes)
+                    apply_payload_budget(span, event_name, event_attributes, rehydrated=bool(existing_events))
+                    record_message_digests(span, input_delta, event_attributes)
+                    if existing_events:
+                        for existing_event in existing_events:
                             existing_event.attributes._dict.update(event_attributes)
-                            alreadyExist = True
-                    if not alreadyExist:
+                    else:
+                        matching_timestamp = timestamps.get(event_name, None)
                         if isinstance(matching_timestamp, int):
                             span.add_event(name=event_name, attributes=event_attributes, timestamp=matching_timestamp)
                         else:
                             span.add_event(name=event_name, attributes=event_attributes)
+                        record_span_event(span, event_name)
         return detected_error
 
     @staticmethod
@@ -317,26 +448,15 @@ class SpanHandler:
     @staticmethod
     def get_workflow_type(to_wrap):
         # workflow type
-        workflow_type = WORKFLOW_TYPE_GENERIC
-        if to_wrap is not None:
-            package_name = to_wrap.get('package')
-            for (package, framework_workflow_type) in WORKFLOW_TYPE_MAP.items():
-                if (package_name is not None and package_name.startswith(package)):
-                    workflow_type = framework_workflow_type
-                    break
-        return workflow_type
+        if to_wrap is None:
+            return WORKFLOW_TYPE_GENERIC
+        return _resolve_workflow_type(to_wrap.get('package'))
 
     def set_app_hosting_identifier_attribute(span):
         span_index = 2
-        # Search env to indentify the infra service type, if found check env for service name if possible
-        span.set_attribute(f"entity.{span_index}.type", f"app_hosting.generic")
-        span.set_attribute(f"entity.{span_index}.name", "generic")
-        for type_env, type_name in service_type_map.items():
-            if type_env in os.environ:
-                span.set_attribute(f"entity.{span_index}.type", f"app_hosting.{type_name}")
-                entity_name_env = service_name_map.get(type_name, "unknown")
-                span.set_attribute(f"entity.{span_index}.name", os.environ.get(entity_name_env, "generic"))
-                break
+        app_hosting_type, app_hosting_name = app_hosting_entity()
+        span.set_attribute(f"entity.{span_index}.type", app_hosting_type)
+        span.set_attribute(f"entity.{span_index}.name", app_hosting_name)
 
     @staticmethod
     def get_workflow_name(span: Span) -> str:
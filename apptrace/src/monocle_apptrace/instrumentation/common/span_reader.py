@@ -0,0 +1,126 @@
+"""Incremental reading of spans from trace files.
+
+``iter_spans`` yields the spans of a trace file one at a time instead of decoding the whole
+document, so memory stays bounded by the largest span rather than by the file. It reads the JSON
+arrays written by ``FileSpanExporter`` (indented or compact) as well as JSON lines files, like its
+ndjson segments, and single span objects. Paths ending in ``.gz`` are read through gzip.
+"""
+
+import codecs
+import gzip
+import json
+import os
+from typing import IO, Any, Iterator, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    """Decoded text of a stream, read on demand and trimmed as values are consumed."""
+
+    def __init__(self, stream: IO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self._decode = codecs.getincrementaldecoder("utf-8-sig")().decode
+
+    def read(self, size: int) -> bool:
+        """Append at least size characters unless the stream ends, return False at the end."""
+        if self.eof:
+            return False
+        if self.pos > self.chunk_size:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        parts = []
+        while size > 0:
+            data = self.stream.read(self.chunk_size)
+            if not data:
+                self.eof = True
+                if isinstance(data, bytes):
+                    parts.append(self._decode(b"", final=True))
+                break
+            text = self._decode(data) if isinstance(data, bytes) else data
+            parts.append(text)
+            size -= len(text)
+        self.text += "".join(parts)
+        return bool(parts) and any(parts)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, empty at the end of the stream."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.read(self.chunk_size):
+                return ""
+
+    def value(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # a value ending with the buffer may be a number cut in two
+                if end < len(self.text) or self.eof or self.text[end - 1] in "}]\"el":
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # grow the buffer geometrically so a large span is decoded a bounded number of times
+            self.read(max(len(self.text) - self.pos, self.chunk_size))
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.text, self.pos)
+
+
+def _iter_stream(stream: IO, chunk_size: int) -> Iterator[Any]:
+    buffer = _Buffer(stream, chunk_size)
+    first = buffer.peek()
+    if not first:
+        raise buffer.error("Expecting value")
+    if first != "[":
+        # JSON lines, or a single span object
+        while buffer.peek():
+            value = buffer.value()
+            if isinstance(value, list):
+                yield from value
+            else:
+                yield value
+        return
+    buffer.pos += 1
+    if buffer.peek() == "]":
+        buffer.pos += 1
+    else:
+        while True:
+            yield buffer.value()
+            separator = buffer.peek()
+            buffer.pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                buffer.pos -= 1
+                raise buffer.error("Expecting ',' delimiter")
+    if buffer.peek():
+        raise buffer.error("Extra data")
+
+
+def iter_spans(source: Union[str, os.PathLike, IO], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the spans of a trace file, or of a file object opened in text or binary mode.
+
+    Raises json.JSONDecodeError when the document is invalid, after yielding the spans before
+    the error.
+    """
+    if hasattr(source, "read"):
+        yield from _iter_stream(source, chunk_size)
+        return
+    opener = gzip.open if os.fspath(source).endswith(".gz") else open
+    with opener(source, "rb") as stream:
+        yield from _iter_stream(stream, chunk_size)
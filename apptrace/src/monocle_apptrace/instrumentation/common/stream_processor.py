@@ -3,14 +3,28 @@ Base streaming processor using Template Method pattern for generic framework sup
 """
 
 import logging
+import math
 import time
 import types as _builtin_types
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
 from types import SimpleNamespace
 from typing import Any, Callable, Dict, List, Optional
 
-from monocle_apptrace.instrumentation.common.utils import patch_instance_method
+from monocle_apptrace.instrumentation.common.constants import (
+    STREAM_CHUNK_COUNT,
+    STREAM_INTER_CHUNK_MAX_MS,
+    STREAM_INTER_CHUNK_P50_MS,
+    STREAM_INTER_CHUNK_P90_MS,
+    STREAM_INTER_CHUNK_P99_MS,
+    STREAM_TIME_TO_FIRST_TOKEN_MS,
+    STREAM_TOKENS_PER_SECOND,
+)
+from monocle_apptrace.instrumentation.common.utils import get_env_int, patch_instance_method
+
+logger = logging.getLogger(__name__)
+
+STREAM_CAPTURE_MAX_CHARS_ENV = "MONOCLE_STREAM_CAPTURE_MAX_CHARS"
+DEFAULT_STREAM_CAPTURE_MAX_CHARS = 1024 * 1024
 
 
 # Streaming Event Type Constants
@@ -36,21 +50,136 @@ class StreamEventTypes:
         return isinstance(event_type, str) and event_type.startswith(cls.RESPONSE_PREFIX)
 
 
-@dataclass
+class LatencySketch:
+    """Fixed-size streaming quantile sketch for latencies in nanoseconds.
+
+    Values are counted in log-spaced buckets growing by 10%, so quantiles are within about 5%
+    of the true value and adding a value never allocates.
+    """
+    __slots__ = ("_counts", "count", "max_value")
+
+    _MIN_VALUE = 100_000  # 0.1ms, smaller values share the first bucket
+    _LOG_GAMMA = math.log(1.1)
+    _BUCKETS = 160  # the last bucket starts around 7 minutes
+
+    def __init__(self):
+        self._counts = [0] * self._BUCKETS
+        self.count = 0
+        self.max_value = 0
+
+    def add(self, value: int) -> None:
+        if value <= self._MIN_VALUE:
+            index = 0
+        else:
+            index = min(int(math.log(value / self._MIN_VALUE) / self._LOG_GAMMA) + 1, self._BUCKETS - 1)
+        self._counts[index] += 1
+        self.count += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile, None while the sketch is empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen > rank:
+                if index == 0:
+                    return float(min(self._MIN_VALUE, self.max_value))
+                # geometric midpoint of the bucket
+                return min(self._MIN_VALUE * math.exp((index - 0.5) * self._LOG_GAMMA), float(self.max_value))
+        return float(self.max_value)
+
+
+def _get_capture_limit() -> int:
+    return get_env_int(STREAM_CAPTURE_MAX_CHARS_ENV, DEFAULT_STREAM_CAPTURE_MAX_CHARS, minimum=0)
+
+
+def _to_ms(value_ns: float) -> float:
+    return round(value_ns / 1e6, 3)
+
+
+def _output_token_count(usage: Any) -> Optional[int]:
+    """Output token count from an OpenAI, Anthropic, Gemini or dict style usage object."""
+    if usage is None:
+        return None
+    for key in ("completion_tokens", "output_tokens", "candidates_token_count"):
+        value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
 class StreamState:
-    """State object for tracking streaming response processing."""
-    waiting_for_first_token: bool = True
-    first_token_time: int = 0
-    stream_closed_time: Optional[int] = None
-    accumulated_response: str = ""
-    token_usage: Optional[Any] = None
-    raw_items: List[Any] = field(default_factory=list)
-    finish_reason: Optional[str] = None
-    role: str = "assistant"
-    tools: List[Dict[str, Any]] = field(default_factory=list)
-    refusal: Optional[str] = None
-    reasoning_content: str = ""
-    
+    """State object for tracking streaming response processing.
+
+    Streamed text is kept as a list of fragments and joined once when read, and capture stops
+    at max_capture_chars (MONOCLE_STREAM_CAPTURE_MAX_CHARS, 0 for no limit); the characters
+    beyond it are only counted in truncated_chars.
+    """
+    __slots__ = (
+        "waiting_for_first_token", "first_token_time", "stream_closed_time", "token_usage",
+        "raw_items", "finish_reason", "role", "tools", "refusal", "reasoning_content",
+        "max_capture_chars", "captured_chars", "truncated_chars", "_text_parts",
+        "chunk_count", "last_chunk_time", "chunk_gaps",
+    )
+
+    def __init__(self, max_capture_chars: Optional[int] = None):
+        self.waiting_for_first_token: bool = True
+        self.first_token_time: int = 0
+        self.stream_closed_time: Optional[int] = None
+        self.token_usage: Optional[Any] = None
+        self.raw_items: List[Any] = []
+        self.finish_reason: Optional[str] = None
+        self.role: str = "assistant"
+        self.tools: List[Dict[str, Any]] = []
+        self.refusal: Optional[str] = None
+        self.reasoning_content: str = ""
+        self.max_capture_chars: int = _get_capture_limit() if max_capture_chars is None else max_capture_chars
+        self.captured_chars: int = 0
+        self.truncated_chars: int = 0
+        self._text_parts: List[str] = []
+        self.chunk_count: int = 0
+        self.last_chunk_time: Optional[int] = None
+        self.chunk_gaps: Optional[LatencySketch] = LatencySketch()
+
+    @property
+    def accumulated_response(self) -> str:
+        """Text captured so far."""
+        if len(self._text_parts) > 1:
+            self._text_parts = ["".join(self._text_parts)]
+        return self._text_parts[0] if self._text_parts else ""
+
+    @accumulated_response.setter
+    def accumulated_response(self, text: str) -> None:
+        self._text_parts = []
+        self.captured_chars = 0
+        self.truncated_chars = 0
+        self.append_text(text)
+
+    def append_text(self, text: str) -> None:
+        """Append text to the captured response, up to max_capture_chars."""
+        if not text:
+            return
+        if self.max_capture_chars:
+            room = self.max_capture_chars - self.captured_chars
+            if len(text) > room:
+                self.truncated_chars += len(text) - max(room, 0)
+                if room <= 0:
+                    return
+                text = text[:room]
+        self._text_parts.append(text)
+        self.captured_chars += len(text)
+
+    def record_chunk(self, now: int) -> None:
+        """Count a chunk received at now and add the gap since the previous one to chunk_gaps."""
+        self.chunk_count += 1
+        if self.chunk_gaps is not None and self.last_chunk_time is not None:
+            self.chunk_gaps.add(now - self.last_chunk_time)
+        self.last_chunk_time = now
+
     def update_first_token_time(self) -> None:
         """Update first token timestamp if still waiting for first token."""
         if self.waiting_for_first_token:
@@ -61,7 +190,7 @@ class StreamState:
         """Add content to accumulated response and update first token time."""
         if content:
             self.update_first_token_time()
-            self.accumulated_response += content
+            self.append_text(content)
     
     def store_chunk_or_event(self, item: Any) -> None:
         """Store chunk or event for post-processing."""
@@ -78,7 +207,12 @@ class BaseStreamProcessor(ABC):
     This class provides a structured approach to processing streaming responses
     from various AI/ML frameworks. Subclasses should implement the abstract methods
     and optionally override the configurable methods as needed.
+
+    Raw chunks are only kept in ``state.raw_items`` for processors that set
+    ``retain_raw_items``; the others extract what they need as each chunk arrives.
     """
+
+    retain_raw_items: bool = False
     
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -108,6 +242,8 @@ class BaseStreamProcessor(ABC):
 
         if isinstance(response, list):
             # Pre-consumed items from atask_iter_wrapper: process each fragment.
+            # Their arrival times were not observed, so no gaps are recorded.
+            state.chunk_gaps = None
             for item in response:
                 self.process_fragment(item, state)
             state.stream_closed_time = state.stream_closed_time or time.time_ns()
@@ -232,7 +368,8 @@ class BaseStreamProcessor(ABC):
             item: Streaming chunk or event to store
             state: Current streaming state
         """
-        state.store_chunk_or_event(item)
+        if self.retain_raw_items:
+            state.store_chunk_or_event(item)
     
     def assemble_data(self, state: StreamState) -> None:
         """Assemble fragmented data from stored raw streaming items.
@@ -273,7 +410,29 @@ class BaseStreamProcessor(ABC):
             finish_reason=state.finish_reason,
             refusal=state.refusal,
             reasoning_content=state.reasoning_content,
+            stream_stats=self.build_stream_stats(state, stream_start_time),
         )
+
+    def build_stream_stats(self, state: StreamState, stream_start_time: int) -> Dict[str, Any]:
+        """Summarize stream timing as span attributes.
+
+        Reports the chunk count, time to first token, the p50/p90/p99 and max gap between
+        chunks, and output tokens per second when the usage carries an output token count.
+        """
+        stats: Dict[str, Any] = {STREAM_CHUNK_COUNT: state.chunk_count}
+        if not state.waiting_for_first_token:
+            stats[STREAM_TIME_TO_FIRST_TOKEN_MS] = _to_ms(state.first_token_time - stream_start_time)
+        gaps = state.chunk_gaps
+        if gaps is not None and gaps.count:
+            stats[STREAM_INTER_CHUNK_P50_MS] = _to_ms(gaps.quantile(0.5))
+            stats[STREAM_INTER_CHUNK_P90_MS] = _to_ms(gaps.quantile(0.9))
+            stats[STREAM_INTER_CHUNK_P99_MS] = _to_ms(gaps.quantile(0.99))
+            stats[STREAM_INTER_CHUNK_MAX_MS] = _to_ms(gaps.max_value)
+        output_tokens = _output_token_count(state.token_usage)
+        end_time = state.stream_closed_time or state.last_chunk_time
+        if output_tokens and end_time and not state.waiting_for_first_token and end_time > state.first_token_time:
+            stats[STREAM_TOKENS_PER_SECOND] = round(output_tokens * 1e9 / (end_time - state.first_token_time), 3)
+        return stats
     
     # =============================================================================
     # INTERNAL IMPLEMENTATION - Do not override these methods
@@ -441,6 +600,7 @@ class BaseStreamProcessor(ABC):
 
     def process_fragment(self, item: Any, state: StreamState) -> None:
         """Template method for processing a single stream fragment."""
+        state.record_chunk(time.time_ns())
         try:
             # Try framework-specific processing first
             if self.try_framework_specific_processing(item, state):
@@ -451,7 +611,10 @@ class BaseStreamProcessor(ABC):
         except Exception as e:
             self.handle_processing_error(e, item, state)
         finally:
-            self.store_chunk_or_event(item, state)
+            try:
+                self.store_chunk_or_event(item, state)
+            except Exception as e:
+                self.handle_processing_error(e, item, state)
     
     def try_framework_specific_processing(self, item: Any, state: StreamState) -> bool:
         """Try to process item using framework-specific logic.
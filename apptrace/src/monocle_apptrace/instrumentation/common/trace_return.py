@@ -1,24 +1,32 @@
 import base64
-import gzip
+import binascii
 import hmac
 import importlib
-import json
 import logging
 import os
 import uuid
+import zlib
 
 from monocle_apptrace.exporters.base_exporter import serialize_span
+from monocle_apptrace.instrumentation.common import json_codec
 from monocle_apptrace.instrumentation.common.constants import (
     MONOCLE_TRACE_RETURN_ENABLED_ENV,
+    MONOCLE_TRACE_RETURN_MAX_BYTES_ENV,
     MONOCLE_TRACE_RETRIEVAL_CALLBACK_ENV,
     MONOCLE_TRACE_RETRIEVAL_DEFAULT_KEY_ENV,
     TRACE_RETURN_REQUEST_HEADER,
     TRACE_RETURN_VERSION,
 )
+from monocle_apptrace.instrumentation.common.utils import get_env_int
 
 logger = logging.getLogger(__name__)
 
 _DELIMITER_PREFIX = "__MONOCLE_TRACES__"
+# Size of the chunks the trailer is produced and decoded in.
+TRAILER_CHUNK_SIZE = 64 * 1024
+# Last element of the span list when spans were dropped to honor MONOCLE_TRACE_RETURN_MAX_BYTES.
+TRUNCATED_MARKER_KEY = "monocle.trace_return.truncated"
+_TRUNCATED_MARKER_PREFIX = '{"' + TRUNCATED_MARKER_KEY + '": '
 
 
 def is_trace_return_enabled() -> bool:
@@ -90,19 +98,134 @@ def make_delimiter() -> str:
     return f"{_DELIMITER_PREFIX}{uuid.uuid4().hex}__"
 
 
-def encode_spans(spans: list) -> str:
-    span_dicts = [serialize_span(span) for span in spans]
-    raw = json.dumps(span_dicts).encode("utf-8")
-    return base64.b64encode(gzip.compress(raw)).decode("ascii")
+def get_trace_return_max_bytes() -> "int | None":
+    """Cap on the uncompressed JSON size of the returned spans, from MONOCLE_TRACE_RETURN_MAX_BYTES.
+    None (the default) returns every span."""
+    return get_env_int(MONOCLE_TRACE_RETURN_MAX_BYTES_ENV, 0, minimum=0) or None
+
+
+class TrailerEncoder:
+    """Incrementally encodes spans into the trailer payload: the base64 of the gzip of the JSON span
+    list. Spans are serialized, compressed and base64 encoded one at a time, so the full JSON text is
+    never held in memory. Once a span would take the JSON over max_bytes, it and the spans after it
+    are dropped and a {"monocle.trace_return.truncated": <dropped span count>} marker ends the list."""
+
+    def __init__(self, max_bytes: "int | None" = None):
+        self.max_bytes = max_bytes
+        self.span_count = 0
+        self.dropped_count = 0
+        self._json_bytes = 0
+        # gzip container, so that the payload stays readable by gzip.decompress
+        self._compressor = zlib.compressobj(wbits=31)
+        self._unencoded = b""
+
+    def _base64(self, compressed: bytes, final: bool = False) -> bytes:
+        data = self._unencoded + compressed if self._unencoded else compressed
+        if final:
+            self._unencoded = b""
+            return base64.b64encode(data)
+        aligned = len(data) - len(data) % 3
+        self._unencoded = data[aligned:]
+        return base64.b64encode(data[:aligned]) if aligned else b""
+
+    def add_span(self, span) -> bytes:
+        """Add a span and return the encoded payload bytes available so far (possibly empty)."""
+        if self.dropped_count:
+            self.dropped_count += 1
+            return b""
+        raw = json_codec.dumps_bytes(serialize_span(span))
+        if self.max_bytes is not None and self._json_bytes + len(raw) + 2 > self.max_bytes:
+            self.dropped_count += 1
+            return b""
+        raw = (b"," if self.span_count else b"[") + raw
+        self._json_bytes += len(raw)
+        self.span_count += 1
+        return self._base64(self._compressor.compress(raw))
+
+    def finish(self) -> bytes:
+        """Close the span list and return the remaining encoded payload bytes."""
+        tail = b"," if self.span_count else b"["
+        if self.dropped_count:
+            tail += (_TRUNCATED_MARKER_PREFIX + str(self.dropped_count) + "}").encode("utf-8")
+            logger.warning("Trace-return trailer truncated, dropped %d spans over %d bytes",
+                           self.dropped_count, self.max_bytes)
+        elif self.span_count:
+            tail = b""
+        tail += b"]"
+        compressed = self._compressor.compress(tail) + self._compressor.flush()
+        return self._base64(compressed, final=True)
+
+
+def iter_trailer_chunks(spans: list, delimiter: str, max_bytes: "int | None" = None):
+    """Yield the trailer (delimiter followed by the encoded spans) in chunks of about TRAILER_CHUNK_SIZE bytes."""
+    encoder = TrailerEncoder(max_bytes)
+    chunk = bytearray(delimiter.encode("utf-8"))
+    for span in spans:
+        chunk += encoder.add_span(span)
+        if len(chunk) >= TRAILER_CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk = bytearray()
+    chunk += encoder.finish()
+    yield bytes(chunk)
+
+
+def encode_spans(spans: list, max_bytes: "int | None" = None) -> str:
+    encoder = TrailerEncoder(max_bytes)
+    encoded = [encoder.add_span(span) for span in spans]
+    encoded.append(encoder.finish())
+    return b"".join(encoded).decode("ascii")
+
+
+class TrailerDecoder:
+    """Incrementally decodes a trailer payload fed in chunks back into the JSON span list text."""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(wbits=47)  # gzip or zlib container
+        self._undecoded = b""
+        self._parts = []
+        self.dropped_count = 0
+
+    def feed(self, payload_chunk) -> None:
+        if isinstance(payload_chunk, str):
+            payload_chunk = payload_chunk.encode("ascii")
+        data = self._undecoded + payload_chunk if self._undecoded else payload_chunk
+        aligned = len(data) - len(data) % 4
+        self._undecoded = data[aligned:]
+        if aligned:
+            self._parts.append(self._decompressor.decompress(binascii.a2b_base64(data[:aligned])))
+
+    def finish(self) -> str:
+        """Return the JSON span list text, without the truncation marker (see dropped_count)."""
+        if self._undecoded:
+            self._parts.append(self._decompressor.decompress(binascii.a2b_base64(self._undecoded)))
+            self._undecoded = b""
+        self._parts.append(self._decompressor.flush())
+        text = b"".join(self._parts).decode("utf-8")
+        self._parts = []
+        marker_index = text.rfind(_TRUNCATED_MARKER_PREFIX)
+        if marker_index != -1 and text.endswith("}]"):
+            try:
+                self.dropped_count = int(text[marker_index + len(_TRUNCATED_MARKER_PREFIX):-2])
+                text = text[:marker_index].rstrip(",") + "]"
+            except ValueError:
+                pass
+        return text
+
+
+def decode_trailer(payload: str) -> "tuple[str, int]":
+    """Decode a trailer payload into (JSON span list text, number of spans dropped by the size cap)."""
+    decoder = TrailerDecoder()
+    for start in range(0, len(payload), TRAILER_CHUNK_SIZE):
+        decoder.feed(payload[start:start + TRAILER_CHUNK_SIZE])
+    return decoder.finish(), decoder.dropped_count
 
 
 def decode_payload(payload: str) -> str:
-    raw = gzip.decompress(base64.b64decode(payload.encode("ascii")))
-    return raw.decode("utf-8")
+    return decode_trailer(payload)[0]
 
 
 def build_trailer_bytes(spans: list, delimiter: str) -> bytes:
-    return delimiter.encode("utf-8") + encode_spans(spans).encode("ascii")
+    return b"".join(iter_trailer_chunks(spans, delimiter, get_trace_return_max_bytes()))
 
 
 def build_response_header_value(delimiter: str) -> str:
@@ -117,7 +240,8 @@ def parse_delimiter_from_header(header_value: str) -> "str | None":
 
 def split_body_and_trailer(body: bytes, delimiter: str) -> "tuple[bytes, str | None]":
     marker = delimiter.encode("utf-8")
-    idx = body.find(marker)
+    # the trailer is at the end of the body, search from there
+    idx = body.rfind(marker)
     if idx == -1:
         return body, None
     clean = body[:idx]
@@ -125,6 +249,20 @@ def split_body_and_trailer(body: bytes, delimiter: str) -> "tuple[bytes, str | N
     return clean, payload
 
 
+def split_and_decode_trailer(body: bytes, delimiter: str) -> "tuple[bytes, str | None, int]":
+    """Split the trailer off a response body and decode it straight from the body bytes.
+    Returns (clean body, JSON span list text or None, number of spans dropped by the size cap)."""
+    marker = delimiter.encode("utf-8")
+    idx = body.rfind(marker)
+    if idx == -1:
+        return body, None, 0
+    decoder = TrailerDecoder()
+    view = memoryview(body)
+    for start in range(idx + len(marker), len(body), TRAILER_CHUNK_SIZE):
+        decoder.feed(bytes(view[start:start + TRAILER_CHUNK_SIZE]))
+    return body[:idx], decoder.finish(), decoder.dropped_count
+
+
 def pop_and_build_trailer(trace_id: int, delimiter: str) -> "bytes | None":
     """Pop this trace's captured spans from the exporter and build trailer bytes.
     Returns None when there are no spans to return."""
@@ -135,6 +273,16 @@ def pop_and_build_trailer(trace_id: int, delimiter: str) -> "bytes | None":
     return build_trailer_bytes(spans, delimiter)
 
 
+def pop_trailer_chunks(trace_id: int, delimiter: str):
+    """Pop this trace's captured spans from the exporter and return an iterator over the trailer
+    chunks, for streamed responses. Returns None when there are no spans to return."""
+    from monocle_apptrace.exporters.trace_return_exporter import get_trace_return_exporter
+    spans = get_trace_return_exporter().pop_spans_for_trace(trace_id)
+    if not spans:
+        return None
+    return iter_trailer_chunks(spans, delimiter, get_trace_return_max_bytes())
+
+
 def get_response_trailer(trace_id: int) -> "tuple[str, bytes] | None":
     """Convenience for buffered injection: make a delimiter, pop+build the
     trailer, and return (response header value, trailer bytes). None when the
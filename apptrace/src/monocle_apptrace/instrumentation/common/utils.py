@@ -2,8 +2,8 @@ import ast
 import contextvars
 import logging, json
 import os
+import sys
 import threading
-import traceback
 from typing import Callable, Generic, Optional, TypeVar, Mapping, Union
 
 from opentelemetry.context import attach, detach, get_current, get_value, set_value, Context
@@ -17,6 +17,7 @@ from monocle_apptrace.instrumentation.common.constants import (
     AGENT_INVOCATION_SPAN_NAME, LAST_AGENT_INVOCATION_ID, LAST_AGENT_NAME, INFERENCE_DECISION, INFERENCE_AGENT_DELEGATION, INFERENCE_TOOL_CALL, INFERENCE_TURN_END, SPAN_SUBTYPES
 )
 from importlib.metadata import version
+from monocle_apptrace.env_config import get_monocle_env_value  # noqa: F401, re-exported
 from opentelemetry.trace.span import INVALID_SPAN
 _MONOCLE_SPAN_KEY = "monocle" + _SPAN_KEY
 
@@ -109,9 +110,10 @@ def with_tracer_wrapper(func):
             except Exception as e:
                 logger.error("Exception in attaching parent context: %s", e)
             if not source_path:
-                if traceback.extract_stack().__len__() > 2:
-                    filename, line_number, _, _ = traceback.extract_stack()[-2]
-                    source_path = f"{filename}:{line_number}"
+                # Only the immediate caller is needed, avoid building the whole stack summary.
+                caller = sys._getframe(1)
+                if caller.f_back is not None:
+                    source_path = f"{caller.f_code.co_filename}:{caller.f_lineno}"
                 else:
                     source_path = ""
             val = func(tracer, handler, to_wrap, wrapped, instance, source_path, args, kwargs)
@@ -232,6 +234,52 @@ def _normalize_bool(value) -> bool:
     return bool(value)
 
 
+def parse_bool_setting(name: str, value) -> bool:
+    """Strict true/false parsing of a configuration value, raising ValueError naming the setting."""
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in {"true", "1", "yes", "on"}:
+        return True
+    if normalized in {"false", "0", "no", "off", ""}:
+        return False
+    raise ValueError(f"{name} must be one of true or false")
+
+
+def get_env_int(name: str, default: int, minimum: int = 1,
+                lookup: Optional[Callable[[str], Optional[str]]] = None) -> int:
+    """Integer environment setting, falling back to the default with a warning when below the minimum or invalid.
+
+    lookup reads the setting, os.environ by default; pass get_monocle_env_value to also read the .env files.
+    """
+    value = (lookup or os.environ.get)(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        if parsed >= minimum:
+            return parsed
+    except ValueError:
+        pass
+    logger.warning("Invalid value for %s: %s, using %s", name, value, default)
+    return default
+
+
+def get_env_float(name: str, default: float) -> float:
+    """Positive number environment setting, falling back to the default with a warning when invalid."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+        if parsed > 0:
+            return parsed
+    except ValueError:
+        pass
+    logger.warning("Invalid value for %s: %s, using %s", name, value, default)
+    return default
+
+
 def build_setup_signature(
         workflow_name: str,
         span_processors: Optional[list] = None,
@@ -240,6 +288,9 @@ def build_setup_signature(
         union_with_default_methods: bool = True,
         monocle_exporters_list: str = None,
         otel_genai_semconv: object = None,
+        deferred_events: object = None,
+        lazy_instrumentation: object = None,
+        resource_attributes: object = None,
 ) -> dict:
     return {
         "workflow_name": workflow_name,
@@ -252,6 +303,9 @@ def build_setup_signature(
         "union_with_default_methods": _normalize_bool(union_with_default_methods),
         "monocle_exporters_list": _normalize_exporters_list(monocle_exporters_list),
         "otel_genai_semconv": otel_genai_semconv,
+        "deferred_events": deferred_events,
+        "lazy_instrumentation": lazy_instrumentation,
+        "resource_attributes": resource_attributes,
     }
 
 def changed_setup_fields(previous: dict, current: dict) -> list[str]:
@@ -794,32 +848,3 @@ def get_span_id(span: Span) -> str:
     """Get the span ID as a hex string without 0x prefix."""
     return format(span.context.span_id, '016x')
 
-def get_monocle_env_value(key: str) -> Optional[str]:
-    """Look up a Monocle config value from the environment or .env files.
-    """
-    env_value = os.environ.get(key)
-    if env_value:
-        return env_value
-    candidates = (
-        os.path.join(os.getcwd(), ".env.monocle"),
-        os.path.join(os.path.expanduser("~"), ".monocle", ".env"),
-    )
-    for env_file_path in candidates:
-        try:
-            with open(env_file_path, "r", encoding="utf-8") as env_file:
-                for line in env_file:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    if line.startswith("export "):
-                        line = line[len("export "):].strip()
-                    if not line.startswith(f"{key}="):
-                        continue
-                    value = line.split("=", 1)[1].strip()
-                    if value.startswith(('"', "'")):
-                        value = value[1:-1].strip()
-                    if value:
-                        return value
-        except OSError:
-            continue
-    return None
@@ -12,11 +12,11 @@ from opentelemetry.trace.status import StatusCode
 
 from monocle_apptrace.instrumentation.common.constants import (
     ADD_NEW_WORKFLOW,
-    AGENTIC_SPANS,
     SPAN_START_TIME,
     SPAN_END_TIME,
 )
 from monocle_apptrace.instrumentation.common.genai_semantic_conventions import enrich_genai_attributes
+from monocle_apptrace.instrumentation.common.method_plan import get_method_plan
 from monocle_apptrace.instrumentation.common.scope_wrapper import monocle_trace_scope
 from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
 from monocle_apptrace.instrumentation.common.utils import (
@@ -33,16 +33,7 @@ logger = logging.getLogger(__name__)
 ISOLATE_MONOCLE_SPANS = os.getenv("MONOCLE_ISOLATE_SPANS", "true").lower() == "true"
 
 def get_auto_close_span(to_wrap, kwargs):
-    try:
-        output_processor = to_wrap.get("output_processor")
-        if not output_processor and to_wrap.get("output_processor_list"):
-            output_processor = to_wrap["output_processor_list"][0]
-        if output_processor and output_processor.get("is_auto_close"):
-            return output_processor.get("is_auto_close")(kwargs)
-        return True
-    except Exception as e:
-        logger.warning("Warning: Error occurred in get_auto_close_span: %s", str(e))
-        return True
+    return get_method_plan(to_wrap).get_auto_close_span(kwargs)
 
 def pre_process_span(name, tracer, handler, add_workflow_span, to_wrap, wrapped, instance, args, kwargs, span, source_path):
     SpanHandler.set_default_monocle_attributes(span, source_path)
@@ -154,8 +145,7 @@ def finalize_span(handler, to_wrap, wrapped, instance, args, kwargs, span, paren
         ex=ex,
         auto_close_span=auto_close_span,
     )
-    output_processor = to_wrap.get("output_processor")
-    response_processor = output_processor.get("response_processor") if isinstance(output_processor, dict) else None
+    response_processor = get_method_plan(to_wrap).response_processor
     if ex is None and not auto_close_span and response_processor:
         if is_generator:
             response_processor(to_wrap, stream_items or None, post_process_span_internal)
@@ -165,18 +155,15 @@ def finalize_span(handler, to_wrap, wrapped, instance, args, kwargs, span, paren
     return post_process_span_internal(result)
 
 def get_span_name(to_wrap, instance):
-    if to_wrap.get("span_name"):
-        name = to_wrap.get("span_name")
-    else:
-        name = to_wrap.get("package", "") + "." + to_wrap.get("object", "") + "." + to_wrap.get("method", "")
-    return name
+    return get_method_plan(to_wrap).span_name
 
 def monocle_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to_wrap, wrapped, instance, source_path, add_workflow_span, args, kwargs):
     # Main span processing logic
-    name = get_span_name(to_wrap, instance)
+    plan = get_method_plan(to_wrap)
+    name = plan.span_name
     return_value = None
     span_status = None
-    auto_close_span = get_auto_close_span(to_wrap, kwargs)
+    auto_close_span = plan.get_auto_close_span(kwargs)
     parent_span = get_current_monocle_span()
     with start_as_monocle_span(tracer, name, auto_close_span) as span:
         pre_process_span(name, tracer, handler, add_workflow_span, to_wrap, wrapped, instance, args, kwargs, span, source_path)
@@ -198,14 +185,15 @@ def monocle_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to_wrap
         else:
             ex:Exception = None
             to_wrap = get_wrapper_with_next_processor(to_wrap, handler, instance, span, parent_span, args, kwargs)
-            if has_more_processors(to_wrap):
+            plan = get_method_plan(to_wrap)
+            if plan.has_more_processors:
                 try:
                     handler.hydrate_span(to_wrap, wrapped, instance, args, kwargs, None, span, parent_span, ex,
                                 is_post_exec=False)
                 except Exception as e:
                     logger.info(f"Warning: Error occurred in hydrate_span pre_process_span: {e}")
                 try:
-                    with monocle_trace_scope(get_builtin_scope_names(to_wrap)):
+                    with monocle_trace_scope(plan.builtin_scope_name):
                         return_value, span_status = monocle_wrapper_span_processor(tracer, handler, to_wrap, wrapped, instance, source_path, False, args, kwargs)
                 except Exception as e:
                     ex = e
@@ -241,8 +229,9 @@ def monocle_iter_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to
                                         args, kwargs) -> Generator[any, None, None]:
     # Sync counterpart of amonocle_iter_wrapper_span_processor, for generator-returning methods
     # (e.g. CompiledStateGraph.stream) that have no async equivalent in the call path.
-    name = get_span_name(to_wrap, instance)
-    auto_close_span = get_auto_close_span(to_wrap, kwargs)
+    plan = get_method_plan(to_wrap)
+    name = plan.span_name
+    auto_close_span = plan.get_auto_close_span(kwargs)
     parent_span = get_current_monocle_span()
     last_item = None
 
@@ -270,14 +259,15 @@ def monocle_iter_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to
         else:
             ex:Exception = None
             to_wrap = get_wrapper_with_next_processor(to_wrap, handler, instance, span, parent_span, args, kwargs)
-            if has_more_processors(to_wrap):
+            plan = get_method_plan(to_wrap)
+            if plan.has_more_processors:
                 try:
                     handler.hydrate_span(to_wrap, wrapped, instance, args, kwargs, None, span, parent_span, ex,
                                 is_post_exec=False)
                 except Exception as e:
                     logger.info(f"Warning: Error occurred in hydrate_span pre_process_span: {e}")
                 try:
-                    with monocle_trace_scope(get_builtin_scope_names(to_wrap)):
+                    with monocle_trace_scope(plan.builtin_scope_name):
                         for item in monocle_iter_wrapper_span_processor(tracer, handler, to_wrap, wrapped, instance, source_path, False, args, kwargs):
                             last_item = item
                             yield item
@@ -300,9 +290,7 @@ def monocle_iter_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to
                     logger.info(f"Warning: Error occurred in hydrate_span pre_process_span: {e}")
                 try:
                     skip_execution, last_item = SpanHandler.skip_execution(span)
-                    _has_response_processor = (not auto_close_span
-                        and to_wrap.get("output_processor")
-                        and to_wrap.get("output_processor").get("response_processor"))
+                    _has_response_processor = not auto_close_span and plan.response_processor
                     _raw_items = [] if _has_response_processor else None
                     if not skip_execution:
                         with SpanHandler.workflow_type(to_wrap, span):
@@ -405,10 +393,11 @@ def monocle_iter_wrapper(tracer: Tracer, handler: SpanHandler, to_wrap, wrapped,
 async def amonocle_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to_wrap, wrapped, instance, source_path, add_workflow_span,
                                         args, kwargs):
     # Main span processing logic
-    name = get_span_name(to_wrap, instance)
+    plan = get_method_plan(to_wrap)
+    name = plan.span_name
     return_value = None
     span_status = None
-    auto_close_span = get_auto_close_span(to_wrap, kwargs)
+    auto_close_span = plan.get_auto_close_span(kwargs)
     parent_span = get_current_monocle_span()
     with start_as_monocle_span(tracer, name, auto_close_span) as span:
         pre_process_span(name, tracer, handler, add_workflow_span, to_wrap, wrapped, instance, args, kwargs, span, source_path)
@@ -429,8 +418,9 @@ async def amonocle_wrapper_span_processor(tracer: Tracer, handler: SpanHandler,
                     span.end()
         else:
             ex:Exception = None
-            to_wrap = get_wrapper_with_next_processor(to_wrap, handler, instance, span, parent_span,args, kwargs)
-            if has_more_processors(to_wrap):
+            to_wrap = get_wrapper_with_next_processor(to_wrap, handler, instance, span, parent_span, args, kwargs)
+            plan = get_method_plan(to_wrap)
+            if plan.has_more_processors:
                 try:
                     handler.hydrate_span(to_wrap, wrapped, instance, args, kwargs, None, span, parent_span, ex,
                                     is_post_exec=False)
@@ -438,7 +428,7 @@ async def amonocle_wrapper_span_processor(tracer: Tracer, handler: SpanHandler,
                     logger.info(f"Warning: Error occurred in hydrate_span pre_process_span: {e}")
 
                 try:
-                    with monocle_trace_scope(get_builtin_scope_names(to_wrap)):
+                    with monocle_trace_scope(plan.builtin_scope_name):
                         return_value, span_status = await amonocle_wrapper_span_processor(tracer, handler, to_wrap, wrapped, instance, source_path, False, args, kwargs)
                 except Exception as e:
                     ex = e
@@ -473,8 +463,9 @@ async def amonocle_wrapper_span_processor(tracer: Tracer, handler: SpanHandler,
 async def amonocle_iter_wrapper_span_processor(tracer: Tracer, handler: SpanHandler, to_wrap, wrapped, instance, source_path, add_workflow_span,
                                         args, kwargs) -> AsyncGenerator[any, None]:
     # Main span processing logic
-    name = get_span_name(to_wrap, instance)
-    auto_close_span = get_auto_close_span(to_wrap, kwargs)
+    plan = get_method_plan(to_wrap)
+    name = plan.span_name
+    auto_close_span = plan.get_auto_close_span(kwargs)
     parent_span = get_current_monocle_span()
     last_item = None
 
@@ -503,14 +494,15 @@ async def amonocle_iter_wrapper_span_processor(tracer: Tracer, handler: SpanHand
         else:
             ex:Exception = None
             to_wrap = get_wrapper_with_next_processor(to_wrap, handler, instance, span, parent_span, args, kwargs)
-            if has_more_processors(to_wrap):
+            plan = get_method_plan(to_wrap)
+            if plan.has_more_processors:
                 try:
                     handler.hydrate_span(to_wrap, wrapped, instance, args, kwargs, None, span, parent_span, ex,
                                 is_post_exec=False)
                 except Exception as e:
                     logger.info(f"Warning: Error occurred in hydrate_span pre_process_span: {e}")
                 try:
-                    with monocle_trace_scope(get_builtin_scope_names(to_wrap)):
+                    with monocle_trace_scope(plan.builtin_scope_name):
                         async for item in amonocle_iter_wrapper_span_processor(tracer, handler, to_wrap, wrapped, instance, source_path, False, args, kwargs):
                             last_item = item
                             yield item
@@ -533,9 +525,7 @@ async def amonocle_iter_wrapper_span_processor(tracer: Tracer, handler: SpanHand
                     logger.info(f"Warning: Error occurred in hydrate_span pre_process_span: {e}")
                 try:
                     skip_execution, last_item = SpanHandler.skip_execution(span)
-                    _has_response_processor = (not auto_close_span
-                        and to_wrap.get("output_processor")
-                        and to_wrap.get("output_processor").get("response_processor"))
+                    _has_response_processor = not auto_close_span and plan.response_processor
                     _raw_items = [] if _has_response_processor else None
                     if not skip_execution:
                         with SpanHandler.workflow_type(to_wrap, span):
@@ -796,36 +786,18 @@ def start_as_monocle_span(tracer: Tracer, name: str, auto_close_span: bool,
             span.end(end_time=effective_end)
 
 def get_builtin_scope_names(to_wrap) -> str:
-    output_processor = None
-    if "output_processor" in to_wrap:
-        output_processor = to_wrap.get("output_processor", None)
-    if "output_processor_list" in to_wrap:
-        for processor in to_wrap["output_processor_list"]:
-            if processor.get("type", None) in AGENTIC_SPANS:
-                output_processor = processor
-                break
-
-    # An entity can opt out of the builtin scope when its handler sets the value itself.
-    if isinstance(output_processor, dict) and output_processor.get("skip_builtin_scope", False):
-        return None
-    span_type = output_processor.get("type", None) if output_processor and isinstance(output_processor, dict) else None
-    if span_type and span_type in AGENTIC_SPANS:
-        return span_type
-    return None
+    return get_method_plan(to_wrap).builtin_scope_name
 
 def get_wrapper_with_next_processor(to_wrap, handler, instance, span, parent_span, args, kwargs):
-    if has_more_processors(to_wrap):
-        next_output_processor_list = to_wrap.get('output_processor_list',[]).copy()
-        while len(next_output_processor_list) > 0:
-            next_output_processor = next_output_processor_list.pop(0)
-            if handler.should_skip(next_output_processor, instance, span, parent_span, args, kwargs):
-                next_output_processor = None
-            else:
+    plan = get_method_plan(to_wrap)
+    if plan.has_more_processors:
+        next_index = None
+        for index, next_output_processor in enumerate(plan.output_processor_list):
+            if not handler.should_skip(next_output_processor, instance, span, parent_span, args, kwargs):
+                next_index = index
                 break
-        to_wrap = to_wrap.copy()
-        to_wrap['output_processor_list'] = next_output_processor_list
-        to_wrap['output_processor'] = next_output_processor
+        to_wrap = plan.next_plan(next_index).bind(to_wrap)
     return to_wrap
 
 def has_more_processors(to_wrap) -> bool:
-    return len(to_wrap.get('output_processor_list', [])) > 0
+    return get_method_plan(to_wrap).has_more_processors
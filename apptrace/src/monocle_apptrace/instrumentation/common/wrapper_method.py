@@ -2,60 +2,7 @@
 from typing import Any, Dict
 from monocle_apptrace.instrumentation.common.wrapper import task_wrapper, scope_wrapper
 from monocle_apptrace.instrumentation.common.span_handler import SpanHandler, NonFrameworkSpanHandler
-from monocle_apptrace.instrumentation.metamodel.azureaiinference.methods import AZURE_AI_INFERENCE_METHODS
-from monocle_apptrace.instrumentation.metamodel.botocore.methods import BOTOCORE_METHODS
-from monocle_apptrace.instrumentation.metamodel.botocore.handlers.botocore_span_handler import BotoCoreSpanHandler
-from monocle_apptrace.instrumentation.metamodel.claude_cli.claude_span_handler import ClaudeSpanHandler
-from monocle_apptrace.instrumentation.metamodel.hugging_face.methods import HUGGING_FACE_METHODS
-from monocle_apptrace.instrumentation.metamodel.langchain.methods import (
-    LANGCHAIN_METHODS,
-)
-from monocle_apptrace.instrumentation.metamodel.llamaindex.methods import (LLAMAINDEX_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.llamaindex.llamaindex_processor import LlamaIndexToolHandler, LlamaIndexAgentHandler, LlamaIndexSingleAgenttToolHandlerWrapper, LlamaIndexWorkflowHandler
-from monocle_apptrace.instrumentation.metamodel.haystack.methods import (HAYSTACK_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.openai.methods import (OPENAI_METHODS,)
-from monocle_apptrace.instrumentation.metamodel.openai.openai_processor import ( OpenAISpanHandler, OpenAIAgentsSpanHandler)
-from monocle_apptrace.instrumentation.metamodel.langgraph.methods import LANGGRAPH_METHODS
-from monocle_apptrace.instrumentation.metamodel.langgraph.langgraph_processor import LanggraphAgentHandler, LanggraphToolHandler
-from monocle_apptrace.instrumentation.metamodel.crew_ai.methods import CREW_AI_METHODS
-from monocle_apptrace.instrumentation.metamodel.crew_ai.crew_ai_processor import CrewAIAgentHandler, CrewAITaskHandler, CrewAIToolHandler
-from monocle_apptrace.instrumentation.metamodel.msagent.methods import MSAGENT_METHODS
-from monocle_apptrace.instrumentation.metamodel.msagent.msagent_processor import MSAgentRequestHandler, MSAgentAgentHandler, MSAgentInferenceHandler, MSAgentInferenceStreamHandler, MSAgentToolHandler
-from monocle_apptrace.instrumentation.metamodel.agents.methods import AGENTS_METHODS
-from monocle_apptrace.instrumentation.metamodel.agents.agents_processor import AgentsSpanHandler
-from monocle_apptrace.instrumentation.metamodel.flask.methods import (FLASK_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.flask._helper import FlaskSpanHandler, FlaskResponseSpanHandler
-from monocle_apptrace.instrumentation.metamodel.requests.methods import (REQUESTS_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.requests._helper import RequestSpanHandler
-from monocle_apptrace.instrumentation.metamodel.teamsai.methods import (TEAMAI_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.anthropic.methods import (ANTHROPIC_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.aiohttp.methods import (AIOHTTP_METHODS, )
-from monocle_apptrace.instrumentation.metamodel.aiohttp._helper import aiohttpSpanHandler
-from monocle_apptrace.instrumentation.metamodel.azfunc._helper import (azureSpanHandler)
-from monocle_apptrace.instrumentation.metamodel.azfunc.methods import AZFUNC_HTTP_METHODS
-from monocle_apptrace.instrumentation.metamodel.gemini.methods import GEMINI_METHODS
-from monocle_apptrace.instrumentation.metamodel.fastapi.methods import FASTAPI_METHODS
-from monocle_apptrace.instrumentation.metamodel.fastapi._helper import FastAPISpanHandler, FastAPIResponseSpanHandler
-from monocle_apptrace.instrumentation.metamodel.fastmcp.methods import FASTMCP_METHODS
-from monocle_apptrace.instrumentation.metamodel.agentcore.agentcore_handler import AgentCoreSpanHandler
-from monocle_apptrace.instrumentation.metamodel.lambdafunc._helper import lambdaSpanHandler
-from monocle_apptrace.instrumentation.metamodel.lambdafunc.methods import LAMBDA_HTTP_METHODS
-from monocle_apptrace.instrumentation.metamodel.mcp.methods import MCP_METHODS
-from monocle_apptrace.instrumentation.metamodel.mcp.mcp_processor import MCPAgentHandler
-from monocle_apptrace.instrumentation.metamodel.a2a.methods import A2A_CLIENT_METHODS
-from monocle_apptrace.instrumentation.metamodel.litellm.methods import LITELLM_METHODS
-from monocle_apptrace.instrumentation.metamodel.litellm.litellm_span_handler import LiteLLMSyncSpanHandler
-from monocle_apptrace.instrumentation.metamodel.adk.methods import ADK_METHODS
-from monocle_apptrace.instrumentation.metamodel.adk.adk_handler import AdkSpanHandler
-from monocle_apptrace.instrumentation.metamodel.mistral.methods import MISTRAL_METHODS
-from monocle_apptrace.instrumentation.metamodel.strands.methods import STRAND_METHODS
-from monocle_apptrace.instrumentation.metamodel.strands.strands_processor import StrandsSpanHandler
-from monocle_apptrace.instrumentation.metamodel.agentcore.methods import AGENTCORE_METHODS
-from monocle_apptrace.instrumentation.metamodel.claude_cli.methods import CLAUDE_CLI_PROXY_METHODS
-from monocle_apptrace.instrumentation.metamodel.codex_cli.codex_span_handler import CodexSpanHandler
-from monocle_apptrace.instrumentation.metamodel.codex_cli.methods import CODEX_CLI_PROXY_METHODS
-from monocle_apptrace.instrumentation.metamodel.github_copilot.github_copilot_span_handler import GitHubCopilotSpanHandler
-from monocle_apptrace.instrumentation.metamodel.github_copilot.methods import GITHUB_COPILOT_PROXY_METHODS
+from monocle_apptrace.instrumentation.common.metamodel_registry import SpanHandlerRegistry, default_methods
 
 class WrapperMethod:
     def __init__(
@@ -105,75 +52,15 @@ class WrapperMethod:
     def get_span_handler(self) -> SpanHandler:
         return self.span_handler()
 
-DEFAULT_METHODS_LIST = (
-    LANGCHAIN_METHODS + 
-    LLAMAINDEX_METHODS + 
-    HAYSTACK_METHODS + 
-    BOTOCORE_METHODS + 
-    FLASK_METHODS + 
-    REQUESTS_METHODS + 
-    LANGGRAPH_METHODS + 
-    CREW_AI_METHODS +
-    MSAGENT_METHODS +
-    AGENTS_METHODS +
-    OPENAI_METHODS + 
-    TEAMAI_METHODS +
-    ANTHROPIC_METHODS + 
-    AIOHTTP_METHODS + 
-    AZURE_AI_INFERENCE_METHODS + 
-    AZFUNC_HTTP_METHODS + 
-    GEMINI_METHODS + 
-    FASTAPI_METHODS + 
-    FASTMCP_METHODS +
-    LAMBDA_HTTP_METHODS +
-    MCP_METHODS + 
-    A2A_CLIENT_METHODS +
-    LITELLM_METHODS +
-    ADK_METHODS +
-    MISTRAL_METHODS +
-    HUGGING_FACE_METHODS +
-    STRAND_METHODS +
-    AGENTCORE_METHODS +
-    CLAUDE_CLI_PROXY_METHODS +
-    CODEX_CLI_PROXY_METHODS +
-    GITHUB_COPILOT_PROXY_METHODS
-)
-
-MONOCLE_SPAN_HANDLERS: Dict[str, SpanHandler] = {
+# Built-in handlers are imported on their first lookup, see metamodel_registry
+MONOCLE_SPAN_HANDLERS: Dict[str, SpanHandler] = SpanHandlerRegistry({
     "default": SpanHandler(),
-    "aiohttp_handler": aiohttpSpanHandler(),
-    "botocore_handler": BotoCoreSpanHandler(),
-    "flask_handler": FlaskSpanHandler(),
-    "flask_response_handler": FlaskResponseSpanHandler(),
-    "request_handler": RequestSpanHandler(),
     "non_framework_handler": NonFrameworkSpanHandler(),
-    "openai_handler": OpenAISpanHandler(),
-    "openai_agents_handler": OpenAIAgentsSpanHandler(),
-    "azure_func_handler": azureSpanHandler(),
-    "mcp_agent_handler": MCPAgentHandler(),
-    "fastapi_handler": FastAPISpanHandler(),
-    "fastapi_response_handler": FastAPIResponseSpanHandler(),
-    "langgraph_agent_handler": LanggraphAgentHandler(),
-    "langgraph_tool_handler": LanggraphToolHandler(),
-    "crew_ai_agent_handler": CrewAIAgentHandler(),
-    "crew_ai_task_handler": CrewAITaskHandler(),
-    "crew_ai_tool_handler": CrewAIToolHandler(),
-    "msagent_request_handler": MSAgentRequestHandler(),
-    "msagent_agent_handler": MSAgentAgentHandler(),
-    "msagent_inference_handler": MSAgentInferenceHandler(),
-    "msagent_inference_stream_handler": MSAgentInferenceStreamHandler(),
-    "msagent_tool_handler": MSAgentToolHandler(),
-    "agents_agent_handler": AgentsSpanHandler(),
-    "llamaindex_tool_handler": LlamaIndexToolHandler(),
-    "llamaindex_agent_handler": LlamaIndexAgentHandler(),
-    "llamaindex_workflow_handler": LlamaIndexWorkflowHandler(),
-    "llamaindex_single_agent_tool_handler": LlamaIndexSingleAgenttToolHandlerWrapper(),
-    "lambda_func_handler": lambdaSpanHandler(),
-    "agentcore_handler": AgentCoreSpanHandler(),
-    "adk_handler": AdkSpanHandler(),
-    "strands_handler": StrandsSpanHandler(),
-    "claude_handler": ClaudeSpanHandler(),
-    "codex_handler": CodexSpanHandler(),
-    "github_copilot_handler": GitHubCopilotSpanHandler(),
-    "litellm_sync_handler": LiteLLMSyncSpanHandler()
-}
+})
+
+
+def __getattr__(name):
+    # DEFAULT_METHODS_LIST imports every metamodel, so it is only built when asked for
+    if name == "DEFAULT_METHODS_LIST":
+        return default_methods(available_only=False)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
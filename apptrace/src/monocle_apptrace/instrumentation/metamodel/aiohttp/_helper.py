@@ -152,9 +152,10 @@ async def aiohttp_streamresponse_write_eof(tracer, handler, to_wrap, wrapped, in
         delimiter = getattr(instance, "_monocle_tr_delimiter", None)
         if delimiter is not None:
             trace_id = get_current_monocle_span().get_span_context().trace_id
-            trailer = tr.pop_and_build_trailer(trace_id, delimiter)
-            if trailer:
-                await instance.write(trailer)
+            trailer_chunks = tr.pop_trailer_chunks(trace_id, delimiter)
+            if trailer_chunks is not None:
+                for chunk in trailer_chunks:
+                    await instance.write(chunk)
             instance._monocle_tr_delimiter = None
     except Exception as e:
         logger.debug(f"aiohttp stream write_eof trailer skipped: {e}")
@@ -18,6 +18,7 @@ from monocle_apptrace.instrumentation.common.utils import (
 from monocle_apptrace.instrumentation.metamodel.finish_types import map_anthropic_finish_reason_to_finish_type
 from monocle_apptrace.instrumentation.common.constants import AGENT_PREFIX_KEY, INFERENCE_AGENT_DELEGATION, INFERENCE_TURN_END, INFERENCE_TOOL_CALL, TOOL_TYPE
 from contextlib import suppress
+from monocle_apptrace.instrumentation.common.client_entity_cache import cached_per_client
 
 
 logger = logging.getLogger(__name__)
@@ -26,6 +27,7 @@ def extract_provider_name(instance):
     provider_url: Option[str] = try_option(getattr, instance._client.base_url, 'host')
     return provider_url.unwrap_or(None)
 
+@cached_per_client("_client._base_url", "client.meta._endpoint_url")
 def extract_inference_endpoint(instance):
     inference_endpoint: Option[str] = try_option(getattr, instance._client, 'base_url').map(str)
     if inference_endpoint.is_none() and "meta" in instance.client.__dict__:
@@ -15,6 +15,7 @@ from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
 from monocle_apptrace.instrumentation.common.utils import ( get_exception_message, get_json_dumps, get_status_code,)
 from monocle_apptrace.instrumentation.metamodel.finish_types import map_bedrock_finish_reason_to_finish_type
 from contextlib import suppress
+from monocle_apptrace.instrumentation.common.client_entity_cache import cached_per_client
 
 logger = logging.getLogger(__name__)
 
@@ -242,6 +243,7 @@ def map_finish_reason_to_finish_type(finish_reason):
     """Map Bedrock finish_reason/stopReason to finish_type."""
     return map_bedrock_finish_reason_to_finish_type(finish_reason)
 
+@cached_per_client("meta._endpoint_url")
 def extract_provider_name(instance):
     return urlparse(instance.meta.endpoint_url).hostname
 
@@ -1,7 +1,9 @@
 import json
 import logging
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from monocle_apptrace.instrumentation.common.jsonl_cursor import read_new_records
 
 logger = logging.getLogger(__name__)
 
@@ -52,52 +54,33 @@ def extract_tool_response(result) -> str:
         return json.dumps(result)
     return str(result) if result else ""
 
-def read_transcript_tokens(transcript_path: str, start_line: int = 0) -> Dict[str, int]:
-    """Sum assistant message usage from transcript lines at or after start_line.
+def _sum_assistant_usage(messages: Iterable[Any]) -> Dict[str, int]:
+    """Sum the usage of the assistant messages of a transcript, once per API request.
 
     prompt_tokens = input_tokens + cache_read_input_tokens + cache_creation_input_tokens
     Raw input_tokens alone is wrong — Claude Code caches aggressively, making
     it as small as 3 on a warm session.
-
-    start_line allows callers to pass the line count from the previous turn so
-    only the current turn's API calls are counted (avoids double-counting cached
-    tokens across turns).
     """
-    if not transcript_path:
-        return {}
-    path = Path(transcript_path)
-    if not path.exists():
-        return {}
-
     total_input = total_cache_read = total_cache_creation = total_output = 0
     seen_request_ids: set = set()
-    try:
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-        for line in lines[start_line:]:
-            line = line.strip()
-            if not line:
+    for msg in messages:
+        try:
+            inner = msg.get("message", {})
+            if not isinstance(inner, dict) or inner.get("role") != "assistant":
                 continue
-            try:
-                msg = json.loads(line)
-                inner = msg.get("message", {})
-                if not isinstance(inner, dict) or inner.get("role") != "assistant":
+            req_id = msg.get("requestId", "")
+            if req_id:
+                if req_id in seen_request_ids:
                     continue
-                req_id = msg.get("requestId", "")
-                if req_id:
-                    if req_id in seen_request_ids:
-                        continue
-                    seen_request_ids.add(req_id)
-                usage = inner.get("usage", {})
-                total_input += usage.get("input_tokens", 0)
-                total_cache_read += usage.get("cache_read_input_tokens", 0)
-                total_cache_creation += usage.get("cache_creation_input_tokens", 0)
-                total_output += usage.get("output_tokens", 0)
-            except Exception as e:
-                logger.debug(f"skipping transcript line: {e}")
-                continue
-    except Exception as e:
-        logger.debug(f"Error reading transcript {transcript_path}: {e}")
-        return {}
+                seen_request_ids.add(req_id)
+            usage = inner.get("usage", {})
+            total_input += usage.get("input_tokens", 0)
+            total_cache_read += usage.get("cache_read_input_tokens", 0)
+            total_cache_creation += usage.get("cache_creation_input_tokens", 0)
+            total_output += usage.get("output_tokens", 0)
+        except Exception as e:
+            logger.debug(f"skipping transcript line: {e}")
+            continue
 
     prompt_t = total_input + total_cache_read + total_cache_creation
     if not prompt_t and not total_output:
@@ -112,6 +95,48 @@ def read_transcript_tokens(transcript_path: str, start_line: int = 0) -> Dict[st
         "cache_creation_tokens": total_cache_creation,
     }
 
+def _parse_lines(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except Exception as e:
+            logger.debug(f"skipping transcript line: {e}")
+
+def read_transcript_tokens(transcript_path: str, start_line: int = 0) -> Dict[str, int]:
+    """Sum assistant message usage from transcript lines at or after start_line.
+
+    start_line allows callers to pass the line count from the previous turn so
+    only the current turn's API calls are counted (avoids double-counting cached
+    tokens across turns).
+    """
+    if not transcript_path:
+        return {}
+    path = Path(transcript_path)
+    if not path.exists():
+        return {}
+
+    try:
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        return _sum_assistant_usage(_parse_lines(lines[start_line:]))
+    except Exception as e:
+        logger.debug(f"Error reading transcript {transcript_path}: {e}")
+        return {}
+
+def read_new_transcript_tokens(transcript_path: str, cursor: Optional[dict] = None) -> Tuple[Dict[str, int], dict]:
+    """Sum assistant message usage from the transcript lines appended since the cursor.
+
+    Only the bytes written since the previous turn are read. Returns the tokens and the
+    cursor to pass for the next turn.
+    """
+    cursor = cursor or {}
+    if not transcript_path or not Path(transcript_path).exists():
+        return {}, cursor
+    records, new_cursor, _ = read_new_records(transcript_path, cursor)
+    return _sum_assistant_usage(msg for _, _, msg in records), new_cursor
+
 def read_subagent_transcript(transcript_path: str) -> Tuple[str, Dict[str, int]]:
     """Read model name and token totals from a subagent transcript JSONL.
 
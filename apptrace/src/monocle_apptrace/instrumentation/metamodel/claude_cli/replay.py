@@ -7,12 +7,14 @@ just completed), and emits Monocle spans via the ReplayHandler dummy functions.
 Called only on Stop events (one turn = UserPromptSubmit → Stop).
 
 State is tracked in a .state.json sidecar so multi-turn sessions don't
-re-emit already-processed turns.
+re-emit already-processed turns. It holds byte cursors into the event log and
+the transcript, so each Stop reads only what was appended since the last one.
 """
 
 import json
 import logging
 import sys
+import threading
 from pathlib import Path
 
 from monocle_apptrace.instrumentation.metamodel.claude_cli.trace_events import _session_log
@@ -21,6 +23,8 @@ logger = logging.getLogger(__name__)
 
 
 _telemetry_ready = False
+# the hook daemon handles the Stops of several sessions at once
+_telemetry_lock = threading.Lock()
 
 
 def _configure_telemetry():
@@ -33,19 +37,24 @@ def _configure_telemetry():
     global _telemetry_ready
     if _telemetry_ready:
         return
-    from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
-    from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
-    workflow_name = get_monocle_env_value("MONOCLE_WORKFLOW_NAME") or Path.cwd().name
-    setup_monocle_telemetry(workflow_name=workflow_name)
-    _telemetry_ready = True
+    with _telemetry_lock:
+        if _telemetry_ready:
+            return
+        from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
+        from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+        workflow_name = get_monocle_env_value("MONOCLE_WORKFLOW_NAME") or Path.cwd().name
+        setup_monocle_telemetry(workflow_name=workflow_name)
+        _telemetry_ready = True
 
 
 from monocle_apptrace.instrumentation.metamodel.claude_cli.replay_handlers import ReplayHandler, StopFailureError
 from monocle_apptrace.instrumentation.metamodel.claude_cli._helper import (
     build_subagent_tokens,
+    read_new_transcript_tokens,
     read_transcript_tokens,
     read_subagent_transcript,
 )
+from monocle_apptrace.instrumentation.common.jsonl_cursor import cursor_after_lines, read_new_records
 from monocle_apptrace.instrumentation.metamodel.claude_cli import git_context
 from monocle_apptrace.instrumentation.common.constants import AGENT_SESSION, SPAN_START_TIME, SPAN_END_TIME
 
@@ -68,10 +77,20 @@ def _load_state(session_id: str) -> dict:
     sf = _state_file(session_id)
     if sf.exists():
         try:
-            return json.loads(sf.read_text())
+            return _upgrade_state(session_id, json.loads(sf.read_text()))
         except Exception:
             pass
-    return {"events_processed": 0, "transcript_lines_processed": 0, "model": "claude"}
+    return {"events_cursor": {}, "transcript_cursor": {}, "model": "claude"}
+
+
+def _upgrade_state(session_id: str, state: dict) -> dict:
+    """Convert the event count saved by earlier versions into a cursor.
+
+    The transcript line count is converted once the transcript path is known, see replay_session.
+    """
+    if "events_cursor" not in state:
+        state["events_cursor"] = cursor_after_lines(_session_log(session_id), state.pop("events_processed", 0))
+    return state
 
 
 def _save_state(session_id: str, state: dict) -> None:
@@ -98,6 +117,15 @@ def _load_events(session_id: str) -> list:
     return events
 
 
+def _load_new_events(session_id: str, state: dict) -> tuple:
+    """Events logged since the state's cursor, and the cursor past them."""
+    log = _session_log(session_id)
+    if not log.exists():
+        return [], state.get("events_cursor") or {}
+    records, cursor, _ = read_new_records(log, state.get("events_cursor"))
+    return [event for _, _, event in records], cursor
+
+
 # ── Tool call pairing ─────────────────────────────────────────────────────────
 
 def _pair_tool_call(pre_event: dict, post_event: dict) -> dict:
@@ -283,7 +311,7 @@ def _build_subagents(subagent_order: list, subagent_data: dict, model: str) -> l
     return subagents
 
 
-def _process_turn(turn_events: list, session_id: str, model: str, handler: ReplayHandler, transcript_start_line: int = 0) -> None:
+def _process_turn(turn_events: list, session_id: str, model: str, handler: ReplayHandler, parent_tokens: dict) -> None:
     prompt_event, stop_event, parent_tool_calls, subagent_order, subagent_data = _collect_turn_events(turn_events)
 
     if not prompt_event or not stop_event:
@@ -293,9 +321,6 @@ def _process_turn(turn_events: list, session_id: str, model: str, handler: Repla
     stop_ts = stop_event.get("timestamp", "")
     inference_rounds = _derive_inference_rounds(turn_events, prompt_ts, stop_ts, model)
 
-    transcript_path = stop_event.get("transcript_path", "")
-    parent_tokens = read_transcript_tokens(transcript_path, start_line=transcript_start_line)
-
     if inference_rounds:
         if parent_tokens:
             inference_rounds[-1]["tokens"] = parent_tokens
@@ -339,7 +364,8 @@ def _process_turn(turn_events: list, session_id: str, model: str, handler: Repla
 
 def replay_compaction(session_id: str) -> None:
     _configure_telemetry()
-    events = _load_events(session_id)
+    # the compaction happened after the last replayed turn
+    events, _ = _load_new_events(session_id, _load_state(session_id))
 
     post = next(
         (e for e in reversed(events) if e.get("hook_event_name") == "PostCompact"),
@@ -401,13 +427,12 @@ def cleanup_session(session_id: str) -> None:
     """
     from monocle_apptrace.instrumentation.metamodel.claude_cli.trace_events import unmark_subagent_sessions
 
-    state = _load_state(session_id)
-    events = _load_events(session_id)
-
-    if state["events_processed"] < len(events):
-        logger.debug(f"SessionEnd: {len(events) - state['events_processed']} unprocessed events found — replaying before cleanup")
+    unprocessed, _ = _load_new_events(session_id, _load_state(session_id))
+    if unprocessed:
+        logger.debug(f"SessionEnd: {len(unprocessed)} unprocessed events found — replaying before cleanup")
         replay_session(session_id)
 
+    events = _load_events(session_id)
     subagent_ids = [
         e.get("agent_id") for e in events
         if e.get("hook_event_name") == "SubagentStart" and e.get("agent_id")
@@ -422,8 +447,7 @@ def cleanup_session(session_id: str) -> None:
 
 def replay_session(session_id: str) -> None:
     state = _load_state(session_id)
-    events = _load_events(session_id)
-    new_events = events[state["events_processed"]:]
+    new_events, events_cursor = _load_new_events(session_id, state)
 
     if not new_events:
         return
@@ -431,27 +455,27 @@ def replay_session(session_id: str) -> None:
     _configure_telemetry()
 
     model = state.get("model", "claude")
-    for e in events:
+    for e in new_events:
         if e.get("hook_event_name") == "SessionStart" and e.get("model"):
             model = e["model"]
             break
 
     stop_event = next((e for e in reversed(new_events) if e.get("hook_event_name") in ("Stop", "StopFailure")), None)
     transcript_path = stop_event.get("transcript_path", "") if stop_event else ""
-    transcript_start_line = state.get("transcript_lines_processed", 0)
-    transcript_line_count = 0
+    transcript_cursor = state.get("transcript_cursor")
+    if transcript_cursor is None:
+        transcript_cursor = cursor_after_lines(transcript_path, state.pop("transcript_lines_processed", 0)) \
+            if transcript_path else {}
+    parent_tokens = {}
     if transcript_path:
-        try:
-            transcript_line_count = len(Path(transcript_path).read_text(encoding="utf-8", errors="replace").splitlines())
-        except Exception:
-            pass
+        parent_tokens, transcript_cursor = read_new_transcript_tokens(transcript_path, transcript_cursor)
 
     logger.debug(f"--- Replay: {len(new_events)} new events for session {session_id} ---")
     handler = ReplayHandler()
-    _process_turn(new_events, session_id, model, handler, transcript_start_line=transcript_start_line)
+    _process_turn(new_events, session_id, model, handler, parent_tokens)
 
-    state["events_processed"] = len(events)
-    state["transcript_lines_processed"] = transcript_line_count or transcript_start_line
+    state["events_cursor"] = events_cursor
+    state["transcript_cursor"] = transcript_cursor
     state["model"] = model
     _save_state(session_id, state)
     logger.debug("--- Replay done ---")
@@ -3,11 +3,13 @@
 import json
 import logging
 import re
+import threading
 from pathlib import Path
 from typing import Optional
 
 from monocle_apptrace.instrumentation.common.constants import AGENT_SESSION, CODEX_TURN_SCOPE, CODEX_INVOCATION_SCOPE, SPAN_START_TIME, SPAN_END_TIME
 from monocle_apptrace.instrumentation.common.agent_edit_context import _file_types_summary
+from monocle_apptrace.instrumentation.common.jsonl_cursor import cursor_after_lines, cursor_at, read_new_records
 from monocle_apptrace.instrumentation.metamodel.codex_cli._helper import find_subagent_transcript
 from monocle_apptrace.instrumentation.metamodel.codex_cli.replay_handlers import ReplayHandler
 from monocle_apptrace.instrumentation.metamodel.codex_cli import git_context
@@ -20,17 +22,22 @@ logger = logging.getLogger(__name__)
 
 
 _telemetry_ready = False
+# the hook daemon handles the Stops of several sessions at once
+_telemetry_lock = threading.Lock()
 
 
 def _configure_telemetry():
     global _telemetry_ready
     if _telemetry_ready:
         return
-    from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
-    from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
-    workflow_name = get_monocle_env_value("MONOCLE_WORKFLOW_NAME") or Path.cwd().name
-    setup_monocle_telemetry(workflow_name=workflow_name)
-    _telemetry_ready = True
+    with _telemetry_lock:
+        if _telemetry_ready:
+            return
+        from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
+        from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+        workflow_name = get_monocle_env_value("MONOCLE_WORKFLOW_NAME") or Path.cwd().name
+        setup_monocle_telemetry(workflow_name=workflow_name)
+        _telemetry_ready = True
 
 
 # Universal signals: response_item *_call (paired by call_id with *_call_output)
@@ -227,7 +234,7 @@ def _build_subagent(parent_path, thread_id, spawn_payload, spawn_ts):
     sa_path = find_subagent_transcript(parent_path, thread_id)
     if not sa_path:
         return None
-    sub_turns, _, sa_model = _walk_turns(str(sa_path), 0, "codex")
+    sub_turns, _, sa_model = _walk_turns(str(sa_path), None, "codex")
     if not sub_turns:
         return None
 
@@ -255,19 +262,20 @@ def _build_subagent(parent_path, thread_id, spawn_payload, spawn_ts):
 
 # ── Transcript walk ───────────────────────────────────────────────────────────
 
-def _walk_turns(transcript_path, start_line, current_model):
-    """Walk transcript from start_line. Returns (completed_turns, next_cursor, model)."""
+def _walk_turns(transcript_path, cursor, current_model):
+    """Walk the transcript lines appended since cursor. Returns (completed_turns, next_cursor, model).
+
+    next_cursor points just past the last complete turn, so a turn still in
+    progress is read again on the next Stop.
+    """
+    cursor = cursor or {}
     if not transcript_path:
-        return [], start_line, current_model
+        return [], cursor, current_model
     path = Path(transcript_path)
     if not path.exists():
-        return [], start_line, current_model
+        return [], cursor, current_model
 
-    try:
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-    except Exception as e:
-        logger.debug(f"Error reading transcript {transcript_path}: {e}")
-        return [], start_line, current_model
+    records, read_cursor, _ = read_new_records(path, cursor)
 
     turns = []
     turn = None
@@ -275,7 +283,7 @@ def _walk_turns(transcript_path, start_line, current_model):
     patch_results: dict = {}  # call_id -> apply_patch success bool
     pending_spawns: dict = {}  # call_id -> spawn_agent args (multi_agent_v1)
     handled_subagent_calls: set = set()
-    next_cursor = start_line
+    next_cursor = cursor_at(read_cursor, records[0][0]) if records else cursor
 
     def _flush_inline_calls():
         """Emit any *_call entries that never got a matching *_call_output."""
@@ -293,14 +301,8 @@ def _walk_turns(transcript_path, start_line, current_model):
                 SPAN_END_TIME: pre["start_ts"],
             })
 
-    for offset, line in enumerate(lines[start_line:]):
-        idx = start_line + offset
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            entry = json.loads(line)
-        except Exception:
+    for _, line_end, entry in records:
+        if not isinstance(entry, dict):
             continue
 
         ts = entry.get("timestamp") or ""
@@ -349,7 +351,7 @@ def _walk_turns(transcript_path, start_line, current_model):
                 patch_results = {}
                 pending_spawns = {}
                 handled_subagent_calls = set()
-                next_cursor = idx + 1  # advance cursor past this complete turn
+                next_cursor = cursor_at(read_cursor, line_end)  # advance cursor past this complete turn
             continue
 
         if turn is None:
@@ -472,10 +474,13 @@ def replay_session(session_id: str, transcript_path: Optional[str]) -> None:
         return
 
     state = load_state(session_id)
-    start_line = state.get("transcript_lines_processed", 0)
+    cursor = state.get("transcript_cursor")
+    if cursor is None:
+        # state saved by earlier versions counts lines instead
+        cursor = cursor_after_lines(transcript_path, state.pop("transcript_lines_processed", 0))
     current_model = state.get("model", "codex")
 
-    turns, next_cursor, model = _walk_turns(transcript_path, start_line, current_model)
+    turns, next_cursor, model = _walk_turns(transcript_path, cursor, current_model)
     if not turns:
         return
 
@@ -509,6 +514,6 @@ def replay_session(session_id: str, transcript_path: Optional[str]) -> None:
             },
         )
 
-    state["transcript_lines_processed"] = next_cursor
+    state["transcript_cursor"] = next_cursor
     state["model"] = model
     save_state(session_id, state)
@@ -29,7 +29,7 @@ def load_state(session_id):
             return json.loads(sf.read_text())
         except Exception:
             pass
-    return {"transcript_lines_processed": 0, "model": "codex"}
+    return {"transcript_cursor": {}, "model": "codex"}
 
 
 def save_state(session_id, state):
@@ -112,9 +112,9 @@ def _flask_chain_trailer(app_iter, trailer):
 def _flask_wrap_stream(app_iter, trace_id, delimiter):
     for chunk in app_iter:
         yield chunk
-    trailer = tr.pop_and_build_trailer(trace_id, delimiter)
-    if trailer:
-        yield trailer
+    trailer_chunks = tr.pop_trailer_chunks(trace_id, delimiter)
+    if trailer_chunks is not None:
+        yield from trailer_chunks
 
 
 @with_tracer_wrapper
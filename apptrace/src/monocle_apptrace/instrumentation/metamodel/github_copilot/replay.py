@@ -3,7 +3,9 @@
 import json
 import logging
 import sys
+import threading
 from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
@@ -12,6 +14,7 @@ try:
 except ImportError:
     fcntl = None
 
+from monocle_apptrace.instrumentation.common.jsonl_cursor import read_new_records
 from monocle_apptrace.instrumentation.common.constants import (
     AGENT_SESSION,
     SPAN_START_TIME,
@@ -30,17 +33,22 @@ logger = logging.getLogger(__name__)
 _SUBAGENT_LAUNCHER_TOOL_NAMES = {"runSubagent"}  # filtered from parent tool list
 
 _telemetry_ready = False
+# the hook daemon handles the Stops of several sessions at once
+_telemetry_lock = threading.Lock()
 
 
 def _configure_telemetry():
     global _telemetry_ready
     if _telemetry_ready:
         return
-    from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
-    from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
-    workflow_name = get_monocle_env_value("MONOCLE_WORKFLOW_NAME") or Path.cwd().name
-    setup_monocle_telemetry(workflow_name=workflow_name)
-    _telemetry_ready = True
+    with _telemetry_lock:
+        if _telemetry_ready:
+            return
+        from monocle_apptrace.instrumentation.common.utils import get_monocle_env_value
+        from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+        workflow_name = get_monocle_env_value("MONOCLE_WORKFLOW_NAME") or Path.cwd().name
+        setup_monocle_telemetry(workflow_name=workflow_name)
+        _telemetry_ready = True
 
 
 def _event_cwd(event: dict) -> str:
@@ -99,23 +107,40 @@ def _session_lock(session_id: str):
         lock_f.close()
 
 
-def _load_jsonl(path) -> list:
-    p = Path(path) if not isinstance(path, Path) else path
-    if not p.exists():
-        return []
-    events = []
+def _load_new_jsonl(path, cursor: Optional[dict]) -> tuple:
+    """Records appended to a JSON lines file since the cursor, as (start, end, event), and the cursor past them."""
+    if not path or not Path(path).exists():
+        return [], cursor or {}
+    records, new_cursor, _ = read_new_records(path, cursor)
+    return [r for r in records if isinstance(r[2], dict)], new_cursor
+
+
+def _parse_ts(ts) -> Optional[datetime]:
+    """Hook (isoformat with offset) or transcript ("Z" suffix) timestamp as an aware datetime."""
+    if not ts:
+        return None
     try:
-        for line in p.read_text(encoding="utf-8", errors="replace").splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError:
-                pass
-    except Exception as e:
-        logger.debug(f"Error reading {p}: {e}")
-    return events
+        parsed = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _cursor_from(records: list, read_cursor: dict, ts: str) -> dict:
+    """Cursor at the first record timestamped at or after ts, past all records when there is none.
+
+    A record whose timestamp can't be parsed, or a ts that can't be, keeps the records from there on.
+    """
+    if not ts:
+        return read_cursor
+    since = _parse_ts(ts)
+    start = None
+    for record_start, _, event in records:
+        record_ts = _parse_ts(event.get("timestamp"))
+        if since is None or record_ts is None or record_ts >= since:
+            start = record_start
+            break
+    return read_cursor if start is None else dict(read_cursor, offset=start)
 
 
 def _state_file(session_id: str) -> Path:
@@ -129,7 +154,7 @@ def _load_state(session_id: str) -> dict:
             return json.loads(sf.read_text())
         except Exception:
             pass
-    return {"interactions_processed": [], "model": "copilot"}
+    return {"interactions_processed": [], "model": "copilot", "hooks_cursor": {}, "transcript_cursor": {}}
 
 
 def _save_state(session_id: str, state: dict) -> None:
@@ -210,15 +235,18 @@ def _index_tool_outputs(hook_events: list, intervals: list) -> tuple:
     return parent_outputs, subagent_outputs
 
 
-def _walk_interactions(transcript_events: list, subagent_intervals: list) -> list:
-    """Walk the transcript into interactions, nesting subagent activity inside
-    the parent turn. A `user.message` whose timestamp falls inside a subagent
-    interval is the subagent's task prompt, not a new top-level turn."""
+def _walk_interactions(transcript_records: list, subagent_intervals: list, current_model: str = "copilot") -> list:
+    """Walk the transcript records, as (start, end, event), into interactions, nesting
+    subagent activity inside the parent turn. A `user.message` whose timestamp falls
+    inside a subagent interval is the subagent's task prompt, not a new top-level turn.
+    Each interaction keeps the offset of its `user.message` line and the model in effect
+    there, so that a later replay can resume the walk from it. Returns the interactions
+    and the model in effect at the end of the records."""
     interactions = []
     current = None
     current_subagent = None
     pending_tools = {}          # toolCallId -> (container, start_dict)
-    current_model = "copilot"   # updated by session.start.model / session.model_change
+    # current_model is updated by session.start.model / session.model_change
 
     def _container_for_ts(ts: str):
         nonlocal current_subagent
@@ -242,7 +270,7 @@ def _walk_interactions(transcript_events: list, subagent_intervals: list) -> lis
             current.setdefault("subagents", []).append(current_subagent)
         return current_subagent
 
-    for event in transcript_events:
+    for start, _, event in transcript_records:
         etype = event.get("type", "")
         data = event.get("data") or {}
         ts = event.get("timestamp", "")
@@ -275,6 +303,8 @@ def _walk_interactions(transcript_events: list, subagent_intervals: list) -> lis
                 "model": current_model,
                 "turn_start": ts,
                 "turn_end": ts,
+                "offset": start,
+                "start_model": current_model,
             }
             current_subagent = None
 
@@ -332,7 +362,7 @@ def _walk_interactions(transcript_events: list, subagent_intervals: list) -> lis
 
     if current:
         interactions.append(current)
-    return interactions
+    return interactions, current_model
 
 
 def _parse_args(raw_args) -> dict:
@@ -440,21 +470,26 @@ def replay_session(session_id: str) -> None:
 
 
 def _replay_session_locked(session_id: str) -> None:
-    hook_events = _load_jsonl(_session_log(session_id))
+    state = _load_state(session_id)
+    hook_records, hooks_read_cursor = _load_new_jsonl(_session_log(session_id), state.get("hooks_cursor"))
+    hook_events = [e for _, _, e in hook_records]
     if not hook_events:
         return
-    transcript_path = _latest_transcript_path(hook_events)
+    transcript_path = _latest_transcript_path(hook_events) or state.get("transcript_path")
     if not transcript_path:
         logger.debug(f"No transcript_path for {session_id}")
         return
-    transcript_events = _load_jsonl(transcript_path)
-    if not transcript_events:
+    if transcript_path != state.get("transcript_path"):
+        state["transcript_cursor"] = {}
+    transcript_records, transcript_read_cursor = _load_new_jsonl(transcript_path, state.get("transcript_cursor"))
+    if not transcript_records:
         return
 
     subagent_intervals = _build_subagent_intervals(hook_events)
-    interactions = _walk_interactions(transcript_events, subagent_intervals)
+    interactions, end_model = _walk_interactions(transcript_records, subagent_intervals, state.get("model", "copilot"))
+    if not interactions:
+        return
 
-    state = _load_state(session_id)
     already = set(state.get("interactions_processed", []))
     # Skip interactions with no assistant response; Copilot can fire Stop before
     # the transcript has flushed the assistant/tool events for the current turn.
@@ -463,14 +498,41 @@ def _replay_session_locked(session_id: str) -> None:
         if i["id"] not in already and i.get("assistant_messages")
     ]
 
-    if not new_interactions:
-        return
+    cwd = _latest_cwd(hook_events) or state.get("cwd", "")
+    if new_interactions:
+        _replay_interactions(session_id, new_interactions, hook_events, subagent_intervals, cwd, already)
+
+    # The next replay resumes at the last interaction when it is not replayed yet, with the
+    # hook events from its start on; everything before it is never read again. An earlier
+    # interaction without assistant response was followed by another user message, its turn
+    # is over and it is skipped rather than holding the cursors back.
+    last = interactions[-1]
+    pending = last if last["id"] not in already else None
+    skipped = [i["id"] for i in interactions if i["id"] not in already and i is not pending]
+    if skipped:
+        logger.debug(f"Skipping interactions without assistant response: {skipped}")
+    if pending:
+        state["transcript_cursor"] = dict(transcript_read_cursor, offset=pending["offset"])
+        state["model"] = pending["start_model"]
+        resume_ts = pending["turn_start"]
+    else:
+        state["transcript_cursor"] = transcript_read_cursor
+        state["model"] = end_model
+        resume_ts = transcript_records[-1][2].get("timestamp", "")
+    state["hooks_cursor"] = _cursor_from(hook_records, hooks_read_cursor, resume_ts)
+    # the cursor is at the last interaction or past all of them, none walked again was replayed
+    state["interactions_processed"] = []
+    state["transcript_path"] = transcript_path
+    state["cwd"] = cwd
+    _save_state(session_id, state)
 
+
+def _replay_interactions(session_id: str, new_interactions: list, hook_events: list,
+                         subagent_intervals: list, cwd: str, already: set) -> None:
+    """Emit the span tree of each interaction, adding the replayed ones to already."""
     parent_outputs, subagent_outputs = _index_tool_outputs(hook_events, subagent_intervals)
     _configure_telemetry()
     handler = ReplayHandler()
-    cwd = _latest_cwd(hook_events) or None
-
     for interaction in new_interactions:
         iid = interaction["id"]
         prompt = interaction["prompt"]
@@ -514,7 +576,7 @@ def _replay_session_locked(session_id: str) -> None:
                 inference_rounds=[round_dict] if round_dict else [],
                 model=turn_model,
                 tokens=turn_tokens,
-                git_scopes=git_context.compute_scopes(session_id, cwd=cwd),
+                git_scopes=git_context.compute_scopes(session_id, cwd=cwd or None),
                 _turn_start=turn_start,
                 _turn_end=turn_end,
                 **{SPAN_START_TIME: turn_start, SPAN_END_TIME: turn_end, AGENT_SESSION: session_id},
@@ -523,13 +585,12 @@ def _replay_session_locked(session_id: str) -> None:
             logger.debug(f"Turn replay failed for {iid}: {e}")
         already.add(iid)
 
-    state["interactions_processed"] = list(already)
-    _save_state(session_id, state)
-
 
 def replay_compaction(session_id: str) -> None:
     """VS Code fires only PreCompact (no PostCompact). Emit zero-duration span."""
-    hook_events = _load_jsonl(_session_log(session_id))
+    state = _load_state(session_id)
+    hook_records, _ = _load_new_jsonl(_session_log(session_id), state.get("hooks_cursor"))
+    hook_events = [e for _, _, e in hook_records]
     pre = next(
         (e for e in reversed(hook_events) if e.get("hook_event_name") == "PreCompact"),
         None,
@@ -541,7 +602,7 @@ def replay_compaction(session_id: str) -> None:
     ReplayHandler().handle_inference_round(
         input_text="",
         output_text="",
-        model=_load_state(session_id).get("model", "copilot"),
+        model=state.get("model", "copilot"),
         tokens={},
         finish_reason="compaction",
         finish_type=pre.get("trigger", "auto"),
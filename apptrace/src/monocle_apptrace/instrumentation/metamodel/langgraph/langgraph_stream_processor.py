@@ -127,6 +127,11 @@ class LanggraphStreamProcessor(BaseStreamProcessor):
         """LangGraph does not emit a separate completion chunk; unused."""
         return False
 
+    def store_chunk_or_event(self, item: Any, state: StreamState) -> None:
+        """Keep only the latest state snapshot, the one assemble_data can fall back to."""
+        if self._chunk_state(item):
+            state.raw_items[:] = [item]
+
     def assemble_data(self, state: StreamState) -> None:
         """Custom (non message-based) StateGraph: fall back to the last streamed state snapshot."""
         if state.accumulated_response:
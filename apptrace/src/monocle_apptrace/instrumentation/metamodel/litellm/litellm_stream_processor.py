@@ -86,6 +86,15 @@ class LiteLLMStreamProcessor(BaseStreamProcessor):
 
         return found
 
+    def store_chunk_or_event(self, item: Any, state: StreamState) -> None:
+        """Keep only the chunks carrying tool-call fragments or a finish_reason."""
+        choices = getattr(item, "choices", None)
+        if not choices:
+            return
+        choice = choices[0]
+        if getattr(getattr(choice, "delta", None), "tool_calls", None) or getattr(choice, "finish_reason", None):
+            state.store_chunk_or_event(item)
+
     def assemble_data(self, state: StreamState) -> None:
         """Assemble tool call name/args from fragmented streaming chunks.
 
@@ -43,6 +43,8 @@ AGENT_REQUEST = {
         },
         {
             "name": "data.output",
+            # the accessor sets the agent session scope, which has to happen on the request thread
+            "deferrable": False,
             "attributes": [
                 {
                     "_comment": "this is response from Agent",
@@ -197,6 +199,8 @@ CHAT_AGENT_INVOCATION = {
         },
         {
             "name": "data.output",
+            # the accessor sets the agent session scope, which has to happen on the request thread
+            "deferrable": False,
             "attributes": [
                 {
                     "_comment": "this is response from Agent",
@@ -21,6 +21,7 @@ from monocle_apptrace.instrumentation.metamodel.finish_types import (
 )
 from monocle_apptrace.instrumentation.common.constants import AGENT_PREFIX_KEY, INFERENCE_AGENT_DELEGATION, INFERENCE_TURN_END, INFERENCE_TOOL_CALL, TOOL_TYPE
 from contextlib import suppress
+from monocle_apptrace.instrumentation.common.client_entity_cache import cached_per_client
 
 logger = logging.getLogger(__name__)
 
@@ -282,6 +283,7 @@ def extract_provider_name(instance):
     return None
 
 
+@cached_per_client("_client._base_url", "client.meta._endpoint_url")
 def extract_inference_endpoint(instance):
     inference_endpoint: Option[str] = try_option(getattr, instance._client, 'base_url').map(str)
     if inference_endpoint.is_none() and "meta" in instance.client.__dict__:
@@ -4,7 +4,7 @@ from monocle_apptrace.instrumentation.common.span_handler import (
     SpanHandler,
     WORKFLOW_TYPE_MAP,
 )
-from monocle_apptrace.instrumentation.common.utils import remove_scope, set_scope
+from monocle_apptrace.instrumentation.common.utils import get_error_message, remove_scope, set_scope
 from monocle_apptrace.instrumentation.metamodel.openai._helper import ( extract_session_id_from_agents)
 
 __all__ = ["OpenAISpanHandler", "OpenAIAgentsSpanHandler"]
@@ -57,8 +57,10 @@ class OpenAISpanHandler(NonFrameworkSpanHandler):
 
     def post_task_processing(self, to_wrap, wrapped, instance, args, kwargs, result, ex, span, parent_span):
         if self.is_teams_span_in_progress() and ex is not None:
-            if len(span.events) > 1 and span.events[1].name == "data.output" and span.events[1].attributes.get("error_code") is not None:
-                parent_span.set_attribute(CHILD_ERROR_CODE, span.events[1].attributes.get("error_code"))
+            # same value as the error_code of the data.output event, without reading the span events
+            error_code = get_error_message({"exception": ex, "result": result})
+            if error_code:
+                parent_span.set_attribute(CHILD_ERROR_CODE, error_code)
         super().post_task_processing(to_wrap, wrapped, instance, args, kwargs, result, ex, span, parent_span)
 
 
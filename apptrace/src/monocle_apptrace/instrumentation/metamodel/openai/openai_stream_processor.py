@@ -17,9 +17,9 @@ class OpenAIStreamProcessor(BaseStreamProcessor):
         state.update_first_token_time()
         
         if item.type == StreamEventTypes.RESPONSE_OUTPUT_TEXT_DELTA:
-            state.accumulated_response += item.delta
+            state.add_content(item.delta)
         elif item.type == StreamEventTypes.RESPONSE_TEXT_DELTA:
-            state.accumulated_response += item.delta
+            state.add_content(item.delta)
         elif item.type == StreamEventTypes.RESPONSE_COMPLETED:
             state.close_stream()
             if hasattr(item, "response") and hasattr(item.response, "usage"):
@@ -91,34 +91,33 @@ class OpenAIStreamProcessor(BaseStreamProcessor):
 
         return True
 
-    def assemble_data(self, state: StreamState) -> None:
-        """Assemble tool calls and completion data from fragmented streaming chunks."""
-        for item in state.raw_items:
-            try:
-                if (hasattr(item, "choices") and item.choices and
-                    isinstance(item.choices, list) and len(item.choices) > 0):
-
-                    choice = item.choices[0]
-
-                    # Extract tool calls
-                    if (hasattr(choice, "delta") and hasattr(choice.delta, "tool_calls") and
-                        choice.delta.tool_calls):
-
-                        for tool_call in choice.delta.tool_calls:
-                            if (hasattr(tool_call, "id") and tool_call.id and
-                                hasattr(tool_call, "function") and tool_call.function):
-
-                                state.tools.append({
-                                    "id": tool_call.id,
-                                    "name": tool_call.function.name,
-                                    "arguments": getattr(tool_call.function, "arguments", ""),
-                                })
-
-                    # Extract finish_reason
-                    if hasattr(choice, "finish_reason") and choice.finish_reason:
-                        state.finish_reason = choice.finish_reason
-
-            except Exception as e:
-                self.logger.warning(
-                    "Warning: Error occurred while processing tool calls: %s", str(e)
-                )
\ No newline at end of file
+    def store_chunk_or_event(self, item: Any, state: StreamState) -> None:
+        """Extract tool calls and finish_reason from each chunk instead of keeping it."""
+        try:
+            if (hasattr(item, "choices") and item.choices and
+                isinstance(item.choices, list) and len(item.choices) > 0):
+
+                choice = item.choices[0]
+
+                # Extract tool calls
+                if (hasattr(choice, "delta") and hasattr(choice.delta, "tool_calls") and
+                    choice.delta.tool_calls):
+
+                    for tool_call in choice.delta.tool_calls:
+                        if (hasattr(tool_call, "id") and tool_call.id and
+                            hasattr(tool_call, "function") and tool_call.function):
+
+                            state.tools.append({
+                                "id": tool_call.id,
+                                "name": tool_call.function.name,
+                                "arguments": getattr(tool_call.function, "arguments", ""),
+                            })
+
+                # Extract finish_reason
+                if hasattr(choice, "finish_reason") and choice.finish_reason:
+                    state.finish_reason = choice.finish_reason
+
+        except Exception as e:
+            self.logger.warning(
+                "Warning: Error occurred while extracting tool calls: %s", str(e)
+            )
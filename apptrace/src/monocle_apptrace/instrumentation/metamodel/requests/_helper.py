@@ -92,10 +92,11 @@ class RequestSpanHandler(SpanHandler):
                 if delimiter:
                     body = getattr(result, "_content", None)
                     if isinstance(body, (bytes, bytearray)):
-                        clean, payload = tr.split_body_and_trailer(bytes(body), delimiter)
-                        if payload is not None:
+                        clean, remote_spans, dropped_count = tr.split_and_decode_trailer(bytes(body), delimiter)
+                        if remote_spans is not None:
                             result._content = clean
-                            result._monocle_remote_spans = tr.decode_payload(payload)
+                            result._monocle_remote_spans = remote_spans
+                            result._monocle_remote_spans_dropped = dropped_count
         except Exception as e:
             logger.debug(f"trace-return strip failed: {e}")
         super().post_task_processing(to_wrap, wrapped, instance, args, kwargs, result, ex, span, parent_span)
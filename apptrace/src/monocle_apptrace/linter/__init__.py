@@ -1,10 +1,14 @@
 from monocle_apptrace.linter.validator import MonocleValidator, ValidationResult
 from monocle_apptrace.linter.reporters import ValidationReporter
 from monocle_apptrace.linter.rules import ValidationError
+from monocle_apptrace.linter.runner import FileValidationResult, find_trace_files, validate_trace_files
 
 __all__ = [
     "MonocleValidator",
     "ValidationResult",
     "ValidationReporter",
-    "ValidationError"
+    "ValidationError",
+    "FileValidationResult",
+    "find_trace_files",
+    "validate_trace_files"
 ]
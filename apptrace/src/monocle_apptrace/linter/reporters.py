@@ -1,5 +1,9 @@
-from typing import List
+from typing import Iterable, List
+from xml.etree import ElementTree
+
+from monocle_apptrace.instrumentation.common import json_codec
 from monocle_apptrace.linter.rules import ValidationError
+from monocle_apptrace.linter.runner import FileValidationResult
 from monocle_apptrace.linter.validator import ValidationResult
 
 
@@ -80,3 +84,57 @@ class ValidationReporter:
             return 1
 
         return 0
+
+    @staticmethod
+    def format_file_result(file_result: FileValidationResult, fail_on_warning: bool = False) -> str:
+        """Format the results of one of several validated files, under a header naming the file."""
+        if file_result.failure is not None:
+            return f"== {file_result.path} ==\nERROR: {file_result.failure}"
+        return f"== {file_result.path} ==\n" + ValidationReporter.format_results(file_result.result, fail_on_warning)
+
+    @staticmethod
+    def format_json(file_result: FileValidationResult, fail_on_warning: bool = False) -> str:
+        """Format the results of a file as one line of JSON.
+
+        Example:
+            {"file": "trace.json", "passed": false, "failure": null,
+             "errors": [{"severity": "error", "field": "entity.2.name", ...}], "warnings": []}
+        """
+        result = file_result.result
+        return json_codec.dumps({
+            "file": file_result.path,
+            "passed": not file_result.is_failed(fail_on_warning),
+            "failure": file_result.failure,
+            "errors": [error.to_dict() for error in result.all_errors] if result else [],
+            "warnings": [warning.to_dict() for warning in result.all_warnings] if result else [],
+        })
+
+    @staticmethod
+    def format_junit(file_results: Iterable[FileValidationResult], fail_on_warning: bool = False) -> str:
+        """Format the results of the files as a JUnit XML report, one test case per file.
+
+        A file with errors, or with warnings when fail_on_warning is set, is a failed test case
+        and a file that could not be read is a test case in error.
+        """
+        suite = ElementTree.Element("testsuite", name="monocle-apptrace validate")
+        tests = failures = errors = 0
+        for file_result in file_results:
+            tests += 1
+            case = ElementTree.SubElement(suite, "testcase", classname="monocle.validate", name=file_result.path)
+            if file_result.failure is not None:
+                errors += 1
+                ElementTree.SubElement(case, "error", message=file_result.failure)
+                continue
+            result = file_result.result
+            issues = result.all_errors + (result.all_warnings if fail_on_warning else [])
+            if issues:
+                failures += 1
+                failure = ElementTree.SubElement(case, "failure", message=f"{len(issues)} validation issues")
+                failure.text = "\n".join(str(issue) for issue in issues)
+            if result.all_warnings and not fail_on_warning:
+                output = ElementTree.SubElement(case, "system-out")
+                output.text = "\n".join(str(warning) for warning in result.all_warnings)
+        suite.set("tests", str(tests))
+        suite.set("failures", str(failures))
+        suite.set("errors", str(errors))
+        return '<?xml version="1.0" encoding="UTF-8"?>\n' + ElementTree.tostring(suite, encoding="unicode")
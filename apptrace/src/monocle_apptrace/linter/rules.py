@@ -14,6 +14,10 @@ class ValidationError:
     def __str__(self):
         return f"{self.severity.upper()}: {self.message}"
 
+    def to_dict(self) -> Dict[str, str]:
+        return {"severity": self.severity, "field": self.field, "span_name": self.span_name,
+                "message": self.message}
+
 
 class Rule(ABC):
     """Base class for validation rules"""
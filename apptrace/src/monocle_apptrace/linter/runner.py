@@ -0,0 +1,104 @@
+"""Validate many trace files, in parallel worker processes.
+
+``find_trace_files`` expands files, directories and glob patterns into trace files and
+``validate_trace_files`` validates them across a process pool, yielding a ``FileValidationResult``
+per file, in order, as soon as it is available.
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from monocle_apptrace.linter.specs_loader import SpecsLoader
+from monocle_apptrace.linter.validator import MonocleValidator, ValidationResult
+
+# Trace files written per trace and NDJSON segments written by FileSpanExporter
+TRACE_FILE_PATTERNS = ("*.json", "*.ndjson", "*.ndjson.gz")
+# Files are validated in worker processes when there are at least this many.
+PARALLEL_MIN_FILES = 2
+
+
+class FileValidationResult:
+    """Validation result of one trace file, or the reason it could not be validated."""
+
+    def __init__(self, path: str, result: Optional[ValidationResult] = None, failure: Optional[str] = None):
+        self.path = path
+        self.result = result
+        self.failure = failure
+
+    def is_failed(self, fail_on_warning: bool = False) -> bool:
+        if self.failure is not None:
+            return True
+        return self.result.has_errors() or (fail_on_warning and self.result.has_warnings())
+
+
+def _is_trace_file(path: str) -> bool:
+    return any(Path(path).match(pattern) for pattern in TRACE_FILE_PATTERNS)
+
+
+def find_trace_files(paths: Iterable[str]) -> List[str]:
+    """Expand files, directories (searched recursively) and glob patterns into trace files.
+
+    Files named explicitly are kept whatever their name, so that a missing or unexpected file
+    is reported rather than skipped.
+    """
+    found: List[str] = []
+    for entry in paths:
+        if os.path.isdir(entry):
+            for root, dirs, names in os.walk(entry):
+                dirs.sort()
+                found.extend(sorted(os.path.join(root, name) for name in names
+                                    if _is_trace_file(os.path.join(root, name))))
+        elif glob.has_magic(entry):
+            found.extend(sorted(path for path in glob.glob(entry, recursive=True)
+                                if os.path.isfile(path) and _is_trace_file(path)))
+        else:
+            found.append(entry)
+    # keep the first occurrence of a file given twice
+    return list(dict.fromkeys(found))
+
+
+_validator: Optional[MonocleValidator] = None
+
+
+def _init_worker(specs: Dict[str, Any]) -> None:
+    # the specs are loaded once by the parent, not fetched again by each worker
+    SpecsLoader._cache = specs
+
+
+def _validate_file(path: str) -> FileValidationResult:
+    global _validator
+    if _validator is None:
+        _validator = MonocleValidator()
+    try:
+        return FileValidationResult(path, _validator.validate_trace_file(Path(path)))
+    except (OSError, ValueError) as e:
+        return FileValidationResult(path, failure=str(e))
+    except Exception as e:
+        # a malformed span must fail its file only, not the whole run
+        return FileValidationResult(path, failure=f"{type(e).__name__}: {e}")
+
+
+def validate_trace_files(paths: List[str], workers: Optional[int] = None) -> Iterator[FileValidationResult]:
+    """Validate trace files, yielding their results in order as they complete.
+
+    Files are validated in a pool of ``workers`` processes (default: one per CPU) when there
+    are several of them, serially otherwise or when the pool can't be started.
+    """
+    specs = SpecsLoader.load_specs()
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        try:
+            executor = ProcessPoolExecutor(max_workers=min(workers, len(paths)), initializer=_init_worker,
+                                           initargs=(specs,))
+        except (OSError, ValueError, NotImplementedError):
+            executor = None
+        if executor is not None:
+            with executor:
+                yield from executor.map(_validate_file, paths, chunksize=max(1, len(paths) // (workers * 8)))
+            return
+    for path in paths:
+        yield _validate_file(path)
+
@@ -1,6 +1,22 @@
-import requests
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, Any, Optional
 
+import requests
+
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.utils import get_env_int, parse_bool_setting
+
+# Git ref of monocle-specs the linter validates against
+SPECS_VERSION = "main"
+SPECS_CACHE_DIR_ENV = "MONOCLE_SPECS_CACHE_DIR"
+SPECS_CACHE_TTL_ENV = "MONOCLE_SPECS_CACHE_TTL_SECONDS"
+SPECS_OFFLINE_ENV = "MONOCLE_SPECS_OFFLINE"
+DEFAULT_SPECS_CACHE_DIR = Path.home() / ".monocle" / "specs_cache"
+DEFAULT_SPECS_CACHE_TTL_SECONDS = 24 * 60 * 60
+
 
 class SpecsLoader:
     """Load and cache Monocle validation specifications from monocle-specs repository.
@@ -8,6 +24,12 @@ class SpecsLoader:
     This class is responsible for fetching validation specifications from the public
     monocle-specs GitHub repository and caching them in memory for performance.
 
+    Fetched specs are also kept in an on-disk cache (``MONOCLE_SPECS_CACHE_DIR``, default
+    ``~/.monocle/specs_cache``) with their ETag. A cached spec younger than
+    ``MONOCLE_SPECS_CACHE_TTL_SECONDS`` is used as is, an older one is revalidated with a
+    conditional request. With ``MONOCLE_SPECS_OFFLINE=true``, or when GitHub can't be reached,
+    the cached specs are used; a spec that is not cached is left out.
+
     The specs define the metamodel for Monocle traces, including entity types, required
     attributes, and validation rules.
 
@@ -17,7 +39,7 @@ class SpecsLoader:
         dict_keys(['entities', 'inference_types', 'model_types', ...])
     """
 
-    SPECS_BASE_URL = "https://raw.githubusercontent.com/monocle2ai/monocle-specs/main/metamodel/entities"
+    SPECS_BASE_URL = f"https://raw.githubusercontent.com/monocle2ai/monocle-specs/{SPECS_VERSION}/metamodel/entities"
     REQUIRED_SPEC_FILES = [
         "entities.json",
         "inference_types.json",
@@ -33,9 +55,10 @@ class SpecsLoader:
     def load_specs() -> Dict[str, Any]:
         """Load validation specs from cache or fetch from GitHub.
 
-        On first call, fetches all required specification files from the monocle-specs
-        repository and caches them in memory. Subsequent calls return the cached specs
-        immediately without network requests.
+        On first call, loads all required specification files from the on-disk cache,
+        fetching the missing or stale ones from the monocle-specs repository in parallel,
+        and caches them in memory. Subsequent calls return the cached specs immediately
+        without network requests.
 
         Returns:
             Dict[str, Any]: Dictionary mapping spec name to spec content.
@@ -50,30 +73,78 @@ class SpecsLoader:
         if SpecsLoader._cache is not None:
             return SpecsLoader._cache
 
-        # Fetch specs from GitHub
-        specs = {}
-        for filename in SpecsLoader.REQUIRED_SPEC_FILES:
-            url = f"{SpecsLoader.SPECS_BASE_URL}/{filename}"
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                specs[filename.replace(".json", "")] = response.json()
-            except requests.RequestException as e:
-                print(f"Warning: Could not load {filename}: {e}")
+        cache_dir = Path(os.getenv(SPECS_CACHE_DIR_ENV, str(DEFAULT_SPECS_CACHE_DIR))) / SPECS_VERSION
+        offline = parse_bool_setting(SPECS_OFFLINE_ENV, os.getenv(SPECS_OFFLINE_ENV, "false"))
+        ttl = get_env_int(SPECS_CACHE_TTL_ENV, DEFAULT_SPECS_CACHE_TTL_SECONDS, minimum=0)
+
+        with ThreadPoolExecutor(max_workers=len(SpecsLoader.REQUIRED_SPEC_FILES)) as executor:
+            loaded = executor.map(lambda filename: SpecsLoader._load_spec(filename, cache_dir, ttl, offline),
+                                  SpecsLoader.REQUIRED_SPEC_FILES)
+            specs = {filename.replace(".json", ""): spec
+                     for filename, spec in zip(SpecsLoader.REQUIRED_SPEC_FILES, loaded) if spec is not None}
 
         # Cache specs for subsequent calls
         SpecsLoader._cache = specs
         return specs
 
+    @staticmethod
+    def _load_spec(filename: str, cache_dir: Path, ttl: int, offline: bool) -> Optional[Any]:
+        """Load one spec file from the disk cache or GitHub."""
+        cache_file = cache_dir / filename
+        etag_file = cache_dir / (filename + ".etag")
+        cached = SpecsLoader._read_json(cache_file)
+        if cached is not None and (offline or time.time() - cache_file.stat().st_mtime < ttl):
+            return cached
+
+        if not offline:
+            headers = {}
+            if cached is not None and etag_file.exists():
+                headers["If-None-Match"] = etag_file.read_text().strip()
+            try:
+                response = requests.get(f"{SpecsLoader.SPECS_BASE_URL}/{filename}", headers=headers, timeout=10)
+                if response.status_code == 304 and cached is not None:
+                    # unchanged, restart the cache time to live
+                    os.utime(cache_file)
+                    return cached
+                response.raise_for_status()
+                SpecsLoader._write_cache(cache_file, etag_file, response)
+                return json_codec.loads(response.content)
+            except (requests.RequestException, ValueError) as e:
+                if cached is None:
+                    print(f"Warning: Could not load {filename}: {e}")
+
+        return cached
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[Any]:
+        try:
+            return json_codec.loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_cache(cache_file: Path, etag_file: Path, response) -> None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_bytes(response.content)
+            etag = response.headers.get("ETag")
+            if etag:
+                etag_file.write_text(etag)
+            elif etag_file.exists():
+                etag_file.unlink()
+        except OSError:
+            pass
+
     @staticmethod
     def clear_cache() -> None:
         """Clear the in-memory specs cache.
 
         Useful for testing when you need to reload specs or when you want to
-        free memory. The next call to load_specs() will fetch from GitHub again.
+        free memory. The next call to load_specs() will load them again from the
+        on-disk cache or GitHub.
 
         Example:
             >>> SpecsLoader.clear_cache()
-            >>> specs = SpecsLoader.load_specs()  # Fetches from GitHub again
+            >>> specs = SpecsLoader.load_specs()  # Loads the specs again
         """
         SpecsLoader._cache = None
@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from typing import List, Dict, Any
 
+from monocle_apptrace.instrumentation.common.span_reader import iter_spans
 from monocle_apptrace.linter.specs_loader import SpecsLoader
 from monocle_apptrace.linter.rules import (
     Rule,
@@ -121,8 +122,9 @@ class MonocleValidator:
     def validate_trace_file(self, trace_file: Path) -> ValidationResult:
         """Validate an entire trace JSON file.
 
-        Reads a trace file, parses the JSON, and validates all spans against
-        the defined validation rules.
+        Reads the spans of a trace file one at a time and validates them against
+        the defined validation rules. JSON arrays, JSON lines and single span
+        objects are accepted.
 
         Args:
             trace_file (Path): Path to the trace JSON file
@@ -143,21 +145,17 @@ class MonocleValidator:
         if not trace_file.exists():
             raise FileNotFoundError(f"Trace file not found: {trace_file}")
 
-        # Load trace JSON
-        with open(trace_file) as f:
-            try:
-                traces = json.load(f)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON in trace file: {e}")
-
-        # Ensure traces is a list
-        if isinstance(traces, dict):
-            traces = [traces]
-
-        # Validate each span
+        # Read the spans one at a time, large trace files are never loaded whole
         all_errors = []
-        for span in traces:
-            all_errors.extend(self.validate_span(span))
+        try:
+            for index, span in enumerate(iter_spans(trace_file)):
+                if not isinstance(span, dict):
+                    all_errors.append(ValidationError(field="span", span_name=f"span {index}",
+                                                      message="span is not a JSON object", severity="error"))
+                    continue
+                all_errors.extend(self.validate_span(span))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in trace file: {e}")
 
         return ValidationResult(all_errors)
 
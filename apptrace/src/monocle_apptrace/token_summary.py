@@ -4,15 +4,31 @@ Reads .monocle/monocle_trace_*.json files and aggregates token counts
 per date and model, displayed as a table in the terminal.
 """
 
-import json
+import logging
+import os
+import sqlite3
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
-from typing import List, Dict
+from typing import Iterable, List, Dict, Tuple
+
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.span_reader import iter_spans
+
+logger = logging.getLogger(__name__)
 
 MONOCLE_DIR = Path.home() / ".monocle"
 
+# Per-file token aggregates are kept in this SQLite file in the trace directory, keyed by file
+# name, mtime and size, so that only new or modified trace files are parsed again.
+INDEX_FILE_NAME = ".token_summary_index.sqlite"
+# Uncached files are parsed in worker processes when there are at least this many.
+PARALLEL_MIN_FILES = 64
+# Trace files written per trace and NDJSON segments written by FileSpanExporter
+_TRACE_FILE_EXTENSIONS = (".json", ".ndjson", ".ndjson.gz")
+
 # Token attribute keys extracted from the "metadata" event
 _TOKEN_KEYS = [
     "prompt_tokens",
@@ -30,10 +46,11 @@ def _parse_timestamp_from_filename(name):
     # type: (str) -> Optional[datetime]
     """Extract a UTC datetime from a filename ending like _2025-11-30_19.47.49.json"""
     # strip extension
-    if name.endswith(".json"):
-        stem = name[:-5]
-    else:
-        stem = name
+    stem = name
+    for ext in _TRACE_FILE_EXTENSIONS:
+        if name.endswith(ext):
+            stem = name[:-len(ext)]
+            break
     # last two underscore segments are the date and time parts
     parts = stem.rsplit("_", 2)
     if len(parts) < 3:
@@ -66,73 +83,196 @@ def _window_cutoff(time_window):
     return None  # "all" or unrecognised → no cutoff
 
 
-def _load_spans(path):
-    # type: (Path) -> List[Dict]
+def _add_tokens(totals, attrs):
+    # type: (List[int], Dict) -> None
+    for i, key in enumerate(_TOKEN_KEYS):
+        val = attrs.get(key, 0)
+        if isinstance(val, (int, float)):
+            totals[i] += int(val)
+
+
+def _aggregate_file(path):
+    # type: (Path) -> Dict
+    """Token totals of one trace file, per model and per session and model.
+
+    Totals are lists in _TOKEN_KEYS order: {"models": {model: totals},
+    "sessions": {session: {model: totals}}}.
+    """
+    models = {}  # type: Dict[str, List[int]]
+    sessions = {}  # type: Dict[str, Dict[str, List[int]]]
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return data if isinstance(data, list) else []
+        _aggregate_spans(iter_spans(path), models, sessions)
     except Exception:
-        return []
+        # an unreadable or partially written file counts for nothing
+        return {"models": {}, "sessions": {}}
+    return {"models": models, "sessions": sessions}
+
+
+def _aggregate_spans(spans, models, sessions):
+    # type: (Iterable, Dict[str, List[int]], Dict[str, Dict[str, List[int]]]) -> None
+    for span in spans:
+        if not isinstance(span, dict):
+            continue
+        attrs = span.get("attributes", {})
+        model = attrs.get("entity.2.name")
+        if not model:
+            continue
+        session_id = attrs.get(SESSION_ATTR)
+        for event in span.get("events", []):
+            if event.get("name") != "metadata":
+                continue
+            event_attrs = event.get("attributes", {})
+            _add_tokens(models.setdefault(model, [0] * len(_TOKEN_KEYS)), event_attrs)
+            if session_id:
+                _add_tokens(sessions.setdefault(session_id, {}).setdefault(model, [0] * len(_TOKEN_KEYS)),
+                            event_attrs)
+
+
+class _TokenIndex:
+    """SQLite index of per-file aggregates, a no-op when the database can't be opened."""
+
+    def __init__(self, monocle_dir):
+        # type: (Path) -> None
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(str(monocle_dir / INDEX_FILE_NAME))
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+                "aggregates TEXT)"
+            )
+        except sqlite3.Error as e:
+            logger.debug(f"Token summary index unavailable, parsing all trace files: {e}")
+            self.close()
+
+    def load(self):
+        # type: () -> Dict[str, Tuple[int, int, str]]
+        if self._conn is None:
+            return {}
+        try:
+            return {name: (mtime_ns, size, aggregates) for name, mtime_ns, size, aggregates
+                    in self._conn.execute("SELECT name, mtime_ns, size, aggregates FROM files")}
+        except sqlite3.Error as e:
+            logger.debug(f"Error reading token summary index: {e}")
+            return {}
+
+    def update(self, rows, removed):
+        # type: (List[Tuple[str, int, int, str]], List[str]) -> None
+        if self._conn is None or not (rows or removed):
+            return
+        try:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows)
+                self._conn.executemany("DELETE FROM files WHERE name = ?", [(name,) for name in removed])
+        except sqlite3.Error as e:
+            logger.debug(f"Error updating token summary index: {e}")
+
+    def close(self):
+        # type: () -> None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _parse_files(paths, workers):
+    # type: (List[Path], Optional[int]) -> List[Dict]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_aggregate_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        except Exception as e:
+            logger.debug(f"Parallel parsing of trace files failed, parsing serially: {e}")
+    return [_aggregate_file(path) for path in paths]
+
+
+def _file_aggregates(time_window, monocle_dir, use_index=True, workers=None):
+    # type: (str, Path, bool, Optional[int]) -> List[Tuple[datetime, Dict]]
+    """(file timestamp, aggregates) of the trace files in the time window, parsing only the files
+    missing from or changed since the index."""
+    cutoff = _window_cutoff(time_window)
+    index = _TokenIndex(monocle_dir) if use_index else None
+    try:
+        cached = index.load() if index is not None else {}
+        names = set()
+        results = []
+        uncached = []
+        trace_files = (trace_file for ext in _TRACE_FILE_EXTENSIONS
+                       for trace_file in monocle_dir.glob("monocle_trace_*" + ext))
+        for trace_file in sorted(trace_files):
+            names.add(trace_file.name)
+            ts = _parse_timestamp_from_filename(trace_file.name)
+            if ts is None:
+                continue
+            if cutoff is not None and ts < cutoff:
+                continue
+            try:
+                stat = trace_file.stat()
+            except OSError:
+                continue
+            entry = cached.get(trace_file.name)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                try:
+                    results.append((ts, json_codec.loads(entry[2])))
+                    continue
+                except ValueError:
+                    pass
+            uncached.append((trace_file, ts, stat))
+
+        parsed = _parse_files([trace_file for trace_file, _, _ in uncached], workers)
+        rows = []
+        for (trace_file, ts, stat), aggregates in zip(uncached, parsed):
+            results.append((ts, aggregates))
+            rows.append((trace_file.name, stat.st_mtime_ns, stat.st_size, json_codec.dumps(aggregates)))
+        if index is not None:
+            index.update(rows, [name for name in cached if name not in names])
+        return results
+    finally:
+        if index is not None:
+            index.close()
+
+
+def _rows(aggregated, group_key):
+    # type: (Dict, str) -> List[Dict]
+    rows = []
+    for group in sorted(aggregated.keys()):
+        for model in sorted(aggregated[group].keys()):
+            row = {group_key: group, "model": model}
+            row.update(zip(_TOKEN_KEYS, aggregated[group][model]))
+            rows.append(row)
+    return rows
+
+
+def _merge(target, totals):
+    # type: (List[int], List[int]) -> None
+    for i, val in enumerate(totals):
+        target[i] += val
 
 
-def summarize(time_window="all", monocle_dir=None):
-    # type: (str, Optional[Path]) -> List[Dict]
+def summarize(time_window="all", monocle_dir=None, use_index=True, workers=None):
+    # type: (str, Optional[Path], bool, Optional[int]) -> List[Dict]
     """Aggregate token usage from trace files in *monocle_dir*.
 
     Returns a list of row dicts sorted by date then model, each with keys:
     date, model, prompt_tokens, cache_read_input_tokens,
     cache_creation_input_tokens, completion_tokens, total_tokens.
+
+    Per-file totals are cached in an index in *monocle_dir* unless *use_index* is False.
+    Uncached files are parsed by up to *workers* processes (default: one per CPU).
     """
     if monocle_dir is None:
         monocle_dir = MONOCLE_DIR
 
-    cutoff = _window_cutoff(time_window)
-
-    # aggregated[date_str][model][token_key] = cumulative int
-    aggregated = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-
     if not monocle_dir.exists():
         return []
 
-    for trace_file in sorted(monocle_dir.glob("monocle_trace_*.json")):
-        ts = _parse_timestamp_from_filename(trace_file.name)
-        if ts is None:
-            continue
-        if cutoff is not None and ts < cutoff:
-            continue
-
+    # aggregated[date_str][model] = token totals in _TOKEN_KEYS order
+    aggregated = defaultdict(lambda: defaultdict(lambda: [0] * len(_TOKEN_KEYS)))
+    for ts, aggregates in _file_aggregates(time_window, monocle_dir, use_index, workers):
         date_str = ts.strftime("%Y-%m-%d")
-
-        for span in _load_spans(trace_file):
-            model = span.get("attributes", {}).get("entity.2.name")
-            if not model:
-                continue
-
-            for event in span.get("events", []):
-                if event.get("name") != "metadata":
-                    continue
-                attrs = event.get("attributes", {})
-                for key in _TOKEN_KEYS:
-                    val = attrs.get(key, 0)
-                    if isinstance(val, (int, float)):
-                        aggregated[date_str][model][key] += int(val)
-
-    rows = []
-    for date_str in sorted(aggregated.keys()):
-        for model in sorted(aggregated[date_str].keys()):
-            tokens = aggregated[date_str][model]
-            rows.append(
-                {
-                    "date": date_str,
-                    "model": model,
-                    "prompt_tokens": tokens["prompt_tokens"],
-                    "cache_read_input_tokens": tokens["cache_read_input_tokens"],
-                    "cache_creation_input_tokens": tokens["cache_creation_input_tokens"],
-                    "completion_tokens": tokens["completion_tokens"],
-                    "total_tokens": tokens["total_tokens"],
-                }
-            )
-    return rows
+        for model, totals in aggregates["models"].items():
+            _merge(aggregated[date_str][model], totals)
+    return _rows(aggregated, "date")
 
 
 def format_table(rows):
@@ -175,54 +315,21 @@ SESSION_ATTR = "scope.agentic.session"
 _SESSION_HEADERS = ["Session", "Model", "Input", "Cache Read", "Cache Create", "Output", "Total"]
 
 
-def summarize_by_session(time_window="all", monocle_dir=None):
-    # type: (str, Optional[Path]) -> List[Dict]
+def summarize_by_session(time_window="all", monocle_dir=None, use_index=True, workers=None):
+    # type: (str, Optional[Path], bool, Optional[int]) -> List[Dict]
     """Aggregate token usage per session from trace files in *monocle_dir*."""
     if monocle_dir is None:
         monocle_dir = MONOCLE_DIR
 
-    cutoff = _window_cutoff(time_window)
-    aggregated: dict = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-
     if not monocle_dir.exists():
         return []
 
-    for trace_file in sorted(monocle_dir.glob("monocle_trace_*.json")):
-        ts = _parse_timestamp_from_filename(trace_file.name)
-        if ts is None:
-            continue
-        if cutoff is not None and ts < cutoff:
-            continue
-
-        for span in _load_spans(trace_file):
-            attrs = span.get("attributes", {})
-            session_id = attrs.get(SESSION_ATTR)
-            model = attrs.get("entity.2.name")
-            if not session_id or not model:
-                continue
-            for event in span.get("events", []):
-                if event.get("name") != "metadata":
-                    continue
-                event_attrs = event.get("attributes", {})
-                for key in _TOKEN_KEYS:
-                    val = event_attrs.get(key, 0)
-                    if isinstance(val, (int, float)):
-                        aggregated[session_id][model][key] += int(val)
-
-    rows = []
-    for session_id in sorted(aggregated.keys()):
-        for model in sorted(aggregated[session_id].keys()):
-            tokens = aggregated[session_id][model]
-            rows.append({
-                "session": session_id,
-                "model": model,
-                "prompt_tokens": tokens["prompt_tokens"],
-                "cache_read_input_tokens": tokens["cache_read_input_tokens"],
-                "cache_creation_input_tokens": tokens["cache_creation_input_tokens"],
-                "completion_tokens": tokens["completion_tokens"],
-                "total_tokens": tokens["total_tokens"],
-            })
-    return rows
+    aggregated: dict = defaultdict(lambda: defaultdict(lambda: [0] * len(_TOKEN_KEYS)))
+    for _, aggregates in _file_aggregates(time_window, monocle_dir, use_index, workers):
+        for session_id, models in aggregates["sessions"].items():
+            for model, totals in models.items():
+                _merge(aggregated[session_id][model], totals)
+    return _rows(aggregated, "session")
 
 
 def format_session_table(rows):
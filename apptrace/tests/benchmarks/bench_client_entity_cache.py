@@ -0,0 +1,61 @@
+"""Compare the helpers decorated with cached_per_client against their undecorated versions.
+
+Times each helper on a real SDK client object, with and without the per client cache, and
+checks both return the same value. A helper is only worth caching when the cached call is
+faster. Run with: python tests/benchmarks/bench_client_entity_cache.py [call_count]
+"""
+
+import sys
+import timeit
+
+
+def _cases():
+    cases = []
+    try:
+        import openai
+        from monocle_apptrace.instrumentation.metamodel.openai import _helper as openai_helper
+    except ImportError:
+        print("openai not installed, skipping the OpenAI helpers")
+    else:
+        completions = openai.OpenAI(api_key="bench").chat.completions
+        cases += [("openai.extract_inference_endpoint", openai_helper.extract_inference_endpoint, completions)]
+    try:
+        import anthropic
+        from monocle_apptrace.instrumentation.metamodel.anthropic import _helper as anthropic_helper
+    except ImportError:
+        print("anthropic not installed, skipping the Anthropic helpers")
+    else:
+        messages = anthropic.Anthropic(api_key="bench", base_url="https://api.anthropic.com").messages
+        cases += [("anthropic.extract_inference_endpoint", anthropic_helper.extract_inference_endpoint, messages)]
+    try:
+        import botocore.session
+        from monocle_apptrace.instrumentation.metamodel.botocore import _helper as botocore_helper
+    except ImportError:
+        print("botocore not installed, skipping the botocore helpers")
+    else:
+        client = botocore.session.get_session().create_client(
+            "bedrock-runtime", region_name="us-east-1", aws_access_key_id="bench", aws_secret_access_key="bench")
+        cases += [("botocore.extract_provider_name", botocore_helper.extract_provider_name, client)]
+    return cases
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    slower = []
+    for label, helper, instance in _cases():
+        raw = helper.__wrapped__
+        assert helper(instance) == raw(instance), f"cached value differs for {label}"
+        uncached = min(timeit.repeat(lambda: raw(instance), number=count, repeat=5))
+        cached = min(timeit.repeat(lambda: helper(instance), number=count, repeat=5))
+        per_call = 1e9 / count
+        print(f"{label}: uncached {uncached * per_call:.0f} ns/call, cached {cached * per_call:.0f} ns/call, "
+              f"{uncached / cached:.1f}x")
+        if cached >= uncached:
+            slower.append(label)
+    if slower:
+        print(f"slower with the cache: {', '.join(slower)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
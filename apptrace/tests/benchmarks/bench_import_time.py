@@ -0,0 +1,45 @@
+"""Measure the cold start cost of Monocle: `import monocle_apptrace` and `setup_monocle_telemetry`.
+
+Each sample runs in a fresh interpreter. Prints the median wall time of each step and how many
+metamodel modules it imported, which the lazy metamodel registry keeps to the installed frameworks.
+Run with: python tests/benchmarks/bench_import_time.py [samples]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import monocle_apptrace
+imported = time.perf_counter()
+imported_modules = sum(m.startswith("monocle_apptrace.instrumentation.metamodel.") for m in sys.modules)
+from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+setup_monocle_telemetry(workflow_name="bench_import", monocle_exporters_list="memory")
+done = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "setup_s": done - imported,
+    "import_metamodel_modules": imported_modules,
+    "setup_metamodel_modules": sum(m.startswith("monocle_apptrace.instrumentation.metamodel.") for m in sys.modules),
+}))
+"""
+
+
+def _sample():
+    out = subprocess.check_output([sys.executable, "-c", _PROBE], text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(samples=5):
+    results = [_sample() for _ in range(samples)]
+    for key, label in (("import_s", "import monocle_apptrace"), ("setup_s", "setup_monocle_telemetry")):
+        print(f"{label:<26} {statistics.median(r[key] for r in results) * 1000:8.1f} ms")
+    print(f"{'metamodel modules':<26} {results[-1]['import_metamodel_modules']} after import, "
+          f"{results[-1]['setup_metamodel_modules']} after setup")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
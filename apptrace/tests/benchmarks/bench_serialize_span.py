@@ -0,0 +1,66 @@
+"""Compare serialize_span against json.loads(span.to_json()) on typical inference spans.
+
+Checks that both produce the same dict, with and without the 0x-free to_json patch, and prints
+the time per span of each. Run with: python tests/benchmarks/bench_serialize_span.py [span_count]
+"""
+
+import json
+import sys
+import timeit
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from monocle_apptrace.exporters.base_exporter import serialize_span
+from monocle_apptrace.instrumentation.common.utils import setup_readablespan_patch
+
+
+def _to_json_path(span):
+    obj = json.loads(span.to_json())
+    status = obj.get("status", {})
+    if "description" in status:
+        status["message"] = status.pop("description")
+    return obj
+
+
+def _make_spans(count):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(resource=Resource.create({"service.name": "bench"}))
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("bench")
+    messages = [json.dumps({"role": "user", "content": "question " * 40}) for _ in range(6)]
+    with tracer.start_as_current_span("workflow"):
+        for index in range(count):
+            with tracer.start_as_current_span("openai.resources.chat.completions.Completions.create") as span:
+                span.set_attribute("span.type", "inference")
+                span.set_attribute("entity.1.type", "inference.openai")
+                span.set_attribute("entity.2.name", "gpt-4o")
+                span.add_event("data.input", {"input": messages})
+                span.add_event("data.output", {"response": f"answer {index} " * 40})
+                span.add_event("metadata", {"prompt_tokens": 480, "completion_tokens": 80, "total_tokens": 560})
+    return exporter.get_finished_spans()
+
+
+def _run(spans, label):
+    for span in spans:
+        assert serialize_span(span) == _to_json_path(span), f"serializer output differs for {span.name}"
+    repeat = 5
+    baseline = min(timeit.repeat(lambda: [_to_json_path(span) for span in spans], number=1, repeat=repeat))
+    direct = min(timeit.repeat(lambda: [serialize_span(span) for span in spans], number=1, repeat=repeat))
+    per_span = 1e6 / len(spans)
+    print(f"{label}: to_json {baseline * per_span:.1f} us/span, serialize_span {direct * per_span:.1f} us/span, "
+          f"{baseline / direct:.1f}x")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    spans = _make_spans(count)
+    _run(spans, "default to_json")
+    setup_readablespan_patch()
+    _run(spans, "0x-free to_json")
+
+
+if __name__ == "__main__":
+    main()
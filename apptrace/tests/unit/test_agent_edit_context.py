@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common import agent_edit_context
+from monocle_apptrace.instrumentation.common.agent_edit_context import (
+    GitContext,
+    _read_blob_text,
+    _workspace_changes,
+    _workspace_snapshot,
+)
+
+
+class TestWorkspaceSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.root = self.tmp / "workspace"
+        self.cache_dir = self.tmp / "cache"
+        self.root.mkdir()
+        self.cache_dir.mkdir()
+        # cache every entry regardless of how recently the file was written
+        self.racy_p = patch.object(agent_edit_context, "_RACY_MTIME_NS", -10**12)
+        self.racy_p.start()
+
+    def tearDown(self):
+        self.racy_p.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write(self, rel, text):
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def test_snapshot_skips_hidden_state_and_skip_dirs(self):
+        self._write("src/app.py", "print(1)\n")
+        self._write(".git/config", "x")
+        self._write(".monocle/state.json", "{}")
+        self._write("node_modules/lib.js", "x")
+        self._write("src/.hidden.py", "x")
+        files = _workspace_snapshot(self.root, self.cache_dir)
+        self.assertEqual(set(files), {"src/app.py"})
+        self.assertEqual(files["src/app.py"]["kind"], "text")
+
+    def test_unchanged_files_are_not_read_again(self):
+        self._write("a.py", "one\n")
+        self._write("b.py", "two\n")
+        first = _workspace_snapshot(self.root, self.cache_dir)
+        with patch.object(agent_edit_context, "_hash_file", wraps=agent_edit_context._hash_file) as hash_file:
+            self._write("b.py", "two\nthree\n")
+            second = _workspace_snapshot(self.root, self.cache_dir)
+        self.assertEqual([c.args[0] for c in hash_file.call_args_list], [str(self.root / "b.py")])
+        self.assertEqual(first["a.py"], second["a.py"])
+        self.assertNotEqual(first["b.py"]["hash"], second["b.py"]["hash"])
+
+    def test_racy_files_are_not_cached(self):
+        self.racy_p.stop()
+        self._write("a.py", "one\n")
+        _workspace_snapshot(self.root, self.cache_dir)
+        self.racy_p.start()
+        with patch.object(agent_edit_context, "_hash_file", wraps=agent_edit_context._hash_file) as hash_file:
+            _workspace_snapshot(self.root, self.cache_dir)
+        self.assertEqual(hash_file.call_count, 1)
+
+    def test_text_is_stored_as_blobs_not_inline(self):
+        self._write("a.py", "one\n")
+        files = _workspace_snapshot(self.root, self.cache_dir)
+        self.assertNotIn("text", files["a.py"])
+        self.assertEqual(_read_blob_text(self.cache_dir, files["a.py"]["hash"]), "one\n")
+
+    def test_changes_use_blob_text(self):
+        self._write("a.py", "one\ntwo\n")
+        self._write("gone.py", "x\ny\n")
+        before = _workspace_snapshot(self.root, self.cache_dir)
+        self._write("a.py", "one\n2\nthree\n")
+        self._write("new.py", "n\n")
+        (self.root / "gone.py").unlink()
+        after = _workspace_snapshot(self.root, self.cache_dir)
+        diff = _workspace_changes(before, after, lambda digest: _read_blob_text(self.cache_dir, digest))
+        self.assertEqual(diff["files"], ["a.py", "gone.py", "new.py"])
+        self.assertEqual(diff["added"], 3)
+        self.assertEqual(diff["removed"], 3)
+
+    def test_changes_against_inline_text_baseline(self):
+        self._write("a.py", "one\ntwo\n")
+        after = _workspace_snapshot(self.root, self.cache_dir)
+        baseline = {"a.py": {"size": 4, "hash": "old", "text": "one\n"}}
+        diff = _workspace_changes(baseline, after, lambda digest: _read_blob_text(self.cache_dir, digest))
+        self.assertEqual(diff, {"files": ["a.py"], "added": 1, "removed": 0})
+
+    def test_parallel_hashing_matches_serial(self):
+        for i in range(40):
+            self._write(f"pkg/m{i}.py", f"value = {i}\n")
+        with patch.object(agent_edit_context, "_hash_workers", return_value=1):
+            serial = _workspace_snapshot(self.root)
+        with patch.object(agent_edit_context, "_hash_workers", return_value=4):
+            parallel = _workspace_snapshot(self.root, self.cache_dir)
+        self.assertEqual(serial, parallel)
+
+    def test_invalid_hash_workers_setting_keeps_the_default(self):
+        default = min(8, os.cpu_count() or 1)
+        with patch.dict(os.environ, {agent_edit_context.SNAPSHOT_HASH_WORKERS_ENV: "fuor"}), \
+                self.assertLogs("monocle_apptrace.instrumentation.common.utils", "WARNING"):
+            self.assertEqual(agent_edit_context._hash_workers(), default)
+        with patch.dict(os.environ, {agent_edit_context.SNAPSHOT_HASH_WORKERS_ENV: "3"}):
+            self.assertEqual(agent_edit_context._hash_workers(), 3)
+
+    def _context(self):
+        sessions = self.tmp / "sessions"
+        return GitContext(lambda: sessions, "monocle_test"), sessions / ".workspace_cache"
+
+    def test_cleanup_prunes_unreferenced_blobs(self):
+        ctx, cache_dir = self._context()
+        self._write("a.py", "one\n")
+        ctx.capture_turn_baseline("s2", self.root)
+        kept_hash = ctx._snapshot_files(self.root)["a.py"]["hash"]
+        self._write("a.py", "two\n")
+        ctx.capture_turn_baseline("s1", self.root)
+        self._write("a.py", "three\n")
+        old_hash = ctx._snapshot_files(self.root)["a.py"]["hash"]
+        self.assertIsNotNone(_read_blob_text(cache_dir, old_hash))
+        ctx.cleanup("s1")
+        self.assertIsNone(_read_blob_text(cache_dir, old_hash))
+        # still the baseline of s2
+        self.assertEqual(_read_blob_text(cache_dir, kept_hash), "one\n")
+
+        ctx.cleanup("s2")
+        self.assertEqual(list((cache_dir / "blobs").glob("*/*")), [])
+        # the stat cache does not refer to the pruned blob, the file is read again
+        with patch.object(agent_edit_context, "_hash_file", wraps=agent_edit_context._hash_file) as hash_file:
+            files = ctx._snapshot_files(self.root)
+        hash_file.assert_called_once()
+        self.assertEqual(_read_blob_text(cache_dir, files["a.py"]["hash"]), "three\n")
+
+    def test_turn_start_prunes_at_most_once_per_interval(self):
+        ctx, cache_dir = self._context()
+        self._write("a.py", "one\n")
+        ctx.capture_turn_baseline("s1", self.root)
+        old_hash = ctx._snapshot_files(self.root)["a.py"]["hash"]
+        self._write("a.py", "two\n")
+        ctx.capture_turn_baseline("s1", self.root)
+        # pruned at the first turn, before the second wrote its blob
+        self.assertIsNotNone(_read_blob_text(cache_dir, old_hash))
+        os.utime(cache_dir / "pruned", (0, 0))
+        ctx.capture_turn_baseline("s1", self.root)
+        self.assertIsNone(_read_blob_text(cache_dir, old_hash))
+
+    def test_stale_baselines_and_stat_caches_removed(self):
+        ctx, cache_dir = self._context()
+        self._write("a.py", "one\n")
+        ctx.capture_turn_baseline("s1", self.root)
+        old = time.time() - agent_edit_context._STALE_CACHE_SECONDS - 60
+        for f in [ctx._baseline_file("s1"), *cache_dir.glob("stat_*.json")]:
+            os.utime(f, (old, old))
+        ctx.cleanup("s2")
+        self.assertFalse(ctx._baseline_file("s1").exists())
+        self.assertEqual(list(cache_dir.glob("stat_*.json")), [])
+        self.assertEqual(list((cache_dir / "blobs").glob("*/*")), [])
+
+    @unittest.skipIf(agent_edit_context.fcntl is None, "needs flock")
+    def test_no_pruning_during_a_snapshot(self):
+        ctx, cache_dir = self._context()
+        self._write("a.py", "one\n")
+        digest = ctx._snapshot_files(self.root)["a.py"]["hash"]
+        with agent_edit_context._cache_lock(cache_dir):
+            ctx.cleanup("s1")
+            self.assertIsNotNone(_read_blob_text(cache_dir, digest))
+        ctx.cleanup("s1")
+        self.assertIsNone(_read_blob_text(cache_dir, digest))
+
+if __name__ == "__main__":
+    unittest.main()
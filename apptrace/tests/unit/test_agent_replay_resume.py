@@ -0,0 +1,196 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from monocle_apptrace.instrumentation.common.jsonl_cursor import cursor_after_lines
+from monocle_apptrace.instrumentation.metamodel.claude_cli import replay as claude_replay
+from monocle_apptrace.instrumentation.metamodel.codex_cli import replay as codex_replay
+from monocle_apptrace.instrumentation.metamodel.codex_cli import trace_events as codex_events
+from monocle_apptrace.instrumentation.metamodel.github_copilot import replay as copilot_replay
+
+
+def _append(path, *events):
+    with open(path, "a", encoding="utf-8") as fh:
+        for event in events:
+            fh.write(json.dumps(event) + "\n")
+
+
+class _ReplayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class TestCopilotReplayResume(_ReplayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.transcript = os.path.join(self.tmp, "transcript.jsonl")
+        self.replayed = []
+
+        def _replay_interactions(session_id, new_interactions, hook_events, subagent_intervals, cwd, already):
+            for interaction in new_interactions:
+                self.replayed.append(interaction["id"])
+                already.add(interaction["id"])
+
+        patcher = patch.object(copilot_replay, "_replay_interactions", side_effect=_replay_interactions)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _stop(self, ts):
+        _append(copilot_replay._session_log("s1"),
+                {"hook_event_name": "Stop", "timestamp": ts, "transcript_path": self.transcript})
+        copilot_replay._replay_session_locked("s1")
+
+    def _turn(self, iid, ts, answered=True):
+        events = [{"type": "user.message", "id": iid, "timestamp": ts + "Z", "data": {"content": iid}}]
+        if answered:
+            events.append({"type": "assistant.message", "timestamp": ts + "Z", "data": {"content": "ok"}})
+        _append(self.transcript, *events)
+
+    def test_pending_interaction_replayed_on_next_stop(self):
+        self._turn("u1", "2025-01-01T00:00:01.000")
+        self._turn("u2", "2025-01-01T00:00:02.000", answered=False)
+        self._stop("2025-01-01T00:00:02.500000+00:00")
+        self.assertEqual(self.replayed, ["u1"])
+        state = copilot_replay._load_state("s1")
+        self.assertGreater(state["transcript_cursor"]["offset"], 0)
+
+        _append(self.transcript, {"type": "assistant.message", "timestamp": "2025-01-01T00:00:03.000Z",
+                                  "data": {"content": "late"}})
+        self._stop("2025-01-01T00:00:03.500000+00:00")
+        self.assertEqual(self.replayed, ["u1", "u2"])
+
+    def test_unanswered_interaction_does_not_hold_cursors(self):
+        self._turn("u1", "2025-01-01T00:00:01.000", answered=False)
+        _append(copilot_replay._session_log("s1"),
+                {"hook_event_name": "UserPromptSubmit", "timestamp": "2025-01-01T00:00:01.500000+00:00"})
+        first_hooks_size = os.path.getsize(copilot_replay._session_log("s1"))
+        self._turn("u2", "2025-01-01T00:00:02.000")
+        self._stop("2025-01-01T00:00:02.500000+00:00")
+        self.assertEqual(self.replayed, ["u2"])
+        state = copilot_replay._load_state("s1")
+        self.assertEqual(state["transcript_cursor"]["offset"], os.path.getsize(self.transcript))
+        # the hook events of u1 are not read again
+        self.assertEqual(state["hooks_cursor"]["offset"], first_hooks_size)
+
+    def test_state_with_interaction_ids_only(self):
+        # state saved by earlier versions has no cursors, the transcript is read from the start
+        self._turn("u1", "2025-01-01T00:00:01.000")
+        copilot_replay._save_state("s1", {"interactions_processed": ["u1"], "model": "copilot"})
+        self._turn("u2", "2025-01-01T00:00:02.000")
+        self._stop("2025-01-01T00:00:02.500000+00:00")
+        self.assertEqual(self.replayed, ["u2"])
+
+    def test_cursor_from_compares_parsed_timestamps(self):
+        records = [(0, 10, {"timestamp": "2025-01-01T00:00:01.900000+00:00"}),
+                   (10, 20, {"timestamp": "2025-01-01T00:00:02.100000+00:00"})]
+        read_cursor = {"offset": 20}
+        # "...02Z" sorts after "...02.1..." as a string
+        self.assertEqual(copilot_replay._cursor_from(records, read_cursor, "2025-01-01T00:00:02Z")["offset"], 10)
+        self.assertEqual(copilot_replay._cursor_from(records, read_cursor, "2025-01-01T00:00:03Z"), read_cursor)
+        self.assertEqual(copilot_replay._cursor_from(records, read_cursor, "yesterday")["offset"], 0)
+
+
+class TestClaudeReplayResume(_ReplayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.transcript = os.path.join(self.tmp, "transcript.jsonl")
+        for target in ("_configure_telemetry", "_process_turn"):
+            patcher = patch.object(claude_replay, target)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def _turn(self, prompt, output_tokens):
+        _append(claude_replay._session_log("s1"),
+                {"hook_event_name": "UserPromptSubmit", "prompt": prompt},
+                {"hook_event_name": "Stop", "transcript_path": self.transcript})
+        _append(self.transcript, {"requestId": prompt, "message": {"role": "assistant",
+                                                                     "usage": {"output_tokens": output_tokens}}})
+
+    def test_resumes_from_cursors(self):
+        self._turn("first", 1)
+        claude_replay.replay_session("s1")
+        self._turn("second", 2)
+        claude_replay.replay_session("s1")
+        turn_events, _, _, _, tokens = self._process_turn.call_args.args
+        self.assertEqual([e["prompt"] for e in turn_events if "prompt" in e], ["second"])
+        self.assertEqual(tokens["completion_tokens"], 2)
+
+    def test_line_counts_converted_to_cursors(self):
+        self._turn("first", 1)
+        self._turn("second", 2)
+        # state saved by earlier versions: the first turn, two events and one transcript line, was replayed
+        claude_replay._save_state("s1", {"events_processed": 2, "transcript_lines_processed": 1, "model": "claude"})
+        state = claude_replay._load_state("s1")
+        self.assertNotIn("events_processed", state)
+        self.assertEqual(state["events_cursor"], cursor_after_lines(claude_replay._session_log("s1"), 2))
+
+        claude_replay.replay_session("s1")
+        turn_events, _, _, _, tokens = self._process_turn.call_args.args
+        self.assertEqual([e["prompt"] for e in turn_events if "prompt" in e], ["second"])
+        self.assertEqual(tokens["completion_tokens"], 2)
+        state = claude_replay._load_state("s1")
+        self.assertNotIn("transcript_lines_processed", state)
+        self.assertEqual(state["transcript_cursor"]["offset"], os.path.getsize(self.transcript))
+
+
+class TestCodexReplayResume(_ReplayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.transcript = os.path.join(self.tmp, "rollout.jsonl")
+        self.handler = MagicMock()
+        patches = [
+            patch.object(codex_replay, "_configure_telemetry"),
+            patch.object(codex_replay, "ReplayHandler", return_value=self.handler),
+            patch.object(codex_replay.git_context, "compute_scopes", return_value={}),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _event(self, ptype, turn_id, ts):
+        return {"type": "event_msg", "timestamp": ts, "payload": {"type": ptype, "turn_id": turn_id}}
+
+    def _turn_ids(self):
+        return [call.kwargs[codex_replay.CODEX_TURN_SCOPE] for call in self.handler.handle_turn.call_args_list]
+
+    def test_turn_in_progress_replayed_once_complete(self):
+        _append(self.transcript,
+                self._event("task_started", "t1", "2025-01-01T00:00:01Z"),
+                self._event("task_complete", "t1", "2025-01-01T00:00:02Z"),
+                self._event("task_started", "t2", "2025-01-01T00:00:03Z"))
+        codex_replay.replay_session("s1", self.transcript)
+        self.assertEqual(self._turn_ids(), ["t1"])
+
+        _append(self.transcript, self._event("task_complete", "t2", "2025-01-01T00:00:04Z"))
+        codex_replay.replay_session("s1", self.transcript)
+        self.assertEqual(self._turn_ids(), ["t1", "t2"])
+        self.assertEqual(codex_events.load_state("s1")["transcript_cursor"]["offset"],
+                         os.path.getsize(self.transcript))
+
+    def test_line_count_converted_to_cursor(self):
+        _append(self.transcript,
+                self._event("task_started", "t1", "2025-01-01T00:00:01Z"),
+                self._event("task_complete", "t1", "2025-01-01T00:00:02Z"),
+                self._event("task_started", "t2", "2025-01-01T00:00:03Z"),
+                self._event("task_complete", "t2", "2025-01-01T00:00:04Z"))
+        codex_events.save_state("s1", {"transcript_lines_processed": 2, "model": "codex"})
+        codex_replay.replay_session("s1", self.transcript)
+        self.assertEqual(self._turn_ids(), ["t2"])
+        self.assertNotIn("transcript_lines_processed", codex_events.load_state("s1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import gc
+import importlib.util
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common import client_entity_cache
+from monocle_apptrace.instrumentation.common.client_entity_cache import (
+    cached_per_client,
+    clear_client_entity_cache,
+)
+
+
+class Client:
+    def __init__(self, base_url):
+        self._client = SimpleNamespace(base_url=base_url)
+
+
+class PropertyClient:
+    def __init__(self, host):
+        self._host = host
+
+    @property
+    def base_url(self):
+        # a new string on every read
+        return "https://" + self._host
+
+
+class SlotsClient:
+    __slots__ = ("_client",)
+
+    def __init__(self, base_url):
+        self._client = SimpleNamespace(base_url=base_url)
+
+
+class TestClientEntityCache(unittest.TestCase):
+
+    def setUp(self):
+        clear_client_entity_cache()
+        self.calls = 0
+
+        @cached_per_client("_client.base_url")
+        def endpoint(instance):
+            self.calls += 1
+            return str(instance._client.base_url)
+
+        self.endpoint = endpoint
+
+    def test_value_computed_once_per_instance(self):
+        client = Client("https://a.example.com")
+        self.assertEqual(self.endpoint(client), "https://a.example.com")
+        self.assertEqual(self.endpoint(client), "https://a.example.com")
+        self.assertEqual(self.calls, 1)
+
+        other = Client("https://b.example.com")
+        self.assertEqual(self.endpoint(other), "https://b.example.com")
+        self.assertEqual(self.calls, 2)
+
+    def test_recomputed_when_watched_attribute_changes(self):
+        client = Client("https://a.example.com")
+        self.endpoint(client)
+        client._client.base_url = "https://b.example.com"
+        self.assertEqual(self.endpoint(client), "https://b.example.com")
+        client._client = SimpleNamespace(base_url="https://c.example.com")
+        self.assertEqual(self.endpoint(client), "https://c.example.com")
+        self.assertEqual(self.calls, 3)
+
+    def test_entry_dropped_with_instance(self):
+        client = Client("https://a.example.com")
+        self.endpoint(client)
+        self.assertEqual(len(client_entity_cache._entries), 1)
+        del client
+        gc.collect()
+        self.assertEqual(client_entity_cache._entries, {})
+
+    def test_instances_without_weakref_are_not_cached(self):
+        client = SlotsClient("https://a.example.com")
+        self.assertEqual(self.endpoint(client), "https://a.example.com")
+        self.assertEqual(self.endpoint(client), "https://a.example.com")
+        self.assertEqual(self.calls, 2)
+
+    def test_exceptions_are_not_cached(self):
+        client = SimpleNamespace()
+        with self.assertRaises(AttributeError):
+            self.endpoint(client)
+        client._client = SimpleNamespace(base_url="https://a.example.com")
+        self.assertEqual(self.endpoint(client), "https://a.example.com")
+
+    def test_equal_new_values_hit_the_cache(self):
+        @cached_per_client("base_url")
+        def endpoint(instance):
+            self.calls += 1
+            return instance.base_url
+
+        client = PropertyClient("a.example.com")
+        self.assertIsNot(client.base_url, client.base_url)
+        endpoint(client)
+        self.assertEqual(endpoint(client), "https://a.example.com")
+        self.assertEqual(self.calls, 1)
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+class TestClientEntityCacheOnSdkClients(unittest.TestCase):
+    """The helpers resolve the entity of real SDK clients once."""
+
+    def setUp(self):
+        clear_client_entity_cache()
+
+    @unittest.skipUnless(_installed("openai"), "openai not installed")
+    def test_openai(self):
+        import openai
+        from monocle_apptrace.instrumentation.metamodel.openai import _helper
+
+        client = openai.OpenAI(api_key="test", base_url="https://api.openai.com/v1/")
+        completions = client.chat.completions
+        with patch.object(_helper, "try_option", wraps=_helper.try_option) as try_option:
+            self.assertEqual(_helper.extract_inference_endpoint(completions), "https://api.openai.com/v1/")
+            calls = try_option.call_count
+            self.assertEqual(_helper.extract_inference_endpoint(completions), "https://api.openai.com/v1/")
+            self.assertEqual(try_option.call_count, calls)
+
+            client.base_url = "https://api.deepseek.com/v1/"
+            self.assertEqual(_helper.extract_inference_endpoint(completions), "https://api.deepseek.com/v1/")
+
+    @unittest.skipUnless(_installed("anthropic"), "anthropic not installed")
+    def test_anthropic(self):
+        import anthropic
+        from monocle_apptrace.instrumentation.metamodel.anthropic import _helper
+
+        messages = anthropic.Anthropic(api_key="test", base_url="https://api.anthropic.com").messages
+        with patch.object(_helper, "try_option", wraps=_helper.try_option) as try_option:
+            self.assertEqual(_helper.extract_inference_endpoint(messages), "https://api.anthropic.com")
+            calls = try_option.call_count
+            self.assertEqual(_helper.extract_inference_endpoint(messages), "https://api.anthropic.com")
+            self.assertEqual(try_option.call_count, calls)
+
+    @unittest.skipUnless(_installed("botocore"), "botocore not installed")
+    def test_botocore(self):
+        import botocore.session
+        from monocle_apptrace.instrumentation.metamodel.botocore import _helper
+
+        client = botocore.session.get_session().create_client(
+            "bedrock-runtime", region_name="us-east-1", aws_access_key_id="test", aws_secret_access_key="test")
+        with patch.object(_helper, "urlparse", wraps=_helper.urlparse) as urlparse:
+            self.assertEqual(_helper.extract_provider_name(client), "bedrock-runtime.us-east-1.amazonaws.com")
+            self.assertEqual(_helper.extract_provider_name(client), "bedrock-runtime.us-east-1.amazonaws.com")
+        self.assertEqual(urlparse.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
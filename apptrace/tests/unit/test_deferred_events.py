@@ -0,0 +1,152 @@
+import copy
+import threading
+import unittest
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace.status import StatusCode
+
+from monocle_apptrace.exporters.deferred_events_exporter import DeferredEventsSpanExporter
+from monocle_apptrace.instrumentation.common.constants import MONOCLE_DETECTED_SPAN_ERROR
+from monocle_apptrace.instrumentation.common.deferred_events import (
+    DeferredEventAttributes,
+    configure_deferred_events,
+    snapshot_value,
+)
+from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+from monocle_apptrace.instrumentation.common.utils import MonocleSpanException
+
+
+class TestDeferredEvents(unittest.TestCase):
+    """Test cases for event accessors deferred until the span is exported."""
+
+    def setUp(self):
+        super().setUp()
+        configure_deferred_events(True)
+        self.calls = []
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(DeferredEventsSpanExporter(self.exporter)))
+        self.tracer = provider.get_tracer("test")
+
+    def tearDown(self):
+        configure_deferred_events(False)
+        super().tearDown()
+
+    def _to_wrap(self, output_accessor=None):
+        def input_accessor(arguments):
+            self.calls.append("input")
+            return [message["content"] for message in arguments["kwargs"]["messages"]]
+
+        def default_output_accessor(arguments):
+            self.calls.append("output")
+            return arguments["result"]
+
+        return {
+            "package": "openai.resources.chat.completions",
+            "output_processor": {
+                "type": "inference",
+                "events": [
+                    {"name": "data.input", "attributes": [{"attribute": "input", "accessor": input_accessor}]},
+                    {"name": "data.output", "attributes": [
+                        {"attribute": "response", "accessor": output_accessor or default_output_accessor}]},
+                ],
+            },
+        }
+
+    def _run(self, to_wrap, kwargs, result):
+        with self.tracer.start_as_current_span("workflow"):
+            span = self.tracer.start_span("inference")
+            handler = SpanHandler()
+            handler.hydrate_span(to_wrap, None, None, (), kwargs, None, span, None, None, is_post_exec=False)
+            handler.hydrate_span(to_wrap, None, None, (), kwargs, result, span, None, None, is_post_exec=True)
+            return span
+
+    def _exported(self, name):
+        return next(span for span in self.exporter.get_finished_spans() if span.name == name)
+
+    def test_accessors_run_at_export_on_snapshotted_arguments(self):
+        messages = [{"role": "user", "content": "hi"}]
+        span = self._run(self._to_wrap(), {"messages": messages}, "hello")
+        self.assertEqual(self.calls, [])
+        self.assertTrue(all(isinstance(event.attributes, DeferredEventAttributes) for event in span.events))
+
+        # mutations after the call are not visible to the deferred accessors
+        messages.append({"role": "assistant", "content": "hello"})
+        span.end()
+
+        self.assertEqual(self.calls, ["input", "output"])
+        exported = self._exported("inference")
+        self.assertEqual(exported.events[0].attributes["input"], ("hi",))
+        self.assertEqual(exported.events[1].attributes["response"], "hello")
+        # resolved once, however many exporters read the span
+        dict(exported.events[0].attributes)
+        self.assertEqual(self.calls, ["input", "output"])
+
+    def test_read_before_export_resolves_on_demand(self):
+        span = self._run(self._to_wrap(), {"messages": [{"content": "hi"}]}, "hello")
+        self.assertEqual(dict(span.events[1].attributes), {"response": "hello"})
+        self.assertEqual(self.calls, ["output"])
+        span.end()
+        self.assertEqual(self.calls, ["output", "input"])
+
+    def test_pending_event_can_be_copied_and_printed(self):
+        span = self._run(self._to_wrap(), {"messages": [{"content": "hi"}]}, "hello")
+        copied = []
+        # run apart so that a deadlock fails the test instead of hanging it
+        worker = threading.Thread(target=lambda: copied.append(copy.deepcopy(span.events[1].attributes)), daemon=True)
+        worker.start()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(dict(copied[0]), {"response": "hello"})
+        self.assertEqual(repr(span.events[0].attributes), repr({"input": ("hi",)}))
+        self.assertEqual(self.calls, ["output", "input"])
+        span.end()
+
+    def test_accessor_error_is_recorded_on_exported_span(self):
+        def failing_accessor(arguments):
+            raise MonocleSpanException("quota exceeded", "429")
+
+        span = self._run(self._to_wrap(failing_accessor), {"messages": []}, None)
+        self.assertEqual(span.status.status_code, StatusCode.OK)
+        span.end()
+
+        exported = self._exported("inference")
+        self.assertEqual(exported.status.status_code, StatusCode.ERROR)
+        self.assertEqual(exported.status.description, "quota exceeded")
+        self.assertTrue(exported.attributes[MONOCLE_DETECTED_SPAN_ERROR])
+        self.assertEqual(exported.events[1].attributes["response"], "429")
+
+    def test_disabled_mode_evaluates_eagerly(self):
+        configure_deferred_events(False)
+        span = self._run(self._to_wrap(), {"messages": [{"content": "hi"}]}, "hello")
+        self.assertEqual(self.calls, ["input", "output"])
+        self.assertFalse(any(isinstance(event.attributes, DeferredEventAttributes) for event in span.events))
+
+    def test_non_deferrable_event_evaluates_eagerly(self):
+        to_wrap = self._to_wrap()
+        to_wrap["output_processor"]["events"][1]["deferrable"] = False
+        span = self._run(to_wrap, {"messages": [{"content": "hi"}]}, "hello")
+        self.assertEqual(self.calls, ["output"])
+        self.assertIsInstance(span.events[0].attributes, DeferredEventAttributes)
+        self.assertNotIsInstance(span.events[1].attributes, DeferredEventAttributes)
+        span.end()
+        self.assertEqual(self.calls, ["output", "input"])
+
+    def test_snapshot_copies_containers_only(self):
+        leaf = object()
+        value = {"messages": [{"content": ["part"], "leaf": leaf}]}
+        snapshot = snapshot_value(value)
+        self.assertEqual(snapshot, value)
+        self.assertIsNot(snapshot["messages"], value["messages"])
+        self.assertIsNot(snapshot["messages"][0]["content"], value["messages"][0]["content"])
+        self.assertIs(snapshot["messages"][0]["leaf"], leaf)
+
+    def test_invalid_setting_is_rejected(self):
+        with self.assertRaises(ValueError):
+            configure_deferred_events("sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
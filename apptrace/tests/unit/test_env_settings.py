@@ -0,0 +1,28 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common.utils import get_env_int, parse_bool_setting
+
+
+class TestEnvSettings(unittest.TestCase):
+
+    def test_parse_bool_setting(self):
+        self.assertTrue(parse_bool_setting("X", "Yes"))
+        self.assertFalse(parse_bool_setting("X", ""))
+        with self.assertRaisesRegex(ValueError, "X must be one of true or false"):
+            parse_bool_setting("X", "flase")
+
+    def test_get_env_int(self):
+        with patch.dict(os.environ, {"X": "5"}):
+            self.assertEqual(get_env_int("X", 1), 5)
+        for invalid in ("abc", "0", "2.5"):
+            with patch.dict(os.environ, {"X": invalid}), self.assertLogs(level="WARNING"):
+                self.assertEqual(get_env_int("X", 7), 7)
+        with patch.dict(os.environ, {"X": "0"}):
+            self.assertEqual(get_env_int("X", 7, minimum=0), 0)
+        self.assertEqual(get_env_int("X", 7, lookup={"X": "3"}.get), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
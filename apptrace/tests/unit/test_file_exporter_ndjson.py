@@ -0,0 +1,153 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from opentelemetry.sdk.resources import SERVICE_NAME
+
+from monocle_apptrace.exporters import file_exporter
+from monocle_apptrace.exporters.file_exporter import SEGMENT_INDEX_SUFFIX, FileSpanExporter
+from monocle_apptrace.instrumentation.common.span_reader import iter_spans
+
+
+def _span(trace_id, span_id):
+    return SimpleNamespace(
+        context=SimpleNamespace(trace_id=trace_id, span_id=span_id),
+        parent=SimpleNamespace(),
+        attributes={"monocle_apptrace.version": "test"},
+        resource=SimpleNamespace(attributes={SERVICE_NAME: "ndjson_test"}),
+    )
+
+
+def _formatter(span):
+    return json.dumps({"trace_id": span.context.trace_id, "span_id": span.context.span_id}) + "\n"
+
+
+class TestFileExporterNdjson(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.env_p = patch.dict(os.environ)
+        self.env_p.start()
+        os.environ.pop("MONOCLE_TRACE_OUTPUT_PATH", None)
+        os.environ.pop("MONOCLE_FILE_PREFIX", None)
+
+    def tearDown(self):
+        self.env_p.stop()
+
+    def _exporter(self, **kwargs):
+        return FileSpanExporter(out_path=self.tmp, formatter=_formatter, file_format="ndjson", **kwargs)
+
+    def _files(self, suffix):
+        return sorted(name for name in os.listdir(self.tmp) if name.endswith(suffix))
+
+    def test_traces_share_one_segment_and_are_indexed(self):
+        exp = self._exporter()
+        exp.export([_span(1, 10), _span(2, 20), _span(1, 11)])
+        exp.export([_span(2, 21)])
+        # no handle is kept per trace
+        self.assertEqual(exp.file_handles, {})
+        exp.shutdown()
+
+        segments = self._files(".ndjson")
+        self.assertEqual(len(segments), 1)
+        segment = os.path.join(self.tmp, segments[0])
+        self.assertEqual([span["span_id"] for span in iter_spans(segment)], [10, 11, 20, 21])
+        self.assertEqual(exp.last_file_processed, segment)
+
+        with open(segment + SEGMENT_INDEX_SUFFIX) as f:
+            index = json.load(f)
+        self.assertEqual(index["segment"], segments[0])
+        with open(segment, "rb") as f:
+            data = f.read()
+        trace_2 = file_exporter.format_trace_id_without_0x(2)
+        spans = [json.loads(line) for offset, length in index["traces"][trace_2]
+                 for line in data[offset:offset + length].splitlines()]
+        self.assertEqual([span["span_id"] for span in spans], [20, 21])
+        # contiguous writes of a trace are merged into one range
+        self.assertEqual(len(index["traces"][trace_2]), 1)
+
+    def test_rotation_by_size_and_gzip(self):
+        exp = self._exporter(segment_max_bytes=100, segment_gzip=True)
+        for span_id in range(6):
+            exp.export([_span(1, span_id)])
+        exp.shutdown()
+        segments = self._files(".ndjson.gz")
+        self.assertGreater(len(segments), 1)
+        self.assertEqual(self._files(".ndjson"), [])
+        self.assertEqual(len(self._files(SEGMENT_INDEX_SUFFIX)), len(segments))
+        span_ids = []
+        for name in segments:
+            with gzip.open(os.path.join(self.tmp, name), "rb") as f:
+                self.assertLessEqual(len(f.read()), 100 + 64)
+            span_ids.extend(span["span_id"] for span in iter_spans(os.path.join(self.tmp, name)))
+        self.assertEqual(sorted(span_ids), list(range(6)))
+
+    def test_rotation_by_time(self):
+        now = [1000.0]
+        with patch.object(file_exporter.time, "monotonic", lambda: now[0]):
+            exp = self._exporter(segment_max_seconds=60)
+            exp.export([_span(1, 1)])
+            now[0] += 30
+            exp.export([_span(1, 2)])
+            self.assertEqual(len(self._files(SEGMENT_INDEX_SUFFIX)), 0)
+            now[0] += 31
+            # an idle segment is closed on flush once it is due
+            exp.force_flush()
+            self.assertEqual(len(self._files(SEGMENT_INDEX_SUFFIX)), 1)
+            exp.export([_span(1, 3)])
+            exp.shutdown()
+        self.assertEqual(len(self._files(".ndjson")), 2)
+
+    def test_idle_segment_is_closed_by_its_timer(self):
+        exp = self._exporter(segment_max_seconds=1, segment_gzip=True)
+        exp.export([_span(1, 1)])
+        exp._segment_writer.timer.join(5)
+        # closed, gzipped and indexed without another export
+        self.assertEqual(len(self._files(".ndjson.gz")), 1)
+        self.assertEqual(len(self._files(SEGMENT_INDEX_SUFFIX)), 1)
+        exp.export([_span(1, 2)])
+        exp.shutdown()
+        self.assertEqual(len(self._files(".ndjson.gz")), 2)
+
+    def test_index_is_not_picked_up_as_trace_file(self):
+        exp = self._exporter()
+        exp.export([_span(1, 1)])
+        exp.shutdown()
+        self.assertEqual(len(self._files(SEGMENT_INDEX_SUFFIX)), 1)
+        readers_glob = sorted(path.name for path in Path(self.tmp).glob("monocle_trace_*.json"))
+        self.assertEqual(readers_glob, [])
+
+    def test_failed_gzip_keeps_only_uncompressed_segment(self):
+        exp = self._exporter(segment_gzip=True)
+        exp.export([_span(1, 1)])
+        with patch.object(file_exporter.gzip, "open", side_effect=OSError("disk full")):
+            exp.shutdown()
+        self.assertEqual(self._files(".gz"), [])
+        self.assertEqual(self._files(".tmp"), [])
+        segments = self._files(".ndjson")
+        self.assertEqual(len(segments), 1)
+        with open(os.path.join(self.tmp, segments[0] + SEGMENT_INDEX_SUFFIX)) as f:
+            self.assertEqual(json.load(f)["segment"], segments[0])
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            FileSpanExporter(out_path=self.tmp, file_format="xml")
+
+    def test_invalid_segment_settings(self):
+        os.environ[file_exporter.SEGMENT_MAX_BYTES_ENV] = "big"
+        with self.assertLogs(level="WARNING"):
+            exporter = self._exporter()
+        self.assertEqual(exporter._segment_writer.max_bytes, file_exporter.DEFAULT_SEGMENT_MAX_BYTES)
+        exporter.shutdown()
+        os.environ[file_exporter.SEGMENT_GZIP_ENV] = "sometimes"
+        with self.assertRaises(ValueError):
+            self._exporter()
+
+
+if __name__ == "__main__":
+    unittest.main()
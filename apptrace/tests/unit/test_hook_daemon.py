@@ -0,0 +1,229 @@
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from monocle_apptrace import hook_daemon
+
+
+_running = []
+_running_lock = threading.Lock()
+
+
+def main():
+    """Stand-in hook event handler: echoes the event name, exits 1 on bad JSON.
+
+    Events with a "sleep" take that long, recording the sessions handled meanwhile.
+    """
+    try:
+        event = json.loads(sys.stdin.read())
+    except ValueError:
+        sys.exit(1)
+    with _running_lock:
+        _running.append(event.get("session_id"))
+        event["concurrent"] = sorted(_running)
+    time.sleep(event.get("sleep", 0))
+    with _running_lock:
+        _running.remove(event.get("session_id"))
+    sys.stdout.write(json.dumps({"seen": event.get("hook_event_name"), "concurrent": event["concurrent"]}))
+
+
+@unittest.skipIf(hook_daemon.fcntl is None, "hook daemon needs POSIX")
+class TestHookDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.env_p = patch.dict(os.environ, {"HOME": self.tmp})
+        self.env_p.start()
+        self.handlers_p = patch.dict(hook_daemon.HOOK_HANDLER_MODULES, {"claude": __name__})
+        self.handlers_p.start()
+
+    def tearDown(self):
+        self.handlers_p.stop()
+        self.env_p.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _start_server(self, idle_timeout=0.5):
+        server = threading.Thread(target=hook_daemon.serve, kwargs={"idle_timeout": idle_timeout}, daemon=True)
+        server.start()
+        sock_path, _ = hook_daemon._daemon_paths(os.getcwd())
+        deadline = time.time() + 5
+        while not sock_path.exists() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(sock_path.exists())
+        return server
+
+    def test_event_handled_by_daemon(self):
+        server = self._start_server()
+        reply = hook_daemon._send_event("claude", json.dumps({"hook_event_name": "Stop"}))
+        self.assertEqual(reply["exit_code"], 0)
+        self.assertEqual(json.loads(reply["stdout"])["seen"], "Stop")
+
+        reply = hook_daemon._send_event("claude", "not json")
+        self.assertEqual(reply["exit_code"], 1)
+        server.join(5)
+
+    def test_daemon_exits_when_idle(self):
+        server = self._start_server(idle_timeout=0.1)
+        server.join(5)
+        self.assertFalse(server.is_alive())
+        sock_path, _ = hook_daemon._daemon_paths(os.getcwd())
+        self.assertFalse(sock_path.exists())
+
+    def test_single_daemon_per_directory(self):
+        server = self._start_server()
+        second = threading.Thread(target=hook_daemon.serve, kwargs={"idle_timeout": 5}, daemon=True)
+        second.start()
+        second.join(2)
+        self.assertFalse(second.is_alive())
+        server.join(5)
+
+    def test_dispatch_falls_back_without_daemon(self):
+        raw = json.dumps({"hook_event_name": "PreToolUse"})
+        with patch.object(hook_daemon, "_start_daemon") as start, \
+                patch.object(sys, "stdin", io.StringIO(raw)):
+            self.assertIsNone(hook_daemon.dispatch("claude"))
+            start.assert_called_once()
+            self.assertEqual(sys.stdin.read(), raw)
+
+    def test_dispatch_writes_daemon_output(self):
+        server = self._start_server()
+        out = io.StringIO()
+        with patch.object(sys, "stdin", io.StringIO(json.dumps({"hook_event_name": "Stop"}))), \
+                patch.object(sys, "stdout", out):
+            self.assertEqual(hook_daemon.dispatch("claude"), 0)
+        self.assertEqual(json.loads(out.getvalue())["seen"], "Stop")
+        server.join(5)
+
+    def _send_concurrently(self, *events):
+        replies = [None] * len(events)
+
+        def send(i):
+            replies[i] = hook_daemon._send_event("claude", json.dumps(events[i]))
+
+        senders = [threading.Thread(target=send, args=(i,)) for i in range(len(events))]
+        for sender in senders:
+            sender.start()
+            time.sleep(0.05)
+        for sender in senders:
+            sender.join(10)
+        return [json.loads(reply["stdout"])["concurrent"] for reply in replies]
+
+    def test_sessions_handled_concurrently(self):
+        server = self._start_server()
+        concurrent = self._send_concurrently({"session_id": "a", "sleep": 0.5}, {"session_id": "b"})
+        self.assertEqual(concurrent[1], ["a", "b"])
+        server.join(5)
+
+    def test_events_of_a_session_handled_in_turn(self):
+        server = self._start_server()
+        concurrent = self._send_concurrently({"session_id": "a", "sleep": 0.3}, {"session_id": "a"})
+        self.assertEqual(concurrent, [["a"], ["a"]])
+        server.join(5)
+
+    def test_event_not_accepted_in_time_handled_in_process(self):
+        # a daemon stuck before reading the event
+        sock_path, _ = hook_daemon._daemon_paths(os.getcwd())
+        hook_daemon._daemon_dir().mkdir(parents=True)
+        stuck = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stuck.bind(str(sock_path))
+        stuck.listen(1)
+        try:
+            with patch.object(hook_daemon, "ACCEPT_TIMEOUT", 0.1):
+                self.assertIsNone(hook_daemon._send_event("claude", json.dumps({"hook_event_name": "Stop"})))
+        finally:
+            stuck.close()
+
+    def test_reply_timeout_is_a_failure(self):
+        server = self._start_server()
+        with patch.object(hook_daemon, "REQUEST_TIMEOUT", 0.1):
+            reply = hook_daemon._send_event("claude", json.dumps({"session_id": "a", "sleep": 0.5}))
+        self.assertEqual(reply, {"exit_code": 1})
+        server.join(5)
+
+    def test_unconfirmed_event_dropped(self):
+        server = self._start_server()
+        sock_path, _ = hook_daemon._daemon_paths(os.getcwd())
+        with patch.object(hook_daemon, "run_handler") as run_handler:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.connect(str(sock_path))
+                conn.sendall(json.dumps({"agent": "claude", "event": "{}"}).encode("utf-8") + b"\n")
+                self.assertEqual(hook_daemon._read_line(conn), hook_daemon._ACCEPTED)
+            server.join(5)
+        run_handler.assert_not_called()
+
+    def test_concurrent_stops_set_up_telemetry_once(self):
+        from monocle_apptrace.instrumentation.common import instrumentor
+        from monocle_apptrace.instrumentation.metamodel.claude_cli import replay
+
+        def slow_setup(**kwargs):
+            time.sleep(0.2)
+
+        def stop_handler(agent):
+            json.loads(sys.stdin.read())
+            replay._configure_telemetry()
+
+        with patch.object(replay, "_telemetry_ready", False), \
+                patch.object(instrumentor, "setup_monocle_telemetry", side_effect=slow_setup) as setup, \
+                patch.object(hook_daemon, "run_handler", side_effect=stop_handler):
+            requests = [{"agent": "claude", "event": json.dumps({"hook_event_name": "Stop", "session_id": sid})}
+                        for sid in ("a", "b")]
+            replies = []
+            handlers = [threading.Thread(target=lambda r=r: replies.append(hook_daemon._handle_request(r)))
+                        for r in requests]
+            for handler in handlers:
+                handler.start()
+            for handler in handlers:
+                handler.join(5)
+        self.assertEqual([reply["exit_code"] for reply in replies], [0, 0])
+        setup.assert_called_once()
+
+    def test_idle_timeout_read_from_monocle_env_file(self):
+        with open(".env.monocle", "w") as fh:
+            fh.write(f"{hook_daemon.HOOK_DAEMON_IDLE_TIMEOUT_ENV}=0.1\n")
+        server = threading.Thread(target=hook_daemon.serve, daemon=True)
+        server.start()
+        server.join(5)
+        self.assertFalse(server.is_alive())
+
+
+class TestHookShimImports(unittest.TestCase):
+
+    def test_hook_entry_point_does_not_load_instrumentation(self):
+        code = ("import sys, monocle_apptrace.cli, monocle_apptrace.hook_daemon as d; d.daemon_enabled(); "
+                "print([m for m in sys.modules if m.startswith(('opentelemetry', "
+                "'monocle_apptrace.instrumentation'))])")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_exporters_importable_before_the_instrumentation(self):
+        code = "import monocle_apptrace.exporters.file_exporter, monocle_apptrace; monocle_apptrace.setup_monocle_telemetry"
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=True)
+
+    def test_legacy_module_attributes(self):
+        code = ("import monocle_apptrace as m; "
+                "print(m.utils.__name__, m.instrumentor.__name__, m.span_handler.__name__, "
+                "m.wrapper_method.__name__, 'constants' in dir(m))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), [
+            "monocle_apptrace.instrumentation.common.utils",
+            "monocle_apptrace.instrumentation.common.instrumentor",
+            "monocle_apptrace.instrumentation.common.span_handler",
+            "monocle_apptrace.instrumentation.common.wrapper_method",
+            "True",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+from monocle_apptrace.exporters.file_exporter import FileSpanExporter
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.constants import MONOCLE_SDK_VERSION
+from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+
+VALUE = {"name": "inference", "attributes": {"entity.count": 2, "tags": ["a", "é"]}, "ratio": 0.5,
+         "parent_id": None, "ok": True}
+
+
+class TestJsonCodec(unittest.TestCase):
+    """Test the JSON codec with every backend installed here."""
+
+    def tearDown(self):
+        json_codec.configure_json_backend()
+        super().tearDown()
+
+    def _backends(self):
+        for backend in json_codec.JSON_BACKENDS:
+            if json_codec.configure_json_backend(backend) == backend:
+                yield backend
+
+    def test_round_trip(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(json_codec.loads(json_codec.dumps(VALUE)), VALUE)
+                self.assertEqual(json_codec.loads(json_codec.dumps_bytes(VALUE)), VALUE)
+                self.assertEqual(json.loads(json_codec.dumps(VALUE, indent=4)), VALUE)
+
+    def test_unsupported_values_fall_back_to_json(self):
+        value = {"big": 2 ** 70, "nan": float("nan")}
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                decoded = json_codec.loads(json.dumps(value))
+                self.assertEqual(decoded["big"], 2 ** 70)
+                self.assertNotEqual(decoded["nan"], decoded["nan"])
+                self.assertEqual(json_codec.loads(json_codec.dumps({"big": 2 ** 70})), {"big": 2 ** 70})
+
+    def test_non_finite_floats_encode_as_null(self):
+        value = {"nan": float("nan"), "inf": [float("inf"), -float("inf")], "ratio": 0.5}
+        expected = {"nan": None, "inf": [None, None], "ratio": 0.5}
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(json.loads(json_codec.dumps(value)), expected)
+                self.assertEqual(json.loads(json_codec.dumps_bytes(value)), expected)
+                self.assertEqual(json.loads(json_codec.dumps(value, indent=2)), expected)
+                # values the fast encoders refuse go through the standard library
+                self.assertEqual(json.loads(json_codec.dumps({**value, "big": 2 ** 70})),
+                                 {**expected, "big": 2 ** 70})
+
+    def test_unencodable_values_raise(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                with self.assertRaises(TypeError):
+                    json_codec.dumps({"value": object()})
+
+    def test_invalid_documents_raise_json_decode_error(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                with self.assertRaises(json.JSONDecodeError):
+                    json_codec.loads(b"[{")
+
+    def test_missing_backend_falls_back(self):
+        self.assertIn(json_codec.configure_json_backend("json"), json_codec.JSON_BACKENDS)
+        with self.assertRaises(ValueError):
+            json_codec.configure_json_backend("simplejson")
+
+    def test_invalid_setting_does_not_break_import(self):
+        env = dict(os.environ, **{json_codec.JSON_BACKEND_ENV: "ujson"})
+        result = subprocess.run(
+            [sys.executable, "-c", "from monocle_apptrace.instrumentation.common import json_codec; "
+                                   "print(json_codec.get_json_backend())"],
+            env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn(result.stdout.strip(), json_codec.JSON_BACKENDS)
+
+    def test_invalid_setting_rejected_at_setup(self):
+        with patch.dict(os.environ, {json_codec.JSON_BACKEND_ENV: "ujson"}), self.assertRaises(ValueError):
+            setup_monocle_telemetry(workflow_name="json_backend_test", span_processors=[])
+
+    def test_compact_file_format(self):
+        with tempfile.TemporaryDirectory() as out_path:
+            exporter = FileSpanExporter(out_path=out_path, file_format="compact")
+            provider = TracerProvider()
+            provider.add_span_processor(SimpleSpanProcessor(exporter))
+            tracer = provider.get_tracer("test")
+            with tracer.start_as_current_span("workflow", attributes={MONOCLE_SDK_VERSION: "1"}):
+                with tracer.start_as_current_span("child", attributes={MONOCLE_SDK_VERSION: "1"}):
+                    pass
+            exporter.shutdown()
+            with open(os.path.join(out_path, os.listdir(out_path)[0]), encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            # "[" + one line per span + "]"
+            self.assertEqual(len(lines), 3)
+            self.assertEqual([span["name"] for span in json.loads("".join(lines))], ["child", "workflow"])
+
+    def test_invalid_file_format_is_rejected(self):
+        with tempfile.TemporaryDirectory() as out_path:
+            with self.assertRaises(ValueError):
+                FileSpanExporter(out_path=out_path, file_format="yaml")
+
+
+if __name__ == "__main__":
+    unittest.main()
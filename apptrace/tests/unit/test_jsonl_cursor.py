@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from monocle_apptrace.instrumentation.common.jsonl_cursor import (
+    cursor_after_lines,
+    cursor_at,
+    read_new_records,
+)
+
+
+class TestJsonlCursor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "session.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _append(self, *texts):
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write("".join(texts))
+
+    def _line(self, n):
+        return json.dumps({"n": n}) + "\n"
+
+    def test_reads_only_appended_lines(self):
+        self._append(self._line(1), self._line(2))
+        records, cursor, restarted = read_new_records(self.path)
+        self.assertEqual([r[2]["n"] for r in records], [1, 2])
+        self.assertFalse(restarted)
+
+        self._append(self._line(3))
+        records, cursor, _ = read_new_records(self.path, cursor)
+        self.assertEqual([r[2]["n"] for r in records], [3])
+
+        records, cursor2, _ = read_new_records(self.path, cursor)
+        self.assertEqual(records, [])
+        self.assertEqual(cursor2["offset"], cursor["offset"])
+
+    def test_partial_line_left_for_next_call(self):
+        self._append(self._line(1), '{"n": ')
+        records, cursor, _ = read_new_records(self.path)
+        self.assertEqual([r[2]["n"] for r in records], [1])
+
+        self._append('2}\n')
+        records, _, _ = read_new_records(self.path, cursor)
+        self.assertEqual([r[2]["n"] for r in records], [2])
+
+    def test_invalid_and_blank_lines_skipped(self):
+        self._append(self._line(1), "\n", "not json\n", self._line(2))
+        records, _, _ = read_new_records(self.path)
+        self.assertEqual([r[2]["n"] for r in records], [1, 2])
+
+    def test_offsets_allow_rewinding(self):
+        self._append(self._line(1), self._line(2))
+        records, cursor, _ = read_new_records(self.path)
+        start_of_second = records[1][0]
+        records, _, _ = read_new_records(self.path, cursor_at(cursor, start_of_second))
+        self.assertEqual([r[2]["n"] for r in records], [2])
+
+    def test_truncated_file_read_from_start(self):
+        self._append(self._line(1), self._line(2), self._line(3))
+        _, cursor, _ = read_new_records(self.path)
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(self._line(9))
+        records, _, restarted = read_new_records(self.path, cursor)
+        self.assertTrue(restarted)
+        self.assertEqual([r[2]["n"] for r in records], [9])
+
+    def test_replaced_file_read_from_start(self):
+        self._append(self._line(1))
+        _, cursor, _ = read_new_records(self.path)
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(self._line(7) + self._line(8))
+        records, _, restarted = read_new_records(self.path, cursor)
+        self.assertTrue(restarted)
+        self.assertEqual([r[2]["n"] for r in records], [7, 8])
+
+    def test_missing_file(self):
+        records, cursor, restarted = read_new_records(os.path.join(self.tmp, "missing.jsonl"), {"offset": 3})
+        self.assertEqual(records, [])
+        self.assertEqual(cursor, {"offset": 3})
+        self.assertFalse(restarted)
+
+    def test_cursor_after_lines_converts_line_counts(self):
+        self._append(self._line(1), self._line(2), self._line(3))
+        cursor = cursor_after_lines(self.path, 2)
+        records, _, restarted = read_new_records(self.path, cursor)
+        self.assertFalse(restarted)
+        self.assertEqual([r[2]["n"] for r in records], [3])
+        self.assertEqual(cursor_after_lines(self.path, 0), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
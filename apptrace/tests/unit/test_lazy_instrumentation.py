@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common.constants import LAZY_INSTRUMENTATION_ENV
+from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+from monocle_apptrace.instrumentation.common.wrapper_method import WrapperMethod
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+MODULE_SOURCE = """
+class Target:
+    def run(self, value):
+        return value * 2
+"""
+
+
+class TestLazyInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.module_name = f"lazy_target_{self.id().rsplit('.', 1)[-1]}"
+        with open(f"{self.tmp}/{self.module_name}.py", "w") as f:
+            f.write(MODULE_SOURCE)
+        sys.path.insert(0, self.tmp)
+        self.exporter = InMemorySpanExporter()
+        self.instrumentor = None
+
+    def tearDown(self):
+        if self.instrumentor is not None:
+            self.instrumentor.uninstrument()
+        sys.modules.pop(self.module_name, None)
+        sys.path.remove(self.tmp)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _setup(self):
+        self.instrumentor = setup_monocle_telemetry(
+            workflow_name="lazy_instrumentation_test",
+            span_processors=[SimpleSpanProcessor(self.exporter)],
+            wrapper_methods=[
+                WrapperMethod(package=self.module_name, object_name="Target", method="run", span_name="target.run"),
+            ],
+            union_with_default_methods=False,
+            lazy_instrumentation=True,
+        )
+
+    def test_package_wrapped_when_imported(self):
+        self._setup()
+        self.assertNotIn(self.module_name, sys.modules)
+        self.assertNotIn(self.module_name, [m["package"] for m in self.instrumentor.instrumented_method_list])
+
+        module = __import__(self.module_name)
+        self.assertTrue(hasattr(module.Target.run, "__wrapped__"))
+        self.assertEqual(module.Target().run(2), 4)
+        self.assertIn("target.run", [span.name for span in self.exporter.get_finished_spans()])
+
+    def test_imported_package_wrapped_at_setup(self):
+        module = __import__(self.module_name)
+        self._setup()
+        self.assertTrue(hasattr(module.Target.run, "__wrapped__"))
+
+    def test_not_wrapped_after_uninstrument(self):
+        self._setup()
+        self.instrumentor.uninstrument()
+        self.instrumentor = None
+        module = __import__(self.module_name)
+        self.assertFalse(hasattr(module.Target.run, "__wrapped__"))
+
+    def test_invalid_setting_is_rejected(self):
+        with patch.dict(os.environ, {LAZY_INSTRUMENTATION_ENV: "ture"}), self.assertRaises(ValueError):
+            setup_monocle_telemetry(
+                workflow_name="lazy_instrumentation_invalid_test",
+                span_processors=[SimpleSpanProcessor(self.exporter)],
+                union_with_default_methods=False,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
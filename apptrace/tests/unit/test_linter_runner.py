@@ -0,0 +1,159 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+from monocle_apptrace.cli import cmd_validate
+from monocle_apptrace.linter import find_trace_files, validate_trace_files
+from monocle_apptrace.linter.specs_loader import SPECS_CACHE_DIR_ENV, SPECS_OFFLINE_ENV, SpecsLoader
+
+VALID_SPAN = {"name": "workflow", "attributes": {"span.type": "workflow"}, "events": []}
+INVALID_SPAN = {"name": "openai.create", "attributes": {"span.type": "inference"}, "events": []}
+
+
+class TestLinterRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.specs_cache = SpecsLoader._cache
+        SpecsLoader._cache = {}
+
+    def tearDown(self):
+        SpecsLoader._cache = self.specs_cache
+
+    def _write(self, name, spans):
+        path = os.path.join(self.tmp, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(spans, f)
+        return path
+
+    def test_find_trace_files(self):
+        first = self._write("a/monocle_trace_1.json", [VALID_SPAN])
+        second = self._write("b/monocle_trace_2.ndjson", [VALID_SPAN])
+        self._write("b/monocle_trace_2.ndjson.idx", {})
+        self._write("b/notes.txt", [])
+        self.assertEqual(find_trace_files([self.tmp]), [first, second])
+        self.assertEqual(find_trace_files([os.path.join(self.tmp, "**", "*.json"), first]), [first])
+        self.assertEqual(find_trace_files(["missing.json"]), ["missing.json"])
+
+    def test_parallel_results_match_serial(self):
+        paths = [self._write(f"monocle_trace_{i}.json", [VALID_SPAN, INVALID_SPAN] if i % 2 else [VALID_SPAN])
+                 for i in range(6)]
+        paths.append(os.path.join(self.tmp, "missing.json"))
+        serial = list(validate_trace_files(paths, workers=1))
+        parallel = list(validate_trace_files(paths, workers=3))
+        self.assertEqual([r.path for r in parallel], paths)
+        for expected, actual in zip(serial, parallel):
+            self.assertEqual(expected.is_failed(), actual.is_failed())
+            self.assertEqual(expected.failure, actual.failure)
+        self.assertEqual([r.is_failed() for r in serial], [False, True, False, True, False, True, True])
+
+    def _run(self, **kwargs):
+        args = Namespace(trace_file=[self.tmp], fail_on_warning=False, level="selective", workers=1, **kwargs)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            exit_code = cmd_validate(args)
+        return exit_code, out.getvalue()
+
+    def test_json_output(self):
+        self._write("monocle_trace_1.json", [VALID_SPAN])
+        self._write("monocle_trace_2.json", [INVALID_SPAN])
+        exit_code, output = self._run(format="json")
+        self.assertEqual(exit_code, 1)
+        lines = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([line["passed"] for line in lines], [True, False])
+        self.assertEqual(lines[1]["errors"][0]["field"], "entity.2.name")
+
+    def test_junit_output(self):
+        self._write("monocle_trace_1.json", [VALID_SPAN])
+        self._write("monocle_trace_2.json", [INVALID_SPAN])
+        with open(os.path.join(self.tmp, "monocle_trace_3.json"), "w") as f:
+            f.write("[{")
+        exit_code, output = self._run(format="junit")
+        self.assertEqual(exit_code, 1)
+        suite = ElementTree.fromstring(output)
+        self.assertEqual((suite.get("tests"), suite.get("failures"), suite.get("errors")), ("3", "1", "1"))
+
+    def test_malformed_spans_fail_their_file_only(self):
+        self._write("monocle_trace_1.json", [1, "x", VALID_SPAN])
+        self._write("monocle_trace_2.json", [{"name": "broken", "attributes": [1]}])
+        self._write("monocle_trace_3.json", [VALID_SPAN])
+        first, second, third = validate_trace_files(find_trace_files([self.tmp]), workers=1)
+        self.assertEqual([error.span_name for error in first.result.all_errors], ["span 0", "span 1"])
+        self.assertIn("AttributeError", second.failure)
+        self.assertFalse(third.is_failed())
+
+        exit_code, output = self._run(format="junit")
+        self.assertEqual(exit_code, 1)
+        suite = ElementTree.fromstring(output)
+        self.assertEqual((suite.get("tests"), suite.get("failures"), suite.get("errors")), ("3", "1", "1"))
+
+    def test_no_trace_files(self):
+        self.assertEqual(self._run(format="text")[0], 1)
+
+
+class TestSpecsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.specs_cache = SpecsLoader._cache
+        SpecsLoader._cache = None
+        self.env = patch.dict(os.environ, {SPECS_CACHE_DIR_ENV: self.tmp})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        SpecsLoader._cache = self.specs_cache
+
+    def _response(self, status, body=b"{}", etag=None):
+        return SimpleNamespace(status_code=status, content=body, headers={"ETag": etag} if etag else {},
+                               raise_for_status=lambda: None)
+
+    def test_specs_are_cached_on_disk_and_revalidated(self):
+        with patch("requests.get", return_value=self._response(200, b'{"v": 1}', '"abc"')) as get:
+            specs = SpecsLoader.load_specs()
+        self.assertEqual(specs["entities"], {"v": 1})
+        self.assertEqual(get.call_count, len(SpecsLoader.REQUIRED_SPEC_FILES))
+
+        # fresh disk cache, no request
+        SpecsLoader.clear_cache()
+        with patch("requests.get") as get:
+            self.assertEqual(SpecsLoader.load_specs()["entities"], {"v": 1})
+        get.assert_not_called()
+
+        # stale disk cache, revalidated with the ETag
+        SpecsLoader.clear_cache()
+        with patch.dict(os.environ, {"MONOCLE_SPECS_CACHE_TTL_SECONDS": "0"}), \
+                patch("requests.get", return_value=self._response(304)) as get:
+            self.assertEqual(SpecsLoader.load_specs()["entities"], {"v": 1})
+        self.assertEqual(get.call_args.kwargs["headers"], {"If-None-Match": '"abc"'})
+
+    def test_offline_uses_only_the_disk_cache(self):
+        with patch("requests.get", return_value=self._response(200, b'{"v": 1}')):
+            SpecsLoader.load_specs()
+        SpecsLoader.clear_cache()
+        with patch.dict(os.environ, {SPECS_OFFLINE_ENV: "true", "MONOCLE_SPECS_CACHE_TTL_SECONDS": "0"}), \
+                patch("requests.get") as get:
+            self.assertEqual(SpecsLoader.load_specs()["entities"], {"v": 1})
+        get.assert_not_called()
+
+    def test_offline_without_cache_leaves_the_specs_out(self):
+        with patch.dict(os.environ, {SPECS_OFFLINE_ENV: "true"}), patch("requests.get") as get:
+            specs = SpecsLoader.load_specs()
+        get.assert_not_called()
+        self.assertEqual(specs, {})
+
+    def test_invalid_offline_setting_is_rejected(self):
+        with patch.dict(os.environ, {SPECS_OFFLINE_ENV: "ture"}), self.assertRaises(ValueError):
+            SpecsLoader.load_specs()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from monocle_apptrace.instrumentation.common.deferred_events import configure_deferred_events
+from monocle_apptrace.instrumentation.common.message_delta import (
+    PREFIX_COUNT_ATTRIBUTE,
+    PREFIX_SPAN_ID_ATTRIBUTE,
+    configure_message_delta,
+    expand_message_deltas,
+)
+from monocle_apptrace.instrumentation.common.payload_budget import (
+    PAYLOAD_MAX_ATTRIBUTE_BYTES_ENV,
+    configure_payload_budget,
+)
+from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+
+TO_WRAP = {
+    "package": "openai.resources.chat.completions",
+    "output_processor": {
+        "type": "inference",
+        "events": [
+            {"name": "data.input", "attributes": [
+                {"attribute": "input",
+                 "accessor": lambda arguments: [json.dumps(message) for message in arguments["kwargs"]["messages"]]}]},
+        ],
+    },
+}
+
+
+class TestMessageDelta(unittest.TestCase):
+    """Test cases for the delta capture of multi-turn inference inputs."""
+
+    def setUp(self):
+        super().setUp()
+        configure_message_delta(True)
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.tracer = provider.get_tracer("test")
+
+    def tearDown(self):
+        configure_message_delta(False)
+        configure_deferred_events(False)
+        configure_payload_budget(False)
+        super().tearDown()
+
+    def _agent_loop(self, turns, ex=None, first_question="question 0"):
+        messages = [{"role": "system", "content": "be brief"}]
+        with self.tracer.start_as_current_span("workflow"):
+            for turn in range(turns):
+                messages.append({"role": "user", "content": f"question {turn}" if turn else first_question})
+                with self.tracer.start_as_current_span("inference") as span:
+                    SpanHandler().hydrate_span(TO_WRAP, None, None, (), {"messages": messages}, None, span, None,
+                                               None, is_post_exec=False)
+                    if ex is not None:
+                        # the exception path hydrates the existing events again
+                        SpanHandler().hydrate_span(TO_WRAP, None, None, (), {"messages": messages}, None, span, None,
+                                                   ex, is_post_exec=True)
+                messages.append({"role": "assistant", "content": f"answer {turn}"})
+        return [span for span in self.exporter.get_finished_spans() if span.name == "inference"]
+
+    @staticmethod
+    def _as_dicts(spans):
+        return [json.loads(span.to_json()) for span in spans]
+
+    def test_only_new_messages_are_recorded(self):
+        first, second, third = [span.events[0].attributes for span in self._agent_loop(3)]
+        self.assertEqual(len(first["input"]), 2)
+        self.assertNotIn(PREFIX_SPAN_ID_ATTRIBUTE, first)
+
+        self.assertEqual(len(second["input"]), 2)
+        self.assertEqual(second[PREFIX_COUNT_ATTRIBUTE], 2)
+        self.assertEqual(len(third["input"]), 2)
+        self.assertEqual(third[PREFIX_COUNT_ATTRIBUTE], 4)
+
+    def test_expand_rebuilds_full_inputs(self):
+        spans = self._as_dicts(self._agent_loop(3))
+        expand_message_deltas(spans)
+        inputs = [span["events"][0]["attributes"] for span in spans]
+        self.assertEqual([len(attributes["input"]) for attributes in inputs], [2, 4, 6])
+        self.assertEqual([json.loads(message)["content"] for message in inputs[2]["input"]],
+                         ["be brief", "question 0", "answer 0", "question 1", "answer 1", "question 2"])
+        self.assertFalse(any(PREFIX_SPAN_ID_ATTRIBUTE in attributes for attributes in inputs))
+
+    def test_missing_prefix_span_is_left_as_recorded(self):
+        spans = self._as_dicts(self._agent_loop(2))[1:]
+        expand_message_deltas(spans)
+        self.assertEqual(spans[0]["events"][0]["attributes"][PREFIX_COUNT_ATTRIBUTE], 2)
+
+    def test_deferred_events_capture_deltas(self):
+        configure_deferred_events(True)
+        spans = self._as_dicts(self._agent_loop(2))
+        self.assertEqual(spans[1]["events"][0]["attributes"][PREFIX_COUNT_ATTRIBUTE], 2)
+        expand_message_deltas(spans)
+        self.assertEqual(len(spans[1]["events"][0]["attributes"]["input"]), 4)
+
+    def test_input_survives_exception_path(self):
+        spans = self._agent_loop(2, ex=RuntimeError("inference failed"))
+        first, second = [span.events[0].attributes for span in spans]
+        self.assertEqual(len(first["input"]), 2)
+        self.assertNotIn(PREFIX_SPAN_ID_ATTRIBUTE, first)
+        self.assertEqual(len(second["input"]), 2)
+        self.assertEqual(second[PREFIX_SPAN_ID_ATTRIBUTE], format(spans[0].context.span_id, "016x"))
+        self.assertEqual(second[PREFIX_COUNT_ATTRIBUTE], 2)
+
+    def test_budget_truncated_messages_are_not_a_prefix(self):
+        with patch.dict("os.environ", {PAYLOAD_MAX_ATTRIBUTE_BYTES_ENV: "100"}):
+            configure_payload_budget(True)
+        spans = self._as_dicts(self._agent_loop(2, first_question="x" * 300))
+        first, second = [span["events"][0]["attributes"] for span in spans]
+        self.assertEqual(len(first["input"]), 2)
+        self.assertIn("...[truncated", first["input"][1])
+        # only the system message was stored unchanged
+        self.assertEqual(second[PREFIX_COUNT_ATTRIBUTE], 1)
+        recorded = list(second["input"])
+
+        expand_message_deltas(spans)
+        self.assertEqual(second["input"], [first["input"][0]] + recorded)
+        self.assertEqual(json.loads(second["input"][0])["content"], "be brief")
+
+    def test_disabled_mode_records_full_inputs(self):
+        configure_message_delta(False)
+        inputs = [span.events[0].attributes for span in self._agent_loop(2)]
+        self.assertEqual([len(attributes["input"]) for attributes in inputs], [2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common import metamodel_registry
+from monocle_apptrace.instrumentation.common.metamodel_registry import (
+    METAMODELS,
+    SPAN_HANDLERS,
+    Metamodel,
+    SpanHandlerRegistry,
+    default_methods,
+    is_available,
+)
+from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+
+
+class TestMetamodelRegistry(unittest.TestCase):
+
+    def test_import_does_not_load_metamodels(self):
+        probe = (
+            "import sys, monocle_apptrace\n"
+            "loaded = [m for m in sys.modules if m.startswith('monocle_apptrace.instrumentation.metamodel.')"
+            " and m.endswith(('.methods', '_processor', '_handler'))]\n"
+            "print(','.join(loaded))\n"
+        )
+        out = subprocess.check_output([sys.executable, "-c", probe], text=True).strip()
+        self.assertEqual(out, "")
+
+    def test_availability(self):
+        self.assertTrue(is_available(Metamodel(("x", "X"))))
+        self.assertTrue(is_available(Metamodel(("x", "X"), ("json", "no_such_package_xyz"))))
+        self.assertFalse(is_available(Metamodel(("x", "X"), ("no_such_package_xyz",))))
+        self.assertFalse(is_available(Metamodel(("x", "X"), requires_imported=("no_such_module_xyz",))))
+        self.assertTrue(is_available(Metamodel(("x", "X"), requires_imported=("json",))))
+
+    def test_namespace_packages_do_not_make_metamodels_available(self):
+        # protobuf alone provides the google namespace, azure-core the azure one
+        by_methods = {metamodel.methods[0]: metamodel for metamodel in METAMODELS}
+        with patch.object(metamodel_registry, "_is_installed", lambda package: package in ("google", "azure")):
+            for methods in ("gemini.methods", "adk.methods", "azureaiinference.methods"):
+                self.assertFalse(is_available(by_methods[methods]), methods)
+
+    def test_default_methods_skip_missing_packages(self):
+        requests_metamodel = Metamodel(("requests.methods", "REQUESTS_METHODS"), ("requests",))
+        missing = Metamodel(("flask.methods", "FLASK_METHODS"), ("no_such_package_xyz",))
+        with patch.object(metamodel_registry, "METAMODELS", (requests_metamodel, missing)):
+            methods = default_methods()
+        self.assertTrue(methods)
+        self.assertTrue(all(m["package"].startswith("requests") for m in methods))
+
+    def test_all_methods_match_registry(self):
+        from monocle_apptrace.instrumentation.common.wrapper_method import DEFAULT_METHODS_LIST
+        expected = sum(len(metamodel_registry.load_methods(m)) for m in METAMODELS)
+        self.assertEqual(len(DEFAULT_METHODS_LIST), expected)
+
+    def test_span_handlers_created_on_lookup(self):
+        registry = SpanHandlerRegistry({"default": SpanHandler()})
+        self.assertNotIn("request_handler", dict(registry))
+        self.assertIn("request_handler", registry)
+        handler = registry.get("request_handler")
+        self.assertIsInstance(handler, SpanHandler)
+        self.assertIs(registry["request_handler"], handler)
+        self.assertIsNone(registry.get("no_such_handler"))
+
+    def test_every_span_handler_resolves(self):
+        registry = SpanHandlerRegistry()
+        for name in SPAN_HANDLERS:
+            self.assertIsInstance(registry[name], SpanHandler, name)
+
+    def test_fallback_shares_instances(self):
+        shared = SpanHandlerRegistry()
+        custom = SpanHandler()
+        first = SpanHandlerRegistry({"request_handler": custom}, fallback=shared)
+        second = SpanHandlerRegistry({}, fallback=shared)
+        self.assertIs(first["request_handler"], custom)
+        self.assertIs(second["flask_handler"], shared["flask_handler"])
+
+
+if __name__ == "__main__":
+    unittest.main()
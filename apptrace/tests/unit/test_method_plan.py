@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import MagicMock
+
+from monocle_apptrace.instrumentation.common.constants import AGENT_REQUEST_SPAN_NAME
+from monocle_apptrace.instrumentation.common.method_plan import (
+    compile_method_plan,
+    get_method_plan,
+    remove_method_plan,
+)
+from monocle_apptrace.instrumentation.common.wrapper import (
+    get_auto_close_span,
+    get_builtin_scope_names,
+    get_span_name,
+    get_wrapper_with_next_processor,
+    has_more_processors,
+)
+
+AGENT_REQUEST = {"type": AGENT_REQUEST_SPAN_NAME, "is_auto_close": lambda kwargs: False}
+AGENT = {"type": "agentic.invocation"}
+
+
+class TestMethodPlan(unittest.TestCase):
+    """Test cases for the compiled per-method plan consumed by the wrappers."""
+
+    def _to_wrap(self, **overrides):
+        to_wrap = {
+            "package": "langchain_core.runnables",
+            "object": "RunnableSequence",
+            "method": "invoke",
+            "output_processor_list": [AGENT_REQUEST, AGENT],
+        }
+        to_wrap.update(overrides)
+        return to_wrap
+
+    def test_plan_precomputes_method_facts(self):
+        to_wrap = self._to_wrap()
+        plan = compile_method_plan(to_wrap)
+        try:
+            self.assertIs(get_method_plan(to_wrap), plan)
+            self.assertEqual(plan.span_name, "langchain_core.runnables.RunnableSequence.invoke")
+            self.assertEqual(plan.workflow_type, "workflow.langchain")
+            self.assertTrue(plan.is_framework_workflow)
+            self.assertTrue(plan.has_more_processors)
+            self.assertEqual(plan.builtin_scope_name, AGENT_REQUEST_SPAN_NAME)
+            self.assertFalse(plan.get_auto_close_span({}))
+        finally:
+            remove_method_plan(to_wrap)
+
+    def test_plan_is_immutable(self):
+        plan = get_method_plan(self._to_wrap())
+        with self.assertRaises(AttributeError):
+            plan.span_name = "other"
+
+    def test_wrapper_helpers_match_config(self):
+        to_wrap = self._to_wrap(span_name="custom", output_processor_list=[])
+        self.assertEqual(get_span_name(to_wrap, None), "custom")
+        self.assertTrue(get_auto_close_span(to_wrap, {}))
+        self.assertIsNone(get_builtin_scope_names(to_wrap))
+        self.assertFalse(has_more_processors(to_wrap))
+
+    def test_handler_copy_with_new_processor_gets_own_plan(self):
+        to_wrap = self._to_wrap()
+        compile_method_plan(to_wrap)
+        try:
+            copy = to_wrap.copy()
+            copy["output_processor"] = AGENT
+            del copy["output_processor_list"]
+            plan = get_method_plan(copy)
+            self.assertIsNot(plan, get_method_plan(to_wrap))
+            self.assertIs(plan.output_processor, AGENT)
+            self.assertFalse(plan.has_more_processors)
+            self.assertIs(get_method_plan(copy), plan)
+        finally:
+            remove_method_plan(to_wrap)
+
+    def test_next_processor_reuses_compiled_plans(self):
+        to_wrap = self._to_wrap()
+        handler = MagicMock()
+        handler.should_skip.return_value = False
+
+        first = get_wrapper_with_next_processor(to_wrap, handler, None, None, None, (), {})
+        self.assertIs(first["output_processor"], AGENT_REQUEST)
+        self.assertEqual(first["output_processor_list"], [AGENT])
+
+        second = get_wrapper_with_next_processor(first, handler, None, None, None, (), {})
+        self.assertIs(second["output_processor"], AGENT)
+        self.assertEqual(second["output_processor_list"], [])
+
+        again = get_wrapper_with_next_processor(to_wrap, handler, None, None, None, (), {})
+        self.assertIs(get_method_plan(again), get_method_plan(first))
+        # the original config is left untouched
+        self.assertNotIn("output_processor", to_wrap)
+
+    def test_next_processor_skips_processors(self):
+        to_wrap = self._to_wrap()
+        handler = MagicMock()
+        handler.should_skip.side_effect = lambda processor, *args: processor is AGENT_REQUEST
+
+        next_to_wrap = get_wrapper_with_next_processor(to_wrap, handler, None, None, None, (), {})
+        self.assertIs(next_to_wrap["output_processor"], AGENT)
+        self.assertEqual(next_to_wrap["output_processor_list"], [])
+
+        handler.should_skip.side_effect = None
+        handler.should_skip.return_value = True
+        next_to_wrap = get_wrapper_with_next_processor(to_wrap, handler, None, None, None, (), {})
+        self.assertIsNone(next_to_wrap["output_processor"])
+        self.assertFalse(has_more_processors(next_to_wrap))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import gzip
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from monocle_apptrace.exporters.okahu.okahu_exporter import OkahuSpanExporter
+from monocle_apptrace.instrumentation.common.constants import MONOCLE_SDK_VERSION
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+
+class _Session:
+    """Records the posted requests, answering with the given status codes in turn."""
+
+    def __init__(self, *status_codes):
+        self.headers = {}
+        self.posts = []
+        self.status_codes = list(status_codes)
+        self.release = threading.Event()
+        self.release.set()
+        self.down = False
+
+    def post(self, url, data, headers, timeout):
+        self.release.wait()
+        if self.down:
+            raise requests.exceptions.ConnectionError("unreachable")
+        self.posts.append((data, headers))
+        return _Response(self.status_codes.pop(0) if self.status_codes else 200)
+
+    def close(self):
+        pass
+
+    def batches(self):
+        bodies = [gzip.decompress(data) if headers else data for data, headers in self.posts]
+        return [[span["name"] for span in json.loads(body)["batch"]] for body in bodies]
+
+
+def _spans(count):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("test")
+    for index in range(count):
+        with tracer.start_as_current_span(f"span{index}", attributes={MONOCLE_SDK_VERSION: "1"}):
+            pass
+    return exporter.get_finished_spans()
+
+
+@patch.dict("os.environ", {"OKAHU_API_KEY": "test-key"})
+class TestOkahuSpanExporter(unittest.TestCase):
+    """Test the queued, coalescing Okahu export pipeline."""
+
+    def test_batches_are_coalesced_and_compressed(self):
+        session = _Session()
+        session.release.clear()
+        exporter = OkahuSpanExporter(session=session, compression="gzip", export_workers=1, max_batch_spans=4)
+        spans = _spans(6)
+        for span in spans:
+            exporter.export([span])
+        session.release.set()
+        self.assertTrue(exporter.force_flush())
+        exporter.shutdown()
+
+        self.assertEqual(sorted(name for batch in session.batches() for name in batch), sorted(s.name for s in spans))
+        self.assertLessEqual(len(session.posts), 3)
+        self.assertTrue(all(headers == {"Content-Encoding": "gzip"} for _, headers in session.posts))
+        self.assertEqual(exporter.exported_spans, 6)
+
+    def test_size_limit_splits_requests(self):
+        session = _Session()
+        exporter = OkahuSpanExporter(session=session, max_batch_bytes=1)
+        exporter._send_spans([b'{"name":"a"}', b'{"name":"b"}'])
+        self.assertEqual(session.batches(), [["a"], ["b"]])
+
+    @patch("monocle_apptrace.exporters.base_exporter.time.sleep")
+    def test_retryable_responses_are_retried(self, _sleep):
+        session = _Session(503, 429, 200)
+        exporter = OkahuSpanExporter(session=session)
+        exporter.export(_spans(1))
+        exporter.shutdown()
+        self.assertEqual(len(session.posts), 3)
+        self.assertEqual((exporter.exported_spans, exporter.failed_spans), (1, 0))
+
+    def test_rejected_batch_is_counted(self):
+        session = _Session(400)
+        exporter = OkahuSpanExporter(session=session)
+        exporter.export(_spans(2))
+        exporter.shutdown()
+        self.assertEqual(len(session.posts), 1)
+        self.assertEqual((exporter.exported_spans, exporter.failed_spans), (0, 2))
+
+    def test_full_queue_drops_spans(self):
+        session = _Session()
+        session.release.clear()
+        exporter = OkahuSpanExporter(session=session, export_workers=1, max_queue_size=2, max_batch_spans=1)
+        spans = _spans(5)
+        results = [exporter.export([span]) for span in spans]
+        self.assertGreater(exporter.dropped_spans, 0)
+        self.assertEqual(results.count(SpanExportResult.FAILURE), exporter.dropped_spans)
+        session.release.set()
+        exporter.shutdown()
+        self.assertEqual(exporter.exported_spans + exporter.dropped_spans, 5)
+
+    @patch("monocle_apptrace.exporters.base_exporter.time.sleep")
+    def test_unreachable_backend_spools_spans(self, _sleep):
+        session = _Session()
+        session.down = True
+        exporter = OkahuSpanExporter(session=session)
+        with tempfile.TemporaryDirectory() as spool_dir:
+            spool = exporter.enable_spool(spool_dir, drain_interval=3600)
+            exporter.export(_spans(2))
+            self.assertTrue(exporter.force_flush())
+            self.assertEqual((exporter.failed_spans, len(spool.read(10))), (0, 2))
+
+            session.down = False
+            self.assertTrue(exporter._spool_drainer.drain())
+            self.assertTrue(spool.is_empty())
+            self.assertEqual(sorted(session.batches()[0]), ["span0", "span1"])
+            exporter.shutdown()
+
+    def test_forked_child_restarts_workers(self):
+        session = _Session()
+        exporter = OkahuSpanExporter(session=session, export_workers=1)
+        exporter.export(_spans(1))
+        self.assertTrue(exporter.force_flush())
+        parent_workers = list(exporter._workers)
+        # as seen from a forked child: the parent's threads are gone and the lock may be held
+        exporter._pid = -1
+        exporter._queue_condition.acquire()
+        exporter.export(_spans(1))
+        self.assertEqual(len(exporter._workers), 1)
+        self.assertNotIn(exporter._workers[0], parent_workers)
+        self.assertTrue(exporter.force_flush())
+        exporter.shutdown()
+        self.assertEqual(exporter.exported_spans, 2)
+
+    def test_shutdown_gives_up_at_deadline(self):
+        session = _Session()
+        session.release.clear()
+        exporter = OkahuSpanExporter(session=session, export_workers=1, max_batch_spans=1)
+        exporter.export(_spans(3))
+        started = time.monotonic()
+        exporter.shutdown(timeout_millis=200)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertGreater(exporter.dropped_spans, 0)
+        session.release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
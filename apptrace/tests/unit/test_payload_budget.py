@@ -0,0 +1,162 @@
+import hashlib
+import unittest
+from unittest.mock import patch
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from monocle_apptrace.instrumentation.common.constants import MONOCLE_PAYLOAD_DROPPED_BYTES
+from monocle_apptrace.instrumentation.common.payload_budget import (
+    PAYLOAD_BUDGET_ENV,
+    PAYLOAD_HASH_DROPPED_ENV,
+    PAYLOAD_MAX_ATTRIBUTE_BYTES_ENV,
+    PAYLOAD_MAX_EVENT_BYTES_ENV,
+    PAYLOAD_MAX_SPAN_BYTES_ENV,
+    PAYLOAD_MAX_TRACE_BYTES_ENV,
+    apply_payload_budget,
+    configure_payload_budget,
+    get_payload_budget_stats,
+)
+from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+
+LIMITS = {
+    PAYLOAD_MAX_ATTRIBUTE_BYTES_ENV: "100",
+    PAYLOAD_MAX_EVENT_BYTES_ENV: "150",
+    PAYLOAD_MAX_SPAN_BYTES_ENV: "200",
+    PAYLOAD_MAX_TRACE_BYTES_ENV: "300",
+}
+
+TO_WRAP = {
+    "package": "openai.resources.chat.completions",
+    "output_processor": {
+        "type": "inference",
+        "events": [
+            {"name": "data.input", "attributes": [
+                {"attribute": "input", "accessor": lambda arguments: arguments["kwargs"]["prompt"]}]},
+        ],
+    },
+}
+
+
+class TestPayloadBudget(unittest.TestCase):
+
+    def setUp(self):
+        with patch.dict("os.environ", LIMITS):
+            configure_payload_budget(True)
+        self.tracer = TracerProvider().get_tracer("test")
+
+    def tearDown(self):
+        configure_payload_budget(False)
+
+    def test_disabled_by_default(self):
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertFalse(configure_payload_budget())
+        attributes = {"input": "x" * 1000}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "data.input", attributes)
+        self.assertEqual(len(attributes["input"]), 1000)
+
+    def test_attribute_is_truncated_with_marker(self):
+        before = get_payload_budget_stats()
+        attributes = {"input": "x" * 1000, "other": 5}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "data.input", attributes)
+        self.assertLessEqual(len(attributes["input"].encode()), 100)
+        self.assertTrue(attributes["input"].endswith("bytes]"))
+        self.assertEqual(attributes["other"], 5)
+        dropped = span.attributes[MONOCLE_PAYLOAD_DROPPED_BYTES]
+        self.assertEqual(len(attributes["input"]) - len("...[truncated %d bytes]" % dropped) + dropped, 1000)
+        after = get_payload_budget_stats()
+        self.assertEqual(after["dropped_bytes"] - before["dropped_bytes"], dropped)
+        self.assertEqual(after["truncated_values"] - before["truncated_values"], 1)
+
+    def test_other_events_are_not_budgeted(self):
+        attributes = {"input": "x" * 1000}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "metadata", attributes)
+        self.assertEqual(len(attributes["input"]), 1000)
+
+    def test_span_and_trace_budgets(self):
+        with self.tracer.start_as_current_span("workflow"):
+            with self.tracer.start_as_current_span("inference") as span:
+                first, second, third = {"input": "a" * 90}, {"output": "b" * 90}, {"output": "c" * 90}
+                apply_payload_budget(span, "data.input", first)
+                apply_payload_budget(span, "data.output", second)
+                apply_payload_budget(span, "data.output", third)
+            self.assertEqual(first["input"], "a" * 90)
+            self.assertEqual(second["output"], "b" * 90)
+            # only 20 bytes of the span budget are left
+            self.assertTrue(third["output"].startswith("...[truncated"))
+            with self.tracer.start_as_current_span("inference") as other_span:
+                fourth = {"input": "d" * 200}
+                apply_payload_budget(other_span, "data.input", fourth)
+            # the trace budget has about 100 bytes left
+            self.assertLessEqual(len(fourth["input"].encode()), 100)
+
+    def test_message_lists_keep_leading_items(self):
+        attributes = {"input": ["m" * 40, "n" * 40, "o" * 40, "p" * 40]}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "data.input", attributes)
+        messages = attributes["input"]
+        self.assertEqual(messages[:2], ["m" * 40, "n" * 40])
+        self.assertTrue(messages[2].endswith("bytes]"))
+        self.assertEqual(messages[-1], "...[truncated 1 items, 40 bytes]")
+
+    def test_multibyte_text_and_hash(self):
+        text = "é" * 200
+        with patch.dict("os.environ", dict(LIMITS, **{PAYLOAD_HASH_DROPPED_ENV: "true"})):
+            configure_payload_budget(True)
+        attributes = {"output": text}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "data.output", attributes)
+        truncated = attributes["output"]
+        self.assertLessEqual(len(truncated.encode()), 100)
+        kept = truncated[:truncated.index("...[")]
+        dropped = text.encode()[len(kept.encode()):]
+        self.assertIn(hashlib.sha256(dropped).hexdigest()[:16], truncated)
+
+    def test_dict_values_are_budgeted(self):
+        attributes = {"input": {"prompt": "x" * 1000}}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "data.input", attributes)
+        self.assertIsInstance(attributes["input"], str)
+        self.assertTrue(attributes["input"].startswith('{"prompt"'))
+        self.assertLessEqual(len(attributes["input"].encode()), 100)
+        self.assertGreater(span.attributes[MONOCLE_PAYLOAD_DROPPED_BYTES], 900)
+
+    def test_small_dict_values_are_kept(self):
+        attributes = {"input": {"prompt": "hi"}}
+        with self.tracer.start_as_current_span("inference") as span:
+            apply_payload_budget(span, "data.input", attributes)
+        self.assertEqual(attributes["input"], {"prompt": "hi"})
+
+    def test_exception_path_charges_input_once(self):
+        kwargs = {"prompt": "a" * 90}
+        with self.tracer.start_as_current_span("inference") as span:
+            SpanHandler().hydrate_span(TO_WRAP, None, None, (), kwargs, None, span, None, None, is_post_exec=False)
+            # the exception path hydrates the existing input event again
+            SpanHandler().hydrate_span(TO_WRAP, None, None, (), kwargs, None, span, None, Exception("failed"),
+                                       is_post_exec=True)
+            output = {"output": "b" * 90}
+            apply_payload_budget(span, "data.output", output)
+        self.assertEqual(span.events[0].attributes["input"], "a" * 90)
+        # 90 input bytes charged once leave room for the output in the 200 bytes span budget
+        self.assertEqual(output["output"], "b" * 90)
+
+    def test_dropped_bytes_on_event_after_span_end(self):
+        with self.tracer.start_as_current_span("inference") as span:
+            pass
+        # deferred events are resolved by the exporter once the span ended
+        attributes = {"output": "x" * 1000}
+        apply_payload_budget(span, "data.output", attributes)
+        self.assertLessEqual(len(attributes["output"].encode()), 100)
+        self.assertGreater(attributes[MONOCLE_PAYLOAD_DROPPED_BYTES], 900)
+        self.assertNotIn(MONOCLE_PAYLOAD_DROPPED_BYTES, span.attributes)
+
+    def test_invalid_setting(self):
+        with patch.dict("os.environ", {PAYLOAD_BUDGET_ENV: "maybe"}):
+            with self.assertRaises(ValueError):
+                configure_payload_budget()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+from monocle_apptrace.exporters.base_exporter import MonocleInMemorySpanExporter
+from monocle_apptrace.instrumentation.common.constants import (
+    GITHUB_CODESPACE_ENV_NAME,
+    GITHUB_CODESPACE_IDENTIFIER_ENV_NAME,
+    GITHUB_CODESPACE_SERVICE_NAME,
+    MONOCLE_SDK_LANGUAGE,
+    MONOCLE_SDK_VERSION,
+)
+from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+from monocle_apptrace.instrumentation.common.resource_attributes import (
+    app_hosting_entity,
+    configure_resource_attributes,
+    get_span_attribute,
+    is_resource_attributes_enabled,
+    monocle_resource_attributes,
+)
+from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+
+
+class TestResourceAttributes(unittest.TestCase):
+
+    def tearDown(self):
+        configure_resource_attributes(False)
+
+    def _export_span(self, resource_attributes: bool):
+        configure_resource_attributes(resource_attributes)
+        attributes = {"service.name": "resource_test"}
+        if resource_attributes:
+            attributes.update(monocle_resource_attributes())
+        exporter = MonocleInMemorySpanExporter()
+        provider = TracerProvider(resource=Resource(attributes))
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        with provider.get_tracer("test").start_as_current_span("workflow") as span:
+            SpanHandler.set_default_monocle_attributes(span, "app.py:1")
+            SpanHandler.set_app_hosting_identifier_attribute(span)
+        return exporter.get_finished_spans()
+
+    def test_default_keeps_attributes_on_spans(self):
+        spans = self._export_span(False)
+        self.assertEqual(len(spans), 1)
+        self.assertIn(MONOCLE_SDK_VERSION, spans[0].attributes)
+        self.assertEqual(spans[0].attributes[MONOCLE_SDK_LANGUAGE], "python")
+
+    def test_attributes_moved_to_resource(self):
+        spans = self._export_span(True)
+        # still exported by the Monocle-only exporters
+        self.assertEqual(len(spans), 1)
+        span = spans[0]
+        self.assertNotIn(MONOCLE_SDK_VERSION, span.attributes)
+        self.assertNotIn(MONOCLE_SDK_LANGUAGE, span.attributes)
+        self.assertEqual(span.attributes["span_source"], "app.py:1")
+        self.assertEqual(get_span_attribute(span, MONOCLE_SDK_LANGUAGE), "python")
+        self.assertIsNotNone(get_span_attribute(span, MONOCLE_SDK_VERSION))
+        self.assertEqual(span.attributes["entity.2.type"], app_hosting_entity()[0])
+
+    def test_foreign_span_skipped_with_resource_attributes(self):
+        configure_resource_attributes(True)
+        exporter = MonocleInMemorySpanExporter()
+        provider = TracerProvider(resource=Resource(monocle_resource_attributes()))
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        with provider.get_tracer("someone.else").start_as_current_span("foreign") as span:
+            pass
+        self.assertTrue(exporter.skip_export(span))
+        self.assertEqual(exporter.get_finished_spans(), ())
+
+    def test_only_moved_attributes_read_from_resource(self):
+        spans = self._export_span(True)
+        self.assertIsNone(get_span_attribute(spans[0], "service.name"))
+
+    def test_app_hosting_resolved_once(self):
+        hosting_type = f"app_hosting.{GITHUB_CODESPACE_SERVICE_NAME}"
+        env = {GITHUB_CODESPACE_ENV_NAME: "true", GITHUB_CODESPACE_IDENTIFIER_ENV_NAME: "first"}
+        with patch.dict(os.environ, env, clear=True):
+            configure_resource_attributes(True)
+            os.environ[GITHUB_CODESPACE_IDENTIFIER_ENV_NAME] = "second"
+            self.assertEqual(app_hosting_entity(), (hosting_type, "first"))
+            configure_resource_attributes(False)
+            self.assertEqual(app_hosting_entity(), (hosting_type, "second"))
+
+    def test_existing_tracer_provider_keeps_attributes_on_spans(self):
+        # the application set up its own provider before Monocle
+        provider = TracerProvider(resource=Resource({"service.name": "app"}))
+        exporter = MonocleInMemorySpanExporter()
+        with patch.object(trace, "_TRACER_PROVIDER", provider):
+            instrumentor = setup_monocle_telemetry(workflow_name="resource_test", resource_attributes=True,
+                                                   span_processors=[SimpleSpanProcessor(exporter)],
+                                                   union_with_default_methods=False)
+            try:
+                self.assertFalse(is_resource_attributes_enabled())
+                with provider.get_tracer("test").start_as_current_span("workflow") as span:
+                    SpanHandler.set_default_monocle_attributes(span, "app.py:1")
+            finally:
+                instrumentor.uninstrument()
+        span = exporter.get_finished_spans()[0]
+        self.assertNotIn(MONOCLE_SDK_VERSION, span.resource.attributes)
+        self.assertEqual(span.attributes[MONOCLE_SDK_LANGUAGE], "python")
+        self.assertIn(MONOCLE_SDK_VERSION, span.attributes)
+
+    def test_invalid_setting(self):
+        with self.assertRaises(ValueError):
+            configure_resource_attributes("sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from opentelemetry import baggage, context, trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import set_span_in_context
+from opentelemetry.trace.status import Status, StatusCode
+
+from monocle_apptrace.exporters.tail_sampling_exporter import TailSamplingSpanExporter
+from monocle_apptrace.instrumentation.common.constants import (
+    MONOCLE_DETECTED_SPAN_ERROR,
+    MONOCLE_SCOPE_NAME_PREFIX,
+)
+from monocle_apptrace.instrumentation.common.instrumentor import setup_monocle_telemetry
+from monocle_apptrace.instrumentation.common.sampling import (
+    HEAD_SAMPLING_RATIO_ENV,
+    TailSamplingPolicy,
+    configure_head_sampling,
+    configure_tail_sampling,
+    parse_head_sampling_rules,
+)
+
+
+class TestHeadSampling(unittest.TestCase):
+
+    def _exported(self, sampler, scopes=None, traces=50):
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider(sampler=sampler)
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        tracer = provider.get_tracer("test")
+        ctx = None
+        for key, value in (scopes or {}).items():
+            ctx = baggage.set_baggage(f"{MONOCLE_SCOPE_NAME_PREFIX}{key}", value, ctx)
+        token = context.attach(ctx) if ctx is not None else None
+        try:
+            for _ in range(traces):
+                with tracer.start_as_current_span("workflow"):
+                    with tracer.start_as_current_span("inference") as child:
+                        # unsampled spans are still recorded
+                        self.assertTrue(child.is_recording())
+        finally:
+            if token is not None:
+                context.detach(token)
+        return exporter.get_finished_spans()
+
+    def test_all_sampled_by_default(self):
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertIsNone(configure_head_sampling())
+
+    def test_ratio_zero_exports_nothing(self):
+        self.assertEqual(self._exported(configure_head_sampling(ratio=0)), ())
+
+    def test_scope_rule_overrides_ratio(self):
+        sampler = configure_head_sampling(ratio=0, rules="scope=tenant=acme:1")
+        spans = self._exported(sampler, scopes={"tenant": "acme"}, traces=3)
+        self.assertEqual(len(spans), 6)
+        self.assertEqual(self._exported(sampler, scopes={"tenant": "other"}, traces=3), ())
+
+    def test_children_follow_the_root(self):
+        spans = self._exported(configure_head_sampling(ratio=0.5), traces=200)
+        self.assertTrue(0 < len(spans) < 400)
+        traces = {}
+        for span in spans:
+            traces.setdefault(span.context.trace_id, []).append(span)
+        self.assertTrue(all(len(trace_spans) == 2 for trace_spans in traces.values()))
+
+    def test_existing_tracer_provider_keeps_its_sampler(self):
+        # the application set up its own provider before Monocle
+        provider = TracerProvider()
+        exporter = InMemorySpanExporter()
+        with patch.object(trace, "_TRACER_PROVIDER", provider), \
+                patch.dict("os.environ", {HEAD_SAMPLING_RATIO_ENV: "0"}):
+            with self.assertLogs("monocle_apptrace.instrumentation.common.instrumentor", "WARNING") as logs:
+                instrumentor = setup_monocle_telemetry(workflow_name="sampling_test",
+                                                       span_processors=[SimpleSpanProcessor(exporter)],
+                                                       union_with_default_methods=False)
+            try:
+                with provider.get_tracer("test").start_as_current_span("workflow"):
+                    pass
+            finally:
+                instrumentor.uninstrument()
+        self.assertTrue(any("head sampling" in message for message in logs.output))
+        self.assertEqual(len(exporter.get_finished_spans()), 1)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            parse_head_sampling_rules("tenant:1")
+        with self.assertRaises(ValueError):
+            parse_head_sampling_rules("workflow=checkout:2")
+        with patch.dict("os.environ", {HEAD_SAMPLING_RATIO_ENV: "half"}):
+            with self.assertRaises(ValueError):
+                configure_head_sampling()
+        with self.assertRaises(ValueError):
+            configure_tail_sampling("sometimes")
+
+    def test_parse_rules(self):
+        self.assertEqual(parse_head_sampling_rules("workflow=checkout:0.1, scope=tenant=a:b:1, scope=debug:1"),
+                         [("workflow", "checkout", None, 0.1), ("scope", "tenant", "a:b", 1.0),
+                          ("scope", "debug", None, 1.0)])
+
+
+class TestTailSampling(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.tail = TailSamplingSpanExporter(
+            self.exporter, TailSamplingPolicy(ratio=0, min_tokens=100, slow_inference_ms=50), max_traces=3)
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.tail))
+        self.tracer = provider.get_tracer("test")
+
+    def _trace(self, error=False, tokens=0, inference_seconds=0.0, detected_error=False):
+        with self.tracer.start_as_current_span("workflow") as root:
+            with self.tracer.start_as_current_span("inference") as span:
+                span.set_attribute("span.type", "inference")
+                span.add_event("metadata", {"total_tokens": tokens})
+                if detected_error:
+                    span.set_attribute(MONOCLE_DETECTED_SPAN_ERROR, True)
+                if inference_seconds:
+                    time.sleep(inference_seconds)
+            if error:
+                root.set_status(Status(StatusCode.ERROR, "failed"))
+        return root.context.trace_id
+
+    def _exported_traces(self):
+        return {span.context.trace_id for span in self.exporter.get_finished_spans()}
+
+    def test_uninteresting_traces_are_dropped(self):
+        self._trace(tokens=10)
+        self.assertEqual(self.exporter.get_finished_spans(), ())
+        self.assertEqual(self.tail.dropped_traces, 1)
+
+    def test_interesting_traces_are_kept_whole(self):
+        kept = {self._trace(error=True), self._trace(detected_error=True), self._trace(tokens=500),
+                self._trace(inference_seconds=0.06)}
+        self._trace()
+        self.assertEqual(self._exported_traces(), kept)
+        self.assertEqual(len(self.exporter.get_finished_spans()), 8)
+
+    def test_pending_traces_are_bounded(self):
+        # children whose root never ends are decided once more than max_traces are pending
+        roots = [self.tracer.start_span("workflow") for _ in range(5)]
+        for root in roots:
+            with self.tracer.start_as_current_span("tool", context=set_span_in_context(root)) as span:
+                span.set_status(Status(StatusCode.ERROR, "failed"))
+        self.assertEqual(len(self.tail._pending), 3)
+        self.assertEqual(len(self._exported_traces()), 2)
+        # the late root follows the decision taken for its trace
+        roots[0].end()
+        self.assertEqual(len(self.exporter.get_finished_spans()), 3)
+        self.tail.shutdown()
+        self.assertEqual(len(self._exported_traces()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import unittest
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace.status import Status, StatusCode
+
+from monocle_apptrace.exporters.base_exporter import serialize_span
+from monocle_apptrace.instrumentation.common import utils
+
+
+def _expected(span):
+    obj = json.loads(span.to_json())
+    if "description" in obj["status"]:
+        obj["status"]["message"] = obj["status"].pop("description")
+    return obj
+
+
+class TestSerializeSpan(unittest.TestCase):
+    """Test that the direct span serializer matches json.loads(span.to_json())."""
+
+    def setUp(self):
+        super().setUp()
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider(resource=Resource.create({"service.name": "test", "hosts": ("a", "b")}))
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.tracer = provider.get_tracer("test")
+
+    def _spans(self):
+        with self.tracer.start_as_current_span("workflow") as parent:
+            link = trace.Link(parent.get_span_context(), {"link.kind": "parent"})
+            with self.tracer.start_as_current_span("inference", links=[link]) as span:
+                span.set_attribute("entity.1.name", "gpt-4o")
+                span.set_attribute("entity.1.ids", ["0x1f", "2f"])
+                span.set_attribute("entity.count", 1)
+                span.add_event("data.input", {"input": ("0xabc", "question"), "flag": True})
+                span.add_event("metadata", {"total_tokens": 12.5})
+                span.set_status(Status(StatusCode.ERROR, "0x quota exceeded"))
+        return self.exporter.get_finished_spans()
+
+    def test_matches_to_json(self):
+        for span in self._spans():
+            self.assertEqual(serialize_span(span), _expected(span))
+
+    def test_matches_patched_to_json(self):
+        original, original_saved = ReadableSpan.to_json, utils._original_to_json
+        try:
+            utils.setup_readablespan_patch()
+            for span in self._spans():
+                serialized = serialize_span(span)
+                self.assertEqual(serialized, _expected(span))
+                self.assertFalse(serialized["context"]["span_id"].startswith("0x"))
+        finally:
+            ReadableSpan.to_json = original
+            utils._original_to_json = original_saved
+
+    def test_resource_attributes_are_not_shared(self):
+        first, second = [serialize_span(span) for span in self._spans()]
+        first["resource"]["attributes"]["workflow.name"] = "changed"
+        self.assertNotIn("workflow.name", second["resource"]["attributes"])
+
+    def test_other_span_types_use_their_to_json(self):
+        class _CustomSpan(ReadableSpan):
+            def to_json(self, indent=4):
+                return json.dumps({"name": "custom", "status": {"status_code": "ERROR", "description": "boom"}})
+
+        self.assertEqual(serialize_span(_CustomSpan(name="ignored")),
+                         {"name": "custom", "status": {"status_code": "ERROR", "message": "boom"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from monocle_apptrace.instrumentation.common.span_handler import (
+    SpanHandler,
+    get_output_processor_index,
+    get_span_events_by_name,
+)
+
+
+def _accessor(value, calls, name):
+    def accessor(arguments):
+        calls.append(name)
+        return value
+    return accessor
+
+
+class TestSpanHandlerPhaseIndex(unittest.TestCase):
+    """Test cases for the phase partitioned output processor index used by span hydration."""
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.output_processor = {
+            "type": "inference",
+            "attributes": [
+                [
+                    {"attribute": "type", "accessor": _accessor("inference.openai", self.calls, "provider.type")},
+                    {"attribute": "deployment", "accessor": _accessor("gpt", self.calls, "provider.deployment"),
+                     "phase": "post_execution"},
+                ],
+                [
+                    {"attribute": "name", "accessor": _accessor("gpt-4o", self.calls, "model.name"),
+                     "phase": "post_execution"},
+                ],
+            ],
+            "events": [
+                {"name": "data.input", "attributes": [
+                    {"attribute": "input", "accessor": _accessor(["hi"], self.calls, "input")}]},
+                {"name": "data.output", "attributes": [
+                    {"attribute": "response", "accessor": _accessor("hello", self.calls, "response")}]},
+                {"name": "metadata", "attributes": [
+                    {"accessor": _accessor({"total_tokens": 3, "ignored": None}, self.calls, "metadata")}]},
+            ],
+        }
+        self.to_wrap = {"package": "openai.resources.chat.completions", "output_processor": self.output_processor}
+        self.tracer = TracerProvider().get_tracer("test")
+
+    def _child_span(self):
+        with self.tracer.start_as_current_span("workflow"):
+            return self.tracer.start_span("inference")
+
+    def _hydrate(self, span, is_post_exec, ex=None):
+        SpanHandler().hydrate_span(self.to_wrap, None, None, (), {}, None, span, None, ex, is_post_exec=is_post_exec)
+
+    def test_index_is_cached_per_output_processor(self):
+        index = get_output_processor_index(self.output_processor)
+        self.assertIs(get_output_processor_index(self.output_processor), index)
+        self.assertEqual([name for name, _, _ in index.pre_exec_events], ["data.input"])
+        self.assertEqual([name for name, _, _ in index.post_exec_events], ["data.output", "metadata"])
+
+    def test_only_current_phase_accessors_run(self):
+        span = self._child_span()
+
+        self._hydrate(span, is_post_exec=False)
+        self.assertEqual(self.calls, ["provider.type", "input"])
+
+        self.calls.clear()
+        self._hydrate(span, is_post_exec=True)
+        self.assertEqual(self.calls, ["provider.deployment", "model.name", "response", "metadata"])
+
+        self.assertEqual(span.attributes["entity.1.type"], "inference.openai")
+        self.assertEqual(span.attributes["entity.1.deployment"], "gpt")
+        self.assertEqual(span.attributes["entity.2.name"], "gpt-4o")
+        self.assertEqual(span.attributes["entity.count"], 2)
+        self.assertEqual([event.name for event in span.events], ["data.input", "data.output", "metadata"])
+        self.assertEqual(dict(span.events[2].attributes), {"total_tokens": 3})
+
+    def test_entity_index_counts_attributes_of_other_phase(self):
+        span = self._child_span()
+        span.set_attribute("entity.1.type", "inference.openai")
+
+        self._hydrate(span, is_post_exec=True)
+        self.assertEqual(span.attributes["entity.1.deployment"], "gpt")
+        self.assertEqual(span.attributes["entity.2.name"], "gpt-4o")
+
+    def test_exception_evaluates_every_event(self):
+        span = self._child_span()
+
+        self._hydrate(span, is_post_exec=True, ex=RuntimeError("boom"))
+        self.assertEqual([event.name for event in span.events], ["data.input", "data.output", "metadata"])
+
+    def test_existing_event_is_updated(self):
+        span = self.tracer.start_span("inference")
+        span.add_event("data.output", {"status": "ok"})
+
+        self._hydrate(span, is_post_exec=True)
+        self.assertEqual([event.name for event in span.events], ["data.output", "metadata"])
+        self.assertEqual(span.events[0].attributes["response"], "hello")
+        self.assertEqual(span.events[0].attributes["status"], "ok")
+
+    def test_events_by_name_tracks_events_added_elsewhere(self):
+        span = self.tracer.start_span("inference")
+        self.assertEqual(get_span_events_by_name(span), {})
+        span.add_event("custom")
+        self.assertEqual(list(get_span_events_by_name(span)), ["custom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common import span_reader
+from monocle_apptrace.instrumentation.common.span_reader import iter_spans
+
+SPANS = [
+    {"name": "workflow", "attributes": {"span.type": "workflow"}},
+    {"name": "inference", "attributes": {"text": "é, [not] {a} \"span\"" * 50}, "events": []},
+    {"name": "tool", "attributes": {"count": 12345}},
+]
+
+
+class TestSpanReader(unittest.TestCase):
+
+    def _read(self, text, chunk_size=7):
+        return list(iter_spans(io.BytesIO(text.encode("utf-8")), chunk_size=chunk_size))
+
+    def test_indented_and_compact_arrays(self):
+        indented = "[" + ",".join(json.dumps(span, indent=4) for span in SPANS) + "]"
+        compact = "[\n" + ",\n".join(json.dumps(span) for span in SPANS) + "\n]\n"
+        for text in (indented, compact, json.dumps(SPANS)):
+            self.assertEqual(self._read(text), SPANS)
+            self.assertEqual(self._read(text, chunk_size=64 * 1024), SPANS)
+
+    def test_json_lines_and_single_object(self):
+        self.assertEqual(self._read("\n".join(json.dumps(span) for span in SPANS) + "\n"), SPANS)
+        self.assertEqual(self._read(json.dumps(SPANS[0], indent=2)), SPANS[:1])
+        self.assertEqual(self._read("[]"), [])
+
+    def test_text_stream_and_path(self):
+        text = json.dumps(SPANS, indent=2)
+        self.assertEqual(list(iter_spans(io.StringIO(text), chunk_size=5)), SPANS)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            self.assertEqual(list(iter_spans(path)), SPANS)
+
+    def test_invalid_documents(self):
+        for text in ("", "[{\"name\": \"a\"} {\"name\": \"b\"}]", "[{\"name\": \"a\"}] x", "[1, 2"):
+            with self.assertRaises(json.JSONDecodeError, msg=text):
+                self._read(text)
+
+    def test_spans_before_an_error_are_yielded(self):
+        # a trace file whose writer stopped mid span
+        reader = iter_spans(io.BytesIO(b'[{"name": "a"},\n{"name": "b"},\n{"name": '), chunk_size=4)
+        self.assertEqual(next(reader), {"name": "a"})
+        self.assertEqual(next(reader), {"name": "b"})
+        with self.assertRaises(json.JSONDecodeError):
+            next(reader)
+
+    def test_buffer_is_bounded_by_the_largest_span(self):
+        spans = [{"name": f"span-{i}", "attributes": {"data": "x" * 1000}} for i in range(200)]
+        sizes = []
+        original_read = span_reader._Buffer.read
+
+        def read(buffer, size):
+            result = original_read(buffer, size)
+            sizes.append(len(buffer.text))
+            return result
+
+        with patch.object(span_reader._Buffer, "read", read):
+            spans_read = list(iter_spans(io.BytesIO(json.dumps(spans).encode()), chunk_size=256))
+        self.assertEqual(spans_read, spans)
+        # the document is about 200KB, the buffer never held more than a few spans of it
+        self.assertLess(max(sizes), 5000)
+
+
+if __name__ == "__main__":
+    unittest.main()
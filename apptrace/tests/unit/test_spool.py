@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace.status import Status, StatusCode
+
+from monocle_apptrace.exporters.base_exporter import SpanExporterBase, deserialize_span, serialize_span
+from monocle_apptrace.exporters import spool as spool_module
+from monocle_apptrace.exporters.spool import SpanSpool, SpoolDrainer, SpoolLockedError, process_spool_directory
+from monocle_apptrace.instrumentation.common.constants import MONOCLE_SDK_VERSION
+
+
+class _FlakyExporter(SpanExporterBase):
+    """Exporter whose backend is down until told otherwise."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = True
+        self.exported = []
+
+    def export(self, spans):
+        if self.down:
+            self.spool_spans(spans)
+            return SpanExportResult.FAILURE
+        self.exported.extend(spans)
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def _spool_in_process(root, name, count, ready, release):
+    spool = SpanSpool(process_spool_directory(root), segment_bytes=64)
+    for index in range(count):
+        spool.append([f"{name}-{index}".encode()])
+    ready.set()
+    release.wait(30)
+    spool.close()
+
+
+def _spans(count):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(resource=Resource.create({"service.name": "spool"}))
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("test")
+    with tracer.start_as_current_span("workflow", attributes={MONOCLE_SDK_VERSION: "1"}) as parent:
+        for index in range(count - 1):
+            link = trace.Link(parent.get_span_context(), {"kind": "parent"})
+            with tracer.start_as_current_span(f"span{index}", links=[link],
+                                              attributes={MONOCLE_SDK_VERSION: "1", "tags": ("a", "b")}) as span:
+                span.add_event("data.input", {"input": "question"})
+                span.set_status(Status(StatusCode.ERROR, "failed"))
+    return list(exporter.get_finished_spans())
+
+
+class TestSpanSpool(unittest.TestCase):
+    """Test the disk spool of undelivered spans."""
+
+    def setUp(self):
+        super().setUp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+        super().tearDown()
+
+    def test_records_survive_reopening(self):
+        spool = SpanSpool(self.directory, segment_bytes=64)
+        spool.append([b"record%d" % index for index in range(10)])
+        self.assertEqual(spool.read(4), [b"record0", b"record1", b"record2", b"record3"])
+        spool.ack()
+        spool.close()
+
+        spool = SpanSpool(self.directory, segment_bytes=64)
+        self.assertEqual(spool.read(100), [b"record%d" % index for index in range(4, 10)])
+        spool.ack()
+        self.assertTrue(spool.is_empty())
+        spool.append([b"record10"])
+        self.assertEqual(spool.read(100), [b"record10"])
+
+    def test_oldest_segments_are_evicted_over_the_cap(self):
+        spool = SpanSpool(self.directory, max_bytes=200, segment_bytes=50)
+        spool.append([b"x" * 30 for _ in range(20)])
+        self.assertLessEqual(spool.pending_bytes(), 200)
+        self.assertGreater(spool.evicted_records, 0)
+        self.assertEqual(len(spool.read(100)) + spool.evicted_records, 20)
+
+    def test_torn_record_is_skipped(self):
+        spool = SpanSpool(self.directory)
+        spool.append([b"first", b"second"])
+        spool.close()
+        segment = [name for name in os.listdir(self.directory) if name.endswith(".spool")][0]
+        with open(os.path.join(self.directory, segment), "r+b") as f:
+            f.truncate(os.path.getsize(f.name) - 2)
+        self.assertEqual(SpanSpool(self.directory).read(10), [b"first"])
+
+    def test_spool_directory_has_one_owner(self):
+        spool = SpanSpool(self.directory)
+        if spool_module.fcntl is not None:
+            with self.assertRaises(SpoolLockedError):
+                SpanSpool(self.directory)
+        spool.close()
+        SpanSpool(self.directory).close()
+
+    @unittest.skipIf(spool_module.fcntl is None, "needs flock")
+    def test_processes_sharing_a_root_keep_their_own_spools(self):
+        context = multiprocessing.get_context("spawn")
+        release = context.Event()
+        workers = []
+        for name in ("first", "second"):
+            ready = context.Event()
+            worker = context.Process(target=_spool_in_process, args=(self.directory, name, 20, ready, release))
+            worker.start()
+            workers.append((worker, ready))
+        for _, ready in workers:
+            self.assertTrue(ready.wait(30))
+
+        replayed = []
+        own = SpanSpool(process_spool_directory(self.directory))
+        drainer = SpoolDrainer(own, lambda records: replayed.extend(records) or True, root=self.directory)
+        # the spools of running processes are left alone
+        self.assertTrue(drainer.drain())
+        self.assertEqual(replayed, [])
+
+        release.set()
+        for worker, _ in workers:
+            worker.join(30)
+        self.assertTrue(drainer.drain())
+        expected = [f"{name}-{index}".encode() for name in ("first", "second") for index in range(20)]
+        self.assertEqual(sorted(replayed), sorted(expected))
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(own.directory)])
+        own.close()
+
+    def test_deserialized_span_serializes_the_same(self):
+        for span in _spans(3):
+            serialized = serialize_span(span)
+            self.assertEqual(serialize_span(deserialize_span(serialized)), serialized)
+
+    def test_failed_exports_are_replayed(self):
+        exporter = _FlakyExporter()
+        spool = exporter.enable_spool(self.directory, drain_interval=3600)
+        spans = _spans(3)
+        self.assertEqual(exporter.export(spans), SpanExportResult.FAILURE)
+        self.assertFalse(spool.is_empty())
+
+        # still down: the records stay in the spool without being spooled twice
+        self.assertFalse(exporter._spool_drainer.drain())
+        self.assertEqual(len(spool.read(100)), 3)
+
+        exporter.down = False
+        self.assertTrue(exporter._spool_drainer.drain())
+        self.assertTrue(spool.is_empty())
+        self.assertEqual([serialize_span(span) for span in exporter.exported],
+                         [serialize_span(span) for span in spans])
+        exporter.close_spool()
+
+    def test_forked_process_spools_into_its_own_directory(self):
+        exporter = _FlakyExporter()
+        parent_spool = exporter.enable_spool(self.directory, drain_interval=3600)
+        with patch("os.getpid", return_value=os.getpid() + 100000):
+            exporter.export(_spans(2))
+            self.assertIsNot(exporter.spool, parent_spool)
+            self.assertEqual(exporter.spool.directory, process_spool_directory(self.directory))
+        self.assertTrue(parent_spool.is_empty())
+        self.assertEqual(len(exporter.spool.read(10)), 2)
+        exporter.close_spool()
+        parent_spool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
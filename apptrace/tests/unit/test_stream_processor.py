@@ -0,0 +1,157 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from monocle_apptrace.instrumentation.common.constants import (
+    STREAM_CHUNK_COUNT,
+    STREAM_INTER_CHUNK_MAX_MS,
+    STREAM_INTER_CHUNK_P50_MS,
+    STREAM_INTER_CHUNK_P99_MS,
+    STREAM_TIME_TO_FIRST_TOKEN_MS,
+    STREAM_TOKENS_PER_SECOND,
+)
+from monocle_apptrace.instrumentation.common.stream_processor import (
+    STREAM_CAPTURE_MAX_CHARS_ENV,
+    LatencySketch,
+    StreamState,
+)
+from monocle_apptrace.instrumentation.metamodel.openai.openai_stream_processor import OpenAIStreamProcessor
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    delta = SimpleNamespace(role="assistant", content=content, refusal=None, tool_calls=tool_calls)
+    return SimpleNamespace(
+        object="chat.completion.chunk",
+        choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)],
+        usage=usage,
+    )
+
+
+class TestStreamState(unittest.TestCase):
+
+    def test_text_is_joined_from_fragments(self):
+        state = StreamState()
+        for part in ("Hel", "lo", "", " world"):
+            state.add_content(part)
+        self.assertEqual(state.accumulated_response, "Hello world")
+        state.add_content("!")
+        self.assertEqual(state.accumulated_response, "Hello world!")
+        self.assertEqual(state.captured_chars, 12)
+
+    def test_capture_is_capped(self):
+        state = StreamState(max_capture_chars=5)
+        state.add_content("abc")
+        state.add_content("defg")
+        state.add_content("hij")
+        self.assertEqual(state.accumulated_response, "abcde")
+        self.assertEqual(state.truncated_chars, 5)
+
+    def test_assignment_replaces_text(self):
+        state = StreamState(max_capture_chars=5)
+        state.add_content("abcdefgh")
+        state.accumulated_response = "xyz"
+        self.assertEqual(state.accumulated_response, "xyz")
+        self.assertEqual(state.truncated_chars, 0)
+
+    def test_capture_cap_from_env(self):
+        with patch.dict("os.environ", {STREAM_CAPTURE_MAX_CHARS_ENV: "0"}):
+            self.assertEqual(StreamState().max_capture_chars, 0)
+        for invalid in ("bad", "-1"):
+            with patch.dict("os.environ", {STREAM_CAPTURE_MAX_CHARS_ENV: invalid}), self.assertLogs(level="WARNING"):
+                self.assertGreater(StreamState().max_capture_chars, 0)
+
+    def test_state_has_slots(self):
+        with self.assertRaises(AttributeError):
+            StreamState().unexpected = 1
+
+
+class TestLatencySketch(unittest.TestCase):
+
+    def test_quantiles_within_relative_error(self):
+        sketch = LatencySketch()
+        values = [(i + 1) * 1_000_000 for i in range(1000)]  # 1ms .. 1000ms
+        for value in values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, 1000)
+        self.assertEqual(sketch.max_value, 1_000_000_000)
+        for q, expected in ((0.5, 500_000_000), (0.9, 900_000_000), (0.99, 990_000_000)):
+            self.assertAlmostEqual(sketch.quantile(q) / expected, 1, delta=0.06)
+
+    def test_empty_and_tiny_values(self):
+        sketch = LatencySketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        sketch.add(0)
+        sketch.add(10)
+        self.assertEqual(sketch.quantile(0.99), 10)
+
+
+class TestOpenAIStreamProcessor(unittest.TestCase):
+
+    def test_chunks_are_not_retained(self):
+        processor = OpenAIStreamProcessor()
+        tool_call = SimpleNamespace(id="call_1", function=SimpleNamespace(name="lookup", arguments="{}"))
+        usage = SimpleNamespace(prompt_tokens=3, completion_tokens=2, total_tokens=5)
+        spans = []
+        processor.process_stream(False, [
+            _chunk(content="Hi"),
+            _chunk(content=" there"),
+            _chunk(tool_calls=[tool_call]),
+            _chunk(finish_reason="tool_calls"),
+            SimpleNamespace(object="chat.completion.chunk", choices=[], usage=usage),
+        ], spans.append)
+
+        result = spans[0]
+        self.assertEqual(result.output_text, "Hi there")
+        self.assertEqual(result.tools, [{"id": "call_1", "name": "lookup", "arguments": "{}"}])
+        self.assertEqual(result.finish_reason, "tool_calls")
+        self.assertIs(result.usage, usage)
+
+    def test_raw_items_empty_after_stream(self):
+        processor = OpenAIStreamProcessor()
+        state = processor.initialize_state(0)
+        for _ in range(3):
+            processor.process_fragment(_chunk(content="x"), state)
+        self.assertEqual(state.raw_items, [])
+        self.assertEqual(state.accumulated_response, "xxx")
+
+    def test_stream_stats(self):
+        processor = OpenAIStreamProcessor()
+        usage = SimpleNamespace(prompt_tokens=3, completion_tokens=20, total_tokens=23)
+        chunks = [_chunk(content="a"), _chunk(content="b"), _chunk(content="c"),
+                  SimpleNamespace(object="chat.completion.chunk", choices=[], usage=usage)]
+        # chunks 10ms apart from 100ms, the first token and the close share their chunk's time
+        times = iter([100_000_000, 100_000_000, 110_000_000, 120_000_000, 130_000_000, 130_000_000])
+        with patch("monocle_apptrace.instrumentation.common.stream_processor.time.time_ns",
+                   side_effect=lambda: next(times)):
+            state = processor.initialize_state(0)
+            for chunk in chunks:
+                processor.process_fragment(chunk, state)
+            stats = processor.create_span_result(state, 0).stream_stats
+
+        self.assertEqual(stats[STREAM_CHUNK_COUNT], 4)
+        self.assertEqual(stats[STREAM_TIME_TO_FIRST_TOKEN_MS], 100.0)
+        self.assertAlmostEqual(stats[STREAM_INTER_CHUNK_P50_MS], 10.0, delta=0.6)
+        self.assertEqual(stats[STREAM_INTER_CHUNK_MAX_MS], 10.0)
+        self.assertAlmostEqual(stats[STREAM_TOKENS_PER_SECOND], 20 / 0.03, places=2)
+
+    def test_pre_consumed_stream_has_no_gaps(self):
+        processor = OpenAIStreamProcessor()
+        spans = []
+        processor.process_stream(False, [_chunk(content="a"), _chunk(content="b")], spans.append)
+        stats = spans[0].stream_stats
+        self.assertEqual(stats[STREAM_CHUNK_COUNT], 2)
+        self.assertNotIn(STREAM_INTER_CHUNK_P99_MS, stats)
+
+    def test_stream_stats_set_on_span(self):
+        from opentelemetry.sdk.trace import TracerProvider
+        from monocle_apptrace.instrumentation.common.span_handler import SpanHandler
+
+        result = SimpleNamespace(type="stream", stream_stats={STREAM_CHUNK_COUNT: 3})
+        span = TracerProvider().get_tracer("test").start_span("inference")
+        SpanHandler().hydrate_span({}, None, None, (), {}, result, span, is_post_exec=True)
+        span.end()
+        self.assertEqual(span.attributes[STREAM_CHUNK_COUNT], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,15 @@
 """Unit tests for monocle_apptrace.token_summary"""
 
+import gzip
 import json
+import os
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
-from monocle_apptrace.token_summary import format_table, summarize
+from monocle_apptrace import token_summary
+from monocle_apptrace.token_summary import INDEX_FILE_NAME, format_table, summarize, summarize_by_session
 
 
 # ---------------------------------------------------------------------------
@@ -135,6 +139,16 @@ class TestSummarize(unittest.TestCase):
             rows = summarize("all", monocle_dir=Path(tmp))
             self.assertEqual(rows, [])
 
+    def test_ndjson_segments_counted(self):
+        with TemporaryDirectory() as tmp:
+            lines = "\n".join(json.dumps(_span("gpt-4o", 10, 5, 15)) for _ in range(3)) + "\n"
+            (Path(tmp) / "monocle_trace_app_segment-1-1_2025-11-30_10.00.00.ndjson").write_text(lines, encoding="utf-8")
+            with gzip.open(Path(tmp) / "monocle_trace_app_segment-1-2_2025-11-30_11.00.00.ndjson.gz", "wt") as f:
+                f.write(lines)
+            rows = summarize("all", monocle_dir=Path(tmp))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]["total_tokens"], 90)
+
     def test_file_with_unparseable_timestamp_skipped(self):
         with TemporaryDirectory() as tmp:
             # name doesn't match expected timestamp pattern
@@ -220,6 +234,75 @@ class TestFormatTable(unittest.TestCase):
         self.assertIn("-", out)
 
 
+# ---------------------------------------------------------------------------
+# Tests: per-file index and parallel parsing
+# ---------------------------------------------------------------------------
+
+class TestTokenIndex(unittest.TestCase):
+
+    def _parsed(self, tmp, **kwargs):
+        with patch.object(token_summary, "_aggregate_file", wraps=token_summary._aggregate_file) as parse:
+            rows = summarize("all", monocle_dir=Path(tmp), **kwargs)
+        return rows, [call.args[0].name for call in parse.call_args_list]
+
+    def test_only_new_or_changed_files_are_parsed(self):
+        with TemporaryDirectory() as tmp:
+            _write_trace(tmp, "2025-11-30_10.00.00", [_span("gpt-4o", 100, 50, 150)])
+            _write_trace(tmp, "2025-11-30_11.00.00", [_span("gpt-4o", 10, 5, 15)])
+            rows, parsed = self._parsed(tmp)
+            self.assertEqual(len(parsed), 2)
+            self.assertTrue((Path(tmp) / INDEX_FILE_NAME).exists())
+
+            rows_again, parsed = self._parsed(tmp)
+            self.assertEqual(parsed, [])
+            self.assertEqual(rows_again, rows)
+
+            _write_trace(tmp, "2025-11-30_11.00.00", [_span("gpt-4o", 20, 10, 30)])
+            _write_trace(tmp, "2025-12-01_09.00.00", [_span("gpt-4o", 1, 1, 2)])
+            rows, parsed = self._parsed(tmp)
+            self.assertEqual(sorted(parsed), ["monocle_trace_test_workflow_2025-11-30_11.00.00.json",
+                                              "monocle_trace_test_workflow_2025-12-01_09.00.00.json"])
+            self.assertEqual([row["total_tokens"] for row in rows], [180, 2])
+
+    def test_session_summary_shares_the_index(self):
+        with TemporaryDirectory() as tmp:
+            span = _span("gpt-4o", 100, 50, 150)
+            span["attributes"]["scope.agentic.session"] = "s1"
+            _write_trace(tmp, "2025-11-30_10.00.00", [span])
+            summarize("all", monocle_dir=Path(tmp))
+            with patch.object(token_summary, "_aggregate_file") as parse:
+                rows = summarize_by_session("all", monocle_dir=Path(tmp))
+            parse.assert_not_called()
+            self.assertEqual(rows[0]["session"], "s1")
+            self.assertEqual(rows[0]["total_tokens"], 150)
+
+    def test_removed_files_leave_the_index(self):
+        with TemporaryDirectory() as tmp:
+            _write_trace(tmp, "2025-11-30_10.00.00", [_span("gpt-4o", 100, 50, 150)])
+            summarize("all", monocle_dir=Path(tmp))
+            os.remove(Path(tmp) / "monocle_trace_test_workflow_2025-11-30_10.00.00.json")
+            self.assertEqual(summarize("all", monocle_dir=Path(tmp)), [])
+            index = token_summary._TokenIndex(Path(tmp))
+            self.assertEqual(index.load(), {})
+            index.close()
+
+    def test_no_index(self):
+        with TemporaryDirectory() as tmp:
+            _write_trace(tmp, "2025-11-30_10.00.00", [_span("gpt-4o", 100, 50, 150)])
+            summarize("all", monocle_dir=Path(tmp), use_index=False)
+            self.assertFalse((Path(tmp) / INDEX_FILE_NAME).exists())
+
+    def test_parallel_parsing_matches_serial(self):
+        with TemporaryDirectory() as tmp:
+            for minute in range(6):
+                _write_trace(tmp, "2025-11-30_10.{:02d}.00".format(minute), [_span("gpt-4o", minute, 1, minute + 1)])
+            serial = summarize("all", monocle_dir=Path(tmp), use_index=False, workers=1)
+            with patch.object(token_summary, "PARALLEL_MIN_FILES", 2):
+                parallel = summarize("all", monocle_dir=Path(tmp), use_index=False, workers=2)
+            self.assertEqual(parallel, serial)
+            self.assertEqual(serial[0]["total_tokens"], 21)
+
+
 def _row(date="2025-11-30", model="gpt-4o"):
     return {
         "date": date,
@@ -1,3 +1,6 @@
+import base64
+import gzip
+import json
 import os
 from monocle_apptrace.instrumentation.common import trace_return as tr
 
@@ -56,3 +59,59 @@ def test_delimiter_is_header_safe():
     assert "\n" not in d and "\r" not in d
     assert d == d.strip()
     assert tr.parse_delimiter_from_header(tr.build_response_header_value(d)) == d
+
+
+class _SizedSpan:
+    def __init__(self, index, size=100):
+        # random data, so that the compressed trailer grows with the spans
+        self._json = json.dumps({"name": f"span-{index}", "attributes": {"data": os.urandom(size // 2).hex()}})
+
+    def to_json(self):
+        return self._json
+
+
+def test_payload_stays_gzip_compatible():
+    payload = tr.encode_spans([_SizedSpan(i) for i in range(3)])
+    spans = json.loads(gzip.decompress(base64.b64decode(payload)))
+    assert [span["name"] for span in spans] == ["span-0", "span-1", "span-2"]
+    assert json.loads(tr.decode_payload(tr.encode_spans([]))) == []
+
+
+def test_trailer_is_streamed_in_chunks():
+    delim = tr.make_delimiter()
+    spans = [_SizedSpan(i, size=20000) for i in range(50)]
+    chunks = list(tr.iter_trailer_chunks(spans, delim))
+    assert len(chunks) > 1
+    body = b'{"answer": "hi"}' + b"".join(chunks)
+    clean, remote_spans, dropped = tr.split_and_decode_trailer(body, delim)
+    assert clean == b'{"answer": "hi"}'
+    assert dropped == 0
+    assert len(json.loads(remote_spans)) == 50
+
+
+def test_size_cap_truncates_with_marker(monkeypatch):
+    monkeypatch.setenv("MONOCLE_TRACE_RETURN_MAX_BYTES", "500")
+    delim = tr.make_delimiter()
+    trailer = tr.build_trailer_bytes([_SizedSpan(i) for i in range(10)], delim)
+    _, payload = tr.split_body_and_trailer(trailer, delim)
+    text, dropped = tr.decode_trailer(payload)
+    assert [span["name"] for span in json.loads(text)] == ["span-0", "span-1", "span-2"]
+    assert dropped == 7
+    # the marker is the last element of the encoded span list
+    raw = json.loads(gzip.decompress(base64.b64decode(payload)))
+    assert raw[-1] == {tr.TRUNCATED_MARKER_KEY: 7}
+
+
+def test_size_cap_smaller_than_first_span(monkeypatch):
+    monkeypatch.setenv("MONOCLE_TRACE_RETURN_MAX_BYTES", "10")
+    text, dropped = tr.decode_trailer(tr.encode_spans([_SizedSpan(0)], max_bytes=tr.get_trace_return_max_bytes()))
+    assert json.loads(text) == []
+    assert dropped == 1
+
+
+def test_invalid_size_cap_returns_every_span(monkeypatch, caplog):
+    monkeypatch.setenv("MONOCLE_TRACE_RETURN_MAX_BYTES", "many")
+    assert tr.get_trace_return_max_bytes() is None
+    assert "MONOCLE_TRACE_RETURN_MAX_BYTES" in caplog.text
+    monkeypatch.setenv("MONOCLE_TRACE_RETURN_MAX_BYTES", "0")
+    assert tr.get_trace_return_max_bytes() is None
@@ -87,3 +87,38 @@ def test_pop_preserves_remaining_tagged_span_without_sdk_version():
     remaining = exp.get_finished_spans()
     assert len(remaining) == 1
     assert remaining[0].get_span_context().trace_id == 2
+
+
+def test_orphaned_traces_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("monocle_apptrace.exporters.trace_return_exporter.time.monotonic", lambda: now[0])
+    exp = TraceReturnSpanExporter(ttl_seconds=60)
+    exp.export([FakeSpan(1, tagged=True)])
+    now[0] += 30
+    exp.export([FakeSpan(2, tagged=True)])
+    now[0] += 45
+    # trace 1 is older than the TTL and its response never popped it
+    exp.export([FakeSpan(3, tagged=True)])
+    assert [s.get_span_context().trace_id for s in exp.get_finished_spans()] == [2, 3]
+    assert exp.pop_spans_for_trace(1) == []
+    assert exp.evicted_spans == 1
+
+
+def test_buffer_is_bounded_by_max_spans():
+    exp = TraceReturnSpanExporter(max_spans=3)
+    exp.export([FakeSpan(1, tagged=True), FakeSpan(1, tagged=True)])
+    exp.export([FakeSpan(2, tagged=True)])
+    exp.export([FakeSpan(3, tagged=True)])
+    # the least recently updated trace is evicted first
+    assert [s.get_span_context().trace_id for s in exp.get_finished_spans()] == [2, 3]
+    exp.export([FakeSpan(2, tagged=True)])
+    assert len(exp.pop_spans_for_trace(2)) == 2
+    assert exp.evicted_spans == 2
+
+
+def test_ttl_setting_keeps_fractional_seconds(monkeypatch):
+    monkeypatch.setenv("MONOCLE_TRACE_RETURN_TTL_SECONDS", "0.5")
+    monkeypatch.setenv("MONOCLE_TRACE_RETURN_MAX_SPANS", "many")
+    exp = TraceReturnSpanExporter()
+    assert exp.ttl_seconds == 0.5
+    assert exp.max_spans == 10000
@@ -1,5 +1,4 @@
 import datetime
-import json
 import logging
 import os
 import glob
@@ -7,6 +6,9 @@ from typing import Any, Dict, List, Optional
 from opentelemetry.sdk.trace import ReadableSpan, Status, StatusCode, Event, Resource
 from opentelemetry import trace as trace_api
 from monocle_apptrace.exporters.file_exporter import DEFAULT_TRACE_FOLDER
+from monocle_apptrace.instrumentation.common import json_codec
+from monocle_apptrace.instrumentation.common.message_delta import expand_message_deltas
+from monocle_apptrace.instrumentation.common.span_reader import iter_spans
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +26,15 @@ class JSONSpanLoader:
         Returns:
             A list of ReadableSpan instances.
         """
-        span_list = []
-        with open(json_file_path, 'r') as f:
-            span_data = json.load(f)
-            for item in span_data:
-                span = JSONSpanLoader._from_dict(span_data=item)
-                span_list.append(span)
-        return span_list
+        # the file is decoded one span at a time rather than read whole, message deltas are
+        # then expanded over all the spans of the trace
+        span_data = expand_message_deltas(list(iter_spans(json_file_path)))
+        return [JSONSpanLoader._from_dict(span_data=item) for item in span_data]
 
     @staticmethod
     def from_json_str(json_str: str) -> List[ReadableSpan]:
         """Load spans from a JSON string (list of span dicts in file/Okahu format)."""
-        span_data = json.loads(json_str)
+        span_data = expand_message_deltas(json_codec.loads(json_str))
         return [JSONSpanLoader._from_dict(item) for item in span_data]
 
     @staticmethod
@@ -69,6 +68,9 @@ class JSONSpanLoader:
     def _from_dict(span_data: Dict[str, Any]) -> ReadableSpan:
         """Create a ReadableSpan instance from a dictionary.
 
+        Inputs recorded with message delta capture are expected to be expanded beforehand
+        with ``expand_message_deltas`` over all the spans of the trace.
+
         Handles both the local file export format and the Okahu API format:
         - File format: name, context.trace_id, context.span_id, parent_id, kind, resource, links
         - Okahu format: span_name, trace_id, span_id (top-level), no parent_id/kind/resource/links
@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 from typing import Any, Callable, Optional, Sequence, Union
 from monocle_apptrace.instrumentation.common.method_wrappers import monocle_trace_method
+from monocle_apptrace.instrumentation.common.resource_attributes import get_span_attribute
 from monocle_apptrace.instrumentation.common.utils import get_workflow_name
 from monocle_test_tools import eval_matrix
 from monocle_test_tools.constants import CUSTOM_EVAL_TYPE
@@ -474,7 +475,7 @@ class TraceAssertion():
     def _span_matches_attributes(self, span:Span, attribute:dict) -> bool:
         """Return True when the span carries every requested attribute with a matching value."""
         for name, expected in attribute.items():
-            actual = span.attributes.get(name)
+            actual = get_span_attribute(span, name)
             if actual is None:
                 return False
             if not self._value_matches(expected, actual):
@@ -3,6 +3,7 @@ import os
 from typing import Any, Dict, List, Optional
 import requests
 from opentelemetry.sdk.trace import ReadableSpan
+from monocle_apptrace.instrumentation.common.message_delta import expand_message_deltas
 from monocle_test_tools.file_span_loader import JSONSpanLoader
 
 logger = logging.getLogger(__name__)
@@ -193,7 +194,7 @@ class OkahuSpanLoader:
         )
 
         span_list = []
-        for item in span_data_list:
+        for item in expand_message_deltas(span_data_list):
             span = JSONSpanLoader._from_dict(span_data=item)
             span_list.append(span)
         # verify that there's a span with span.attributes["span.type"] == "workflow" otherwise raise HttpError 404
@@ -83,6 +83,10 @@ class HttpRunner(_BaseHttpRunner):
 
     def _capture_remote_spans(self, response) -> None:
         raw = getattr(response, "_monocle_remote_spans", None)
+        dropped_count = getattr(response, "_monocle_remote_spans_dropped", 0)
+        if dropped_count:
+            logger.warning(f"Server truncated the piggybacked spans, {dropped_count} spans were dropped "
+                           f"(see MONOCLE_TRACE_RETURN_MAX_BYTES on the server)")
         if raw:
             try:
                 self._remote_spans = JSONSpanLoader.from_json_str(raw)
@@ -1,6 +1,11 @@
 import inspect
 import os
-from opentelemetry.sdk.trace import Span
+from opentelemetry.sdk.trace import Event, Span
+from monocle_apptrace.instrumentation.common.message_delta import (
+    INPUT_EVENT_NAME,
+    PREFIX_SPAN_ID_ATTRIBUTE,
+    expand_message_deltas,
+)
 
 def get_input_from_span(span: Span) -> str:
     """
@@ -17,6 +22,34 @@ def get_input_from_span(span: Span) -> str:
             return event.attributes.get("input", "")
     return None
 
+def expand_input_messages(spans: list[Span]) -> list[Span]:
+    """
+    Rebuilds the full input of the inference spans recorded with message delta capture
+    (MONOCLE_MESSAGE_DELTA), which only keep the messages that were not sent by an earlier
+    inference call of the trace.
+
+    Args:
+        spans (list[Span]): The spans of the trace, e.g. from the in-memory exporter.
+
+    Returns:
+        list[Span]: The same spans, with their data.input events holding the full message list.
+    """
+    span_data = []
+    for span in spans:
+        events = [{"name": event.name, "attributes": dict(event.attributes or {})} for event in span.events]
+        span_data.append({"context": {"span_id": format(span.context.span_id, "016x")}, "events": events})
+    expand_message_deltas(span_data)
+    for span, data in zip(spans, span_data):
+        if not any(event.name == INPUT_EVENT_NAME and PREFIX_SPAN_ID_ATTRIBUTE in (event.attributes or {})
+                   for event in span.events):
+            continue
+        span._events = tuple(
+            Event(name=event.name, attributes=expanded["attributes"], timestamp=event.timestamp)
+            if event.name == INPUT_EVENT_NAME else event
+            for event, expanded in zip(span.events, data["events"])
+        )
+    return spans
+
 def get_output_from_span(span: Span) -> str:
     """
     Extracts the output text from the span attributes.
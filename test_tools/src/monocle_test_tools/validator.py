@@ -33,6 +33,7 @@ from monocle_apptrace.instrumentation.metamodel.adk.entities.tool import TOOL as
 from monocle_apptrace.instrumentation.metamodel.langgraph.methods import LANGGRAPH_METHODS
 from monocle_apptrace.instrumentation.metamodel.langgraph.entities.inference import TOOLS as LANGGRAPH_TOOL
 from monocle_apptrace.instrumentation.common.constants import MONOCLE_SKIP_EXECUTIONS, WORKFLOW_NAME_ENV
+from monocle_apptrace.instrumentation.common.resource_attributes import get_span_attribute
 from monocle_apptrace.instrumentation.common.utils import set_workflow_name, get_workflow_name
 
 logger = logging.getLogger(__name__)
@@ -1042,9 +1043,8 @@ class MonocleValidator:
 
     def _span_matches_attributes(self, span: Span, expected_attributes: dict, comparer: BaseComparer) -> bool:
         """Return True if the span has every expected attribute key/value."""
-        span_attributes = span.attributes
         for key, expected_value in expected_attributes.items():
-            actual_value = span_attributes.get(key)
+            actual_value = get_span_attribute(span, key)
             if actual_value is None:
                 return False
             if expected_value != actual_value:
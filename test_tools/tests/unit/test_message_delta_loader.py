@@ -0,0 +1,39 @@
+import json
+from monocle_test_tools.file_span_loader import JSONSpanLoader
+from monocle_test_tools.trace_utils import expand_input_messages, get_input_from_span
+
+
+def _span(span_id, input_attributes):
+    return {
+        "name": "inference",
+        "context": {"trace_id": "0x" + "0"*31 + "1", "span_id": span_id, "trace_state": "[]"},
+        "kind": "SpanKind.INTERNAL",
+        "parent_id": None,
+        "start_time": "2026-07-21T00:00:00.000000Z",
+        "end_time": "2026-07-21T00:00:01.000000Z",
+        "status": {"status_code": "OK"},
+        "attributes": {"span.type": "inference"},
+        "events": [{"name": "data.input", "timestamp": "2026-07-21T00:00:00.000000Z", "attributes": input_attributes}],
+        "links": [],
+        "resource": {"attributes": {"service.name": "test"}, "schema_url": ""}
+    }
+
+
+DELTA_SPANS = [
+    _span("0x" + "0"*15 + "1", {"input": ["system", "question 1"]}),
+    _span("0x" + "0"*15 + "2", {"input": ["question 2"], "input.prefix_span_id": "0"*15 + "1",
+                                "input.prefix_count": 2}),
+]
+
+
+def test_loader_expands_message_deltas():
+    spans = JSONSpanLoader.from_json_str(json.dumps(DELTA_SPANS))
+    assert list(get_input_from_span(spans[1])) == ["system", "question 1", "question 2"]
+    assert "input.prefix_span_id" not in spans[1].events[0].attributes
+
+
+def test_expand_input_messages_on_spans():
+    spans = [JSONSpanLoader._from_dict(span) for span in json.loads(json.dumps(DELTA_SPANS))]
+    expand_input_messages(spans)
+    assert list(get_input_from_span(spans[0])) == ["system", "question 1"]
+    assert list(get_input_from_span(spans[1])) == ["system", "question 1", "question 2"]